@@ -7,6 +7,12 @@ be put into classes in this module.
 classes:
 o SummaryInfo
 o PSSM
+
+If NumPy is installed, the SummaryInfo methods count the letters in every
+column of the alignment in a single pass (see Bio.Align.MultipleSeqAlignment
+method column_counts), rather than looping over the columns and records in
+Python, which makes a big difference for large alignments.  The results are
+the same either way.
 """
 
 # standard library
@@ -18,6 +24,20 @@ from Bio import Alphabet
 from Bio.Alphabet import IUPAC
 from Bio.Seq import Seq
 from Bio.SubsMat import FreqTable
+from Bio._py3k import _as_bytes
+from Bio._utils import bincount
+
+try:
+    import numpy
+except ImportError:
+    #NumPy is optional, without it we count the letters in pure Python
+    numpy = None
+else:
+    from Bio.Align import _column_count_table
+
+#Number of cells (rows times columns) to process at a time in the
+#replacement dictionary
+_CHUNK_SIZE = 1000000
 
 # Expected random distributions for 20-letter protein, and
 # for 4-letter nucleotide alphabets
@@ -25,6 +45,27 @@ Protein20Random = 0.05
 Nucleotide4Random = 0.25
 
 
+def _table_consensus(table, threshold, ambiguous, require_multiple):
+    """Consensus string from a table of letter counts (PRIVATE).
+
+    The table is a NumPy array of counts, with a row for each column of
+    the alignment and 256 columns (one for each byte value).  This follows
+    the rules used in SummaryInfo.dumb_consensus, so a column gets the
+    ambiguous character unless a single most common letter reaches the
+    threshold.
+    """
+    num_atoms = table.sum(axis=1)
+    max_size = table.max(axis=1)
+    num_max = (table == max_size[:, numpy.newaxis]).sum(axis=1)
+    fraction = max_size / numpy.maximum(num_atoms, 1).astype(float)
+    ok = (num_max == 1) & (fraction >= threshold)
+    if require_multiple:
+        ok &= (num_atoms != 1)
+    best = table.argmax(axis=1)
+    return "".join([chr(best[n]) if ok[n] else ambiguous
+                    for n in range(len(table))])
+
+
 class SummaryInfo(object):
     """Calculate summary info about the alignment.
 
@@ -39,6 +80,52 @@ class SummaryInfo(object):
         self.alignment = alignment
         self.ic_vector = {}
 
+    def _get_count_table(self, weighted=False):
+        """Count the letters in each column of the alignment (PRIVATE).
+
+        Returns a NumPy array with a row for each column of the alignment,
+        and 256 columns (one for each byte value, i.e. ord(letter)), made
+        in a single pass over the alignment.  If weighted, these are floats
+        summing the record weights (the 'weight' annotation, default 1.0).
+
+        Returns None if NumPy is not installed, or if the sequences are of
+        different lengths, in which case the calling method counts each
+        column in Python instead.
+        """
+        array = self._get_array()
+        if array is None:
+            return None
+        if not weighted:
+            return _column_count_table(array)
+        weights = [record.annotations.get('weight', 1.0)
+                   for record in self.alignment._records]
+        if [w for w in weights if w != 1.0]:
+            return _column_count_table(array, weights)
+        return _column_count_table(array).astype(float)
+
+    def _get_array(self):
+        """Get the letters of the alignment as a NumPy array (PRIVATE).
+
+        Returns None if NumPy is not installed, or if the sequences are of
+        different lengths (or there are none).
+        """
+        if numpy is None or not self.alignment._records:
+            return None
+        try:
+            #Bio.Align.MultipleSeqAlignment keeps this array
+            return self.alignment.as_array()
+        except AttributeError:
+            #e.g. a Bio.Align.Generic.Alignment
+            pass
+        records = self.alignment._records
+        length = len(records[0].seq)
+        for record in records:
+            if len(record.seq) != length:
+                return None
+        data = _as_bytes("".join(str(record.seq) for record in records))
+        array = numpy.frombuffer(data, dtype=numpy.uint8)
+        return array.reshape((len(records), length))
+
     def dumb_consensus(self, threshold = .7, ambiguous = "X",
                        consensus_alpha = None, require_multiple = 0):
         """Output a fast consensus sequence of the alignment.
@@ -70,41 +157,48 @@ class SummaryInfo(object):
         # find the length of the consensus we are creating
         con_len = self.alignment.get_alignment_length()
 
-        # go through each seq item
-        for n in range(con_len):
-            # keep track of the counts of the different atoms we get
-            atom_dict = {}
-            num_atoms = 0
-
-            for record in self.alignment._records:
-                # make sure we haven't run past the end of any sequences
-                # if they are of different lengths
-                if n < len(record.seq):
-                    if record.seq[n] != '-' and record.seq[n] != '.':
-                        if record.seq[n] not in atom_dict:
-                            atom_dict[record.seq[n]] = 1
-                        else:
-                            atom_dict[record.seq[n]] += 1
-
-                        num_atoms = num_atoms + 1
-
-            max_atoms = []
-            max_size = 0
-
-            for atom in atom_dict:
-                if atom_dict[atom] > max_size:
-                    max_atoms = [atom]
-                    max_size = atom_dict[atom]
-                elif atom_dict[atom] == max_size:
-                    max_atoms.append(atom)
-
-            if require_multiple and num_atoms == 1:
-                consensus += ambiguous
-            elif (len(max_atoms) == 1) and ((float(max_size)/float(num_atoms))
-                                         >= threshold):
-                consensus += max_atoms[0]
-            else:
-                consensus += ambiguous
+        table = self._get_count_table()
+        if table is not None:
+            # use the letter counts, ignoring gaps
+            table[:, [ord('-'), ord('.')]] = 0
+            consensus = _table_consensus(table, threshold, ambiguous,
+                                         require_multiple)
+        else:
+            # go through each seq item
+            for n in range(con_len):
+                # keep track of the counts of the different atoms we get
+                atom_dict = {}
+                num_atoms = 0
+
+                for record in self.alignment._records:
+                    # make sure we haven't run past the end of any sequences
+                    # if they are of different lengths
+                    if n < len(record.seq):
+                        if record.seq[n] != '-' and record.seq[n] != '.':
+                            if record.seq[n] not in atom_dict:
+                                atom_dict[record.seq[n]] = 1
+                            else:
+                                atom_dict[record.seq[n]] += 1
+
+                            num_atoms = num_atoms + 1
+
+                max_atoms = []
+                max_size = 0
+
+                for atom in atom_dict:
+                    if atom_dict[atom] > max_size:
+                        max_atoms = [atom]
+                        max_size = atom_dict[atom]
+                    elif atom_dict[atom] == max_size:
+                        max_atoms.append(atom)
+
+                if require_multiple and num_atoms == 1:
+                    consensus += ambiguous
+                elif (len(max_atoms) == 1) and ((float(max_size)/float(num_atoms))
+                                             >= threshold):
+                    consensus += max_atoms[0]
+                else:
+                    consensus += ambiguous
 
         # we need to guess a consensus alphabet if one isn't specified
         if consensus_alpha is None:
@@ -126,40 +220,46 @@ class SummaryInfo(object):
         # find the length of the consensus we are creating
         con_len = self.alignment.get_alignment_length()
 
-        # go through each seq item
-        for n in range(con_len):
-            # keep track of the counts of the different atoms we get
-            atom_dict = {}
-            num_atoms = 0
+        table = self._get_count_table()
+        if table is not None:
+            # use the letter counts, including gaps
+            consensus = _table_consensus(table, threshold, ambiguous,
+                                         require_multiple)
+        else:
+            # go through each seq item
+            for n in range(con_len):
+                # keep track of the counts of the different atoms we get
+                atom_dict = {}
+                num_atoms = 0
+
+                for record in self.alignment._records:
+                    # make sure we haven't run past the end of any sequences
+                    # if they are of different lengths
+                    if n < len(record.seq):
+                        if record.seq[n] not in atom_dict:
+                            atom_dict[record.seq[n]] = 1
+                        else:
+                            atom_dict[record.seq[n]] += 1
+
+                        num_atoms += 1
 
-            for record in self.alignment._records:
-                # make sure we haven't run past the end of any sequences
-                # if they are of different lengths
-                if n < len(record.seq):
-                    if record.seq[n] not in atom_dict:
-                        atom_dict[record.seq[n]] = 1
-                    else:
-                        atom_dict[record.seq[n]] += 1
-
-                    num_atoms += 1
-
-            max_atoms = []
-            max_size = 0
-
-            for atom in atom_dict:
-                if atom_dict[atom] > max_size:
-                    max_atoms = [atom]
-                    max_size = atom_dict[atom]
-                elif atom_dict[atom] == max_size:
-                    max_atoms.append(atom)
-
-            if require_multiple and num_atoms == 1:
-                consensus += ambiguous
-            elif (len(max_atoms) == 1) and ((float(max_size)/float(num_atoms))
-                                         >= threshold):
-                consensus += max_atoms[0]
-            else:
-                consensus += ambiguous
+                max_atoms = []
+                max_size = 0
+
+                for atom in atom_dict:
+                    if atom_dict[atom] > max_size:
+                        max_atoms = [atom]
+                        max_size = atom_dict[atom]
+                    elif atom_dict[atom] == max_size:
+                        max_atoms.append(atom)
+
+                if require_multiple and num_atoms == 1:
+                    consensus += ambiguous
+                elif (len(max_atoms) == 1) and ((float(max_size)/float(num_atoms))
+                                             >= threshold):
+                    consensus += max_atoms[0]
+                else:
+                    consensus += ambiguous
 
         # we need to guess a consensus alphabet if one isn't specified
         if consensus_alpha is None:
@@ -245,6 +345,13 @@ class SummaryInfo(object):
         # get a starting dictionary based on the alphabet of the alignment
         rep_dict, skip_items = self._get_base_replacements(skip_chars)
 
+        array = self._get_array()
+        if array is not None:
+            replacements = self._array_replacements(array, rep_dict,
+                                                    skip_items)
+            if replacements is not None:
+                return replacements
+
         # iterate through each record
         for rec_num1 in range(len(self.alignment._records)):
             # iterate through each record from one beyond the current record
@@ -261,6 +368,59 @@ class SummaryInfo(object):
 
         return rep_dict
 
+    def _array_replacements(self, array, start_dict, ignore_chars):
+        """Add up the replacements seen using an array of the letters (PRIVATE).
+
+        This gives the same result as calling _pair_replacement for each
+        pair of records, but works on blocks of columns at a time.  For
+        each letter, a running total (down the records) of the weights of
+        the records with that letter gives the weight of all the earlier
+        records with that letter in each column.  Multiplying by the weight
+        of each later record, and summing by its letter, gives the
+        replacements from that letter to all the others.
+
+        Returns None if there are any unexpected letters, so that the
+        calling method can count in Python instead and report them.
+        """
+        letters = []
+        for pair in start_dict:
+            if pair[0] not in letters:
+                letters.append(pair[0])
+        # code each letter by its index, and anything to ignore as -1
+        lookup = -2 * numpy.ones(256, dtype=int)
+        for char in ignore_chars:
+            if len(char) == 1:
+                lookup[ord(char)] = -1
+        for i, letter in enumerate(letters):
+            lookup[ord(letter)] = i
+
+        weights = numpy.array([record.annotations.get('weight', 1.0)
+                               for record in self.alignment._records],
+                              dtype=float)[:, numpy.newaxis]
+        totals = numpy.zeros((len(letters), len(letters)), dtype=float)
+        rows, length = array.shape
+        step = max(1, _CHUNK_SIZE // rows)
+        for start in range(0, length, step):
+            block = lookup[array[:, start:start + step]]
+            if (block == -2).any():
+                return None
+            valid = block >= 0
+            later_codes = block[valid]
+            later_weights = numpy.where(valid, weights, 0.0)
+            earlier = numpy.zeros(block.shape, dtype=float)
+            for i in range(len(letters)):
+                matches = numpy.where(block == i, weights, 0.0)
+                numpy.cumsum(matches[:-1], axis=0, out=earlier[1:])
+                totals[i] += bincount(later_codes,
+                                      (later_weights * earlier)[valid],
+                                      len(letters))
+
+        for i, letter1 in enumerate(letters):
+            for j, letter2 in enumerate(letters):
+                if totals[i, j]:
+                    start_dict[(letter1, letter2)] += float(totals[i, j])
+        return start_dict
+
     def _pair_replacement(self, seq1, seq2, weight1, weight2,
                           start_dict, ignore_chars):
         """Compare two sequences and generate info on the replacements seen.
@@ -392,6 +552,20 @@ class SummaryInfo(object):
         else:
             left_seq = self.dumb_consensus()
 
+        table = self._get_count_table(weighted=True)
+        if table is not None \
+        and self._check_table_letters(table, all_letters, chars_to_ignore):
+            # use the weighted letter counts
+            pssm_info = []
+            for residue_num in range(len(left_seq)):
+                score_dict = self._get_base_letters(all_letters)
+                for letter in all_letters:
+                    if table[residue_num, ord(letter)]:
+                        score_dict[letter] = float(table[residue_num,
+                                                         ord(letter)])
+                pssm_info.append((left_seq[residue_num], score_dict))
+            return PSSM(pssm_info)
+
         pssm_info = []
         # now start looping through all of the sequences and getting info
         for residue_num in range(len(left_seq)):
@@ -419,6 +593,22 @@ class SummaryInfo(object):
 
         return PSSM(pssm_info)
 
+    def _check_table_letters(self, table, letters, to_ignore):
+        """Check a table of letter counts only has the expected letters (PRIVATE).
+
+        Returns True if every letter counted in the table (see the
+        _get_count_table method) is either one of the expected letters,
+        or one to ignore.  Otherwise returns False, so that the calling
+        method can count in Python instead and report the bad letter.
+        """
+        allowed = numpy.zeros(256, dtype=bool)
+        for letter in letters:
+            allowed[ord(letter)] = True
+        for letter in to_ignore:
+            if len(letter) == 1:
+                allowed[ord(letter)] = True
+        return not table[:, ~allowed].any()
+
     def _get_base_letters(self, letters):
         """Create a zeroed dictionary with all of the specified letters.
         """
@@ -486,11 +676,23 @@ class SummaryInfo(object):
         for char in chars_to_ignore:
             all_letters = all_letters.replace(char, '')
 
+        table = self._get_count_table(weighted=True)
+        if table is not None \
+        and not self._check_table_letters(table[start:end], all_letters,
+                                          chars_to_ignore):
+            # count in Python, to report the unexpected letter
+            table = None
+
         info_content = {}
         for residue_num in range(start, end):
-            freq_dict = self._get_letter_freqs(residue_num,
-                                               self.alignment._records,
-                                               all_letters, chars_to_ignore)
+            if table is not None:
+                freq_dict = self._table_letter_freqs(table[residue_num],
+                                                     all_letters)
+            else:
+                freq_dict = self._get_letter_freqs(residue_num,
+                                                   self.alignment._records,
+                                                   all_letters,
+                                                   chars_to_ignore)
             # print freq_dict,
             column_score = self._get_column_info_content(freq_dict,
                                                          e_freq_table,
@@ -549,6 +751,24 @@ class SummaryInfo(object):
 
         return freq_info
 
+    def _table_letter_freqs(self, counts, letters):
+        """Frequency of specific letters from a row of letter counts (PRIVATE).
+
+        Arguments:
+        o counts - NumPy array of (weighted) counts for one column of the
+        alignment, with an entry for each byte value.
+        o letters - The letters we are interested in getting the frequency
+        for (any others have already been checked to be ignored).
+
+        This gives the same dictionary as the _get_letter_freqs method.
+        """
+        freq_info = self._get_base_letters(letters)
+        total_count = float(sum(counts[ord(letter)] for letter in freq_info))
+        if total_count:
+            for letter in freq_info:
+                freq_info[letter] = float(counts[ord(letter)]) / total_count
+        return freq_info
+
     def _get_column_info_content(self, obs_freq, e_freq_table, log_base,
                                  random_expected):
         """Calculate the information content for a column.
@@ -0,0 +1,217 @@
+# Copyright 2013 by the Biopython contributors.
+# All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Vectorised Smith-Waterman local alignment scores using NumPy.
+
+This module scores one query sequence against many target sequences (e.g.
+a database of proteins) using local alignment with a substitution matrix
+and affine gap penalties.  It gives the same scores as the Bio.pairwise2
+localds function with score_only=True, but is much faster for more than a
+handful of targets.
+
+The substitution matrix is converted once into a NumPy array indexed by
+residue codes (using integers if all the scores and penalties are whole
+numbers), and the targets are processed in batches of similar length.
+Each row of the dynamic programming matrix (one query residue) is then
+computed for all the targets in the batch at once.  The scores within a
+row are independent apart from gaps along the row, which are found with a
+running maximum (a prefix scan) rather than a loop over the columns.
+
+>>> from Bio.SubsMat import MatrixInfo
+>>> from Bio.Align.SmithWaterman import local_scores
+>>> targets = ["HEAGAWGHEE", "PAWHEAE", "WWWW", "AAAA"]
+>>> local_scores("PAWHEAE", targets, MatrixInfo.blosum62, -10, -1).tolist()
+[17, 44, 11, 4]
+
+Compare with pairwise2:
+
+>>> from Bio import pairwise2
+>>> for target in targets:
+...     score = pairwise2.align.localds("PAWHEAE", target, MatrixInfo.blosum62,
+...                                     -10, -1, score_only=True)
+...     print "%0.1f" % score
+17.0
+44.0
+11.0
+4.0
+"""
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.Align.SmithWaterman.")
+
+from Bio._py3k import _as_bytes
+from Bio.SubsMat import CompiledMatrix
+
+
+def _is_integral(values):
+    """Check if all the values are whole numbers (PRIVATE)."""
+    for value in values:
+        if value != int(value):
+            return False
+    return True
+
+
+def _matrix_array(matrix):
+    """Convert a substitution matrix dictionary into an array (PRIVATE).
+
+    The matrix is a dictionary with pairs of residues as keys, such as
+    those in Bio.SubsMat.MatrixInfo, where a missing pair is looked up the
+    other way round (as in pairwise2.dictionary_match).
+
+    Returns the alphabet (a string of the residues in the matrix, in the
+    order used) and a square NumPy array of the scores.
+    """
+    if isinstance(matrix, CompiledMatrix):
+        return matrix.alphabet, numpy.array(matrix.scores, dtype=float)
+    alphabet = set()
+    for key in matrix:
+        alphabet.update(key)
+    alphabet = "".join(sorted(alphabet))
+    values = numpy.zeros((len(alphabet), len(alphabet)), dtype=float)
+    for i, a in enumerate(alphabet):
+        for j, b in enumerate(alphabet):
+            try:
+                values[i, j] = matrix[(a, b)]
+            except KeyError:
+                values[i, j] = matrix[(b, a)]
+    return alphabet, values
+
+
+def _encode(sequence, lookup):
+    """Convert a sequence into an array of residue codes (PRIVATE)."""
+    try:
+        #SeqRecord
+        sequence = sequence.seq
+    except AttributeError:
+        pass
+    codes = lookup[numpy.frombuffer(_as_bytes(str(sequence)),
+                                    dtype=numpy.uint8)]
+    if (codes < 0).any():
+        bad = set(str(sequence)[i] for i in numpy.flatnonzero(codes < 0))
+        raise KeyError("Residues %s are not in the substitution matrix"
+                       % ", ".join(repr(c) for c in sorted(bad)))
+    return codes
+
+
+def _batch_scores(query, targets, lengths, table, open, extend, minimum):
+    """Best local score of the query against a batch of targets (PRIVATE).
+
+    The targets are a 2D array of residue codes (one row per target, padded
+    to the same length), and table is the substitution score array.  This
+    follows the recursion used in pairwise2 for local alignments (see
+    _make_score_matrix_fast), where M is the score of the best alignment
+    ending with the current query residue aligned to each target residue,
+    E is the best score for a gap in the query (along the row) ending at
+    each column, and F is the best score for a gap in the target (down the
+    column).  As in pairwise2, the first row and column of M are not
+    clipped at zero.
+    """
+    width = targets.shape[1]
+    dtype = table.dtype
+    valid = numpy.arange(width) < lengths[:, numpy.newaxis]
+    #For the running maximum along each row
+    steps = extend * numpy.arange(width)
+
+    def gaps_along_row(M):
+        #E[:, j] is the max of M[:, k] + open + extend * (j - 1 - k) over
+        #k < j, i.e. (open + extend * (j - 1)) + max(M[:, k] - extend * k)
+        E = numpy.empty_like(M)
+        E[:, 0] = minimum
+        if width > 1:
+            running = numpy.maximum.accumulate(M[:, :-1] - steps[:-1], axis=1)
+            E[:, 1:] = running + (open + steps[:-1])
+        return E
+
+    M = table[query[0]][targets]
+    E = gaps_along_row(M)
+    F = numpy.empty_like(M)
+    F[:] = minimum
+    best = numpy.where(valid, M, minimum).max(axis=1)
+    zero = numpy.zeros(1, dtype=dtype)
+    for residue in query[1:]:
+        scores = table[residue][targets]
+        new_M = numpy.empty_like(M)
+        new_M[:, 0] = scores[:, 0]
+        previous = numpy.maximum(numpy.maximum(M, E), F)
+        new_M[:, 1:] = numpy.maximum(scores[:, 1:] + previous[:, :-1], zero)
+        F = numpy.maximum(M + open, F + extend)
+        M = new_M
+        E = gaps_along_row(M)
+        best = numpy.maximum(best, numpy.where(valid, M, minimum).max(axis=1))
+    return best
+
+
+def local_scores(query, targets, matrix, open, extend, batch_cells=1000000):
+    """Smith-Waterman local alignment scores of a query against many targets.
+
+    Arguments:
+     - query       - the query sequence (string, Seq or SeqRecord).
+     - targets     - a list (or other iterable) of target sequences.
+     - matrix      - substitution matrix as a dictionary with pairs of
+                     residues as keys (e.g. from Bio.SubsMat.MatrixInfo),
+                     where a missing pair is looked up the other way round,
+                     or a Bio.SubsMat.CompiledMatrix.
+     - open        - gap opening penalty (negative), the score of a gap of
+                     length one.
+     - extend      - gap extension penalty (negative), added for each
+                     further position of a gap.
+     - batch_cells - maximum size (number of targets times the longest
+                     target length) of each batch of targets, which
+                     limits the memory used.
+
+    The gap penalties follow pairwise2.align.localds, so a gap of length n
+    costs open + (n-1) * extend.  Returns a NumPy array with the score for
+    each target, with integer scores if the matrix and gap penalties are
+    whole numbers.  Empty sequences score zero.
+    """
+    if open > 0 or extend > 0:
+        raise ValueError("Gap penalties should be non-positive.")
+    alphabet, values = _matrix_array(matrix)
+    if _is_integral(values.ravel()) and _is_integral([open, extend]):
+        dtype = numpy.int64
+        minimum = numpy.iinfo(numpy.int32).min
+        open, extend = int(open), int(extend)
+    else:
+        dtype = float
+        minimum = -numpy.inf
+    table = values.astype(dtype)
+    lookup = -numpy.ones(256, dtype=numpy.int64)
+    for i, letter in enumerate(alphabet):
+        lookup[ord(letter)] = i
+
+    query = _encode(query, lookup)
+    targets = [_encode(target, lookup) for target in targets]
+    answer = numpy.zeros(len(targets), dtype=dtype)
+    if not len(query):
+        return answer
+    lengths = numpy.array([len(t) for t in targets], dtype=numpy.int64)
+    #Batches of similar length targets, to minimise padding
+    order = [i for i in numpy.argsort(lengths, kind="mergesort")
+             if lengths[i]]
+    start = 0
+    while start < len(order):
+        end = start + 1
+        while end < len(order) and \
+                lengths[order[end]] * (end - start + 1) <= batch_cells:
+            end += 1
+        batch = order[start:end]
+        width = lengths[batch[-1]]
+        codes = numpy.zeros((len(batch), width), dtype=numpy.int64)
+        for row, i in enumerate(batch):
+            codes[row, :lengths[i]] = targets[i]
+        answer[batch] = _batch_scores(query, codes, lengths[batch], table,
+                                      open, extend, minimum)
+        start = end
+    return answer
+
+
+if __name__ == "__main__":
+    from Bio._utils import run_doctest
+    run_doctest()
@@ -11,13 +11,69 @@ class, used in the Bio.AlignIO module.
 """
 __docformat__ = "epytext en"  # Don't just use plain text in epydoc API pages!
 
+import operator
+
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio import Alphabet
+from Bio._py3k import _as_bytes, _as_string
+from Bio._utils import bincount
 
 #We only import this and subclass it for some limited backward compatibility.
 from Bio.Align.Generic import Alignment as _Alignment
 
+try:
+    import numpy
+except ImportError:
+    #NumPy is optional, only needed for the array based methods
+    numpy = None
+
+#Number of cells (rows times columns) to count at a time in column_counts
+_COUNT_CHUNK_SIZE = 1000000
+
+
+def _require_numpy():
+    """Raise an exception if NumPy is not available (PRIVATE)."""
+    if numpy is None:
+        from Bio import MissingPythonDependencyError
+        raise MissingPythonDependencyError(
+            "Install NumPy if you want to use the array based methods of "
+            "MultipleSeqAlignment.")
+
+
+def _column_count_table(array, weights=None):
+    """Count every byte value in each column of a letter array (PRIVATE).
+
+    Arguments:
+     - array   - NumPy array of bytes, one row for each sequence.
+     - weights - optional weight for each row (otherwise each counts one).
+
+    Returns a NumPy array with a row for each column of the letter array,
+    and 256 columns (one for each byte value, i.e. ord(letter)).  This is
+    done with a single bincount for each block of rows.
+    """
+    rows, length = array.shape
+    if weights is not None:
+        weights = numpy.asarray(weights, dtype=float)
+        if weights.shape != (rows,):
+            raise ValueError("Expected %i weights, not %r"
+                             % (rows, weights.shape))
+        table = numpy.zeros(256 * length, dtype=float)
+    else:
+        table = numpy.zeros(256 * length, dtype=numpy.int64)
+    if not length:
+        return table.reshape((0, 256))
+    offsets = 256 * numpy.arange(length)
+    step = max(1, _COUNT_CHUNK_SIZE // length)
+    for start in range(0, rows, step):
+        codes = (array[start:start + step] + offsets).ravel()
+        if weights is None:
+            table += bincount(codes, minlength=256 * length)
+        else:
+            chunk = numpy.repeat(weights[start:start + step], length)
+            table += bincount(codes, chunk, 256 * length)
+    return table.reshape((length, 256))
+
 
 class MultipleSeqAlignment(_Alignment):
     """Represents a classical multiple sequence alignment (MSA).
@@ -96,6 +152,12 @@ class MultipleSeqAlignment(_Alignment):
     TATACATTAAGTATACCAGA gi|6273289|gb|AF191663.1|AF191
     TATACATTAAGTGTACCAGA gi|6273291|gb|AF191665.1|AF191
 
+    If NumPy is installed, the letters of the alignment can also be kept as
+    a matrix of bytes (one row per record, see the as_array method), which
+    is used for column counts and removing gap columns without looping over
+    the records in Python.  This matters for alignments with many thousands
+    of rows.
+
     Note - This object is intended to replace the existing Alignment object
     defined in module Bio.Align.Generic but is not fully backwards compatible
     with it.
@@ -170,6 +232,9 @@ class MultipleSeqAlignment(_Alignment):
             self._alphabet = Alphabet.single_letter_alphabet
 
         self._records = []
+        #Cached array of the letters, and the Seq objects it was made from
+        self._array = None
+        self._array_seqs = None
         if records:
             self.extend(records)
             if alphabet is None:
@@ -311,6 +376,7 @@ class MultipleSeqAlignment(_Alignment):
         if not Alphabet._check_type_compatible([self._alphabet, record.seq.alphabet]):
             raise ValueError("New sequence's alphabet is incompatible")
         self._records.append(record)
+        self._array = None
 
     def __add__(self, other):
         """Combines to alignments with the same number of rows by adding them.
@@ -522,11 +588,21 @@ class MultipleSeqAlignment(_Alignment):
             return self._records[row_index][col_index]
         elif isinstance(col_index, int):
             #e.g. col_or_part_col = align[1:5, 6], gives a string
+            #Only use the array if it has already been made (by as_array)
+            array = self._cached_array()
+            if array is not None:
+                return _as_string(array[row_index, col_index].tostring())
             return "".join(rec[col_index] for rec in self._records[row_index])
         else:
             #e.g. sub_align = align[1:4, 5:7], gives another alignment
-            return MultipleSeqAlignment((rec[col_index] for rec in self._records[row_index]),
-                                        self._alphabet)
+            sub_align = MultipleSeqAlignment((rec[col_index] for rec in self._records[row_index]),
+                                             self._alphabet)
+            array = self._cached_array()
+            if array is not None and isinstance(row_index, slice) \
+            and isinstance(col_index, slice) and sub_align._records:
+                #Keep the cached array, rather than building it again
+                sub_align._set_array(array[row_index, col_index])
+            return sub_align
 
     def sort(self, key=None, reverse=False):
         """Sort the rows (SeqRecord objects) of the alignment in place.
@@ -605,6 +681,141 @@ class MultipleSeqAlignment(_Alignment):
             self._records.sort(key = lambda r: r.id, reverse = reverse)
         else:
             self._records.sort(key = key, reverse = reverse)
+        self._array = None
+
+    def _can_cache(self):
+        """Check if an array of the letters can be cached (PRIVATE).
+
+        This is only done if all the records use (read only) Seq objects,
+        not for example a MutableSeq, which could be changed at any time.
+        """
+        for rec in self._records:
+            if not isinstance(rec.seq, Seq):
+                return False
+        return True
+
+    def _cached_array(self):
+        """Return the cached array if the records are unchanged (PRIVATE).
+
+        Returns None if there is no cached array, or if any of the records
+        (or their Seq objects) have been replaced since it was made.
+        """
+        if self._array is None:
+            return None
+        seqs = list(map(operator.attrgetter("seq"), self._records))
+        if len(seqs) != len(self._array_seqs) \
+        or not all(map(operator.is_, seqs, self._array_seqs)):
+            self._array = None
+            return None
+        return self._array
+
+    def _set_array(self, array):
+        """Cache an array of the letters in the current records (PRIVATE)."""
+        array.flags.writeable = False
+        if self._can_cache():
+            self._array = array
+            self._array_seqs = [rec.seq for rec in self._records]
+        else:
+            self._array = None
+
+    def as_array(self):
+        """Return the letters of the alignment as a NumPy array of bytes.
+
+        The array has one row for each record, and one column for each
+        column of the alignment, and holds the ASCII codes of the letters.
+        For example, for an alignment of the two records AAAACGT and AAA-CGT
+        the array has shape (2, 7), and element [1, 3] is 45 (the code for
+        the gap, "-").
+
+        The array is made when first needed, and then kept (read only) for
+        as long as the records and their Seq objects are unchanged.  While
+        it is kept, it is also used for getting columns with align[:, i],
+        which is much faster than looping over the rows.  Requires NumPy.
+        """
+        _require_numpy()
+        array = self._cached_array()
+        if array is not None:
+            return array
+        length = self.get_alignment_length()
+        data = _as_bytes("".join(str(rec.seq) for rec in self._records))
+        array = numpy.frombuffer(data, dtype=numpy.uint8).copy()
+        array = array.reshape((len(self._records), length))
+        self._set_array(array)
+        return array
+
+    def column_counts(self, letters, weights=None):
+        """Count the given letters in each column of the alignment.
+
+        Arguments:
+         - letters - string (or list) of single letters to count.
+         - weights - optional list (or array) of weights for the records,
+                     to sum the weights rather than counting the letters.
+
+        Returns a NumPy array with a row for each column of the alignment,
+        and a column for each letter.  Letters are case sensitive, and any
+        other letters in the alignment are ignored.  For example, for an
+        alignment of the records AAAACGT, AAA-CGT and AAAAGGT, counting
+        the letters "ACGT-" gives [2, 0, 0, 0, 1] for the fourth column
+        and [0, 2, 1, 0, 0] for the fifth.
+
+        Requires NumPy.
+        """
+        table = self._count_table(weights)
+        return table[:, [ord(letter) for letter in letters]]
+
+    def _count_table(self, weights=None):
+        """Count every byte value in each column (PRIVATE).
+
+        Returns a NumPy array with a row for each column of the alignment,
+        and 256 columns (one for each byte value, i.e. ord(letter)).
+        """
+        return _column_count_table(self.as_array(), weights)
+
+    def remove_gap_columns(self, gap_chars="-.", fraction=1.0):
+        """Return a new alignment without the mostly gap columns.
+
+        Arguments:
+         - gap_chars - string of the gap characters (default "-" and ".").
+         - fraction  - columns where at least this fraction of the records
+                       have a gap are removed (default 1.0, meaning only
+                       columns which are all gaps are removed).
+
+        For example, for an alignment of the records AA-ACGT, AA--CGT and
+        AA-AGG. this removes the third column, giving AAACGT, AA-CGT and
+        AAAGG. (or with fraction=0.3, also removing the columns with one
+        gap, giving AACG, AACG and AAGG).
+
+        The records in the new alignment keep the identifiers, descriptions,
+        annotations and per-letter annotations of the original records, but
+        any features are dropped.  Requires NumPy.
+        """
+        array = self.as_array()
+        rows, length = array.shape
+        table = self._count_table()
+        gaps = table[:, [ord(char) for char in gap_chars]].sum(axis=1)
+        keep = numpy.flatnonzero(gaps < fraction * rows)
+        array = array[:, keep]
+        records = []
+        for rec, letters in zip(self._records, array):
+            new_rec = SeqRecord(Seq(_as_string(letters.tostring()),
+                                    rec.seq.alphabet),
+                                id=rec.id, name=rec.name,
+                                description=rec.description,
+                                dbxrefs=rec.dbxrefs[:],
+                                annotations=rec.annotations.copy())
+            for key, value in rec.letter_annotations.items():
+                kept = [value[i] for i in keep]
+                if isinstance(value, str):
+                    #e.g. secondary structure from Stockholm files
+                    new_rec.letter_annotations[key] = "".join(kept)
+                else:
+                    new_rec.letter_annotations[key] = value.__class__(kept)
+            records.append(new_rec)
+        sub_align = MultipleSeqAlignment(records, self._alphabet,
+                                         self.annotations.copy())
+        if records:
+            sub_align._set_array(array)
+        return sub_align
 
     def get_column(self, col):
         """Returns a string containing a given column (DEPRECATED).
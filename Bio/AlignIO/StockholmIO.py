@@ -130,9 +130,14 @@ secondary structure string here, are also sliced:
     -------<<<
 """
 __docformat__ = "epytext en"  # not just plaintext
+from StringIO import StringIO
+
+from Bio._py3k import _as_bytes, _bytes_to_string
+from Bio.Alphabet import single_letter_alphabet
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio.Align import MultipleSeqAlignment
+from Bio.File import _IndexedSeqFileProxy, _open_for_random_access
 from Interfaces import AlignmentIterator, SequentialAlignmentWriter
 
 
@@ -294,6 +299,24 @@ class StockholmIterator(AlignmentIterator):
 
     For consistency with BioPerl and EMBOSS we call this the "stockholm"
     format.
+
+    Large files such as Pfam-A.full can have alignments of many thousands
+    of sequences, each with per-residue annotation such as the posterior
+    probability (#=GR PP lines).  If you don't need these, creating the
+    iterator with letter_annotations=False skips the #=GR lines, which
+    saves both time and memory:
+
+    >>> from Bio.AlignIO.StockholmIO import StockholmIterator
+    >>> handle = open("Stockholm/simple.sth")
+    >>> for align in StockholmIterator(handle, letter_annotations=False):
+    ...     for record in align:
+    ...         print record.id, len(record), record.letter_annotations
+    AP001509.1 104 {}
+    AE007476.1 104 {}
+    >>> handle.close()
+
+    To pick out particular alignments from a large file by their accession
+    (the #=GF AC line), see the Bio.AlignIO.index() function.
     """
 
     #These dictionaries should be kept in sync with those
@@ -305,11 +328,28 @@ class StockholmIterator(AlignmentIterator):
                        "LI": "ligand_binding",
                        "AS": "active_site",
                        "IN": "intron"}
+    #Per column annotation uses the same names for the consensus of the
+    #GR features (e.g. "SS_cons"), plus the following:
+    pfam_gc_mapping = {"RF": "reference_annotation",
+                       "MM": "model_mask"}
     #Following dictionary deliberately does not cover AC, DE or DR
     pfam_gs_mapping = {"OS": "organism",
                        "OC": "organism_classification",
                        "LO": "look"}
 
+    def __init__(self, handle, seq_count=None,
+                 alphabet=single_letter_alphabet, letter_annotations=True):
+        """Create a StockholmIterator object.
+
+        handle   - input file
+        count    - optional, expected number of records per alignment
+        alphabet - optional, e.g. Bio.Alphabet.generic_protein
+        letter_annotations - optional boolean, set this to False to ignore
+                   the per-residue annotation (#=GR lines).
+        """
+        AlignmentIterator.__init__(self, handle, seq_count, alphabet)
+        self.letter_annotations = letter_annotations
+
     def next(self):
         try:
             line = self._header
@@ -329,12 +369,17 @@ class StockholmIterator(AlignmentIterator):
         # We do not check for this - perhaps we should, and verify that
         # if present it agrees with our parsing.
 
+        #The sequences (and GR annotation) are built up as lists of the
+        #pieces on each line, joined at the end, as repeatedly adding to
+        #strings is slow for large interlaced alignments.
         seqs = {}
         ids = []
         gs = {}
         gr = {}
+        gc = {}
         gf = {}
         passed_end_alignment = False
+        letter_annotations = self.letter_annotations
         while 1:
             line = self.handle.readline()
             if not line:
@@ -360,10 +405,10 @@ class StockholmIterator(AlignmentIterator):
                     raise ValueError("Could not split line into identifier "
                                       + "and sequence:\n" + line)
                 id, seq = parts
-                if id not in ids:
+                if id not in seqs:
                     ids.append(id)
-                seqs.setdefault(id, '')
-                seqs[id] += seq.replace(".", "-")
+                    seqs[id] = []
+                seqs[id].append(seq.replace(".", "-"))
             elif len(line) >= 5:
                 #Comment line or meta-data
                 if line[:5] == "#=GF ":
@@ -379,7 +424,11 @@ class StockholmIterator(AlignmentIterator):
                 elif line[:5] == '#=GC ':
                     #Generic per-Column annotation, exactly 1 char per column
                     #Format: "#=GC <feature> <exactly 1 char per column>"
-                    pass
+                    parts = line[5:].strip().split(None, 1)
+                    feature = parts[0]
+                    if feature not in gc:
+                        gc[feature] = []
+                    gc[feature].append("".join(parts[1:]).strip())
                 elif line[:5] == '#=GS ':
                     #Generic per-Sequence annotation, free text
                     #Format: "#=GS <seqname> <feature> <free text>"
@@ -392,7 +441,7 @@ class StockholmIterator(AlignmentIterator):
                         gs[id][feature] = [text]
                     else:
                         gs[id][feature].append(text)
-                elif line[:5] == "#=GR ":
+                elif line[:5] == "#=GR " and letter_annotations:
                     #Generic per-Sequence AND per-Column markup
                     #Format: "#=GR <seqname> <feature> <exactly 1 char per column>"
                     id, feature, text = line[5:].strip().split(None, 2)
@@ -401,8 +450,8 @@ class StockholmIterator(AlignmentIterator):
                     if id not in gr:
                         gr[id] = {}
                     if feature not in gr[id]:
-                        gr[id][feature] = ""
-                    gr[id][feature] += text.strip()  # append to any previous entry
+                        gr[id][feature] = []
+                    gr[id][feature].append(text.strip())  # add to any previous entry
                     #TODO - Should we check the length matches the alignment length?
                     #       For iterlaced sequences the GR data can be split over
                     #       multiple lines
@@ -412,6 +461,14 @@ class StockholmIterator(AlignmentIterator):
         #assert len(gs)   <= len(ids)
         #assert len(gr)   <= len(ids)
 
+        for id in seqs:
+            seqs[id] = "".join(seqs[id])
+        for id in gr:
+            for feature in gr[id]:
+                gr[id][feature] = "".join(gr[id][feature])
+        for feature in gc:
+            gc[feature] = "".join(gc[feature])
+
         self.ids = ids
         self.sequences = seqs
         self.seq_annotation = gs
@@ -424,7 +481,7 @@ class StockholmIterator(AlignmentIterator):
                 raise ValueError("Found %i records in this alignment, told to expect %i"
                                  % (len(ids), self.records_per_alignment))
 
-            alignment_length = len(seqs.values()[0])
+            alignment_length = len(seqs[ids[0]])
             records = []  # Alignment obj will put them all in a list anyway
             for id in ids:
                 seq = seqs[id]
@@ -450,11 +507,39 @@ class StockholmIterator(AlignmentIterator):
             #TODO - Introduce an annotated alignment class?
             #For now, store the annotation a new private property:
             alignment._annotations = gr
+            alignment._column_annotations = self._get_column_annotations(
+                gc, alignment_length)
 
             return alignment
         else:
             raise StopIteration
 
+    def _get_column_annotations(self, gc, alignment_length):
+        """Returns the per column annotation dictionary (PRIVATE).
+
+        Any GC annotation which doesn't match the alignment length is
+        skipped (with a warning).
+        """
+        column_annotations = {}
+        for feature, text in gc.items():
+            if len(text) != alignment_length:
+                import warnings
+                from Bio import BiopythonParserWarning
+                warnings.warn("Ignoring GC %s annotation of length %i, not "
+                              "the alignment length %i"
+                              % (feature, len(text), alignment_length),
+                              BiopythonParserWarning)
+                continue
+            if feature.endswith("_cons") \
+            and feature[:-5] in self.pfam_gr_mapping:
+                key = self.pfam_gr_mapping[feature[:-5]]
+            elif feature in self.pfam_gc_mapping:
+                key = self.pfam_gc_mapping[feature]
+            else:
+                key = "GC:" + feature
+            column_annotations[key] = text
+        return column_annotations
+
     def _identifier_split(self, identifier):
         """Returns (name,start,end) string tuple from an identier."""
         if '/' in identifier:
@@ -534,6 +619,79 @@ class StockholmIterator(AlignmentIterator):
                 record.letter_annotations["GR:" + feature] = seq_col_data[feature]
 
 
+class _StockholmRandomAccess(_IndexedSeqFileProxy):
+    """Random access to the alignments in a Stockholm file (PRIVATE).
+
+    This is used by the Bio.AlignIO.index() function, and uses the
+    accession (the #=GF AC line, or failing that the #=GF ID line) of
+    each alignment as the key.
+    """
+    def __init__(self, filename, format, alphabet):
+        self._handle = _open_for_random_access(filename)
+        self._alphabet = alphabet
+        self._format = format
+        self._header = _as_bytes("# STOCKHOLM 1.0")
+
+    def __iter__(self):
+        """Returns (accession, offset, length) tuples."""
+        handle = self._handle
+        handle.seek(0)
+        header = self._header
+        ac_marker = _as_bytes("#=GF AC ")
+        id_marker = _as_bytes("#=GF ID ")
+        gf_marker = _as_bytes("#=GF ")
+        start_offset = None
+        accession = identifier = None
+        length = 0
+        while True:
+            offset = handle.tell()
+            line = handle.readline()
+            if not line or line.strip() == header:
+                if start_offset is not None:
+                    key = accession or identifier
+                    if not key:
+                        raise ValueError("No #=GF AC or ID line in the "
+                                         "alignment at offset %i"
+                                         % start_offset)
+                    yield _bytes_to_string(key), start_offset, length
+                if not line:
+                    break
+                start_offset = offset
+                accession = identifier = None
+                length = len(line)
+                continue
+            elif start_offset is None:
+                if line.strip():
+                    raise ValueError("Did not find STOCKHOLM header")
+                continue
+            elif line.startswith(gf_marker):
+                #Only need to look at the per-file annotation
+                if line.startswith(ac_marker):
+                    accession = line[len(ac_marker):].strip()
+                elif line.startswith(id_marker):
+                    identifier = line[len(id_marker):].strip()
+            length += len(line)
+
+    def get(self, offset):
+        """Returns the MultipleSeqAlignment at the given offset."""
+        handle = StringIO(_bytes_to_string(self.get_raw(offset)))
+        if self._alphabet is None:
+            return StockholmIterator(handle).next()
+        return StockholmIterator(handle, alphabet=self._alphabet).next()
+
+    def get_raw(self, offset):
+        """Returns the alignment at the given offset as a raw string."""
+        handle = self._handle
+        handle.seek(offset)
+        lines = [handle.readline()]
+        while True:
+            line = handle.readline()
+            if not line or line.strip() == self._header:
+                break
+            lines.append(line)
+        return _as_bytes("").join(lines)
+
+
 if __name__ == "__main__":
     from Bio._utils import run_doctest
     run_doctest()
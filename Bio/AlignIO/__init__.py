@@ -51,6 +51,10 @@ different multiple sequence alignments as possible.  One common example
 is the output of the tool seqboot in the PHLYIP suite.  Sometimes there
 can be a file header and footer, as seen in the EMBOSS alignment output.
 
+For large files of many alignments, such as the PFAM Stockholm files, the
+function Bio.AlignIO.index(...) gives dictionary like random access to the
+alignments by their accession, parsing each one only when it is needed.
+
 Output
 ======
 Use the function Bio.AlignIO.write(...), which takes a complete set of
@@ -142,7 +146,7 @@ __docformat__ = "epytext en"  # not just plaintext
 from Bio.Align import MultipleSeqAlignment
 from Bio.Align.Generic import Alignment
 from Bio.Alphabet import Alphabet, AlphabetEncoder, _get_base_alphabet
-from Bio.File import as_handle
+from Bio.File import as_handle, _IndexedSeqFileDict
 
 import StockholmIO
 import ClustalIO
@@ -165,6 +169,9 @@ _FormatToIterator = {  # "fasta" is done via Bio.SeqIO
                      "stockholm": StockholmIO.StockholmIterator,
                      }
 
+_FormatToRandomAccess = {"stockholm": StockholmIO._StockholmRandomAccess,
+                         }
+
 _FormatToWriter = {  # "fasta" is done via Bio.SeqIO
                      # "emboss" : EmbossIO.EmbossWriter, (unfinished)
                    "nexus": NexusIO.NexusWriter,
@@ -436,6 +443,82 @@ def read(handle, format, seq_count=None, alphabet=None):
     return first
 
 
+class _IndexedAlignmentFileDict(_IndexedSeqFileDict):
+    """Read only dictionary interface to a file of alignments (PRIVATE).
+
+    The alignments are parsed on demand as MultipleSeqAlignment objects,
+    which don't have an identifier to check against the key.
+    """
+    def __getitem__(self, key):
+        """x.__getitem__(y) <==> x[y]"""
+        return self._proxy.get(self._offsets[key])
+
+
+def index(filename, format, alphabet=None, key_function=None):
+    """Indexes an alignment file and returns a dictionary like object.
+
+    Arguments:
+     - filename - string giving name of file to be indexed
+     - format   - lower case string describing the file format (currently
+                  only "stockholm" is supported)
+     - alphabet - optional Alphabet object, useful when the sequence type
+                  cannot be automatically inferred from the file itself
+     - key_function - Optional callback function which when given an
+                  alignment's accession should return a unique key for
+                  the dictionary.
+
+    This indexing function will return a dictionary like object, giving the
+    MultipleSeqAlignment objects as values.  For Stockholm files (such as
+    Pfam-A.full) the keys are the accessions from the #=GF AC lines (or if
+    missing, the #=GF ID lines).  Only the keys and the file offsets are
+    held in memory, and each alignment is parsed when you access it.
+
+    >>> from Bio import AlignIO
+    >>> alignments = AlignIO.index("Stockholm/funny.sth", "stockholm")
+    >>> len(alignments)
+    1
+    >>> alignments.keys()
+    ['PF00571']
+    >>> print alignments["PF00571"]
+    SingleLetterAlphabet() alignment with 6 rows and 43 columns
+    MTCRAQLIAVPRASSLAE--AIACAQKM----RVSRVPVYERS O83071/192-246
+    MQHVSAPVFVFECTRLAY--VQHKLRAH----SRAVAIVLDEY O83071/259-312
+    MIEADKVAHVQVGNNLEH--ALLVLTKT----GYTAIPVLDPS O31698/18-71
+    EVMLTDIPRLHINDPIMK--GFGMVINN------GFVCVENDE O31698/88-139
+    EVMLTDIPRLHINDPIMK--GFGMVINN------GFVCVENDE O31699/88-139
+    EVMLTDIPRLHINDPIMK--GFGMVINN------GFVCVENDE 363253|refseq_protein.50.proto_past_mitoc_micro_vira|gi|94986659|ref|YP_594592.1|awsonia_intraceuaris_PHE/MN1-00
+    >>> alignments.close()
+
+    PFAM accessions often include a version suffix (e.g. PF00571.21), which
+    you could remove using the key_function argument, for example with
+    lambda acc: acc.split(".")[0] as the key function.
+
+    See also: Bio.SeqIO.index()
+    """
+    #Try and give helpful error messages:
+    if not isinstance(filename, basestring):
+        raise TypeError("Need a filename (not a handle)")
+    if not isinstance(format, basestring):
+        raise TypeError("Need a string for the file format (lower case)")
+    if not format:
+        raise ValueError("Format required (lower case string)")
+    if format != format.lower():
+        raise ValueError("Format string '%s' should be lower case" % format)
+    if alphabet is not None and not (isinstance(alphabet, Alphabet) or
+                                     isinstance(alphabet, AlphabetEncoder)):
+        raise ValueError("Invalid alphabet, %s" % repr(alphabet))
+
+    try:
+        proxy_class = _FormatToRandomAccess[format]
+    except KeyError:
+        raise ValueError("Unsupported format %r" % format)
+    repr = "AlignIO.index(%r, %r, alphabet=%r, key_function=%r)" \
+        % (filename, format, alphabet, key_function)
+    return _IndexedAlignmentFileDict(proxy_class(filename, format, alphabet),
+                                     key_function, repr,
+                                     "MultipleSeqAlignment")
+
+
 def convert(in_file, in_format, out_file, out_format, alphabet=None):
     """Convert between two alignment files, returns number of alignments.
 
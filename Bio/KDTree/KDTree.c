@@ -1180,3 +1180,259 @@ KDTree_neighbor_simple_search(struct KDTree* tree, float radius,
 
     return 1;
 }
+
+/* Batch searches
+ *
+ * Unlike the searches above, these only read the tree, and keep the
+ * state of each search in local variables. Several threads can therefore
+ * search the same tree at the same time (as long as KDTree_set_data is
+ * not called meanwhile).
+ *
+ * The left subtree of a node holds points with coordinate <= cut value
+ * (in the cut dimension) and the right subtree points with coordinate
+ * >= cut value, so a subtree can be skipped by looking at the distance
+ * from the center to the cut plane.
+ */
+
+int KDTree_get_dim(struct KDTree* tree)
+{
+    return tree->dim;
+}
+
+struct Hits
+{
+    long int *indices;
+    float *radii;
+    long int count;
+    long int size;
+};
+
+static int Hits_add(struct Hits* hits, long int index, float radius)
+{
+    if (hits->count==hits->size)
+    {
+        long int size = hits->size ? 2*hits->size : 256;
+        long int *indices;
+        float *radii;
+
+        indices = realloc(hits->indices, size*sizeof(long int));
+        if (indices==NULL) return 0;
+        hits->indices = indices;
+        radii = realloc(hits->radii, size*sizeof(float));
+        if (radii==NULL) return 0;
+        hits->radii = radii;
+        hits->size = size;
+    }
+    hits->indices[hits->count] = index;
+    hits->radii[hits->count] = radius;
+    hits->count++;
+    return 1;
+}
+
+static int
+KDTree_radius_query(struct KDTree* tree, struct Node *node, const float *center,
+                    float radius, struct Hits* hits)
+{
+    if (Node_is_leaf(node))
+    {
+        long int i;
+        const float radius_sq = radius*radius;
+
+        for (i=node->_start; i<node->_end; i++)
+        {
+            struct DataPoint* data_point = tree->_data_point_list+i;
+            const float r = KDTree_dist((float*)center, data_point->_coord, tree->dim);
+
+            if (r<=radius_sq)
+            {
+                if (!Hits_add(hits, data_point->_index, sqrt(r))) return 0;
+            }
+        }
+    }
+    else
+    {
+        const float x = center[node->_cut_dim];
+
+        if (x-radius<=node->_cut_value)
+        {
+            if (!KDTree_radius_query(tree, node->_left, center, radius, hits))
+                return 0;
+        }
+        if (x+radius>=node->_cut_value)
+        {
+            if (!KDTree_radius_query(tree, node->_right, center, radius, hits))
+                return 0;
+        }
+    }
+    return 1;
+}
+
+int
+KDTree_search_centers_radius(struct KDTree* tree, const float *centers,
+                             long int nr_centers, float radius,
+                             long int *offsets, long int **indices,
+                             float **radii)
+{
+    /* The points within radius of center i are stored in
+     * (*indices)[offsets[i]] ... (*indices)[offsets[i+1]-1], and their
+     * distances in *radii; the caller should free these two arrays. */
+    long int i;
+    struct Hits hits = {NULL, NULL, 0, 0};
+
+    for (i=0; i<nr_centers; i++)
+    {
+        offsets[i] = hits.count;
+        if (!KDTree_radius_query(tree, tree->_root, centers+i*tree->dim,
+                                 radius, &hits))
+        {
+            if (hits.indices) free(hits.indices);
+            if (hits.radii) free(hits.radii);
+            return 0;
+        }
+    }
+    offsets[nr_centers] = hits.count;
+    *indices = hits.indices;
+    *radii = hits.radii;
+    return 1;
+}
+
+/* The k nearest points found so far, as a heap with the furthest first */
+
+struct Heap
+{
+    long int *indices;
+    float *radii_sq;
+    int count;
+    int k;
+};
+
+static void Heap_sift_down(struct Heap* heap, int i)
+{
+    const long int index = heap->indices[i];
+    const float r = heap->radii_sq[i];
+
+    while (1)
+    {
+        int child = 2*i+1;
+        if (child>=heap->count) break;
+        if (child+1<heap->count && heap->radii_sq[child+1]>heap->radii_sq[child])
+            child++;
+        if (heap->radii_sq[child]<=r) break;
+        heap->indices[i] = heap->indices[child];
+        heap->radii_sq[i] = heap->radii_sq[child];
+        i = child;
+    }
+    heap->indices[i] = index;
+    heap->radii_sq[i] = r;
+}
+
+static void Heap_add(struct Heap* heap, long int index, float r)
+{
+    if (heap->count<heap->k)
+    {
+        /* sift up */
+        int i = heap->count;
+        heap->count++;
+        while (i>0)
+        {
+            const int parent = (i-1)/2;
+            if (heap->radii_sq[parent]>=r) break;
+            heap->indices[i] = heap->indices[parent];
+            heap->radii_sq[i] = heap->radii_sq[parent];
+            i = parent;
+        }
+        heap->indices[i] = index;
+        heap->radii_sq[i] = r;
+    }
+    else if (r<heap->radii_sq[0])
+    {
+        /* replace the furthest point */
+        heap->indices[0] = index;
+        heap->radii_sq[0] = r;
+        Heap_sift_down(heap, 0);
+    }
+}
+
+static void
+KDTree_nearest_query(struct KDTree* tree, struct Node *node, const float *center,
+                     struct Heap* heap)
+{
+    if (Node_is_leaf(node))
+    {
+        long int i;
+
+        for (i=node->_start; i<node->_end; i++)
+        {
+            struct DataPoint* data_point = tree->_data_point_list+i;
+            const float r = KDTree_dist((float*)center, data_point->_coord, tree->dim);
+            Heap_add(heap, data_point->_index, r);
+        }
+    }
+    else
+    {
+        const float d = center[node->_cut_dim]-node->_cut_value;
+        struct Node *near, *far;
+
+        if (d<=0)
+        {
+            near = node->_left;
+            far = node->_right;
+        }
+        else
+        {
+            near = node->_right;
+            far = node->_left;
+        }
+        KDTree_nearest_query(tree, near, center, heap);
+        /* the far side is at least |d| away */
+        if (heap->count<heap->k || d*d<=heap->radii_sq[0])
+            KDTree_nearest_query(tree, far, center, heap);
+    }
+}
+
+int
+KDTree_nearest_neighbors(struct KDTree* tree, const float *centers,
+                         long int nr_centers, int k, long int *indices,
+                         float *radii)
+{
+    /* The k nearest points to center i, closest first, are stored in
+     * indices[i*k] ... indices[i*k+k-1] (and their distances in radii).
+     * If there are fewer than k points, the rest are -1 (and infinity). */
+    long int i;
+    struct Heap heap;
+
+    heap.k = k;
+    heap.radii_sq = malloc(k*sizeof(float));
+    if (heap.radii_sq==NULL) return 0;
+
+    for (i=0; i<nr_centers; i++)
+    {
+        int j;
+
+        heap.indices = indices+i*k;
+        heap.count = 0;
+        KDTree_nearest_query(tree, tree->_root, centers+i*tree->dim, &heap);
+        for (j=heap.count; j<k; j++)
+        {
+            indices[i*k+j] = -1;
+            radii[i*k+j] = HUGE_VAL;
+        }
+        /* heap sort, putting the furthest point at the end each time */
+        for (j=heap.count-1; j>=0; j--)
+        {
+            const long int index = heap.indices[0];
+            const float r = heap.radii_sq[0];
+            heap.count = j;
+            if (j>0)
+            {
+                heap.indices[0] = heap.indices[j];
+                heap.radii_sq[0] = heap.radii_sq[j];
+                Heap_sift_down(&heap, 0);
+            }
+            heap.indices[j] = index;
+            radii[i*k+j] = sqrt(r);
+        }
+    }
+    free(heap.radii_sq);
+    return 1;
+}
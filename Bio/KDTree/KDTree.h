@@ -12,3 +12,6 @@ void KDTree_copy_indices(struct KDTree* tree, long *indices);
 void KDTree_copy_radii(struct KDTree* tree, float *radii);
 int KDTree_neighbor_search(struct KDTree* tree, float neighbor_radius, struct Neighbor** neighbors);
 int KDTree_neighbor_simple_search(struct KDTree* tree, float radius, struct Neighbor** neighbors);
+int KDTree_get_dim(struct KDTree* tree);
+int KDTree_search_centers_radius(struct KDTree* tree, const float *centers, long int nr_centers, float radius, long int *offsets, long int **indices, float **radii);
+int KDTree_nearest_neighbors(struct KDTree* tree, const float *centers, long int nr_centers, int k, long int *indices, float *radii);
@@ -14,7 +14,7 @@ Algorithms and Applications" (Mark de Berg, Marc van Kreveld, Mark Overmars,
 Otfried Schwarzkopf). Author: Thomas Hamelryck.
 """
 
-from numpy import sum, sqrt, array
+from numpy import sum, sqrt, array, asarray
 from numpy.random import random
 
 from Bio.KDTree import _CKDTree
@@ -219,6 +219,54 @@ class KDTree(object):
         """
         return [neighbor.radius for neighbor in self.neighbors]
 
+    # Batch searches
+
+    def search_many(self, centers, radius):
+        """Search all points within radius of each of several centers.
+
+        o centers - two dimensional NumPy array. E.g. if the points
+        have dimensionality D and there are M centers, the centers
+        array should be MxD dimensional.
+        o radius - float>0
+
+        Return three NumPy arrays (offsets, indices, radii) where the
+        indices and distances of the points within radius of center i
+        are indices[offsets[i]:offsets[i+1]] and radii[offsets[i]:offsets[i+1]]
+        (in no particular order).
+
+        Unlike search, this does not change the state of the tree (and
+        releases the GIL), so several threads can search the same tree
+        at once.
+        """
+        if not self.built:
+                raise Exception("No point set specified")
+        centers = asarray(centers)
+        if len(centers.shape) != 2 or centers.shape[1] != self.dim:
+                raise Exception("Expected a Mx%i NumPy array" % self.dim)
+        return self.kdt.search_centers_radius(centers, radius)
+
+    def nearest_neighbors(self, centers, k):
+        """Find the k nearest points to each of several centers.
+
+        o centers - two dimensional NumPy array. E.g. if the points
+        have dimensionality D and there are M centers, the centers
+        array should be MxD dimensional.
+        o k - int>0
+
+        Return two Mxk NumPy arrays (indices, radii) with the indices and
+        distances of the nearest points to each center, closest first. If
+        there are fewer than k points, the missing neighbors have index -1
+        and an infinite distance.
+
+        Like search_many, this can be used by several threads at once.
+        """
+        if not self.built:
+                raise Exception("No point set specified")
+        centers = asarray(centers)
+        if len(centers.shape) != 2 or centers.shape[1] != self.dim:
+                raise Exception("Expected a Mx%i NumPy array" % self.dim)
+        return self.kdt.nearest_neighbors(centers, k)
+
 if __name__ == "__main__":
 
     nr_points = 100000
@@ -173,6 +173,9 @@ static PyTypeObject PyNeighborType = {
 typedef struct {
     PyObject_HEAD
     struct KDTree* tree;
+    int built;
+    /* number of batch searches running without the GIL */
+    int searching;
 } PyTree;
 
 static void
@@ -262,6 +265,13 @@ PyTree_set_data(PyTree* self, PyObject* args)
 
     if(!PyArg_ParseTuple(args, "O:KDTree_set_data",&obj)) return NULL;
 
+    if (self->searching)
+    {
+        PyErr_SetString(PyExc_RuntimeError,
+                        "Cannot change the data during a search.");
+        return NULL;
+    }
+
     /* Check if it is an array */
     if (!PyArray_Check(obj))
     {
@@ -324,6 +334,7 @@ PyTree_set_data(PyTree* self, PyObject* args)
         PyErr_SetString (PyExc_MemoryError, "Failed to allocate memory for nodes.");
         return NULL;
     }
+    self->built = 1;
 
     Py_INCREF(Py_None);
     return Py_None;
@@ -596,6 +607,176 @@ static PyObject *PyTree_get_radii(PyTree *self)
 	return PyArray_Return(array);
 }
 
+static PyArrayObject*
+PyTree_get_centers(PyTree* self, PyObject* obj)
+{
+    /* Return the centers as a contiguous array of floats, or NULL */
+    PyArrayObject *array;
+
+    if (!self->built)
+    {
+        PyErr_SetString(PyExc_ValueError, "No point set specified.");
+        return NULL;
+    }
+    array = (PyArrayObject*) PyArray_FromAny(obj, PyArray_DescrFromType(NPY_FLOAT),
+                                             2, 2, NPY_IN_ARRAY | NPY_FORCECAST,
+                                             NULL);
+    if (!array) return NULL;
+    if (PyArray_DIM(array, 1) != KDTree_get_dim(self->tree))
+    {
+        PyErr_Format(PyExc_ValueError,
+                     "Centers should have %i coordinates.",
+                     KDTree_get_dim(self->tree));
+        Py_DECREF(array);
+        return NULL;
+    }
+    return array;
+}
+
+static char PyTree_search_centers_radius__doc__[] =
+"search_centers_radius(centers, radius) -> (offsets, indices, radii)\n"
+"\n"
+"Search the points within radius of each row of the centers array.\n"
+"The indices and distances of the points near center i are\n"
+"indices[offsets[i]:offsets[i+1]] and radii[offsets[i]:offsets[i+1]].\n"
+"The GIL is released during the search.\n";
+
+static PyObject*
+PyTree_search_centers_radius(PyTree* self, PyObject* args)
+{
+    PyObject *obj;
+    double radius;
+    PyArrayObject *centers;
+    PyArrayObject *offsets = NULL;
+    PyArrayObject *indices = NULL;
+    PyArrayObject *radii = NULL;
+    long int *index_data = NULL;
+    float *radius_data = NULL;
+    npy_intp n, count;
+    int ok;
+
+    if(!PyArg_ParseTuple(args, "Od:KDTree_search_centers_radius", &obj, &radius))
+        return NULL;
+
+    if(radius <= 0)
+    {
+        PyErr_SetString(PyExc_ValueError, "Radius must be positive.");
+        return NULL;
+    }
+
+    centers = PyTree_get_centers(self, obj);
+    if (!centers) return NULL;
+
+    n = PyArray_DIM(centers, 0) + 1;
+    offsets = (PyArrayObject*) PyArray_SimpleNew(1, &n, PyArray_LONG);
+    if (!offsets)
+    {
+        Py_DECREF(centers);
+        return NULL;
+    }
+
+    self->searching++;
+    Py_BEGIN_ALLOW_THREADS
+    ok = KDTree_search_centers_radius(self->tree,
+                                      (const float*) PyArray_BYTES(centers),
+                                      PyArray_DIM(centers, 0), radius,
+                                      (long int*) PyArray_BYTES(offsets),
+                                      &index_data, &radius_data);
+    Py_END_ALLOW_THREADS
+    self->searching--;
+    Py_DECREF(centers);
+
+    if (!ok)
+    {
+        Py_DECREF(offsets);
+        PyErr_SetString(PyExc_MemoryError, "Insufficient memory for calculation.");
+        return NULL;
+    }
+
+    count = ((long int*) PyArray_BYTES(offsets))[n-1];
+    indices = (PyArrayObject*) PyArray_SimpleNew(1, &count, PyArray_LONG);
+    radii = (PyArrayObject*) PyArray_SimpleNew(1, &count, PyArray_FLOAT);
+    if (indices && radii && count > 0)
+    {
+        memcpy(PyArray_BYTES(indices), index_data, count*sizeof(long int));
+        memcpy(PyArray_BYTES(radii), radius_data, count*sizeof(float));
+    }
+    if (index_data) free(index_data);
+    if (radius_data) free(radius_data);
+    if (!indices || !radii)
+    {
+        Py_DECREF(offsets);
+        Py_XDECREF(indices);
+        Py_XDECREF(radii);
+        return NULL;
+    }
+    return Py_BuildValue("NNN", offsets, indices, radii);
+}
+
+static char PyTree_nearest_neighbors__doc__[] =
+"nearest_neighbors(centers, k) -> (indices, radii)\n"
+"\n"
+"Find the k nearest points to each row of the centers array, as two\n"
+"arrays with one row per center (closest first). Missing neighbors (if\n"
+"there are fewer than k points) have index -1 and an infinite distance.\n"
+"The GIL is released during the search.\n";
+
+static PyObject*
+PyTree_nearest_neighbors(PyTree* self, PyObject* args)
+{
+    PyObject *obj;
+    int k;
+    PyArrayObject *centers;
+    PyArrayObject *indices;
+    PyArrayObject *radii;
+    npy_intp shape[2];
+    int ok;
+
+    if(!PyArg_ParseTuple(args, "Oi:KDTree_nearest_neighbors", &obj, &k))
+        return NULL;
+
+    if(k <= 0)
+    {
+        PyErr_SetString(PyExc_ValueError, "Number of neighbors must be positive.");
+        return NULL;
+    }
+
+    centers = PyTree_get_centers(self, obj);
+    if (!centers) return NULL;
+
+    shape[0] = PyArray_DIM(centers, 0);
+    shape[1] = k;
+    indices = (PyArrayObject*) PyArray_SimpleNew(2, shape, PyArray_LONG);
+    radii = (PyArrayObject*) PyArray_SimpleNew(2, shape, PyArray_FLOAT);
+    if (!indices || !radii)
+    {
+        Py_DECREF(centers);
+        Py_XDECREF(indices);
+        Py_XDECREF(radii);
+        return NULL;
+    }
+
+    self->searching++;
+    Py_BEGIN_ALLOW_THREADS
+    ok = KDTree_nearest_neighbors(self->tree,
+                                  (const float*) PyArray_BYTES(centers),
+                                  shape[0], k,
+                                  (long int*) PyArray_BYTES(indices),
+                                  (float*) PyArray_BYTES(radii));
+    Py_END_ALLOW_THREADS
+    self->searching--;
+    Py_DECREF(centers);
+
+    if (!ok)
+    {
+        Py_DECREF(indices);
+        Py_DECREF(radii);
+        PyErr_SetString(PyExc_MemoryError, "Insufficient memory for calculation.");
+        return NULL;
+    }
+    return Py_BuildValue("NN", indices, radii);
+}
+
 static PyMethodDef PyTree_methods[] = {
     {"get_count", (PyCFunction)PyTree_get_count, METH_NOARGS, NULL},
     {"set_data", (PyCFunction)PyTree_set_data, METH_VARARGS, NULL},
@@ -605,6 +786,8 @@ static PyMethodDef PyTree_methods[] = {
     {"neighbor_simple_search", (PyCFunction)PyTree_neighbor_simple_search, METH_VARARGS, NULL},
     {"get_indices", (PyCFunction)PyTree_get_indices, METH_NOARGS, PyTree_get_indices__doc__},
     {"get_radii", (PyCFunction)PyTree_get_radii, METH_NOARGS, PyTree_get_radii__doc__},
+    {"search_centers_radius", (PyCFunction)PyTree_search_centers_radius, METH_VARARGS, PyTree_search_centers_radius__doc__},
+    {"nearest_neighbors", (PyCFunction)PyTree_nearest_neighbors, METH_VARARGS, PyTree_nearest_neighbors__doc__},
     {NULL}  /* Sentinel */
 };
 
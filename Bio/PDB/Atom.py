@@ -16,6 +16,10 @@ from Bio.Data import IUPACData
 
 
 class Atom(object):
+    # Set by Bio.PDB.CoordinateStore when the coordinates are packed
+    _coord_store=None
+    _coord_index=None
+
     def __init__(self, name, coord, bfactor, occupancy, altloc, fullname, serial_number,
                  element=None):
         """
@@ -133,15 +137,23 @@ class Atom(object):
 
     def set_bfactor(self, bfactor):
         self.bfactor=bfactor
+        if self._coord_store is not None:
+            self._coord_store.bfactors[self._coord_index]=bfactor
 
     def set_coord(self, coord):
-        self.coord=coord
+        if self._coord_store is not None:
+            # Keep using the row of the CoordinateStore array
+            self.coord[:]=coord
+        else:
+            self.coord=coord
 
     def set_altloc(self, altloc):
         self.altloc=altloc
 
     def set_occupancy(self, occupancy):
         self.occupancy=occupancy
+        if self._coord_store is not None:
+            self._coord_store.occupancies[self._coord_index]=occupancy
 
     def set_sigatm(self, sigatm_array):
         """
@@ -272,7 +284,7 @@ class Atom(object):
         @param tran: the translation vector
         @type tran: size 3 Numeric array
         """
-        self.coord=numpy.dot(self.coord, rot)+tran
+        self.set_coord(numpy.dot(self.coord, rot)+tran)
 
     def get_vector(self):
         """
@@ -292,6 +304,9 @@ class Atom(object):
         # Do a shallow copy then explicitly copy what needs to be deeper.
         shallow = copy.copy(self)
         shallow.detach_parent()
+        # The copy does not share the CoordinateStore (if any)
+        shallow._coord_store=None
+        shallow._coord_index=None
         shallow.set_coord(copy.copy(self.get_coord()))
         shallow.xtra = self.xtra.copy()
         return shallow
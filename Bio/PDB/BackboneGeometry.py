@@ -0,0 +1,201 @@
+# Copyright 2013 by the Biopython contributors.
+# All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Backbone angles and C-alpha distances of a polypeptide, using NumPy.
+
+The N, CA and C coordinates of the residues are taken once, as arrays,
+and all the angles are then calculated together (rather than one residue
+at a time with Vector objects, as calc_dihedral and calc_angle do):
+
+    >>> from Bio.PDB.PDBParser import PDBParser
+    >>> from Bio.PDB.Polypeptide import PPBuilder
+    >>> structure = PDBParser().get_structure("2BEG", "PDB/2BEG.pdb")
+    >>> pp = PPBuilder().build_peptides(structure)[0]
+    >>> geometry = BackboneGeometry(pp)
+    >>> len(geometry)
+    26
+    >>> phi = numpy.degrees(geometry.get_phi())
+    >>> print "%0.1f %0.1f" % (phi[1], phi[2])
+    -105.3 -127.7
+    >>> distances = geometry.get_ca_distances()
+    >>> distances.shape
+    (26, 26)
+    >>> print "%0.1f" % distances[0, 1]
+    3.8
+
+The angles are in radians (like those of calc_dihedral and calc_angle),
+with NaN for those which are undefined (e.g. phi of the first residue) or
+which use a missing atom.
+"""
+
+import numpy
+
+
+def calc_dihedrals(p1, p2, p3, p4):
+    """
+    Calculate the dihedral angles of many sets of 4 connected points.
+
+    The angles are in [-pi, pi], as from calc_dihedral in Bio.PDB.Vector.
+
+    @param p1, p2, p3, p4: the coordinates of the points (one row per angle)
+    @type p1, p2, p3, p4: N x 3 NumPy arrays
+
+    @return: the dihedral angles
+    @rtype: NumPy array of N values
+    """
+    b1 = numpy.asarray(p1, float) - p2
+    b2 = numpy.asarray(p3, float) - p2
+    b3 = numpy.asarray(p4, float) - p3
+    # Project the outer bonds onto the plane perpendicular to the middle bond
+    b2 = b2 / numpy.sqrt((b2 * b2).sum(axis=-1))[..., numpy.newaxis]
+    v = b1 - (b1 * b2).sum(axis=-1)[..., numpy.newaxis] * b2
+    w = b3 - (b3 * b2).sum(axis=-1)[..., numpy.newaxis] * b2
+    x = (v * w).sum(axis=-1)
+    y = (numpy.cross(b2, v) * w).sum(axis=-1)
+    return numpy.arctan2(y, x)
+
+
+def calc_angles(p1, p2, p3):
+    """
+    Calculate the angles of many sets of 3 connected points.
+
+    @param p1, p2, p3: the coordinates of the points (one row per angle)
+    @type p1, p2, p3: N x 3 NumPy arrays
+
+    @return: the angles (at the middle points)
+    @rtype: NumPy array of N values
+    """
+    v1 = numpy.asarray(p1, float) - p2
+    v3 = numpy.asarray(p3, float) - p2
+    cos = (v1 * v3).sum(axis=-1) / numpy.sqrt((v1 * v1).sum(axis=-1)
+                                              * (v3 * v3).sum(axis=-1))
+    return numpy.arccos(numpy.clip(cos, -1.0, 1.0))
+
+
+class BackboneGeometry(object):
+    """
+    Backbone geometry of a list of consecutive residues (e.g. a Polypeptide).
+
+    Attributes:
+     - residues - the list of residues.
+     - n        - N x 3 NumPy array of the N coordinates.
+     - ca       - N x 3 NumPy array of the CA coordinates.
+     - c        - N x 3 NumPy array of the C coordinates.
+
+    Missing atoms have NaN coordinates.  The residues are assumed to be
+    connected, so for a chain with gaps use the polypeptides from PPBuilder.
+    The angle arrays have one value for each residue, and are in radians.
+    """
+    def __init__(self, residues):
+        """
+        @param residues: the residues, in order
+        @type residues: L{Polypeptide}, L{Chain} or list of L{Residue}
+        """
+        residues = list(residues)
+        coords = numpy.empty((3, len(residues), 3))
+        coords.fill(numpy.nan)
+        for i, residue in enumerate(residues):
+            # Not using child_dict, which is wrong for a DisorderedResidue
+            for j, name in enumerate(("N", "CA", "C")):
+                if name in residue:
+                    coords[j, i] = residue[name].get_coord()
+        self.residues = residues
+        self.n, self.ca, self.c = coords
+
+    def __repr__(self):
+        return "<BackboneGeometry of %i residues>" % len(self.residues)
+
+    def __len__(self):
+        "Return the number of residues."
+        return len(self.residues)
+
+    def _per_residue(self, values, start):
+        """Put values in an array of one per residue, from start (PRIVATE)."""
+        result = numpy.empty(len(self.residues))
+        result.fill(numpy.nan)
+        result[start:start + len(values)] = values
+        return result
+
+    def get_phi(self):
+        """Return the phi angles (C of the previous residue, N, CA, C)."""
+        return self._per_residue(calc_dihedrals(self.c[:-1], self.n[1:],
+                                                self.ca[1:], self.c[1:]), 1)
+
+    def get_psi(self):
+        """Return the psi angles (N, CA, C, N of the next residue)."""
+        return self._per_residue(calc_dihedrals(self.n[:-1], self.ca[:-1],
+                                                self.c[:-1], self.n[1:]), 0)
+
+    def get_omega(self):
+        """Return the omega angles (CA, C, N and CA of the next residue).
+
+        This is the angle of the peptide bond to the next residue, which
+        is close to pi for a trans and 0 for a cis peptide bond.
+        """
+        return self._per_residue(calc_dihedrals(self.ca[:-1], self.c[:-1],
+                                                self.n[1:], self.ca[1:]), 0)
+
+    def get_tau(self):
+        """Return the tau torsion angles of 4 consecutive CA atoms.
+
+        Residue i has the angle of the CA atoms of residues i-2 to i+1,
+        as stored in the xtra attribute by the get_tau_list method of
+        the Polypeptide class.
+        """
+        ca = self.ca
+        return self._per_residue(calc_dihedrals(ca[:-3], ca[1:-2], ca[2:-1],
+                                                ca[3:]), 2)
+
+    def get_theta(self):
+        """Return the theta angles of 3 consecutive CA atoms.
+
+        Residue i has the angle of the CA atoms of residues i-1 to i+1.
+        """
+        ca = self.ca
+        return self._per_residue(calc_angles(ca[:-2], ca[1:-1], ca[2:]), 1)
+
+    def get_ca_distances(self, other=None):
+        """Return the distances between the CA atoms of each pair of residues.
+
+        @param other: optionally, the geometry of another chain, giving the
+        distances between the residues of this chain and that one
+        @type other: L{BackboneGeometry}
+
+        @return: the distance matrix, with a row for each residue (and a
+        column for each residue of the other chain)
+        @rtype: NumPy array
+        """
+        if other is None:
+            other = self
+        # One axis at a time, to avoid an N x N x 3 array
+        squared = numpy.zeros((len(self.ca), len(other.ca)))
+        for axis in range(3):
+            diff = numpy.subtract.outer(self.ca[:, axis], other.ca[:, axis])
+            squared += diff * diff
+        return numpy.sqrt(squared)
+
+    def get_contact_map(self, radius=8.0, other=None):
+        """Return which pairs of residues have their CA atoms within radius.
+
+        @param radius: the largest CA distance of a contact
+        @type radius: float
+
+        @param other: optionally, the geometry of another chain
+        @type other: L{BackboneGeometry}
+
+        @return: the contact map (as for get_ca_distances)
+        @rtype: NumPy array of booleans
+
+        Residues without a CA atom have no contacts.
+        """
+        distances = self.get_ca_distances(other)
+        distances[numpy.isnan(distances)] = numpy.inf
+        return distances <= radius
+
+
+if __name__ == "__main__":
+    from Bio._utils import run_doctest
+    run_doctest()
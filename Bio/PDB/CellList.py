@@ -0,0 +1,284 @@
+# Copyright 2013 by the Biopython contributors.
+# All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Fixed radius neighbor search using a grid of cells (cell list).
+
+The points are sorted into cubic cells at least as wide as the search
+radius, so the neighbors of a point can only be in its own cell or one of
+the 26 cells around it.  Everything is done with NumPy arrays (without the
+Bio.KDTree C++ module), and the results are arrays of indices into the
+coordinate array, e.g. for all the atom pairs within 2 Angstrom of each
+other:
+
+    >>> from Bio.PDB.PDBParser import PDBParser
+    >>> structure = PDBParser().get_structure("1A8O", "PDB/1A8O.pdb")
+    >>> atoms = list(structure.get_atoms())
+    >>> cells = CellList(numpy.array([a.get_coord() for a in atoms]))
+    >>> pairs = cells.search_all(2.0)
+    >>> pairs.shape
+    (565, 2)
+    >>> i, j = pairs[0]
+    >>> print atoms[i].get_id(), atoms[j].get_id()
+    N CA
+
+For a simulation in a periodic box, give the lengths of the (rectangular)
+box, and the distances follow the minimum image convention.
+"""
+
+import numpy
+
+from Bio._utils import bincount
+
+
+class CellList(object):
+    """Fixed radius neighbor search of a set of points, using NumPy.
+
+    Attributes:
+     - coords - N x 3 NumPy array of the point coordinates (for a periodic
+                box, wrapped into the box).
+     - box    - NumPy array of the box lengths, or None.
+
+    The grid of cells depends on the search radius, and is made (in
+    O(N log N) time) the first time each radius is used, then kept for
+    further searches with the same radius.
+    """
+    def __init__(self, coords, box=None):
+        """Create the cell list.
+
+        Arguments:
+         - coords - N x 3 NumPy array (or list) of coordinates.
+         - box    - optional lengths of a rectangular periodic box, with a
+                    corner at the origin (e.g. the unit cell of a simulation).
+        """
+        coords = numpy.array(coords, float)
+        if coords.size == 0:
+            coords = coords.reshape((0, 3))
+        if coords.ndim != 2 or coords.shape[1] != 3:
+            raise ValueError("Expected a Nx3 array of coordinates")
+        if box is not None:
+            box = numpy.array(box, float)
+            if box.shape != (3,) or (box <= 0).any():
+                raise ValueError("Expected three positive box lengths")
+            coords = coords % box
+        self.coords = coords
+        self.box = box
+        self._grid = None
+
+    def __repr__(self):
+        return "<CellList of %i points>" % len(self.coords)
+
+    def __len__(self):
+        "Return the number of points."
+        return len(self.coords)
+
+    # Private methods
+
+    def _get_grid(self, radius):
+        """Sort the points into cells of at least the radius (PRIVATE).
+
+        Returns the cell size, the number of cells along each axis, the
+        cell of each point (as three integers), the sorted flat cell numbers,
+        the points in that order, and (unless the grid is very sparse) arrays
+        of the first position and number of points of each cell in that
+        order.  The last grid is cached.
+        """
+        if radius <= 0:
+            raise ValueError("The radius should be positive")
+        if self._grid is not None and self._grid[0] == radius:
+            return self._grid[1]
+        coords = self.coords
+        if self.box is not None:
+            if (radius > 0.5 * self.box).any():
+                raise ValueError("The radius should be at most half the "
+                                 "length of each side of the box")
+            dims = numpy.maximum(numpy.floor(self.box / radius), 1).astype(int)
+            size = self.box / dims
+            cells = numpy.minimum((coords / size).astype(int), dims - 1)
+        else:
+            size = numpy.array([radius] * 3)
+            if len(coords):
+                origin = coords.min(axis=0)
+                cells = numpy.floor((coords - origin) / size).astype(int)
+                dims = cells.max(axis=0) + 1
+            else:
+                cells = numpy.zeros((0, 3), int)
+                dims = numpy.ones(3, int)
+        flat = self._flatten(cells, dims)
+        order = numpy.argsort(flat, kind="mergesort")
+        n_cells = numpy.prod(dims.astype(float))
+        if n_cells <= max(4 * len(coords), 2 ** 20):
+            counts = bincount(flat, minlength=int(n_cells))
+            starts = numpy.cumsum(counts) - counts
+            grid = (size, dims, cells, flat[order], order, starts, counts)
+        else:
+            # Too many empty cells to store, search the sorted cells instead
+            grid = (size, dims, cells, flat[order], order, None, None)
+        self._grid = (radius, grid)
+        return grid
+
+    def _flatten(self, cells, dims):
+        """Turn cell coordinates into single cell numbers (PRIVATE)."""
+        dims = dims.astype(numpy.int64)
+        return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    def _offsets(self, dims, half=False):
+        """Return the offsets of the neighboring cells (PRIVATE).
+
+        Each cell is only listed once, even if a periodic box is only one
+        or two cells wide.  With half=True, only one of each pair of opposite
+        offsets is given (and not the zero offset), so that each pair of
+        different cells is only found once, unless the periodic box is too
+        narrow (in which case None is returned).
+        """
+        axes = []
+        for n in dims:
+            if self.box is not None and n < 3:
+                if half:
+                    return None
+                axes.append(range(n))
+            else:
+                axes.append([-1, 0, 1])
+        offsets = [(i, j, k) for i in axes[0] for j in axes[1] for k in axes[2]]
+        if half:
+            offsets = [offset for offset in offsets if offset > (0, 0, 0)]
+        return offsets
+
+    def _candidates(self, query_cells, radius, offsets=None):
+        """Find the points in the cells around each query (PRIVATE).
+
+        Returns two arrays, the query number and the point number of each
+        candidate pair, with every point in the neighboring cells (by
+        default all of them) of the query's cell.
+        """
+        size, dims, cells, sorted_flat, order, cell_starts, cell_counts = \
+            self._get_grid(radius)
+        if offsets is None:
+            offsets = self._offsets(dims)
+        queries = []
+        points = []
+        for offset in offsets:
+            neighbors = query_cells + offset
+            query_index = numpy.arange(len(query_cells))
+            if self.box is not None:
+                neighbors %= dims
+            else:
+                inside = ((neighbors >= 0) & (neighbors < dims)).all(axis=1)
+                neighbors = neighbors[inside]
+                query_index = query_index[inside]
+            flat = self._flatten(neighbors, dims)
+            if cell_starts is not None:
+                starts = cell_starts[flat]
+                counts = cell_counts[flat]
+            else:
+                starts = numpy.searchsorted(sorted_flat, flat, "left")
+                counts = numpy.searchsorted(sorted_flat, flat, "right") - starts
+            total = counts.sum()
+            if not total:
+                continue
+            # For each query, the positions starts ... starts + counts - 1
+            # of the sorted points
+            first = numpy.cumsum(counts) - counts
+            positions = numpy.arange(total) - numpy.repeat(first - starts,
+                                                           counts)
+            queries.append(numpy.repeat(query_index, counts))
+            points.append(order[positions])
+        if not queries:
+            return numpy.zeros(0, int), numpy.zeros(0, int)
+        return numpy.concatenate(queries), numpy.concatenate(points)
+
+    def _distances(self, a, b):
+        """Distances between rows of two coordinate arrays (PRIVATE)."""
+        diff = a - b
+        if self.box is not None:
+            diff -= self.box * numpy.round(diff / self.box)
+        return numpy.sqrt((diff * diff).sum(axis=1))
+
+    def _cells(self, coords, radius):
+        """Return the cells of some coordinates (PRIVATE).
+
+        Points outside the grid (without a periodic box) are put in the
+        nearest cell just outside it, where they can still have neighbors.
+        """
+        size, dims = self._get_grid(radius)[:2]
+        if self.box is not None:
+            coords = coords % self.box
+            return numpy.minimum((coords / size).astype(int), dims - 1)
+        if len(self.coords):
+            origin = self.coords.min(axis=0)
+        else:
+            origin = numpy.zeros(3)
+        cells = numpy.floor((coords - origin) / size)
+        return numpy.clip(cells, -1, dims).astype(int)
+
+    # Public methods
+
+    def search(self, center, radius, distances=False):
+        """Return the indices of the points within radius of center.
+
+        Arguments:
+         - center    - NumPy array of the three coordinates.
+         - radius    - float (>0).
+         - distances - if True, also return an array of the distances.
+
+        The indices are sorted, and form a NumPy array.
+        """
+        center = numpy.array(center, float)
+        if center.shape != (3,):
+            raise ValueError("Expected a 3-dimensional center")
+        query_cells = self._cells(center.reshape((1, 3)), radius)
+        points = self._candidates(query_cells, radius)[1]
+        d = self._distances(self.coords[points], center)
+        close = d <= radius
+        points = points[close]
+        order = numpy.argsort(points)
+        if distances:
+            return points[order], d[close][order]
+        return points[order]
+
+    def search_all(self, radius, distances=False):
+        """Return the pairs of points within radius of each other.
+
+        Arguments:
+         - radius    - float (>0).
+         - distances - if True, also return an array of the distances.
+
+        The pairs form an M x 2 NumPy array of indices, where the first index
+        of each pair is less than the second, sorted by the first and then
+        the second index.
+        """
+        size, dims, query_cells = self._get_grid(radius)[:3]
+        offsets = self._offsets(dims, half=True)
+        if offsets is None:
+            # Check every neighboring cell, and drop the repeated pairs
+            first, second = self._candidates(query_cells, radius)
+            keep = first < second
+            first = first[keep]
+            second = second[keep]
+        else:
+            # Pairs within a cell are found in both orders
+            first, second = self._candidates(query_cells, radius, [(0, 0, 0)])
+            keep = first < second
+            # Pairs in different cells are found once, in either order
+            other_first, other_second = self._candidates(query_cells, radius,
+                                                         offsets)
+            first = numpy.concatenate((first[keep],
+                                       numpy.minimum(other_first, other_second)))
+            second = numpy.concatenate((second[keep],
+                                        numpy.maximum(other_first, other_second)))
+        d = self._distances(self.coords[first], self.coords[second])
+        close = d <= radius
+        first = first[close]
+        second = second[close]
+        order = numpy.argsort(first * numpy.int64(len(self.coords)) + second)
+        pairs = numpy.column_stack((first[order], second[order]))
+        if distances:
+            return pairs, d[close][order]
+        return pairs
+
+
+if __name__ == "__main__":
+    from Bio._utils import run_doctest
+    run_doctest()
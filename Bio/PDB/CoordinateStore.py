@@ -0,0 +1,160 @@
+# Copyright 2013 by the Biopython contributors.
+# All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Contiguous coordinate arrays for the atoms of a structure.
+
+Normally every Atom object holds its own small NumPy array of coordinates,
+so any calculation over a whole structure has to gather these one atom at
+a time in Python.  Calling the pack_coords method of an Entity (e.g. a
+Structure or Model) instead stores the coordinates of all its atoms in one
+N x 3 array, with each Atom's coord attribute a view of its row:
+
+    >>> from Bio.PDB.PDBParser import PDBParser
+    >>> structure = PDBParser().get_structure("1A8O", "PDB/1A8O.pdb")
+    >>> store = structure.pack_coords()
+    >>> len(store)
+    644
+    >>> store.coords.shape
+    (644, 3)
+    >>> atom = store[0]
+    >>> print atom.get_id(), atom.get_coord().tolist() == store.coords[0].tolist()
+    N True
+
+Changing the array changes the atoms, and the other way round:
+
+    >>> store.coords[0] += 1.0
+    >>> atom.get_coord().tolist() == store.coords[0].tolist()
+    True
+
+Transforming the packed entity (e.g. after a superposition) is then a single
+NumPy operation, and a CoordinateStore can be given to the Superimposer and
+NeighborSearch classes in place of a list of atoms, avoiding gathering the
+coordinates again.
+
+The store also holds arrays of the B factors and occupancies, which are kept
+up to date by the Atom set_bfactor and set_occupancy methods.
+"""
+
+import numpy
+
+
+class CoordinateStore(object):
+    """Coordinates, B factors and occupancies of a list of atoms as arrays.
+
+    Attributes:
+     - atoms       - list of the Atom objects (for disordered atoms, the
+                     currently selected Atom).
+     - coords      - N x 3 NumPy array of the coordinates, where the coord
+                     attribute of each Atom is a view of its row.
+     - bfactors    - NumPy array of the B factors.
+     - occupancies - NumPy array of the occupancies.
+     - entity      - the Entity which was packed (or None).
+
+    The store acts as a (read only) list of the atoms, so it can be used in
+    place of a list of atoms.  It is normally made using the pack_coords
+    method of an Entity.  Adding or removing atoms (or residues, chains,
+    etc) from the packed Entity makes the store out of date (see the valid
+    attribute), although each atom still uses the same coordinate array.
+    """
+    def __init__(self, atoms, entity=None):
+        """Create the arrays, and make each atom use them.
+
+        Arguments:
+         - atoms  - list of Atom (or DisorderedAtom) objects.
+         - entity - optional Entity which contains these atoms.
+        """
+        atoms = [self._get_atom(a) for a in atoms]
+        if atoms:
+            coords = numpy.array([a.coord for a in atoms])
+        else:
+            coords = numpy.zeros((0, 3), "f")
+        if coords.shape != (len(atoms), 3):
+            raise ValueError("Atom coordinates should be 3D")
+        self.atoms = atoms
+        self.coords = coords
+        self.bfactors = numpy.array([a.bfactor for a in atoms], float)
+        self.occupancies = numpy.array([a.occupancy for a in atoms], float)
+        self.entity = entity
+        self.valid = True
+        for i, atom in enumerate(atoms):
+            if atom._coord_store is not None:
+                #Packed again, e.g. as part of a larger entity
+                atom._coord_store.invalidate()
+            atom._coord_store = self
+            atom._coord_index = i
+            atom.coord = coords[i]
+
+    def _get_atom(self, atom):
+        """Return the selected Atom of a DisorderedAtom (PRIVATE)."""
+        if atom.is_disordered() == 2:
+            return atom.disordered_get()
+        return atom
+
+    # Special methods
+
+    def __repr__(self):
+        return "<CoordinateStore of %i atoms>" % len(self.atoms)
+
+    def __len__(self):
+        "Return the number of atoms."
+        return len(self.atoms)
+
+    def __getitem__(self, index):
+        "Return an atom (or a list of atoms for a slice)."
+        return self.atoms[index]
+
+    def __iter__(self):
+        "Iterate over the atoms."
+        return iter(self.atoms)
+
+    # Public methods
+
+    def invalidate(self):
+        """Mark the store as out of date.
+
+        This is called when atoms are added to or removed from the packed
+        entity, so that it no longer uses the store for transformations.
+        """
+        self.valid = False
+
+    def get_indices(self, atoms):
+        """Return an array of the row numbers for a list of atoms.
+
+        Raises a ValueError if any of the atoms is not in this store.
+        """
+        indices = []
+        for atom in atoms:
+            atom = self._get_atom(atom)
+            if getattr(atom, "_coord_store", None) is not self:
+                raise ValueError("%r is not in this CoordinateStore" % atom)
+            indices.append(atom._coord_index)
+        return numpy.array(indices, int)
+
+    def transform(self, rot, tran):
+        """
+        Apply rotation and translation to all the coordinates (in place).
+
+        @param rot: A right multiplying rotation matrix
+        @type rot: 3x3 Numeric array
+
+        @param tran: the translation vector
+        @type tran: size 3 Numeric array
+        """
+        self.coords[:] = numpy.dot(self.coords, rot) + tran
+
+    def center_of_mass(self):
+        """Return the center of mass of the atoms (as a NumPy array).
+
+        Atoms with an unknown element (and therefore mass) are ignored.
+        """
+        masses = numpy.array([a.mass for a in self.atoms], float)
+        known = ~numpy.isnan(masses)
+        return numpy.dot(masses[known], self.coords[known]) / masses[known].sum()
+
+
+if __name__ == "__main__":
+    from Bio._utils import run_doctest
+    run_doctest()
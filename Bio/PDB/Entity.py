@@ -18,6 +18,9 @@ class Entity(object):
     Basic container object. Structure, Model, Chain and Residue
     are subclasses of Entity. It deals with storage and lookup.
     """
+    # Set by pack_coords
+    _coord_store=None
+
     def __init__(self, id):
         self.id=id
         self.full_id=None
@@ -71,8 +74,15 @@ class Entity(object):
         "Detach the parent."
         self.parent=None
 
+    def _invalidate_coords(self):
+        "Mark the packed coordinates (if any) as out of date (PRIVATE)."
+        if self._coord_store is not None:
+            self._coord_store.invalidate()
+            self._coord_store=None
+
     def detach_child(self, id):
         "Remove a child."
+        self._invalidate_coords()
         child=self.child_dict[id]
         child.detach_parent()
         del self.child_dict[id]
@@ -84,6 +94,7 @@ class Entity(object):
         if self.has_id(entity_id):
             raise PDBConstructionException(
                 "%s defined twice" % str(entity_id))
+        self._invalidate_coords()
         entity.set_parent(self)
         self.child_list.append(entity)
         self.child_dict[entity_id]=entity
@@ -94,6 +105,7 @@ class Entity(object):
         if self.has_id(entity_id):
             raise PDBConstructionException(
                 "%s defined twice" % str(entity_id))
+        self._invalidate_coords()
         entity.set_parent(self)
         self.child_list[pos:pos] = [entity]
         self.child_dict[entity_id]=entity
@@ -166,9 +178,58 @@ class Entity(object):
         @param tran: the translation vector
         @type tran: size 3 Numeric array
         """
+        store=self._coord_store
+        if store is not None and store.valid and store.entity is self:
+            store.transform(rot, tran)
+            return
         for o in self.get_list():
             o.transform(rot, tran)
 
+    def _collect_atoms(self, atoms, entities):
+        "Add the atoms and entities below this one to the lists (PRIVATE)."
+        entities.append(self)
+        for child in self:
+            if child.get_level()=="A":
+                atoms.append(child)
+            else:
+                child._collect_atoms(atoms, entities)
+
+    def pack_coords(self):
+        """Store the coordinates of all the atoms in contiguous arrays.
+
+        Returns a Bio.PDB.CoordinateStore.CoordinateStore object, with the
+        coordinates as an N x 3 NumPy array (and arrays of the B factors
+        and occupancies).  The coord attribute of each Atom becomes a view
+        of a row of this array, so changes to one are seen in the other.
+        For disordered atoms and residues only the selected child is
+        packed.
+
+        The transform method of this Entity then acts on the whole array
+        at once.  Adding or removing children (at any level) makes the
+        store out of date, and you should call pack_coords again.
+        """
+        from Bio.PDB.CoordinateStore import CoordinateStore
+        atoms=[]
+        entities=[]
+        self._collect_atoms(atoms, entities)
+        store=CoordinateStore(atoms, self)
+        for entity in entities:
+            entity._coord_store=store
+        return store
+
+    def get_coord_store(self):
+        """Return the CoordinateStore holding this Entity's atoms, or None.
+
+        This is the store made by pack_coords (called on this Entity or one
+        of its parents).  None is returned if the coordinates were never
+        packed, or the store is out of date because children were added or
+        removed.
+        """
+        store=self._coord_store
+        if store is None or not store.valid:
+            return None
+        return store
+
     def copy(self):
         shallow = copy(self)
 
@@ -177,6 +238,8 @@ class Entity(object):
         shallow.xtra = copy(self.xtra)
 
         shallow.detach_parent()
+        # The copy does not share the packed coordinates (if any)
+        shallow._coord_store=None
 
         for child in self.child_list:
             shallow.add(child.copy())
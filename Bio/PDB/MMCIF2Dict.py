@@ -5,60 +5,153 @@
 
 """Turn an mmCIF file into a dictionary."""
 
-import shlex
+# For using with statement in Python 2.5 or Jython
+from __future__ import with_statement
+
+import re
+
+from Bio.File import as_handle
+
+# Quoted strings end at a matching quote followed by white space, so
+# e.g. 'O5'' is not valid but 'it's' is. Other tokens end at white space,
+# and a comment runs to the end of the line.
+_token_re = re.compile(r"""'(.*?)'(?=\s|$)|"(.*?)"(?=\s|$)|(#.*)|(\S+)""")
+
+
+def _tokenize_line(line):
+    """Split a line into (token, quoted) tuples (PRIVATE)."""
+    if "'" not in line and '"' not in line and "#" not in line:
+        return [(token, False) for token in line.split()]
+    tokens = []
+    for single, double, comment, plain in _token_re.findall(line):
+        if plain:
+            tokens.append((plain, False))
+        elif comment:
+            break
+        elif single:
+            tokens.append((single, True))
+        else:
+            # Could be an empty quoted string
+            tokens.append((double, True))
+    return tokens
+
 
 class MMCIF2Dict(dict):
 
-    def __init__(self, filename):
-        handle = open(filename)
-        loop_flag = False
+    def __init__(self, filename, categories=None):
+        """Parse an mmCIF file into a dictionary.
+
+        Arguments:
+        o filename - name of the mmCIF file OR an open filehandle
+        o categories - optional list of the categories to keep (e.g.
+        ["_atom_site", "_cell"]), where the rest of the file is skipped
+        as quickly as possible. By default all categories are kept.
+
+        Each tag (e.g. _cell.length_a) is mapped to its value, or for a
+        loop (e.g. _atom_site.Cartn_x) to the list of values in its column.
+        The name of the data block (e.g. 1ABC) is stored as "data_".
+        """
+        if categories is not None:
+            categories = frozenset(categories)
+        self._categories = categories
+        with as_handle(filename) as handle:
+            self._parse(handle)
+
+    def _keep(self, tag):
+        "Check if a tag is in one of the chosen categories (PRIVATE)."
+        return self._categories is None or \
+            tag.split(".", 1)[0] in self._categories
+
+    def _parse(self, handle):
+        """Read the file, storing the values (PRIVATE).
+
+        This is a state machine working a line at a time, where the
+        values in the body of a loop are collected in one list (without
+        looking at each token unless the line contains anything special)
+        and split into columns at the end of the loop.
+        """
+        # Tag waiting for its value
         key = None
-        tokens = self._tokenize(handle)
-        token = tokens.next()
-        self[token[0:5]]=token[5:]
-        for token in tokens:
-            if token=="loop_":
-                loop_flag = True
-                keys = []
-                i = 0
-                n = 0
+        # Tags and values of the current loop (if any)
+        loop_keys = None
+        loop_values = None
+        # Have we reached the values of the loop? Are they wanted?
+        in_loop_body = False
+        keep_loop = False
+        lines = iter(handle)
+        for line in lines:
+            if line[0] == ";":
+                # Multi-line text field, which ends with a ';' line
+                text = line[1:].strip()
+                for line in lines:
+                    if line[0] == ";":
+                        break
+                    text += line.strip()
+                else:
+                    raise ValueError("Unterminated text field")
+                tokens = [(text, True)]
+                # Anything after the closing ';' is tokenized
+                tokens.extend(_tokenize_line(line[1:]))
+            elif in_loop_body and "_" not in line and "'" not in line \
+                    and '"' not in line and "#" not in line:
+                # The body of a loop, with no tags or special tokens
+                if keep_loop:
+                    loop_values.extend(line.split())
                 continue
-            elif loop_flag:
-                if token.startswith("_"):
-                    if i > 0:
-                        loop_flag = False
-                    else:
-                        self[token] = []
-                        keys.append(token)
-                        n += 1
+            else:
+                tokens = _tokenize_line(line)
+            for token, quoted in tokens:
+                if not quoted and token[0] == "_":
+                    if loop_keys is not None and not in_loop_body:
+                        # Loop header
+                        loop_keys.append(token)
                         continue
+                    if keep_loop:
+                        self._store_loop(loop_keys, loop_values)
+                    loop_keys = loop_values = None
+                    in_loop_body = keep_loop = False
+                    if key is not None:
+                        raise ValueError("Missing value for %s" % key)
+                    key = token
+                elif not quoted and token.lower() == "loop_":
+                    if keep_loop:
+                        self._store_loop(loop_keys, loop_values)
+                    loop_keys = []
+                    loop_values = []
+                    in_loop_body = keep_loop = False
+                elif not quoted and token.lower().startswith("data_"):
+                    if keep_loop:
+                        self._store_loop(loop_keys, loop_values)
+                    loop_keys = loop_values = None
+                    in_loop_body = keep_loop = False
+                    self["data_"] = token[5:]
+                elif key is not None:
+                    if self._keep(key):
+                        self[key] = token
+                    key = None
+                elif loop_keys:
+                    if not in_loop_body:
+                        # First value, so we know all the loop's tags
+                        in_loop_body = True
+                        keep_loop = any(self._keep(k) for k in loop_keys)
+                    if keep_loop:
+                        loop_values.append(token)
                 else:
-                    self[keys[i%n]].append(token)
-                    i+=1
-                    continue
-            if key is None:
-                key = token
-            else:
-                self[key] = token
-                key = None
-        handle.close()
+                    raise ValueError("Unexpected value %r" % token)
+        if keep_loop:
+            self._store_loop(loop_keys, loop_values)
+        if key is not None:
+            raise ValueError("Missing value for %s" % key)
 
-    def _tokenize(self, handle):
-        for line in handle:
-            if line.startswith("#"):
-                continue
-            elif line.startswith(";"):
-                token = line[1:].strip()
-                for line in handle:
-                    line = line.strip()
-                    if line==';':
-                        break
-                    token += line
-                yield token
-            else:
-                tokens = shlex.split(line)
-                for token in tokens:
-                    yield token
+    def _store_loop(self, keys, values):
+        """Store the values of a loop as a list per tag (PRIVATE)."""
+        n = len(keys)
+        if len(values) % n:
+            raise ValueError("Loop of %s has %i values, not a multiple of %i"
+                             % (keys[0], len(values), n))
+        for i, key in enumerate(keys):
+            if self._keep(key):
+                self[key] = values[i::n]
 
 
 if __name__=="__main__":
@@ -5,11 +5,17 @@
 
 """mmCIF parser"""
 
+# For using with statement in Python 2.5 or Jython
+from __future__ import with_statement
+
+import itertools
 from string import ascii_letters
 
 import numpy
 
-from Bio.PDB.MMCIF2Dict import MMCIF2Dict
+from Bio.File import as_handle
+
+from Bio.PDB.MMCIF2Dict import MMCIF2Dict, _tokenize_line
 from Bio.PDB.StructureBuilder import StructureBuilder
 from Bio.PDB.PDBExceptions import PDBConstructionException
 
@@ -21,7 +27,157 @@ class MMCIFParser(object):
         self._build_structure(structure_id)
         return self._structure_builder.get_structure()
 
-    def _build_structure(self, structure_id):
+    def parse_models(self, structure_id, filename):
+        """Iterate over the models in the mmCIF file, parsing one at a time.
+
+        Arguments:
+        o structure_id - string, the id that will be used for the structure
+        o filename - name of the mmCIF file OR an open filehandle
+
+        This reads the _atom_site loop a model at a time (using the
+        _atom_site.pdbx_PDB_model_num column), so even a long trajectory
+        of many models needs only enough memory for one of them. Each
+        Model belongs to its own Structure object, containing just that
+        model. Categories after the _atom_site loop are not read.
+        """
+        model_id = 0
+        for mmcif_dict in self._atom_site_models(filename):
+            self._mmcif_dict = mmcif_dict
+            self._structure_builder = StructureBuilder()
+            self._build_structure(structure_id, model_id)
+            for model in self._structure_builder.get_structure():
+                model_id += 1
+                yield model
+
+    def parse_coords(self, filename):
+        """Iterate over the coordinates of each model in the mmCIF file.
+
+        Arguments:
+        o filename - name of the mmCIF file OR an open filehandle
+
+        This is for files where every model has the same atoms, such as
+        a molecular dynamics trajectory or NMR ensemble, and avoids making
+        any Atom objects. Each model gives an N x 3 NumPy array (of type
+        float32, like the coordinates of an Atom), with one row for each
+        row of the _atom_site loop in the order they are in the file.
+
+        A PDBConstructionException is raised if a model's atoms do not
+        match the first model (by atom name, alternative location,
+        residue name, chain and sequence number).
+        """
+        topology = None
+        for mmcif_dict in self._atom_site_models(filename):
+            if "_atom_site.auth_seq_id" in mmcif_dict:
+                seq_id_list = mmcif_dict["_atom_site.auth_seq_id"]
+            else:
+                seq_id_list = mmcif_dict["_atom_site.label_seq_id"]
+            model_topology = zip(mmcif_dict["_atom_site.label_atom_id"],
+                                 mmcif_dict["_atom_site.label_alt_id"],
+                                 mmcif_dict["_atom_site.label_comp_id"],
+                                 mmcif_dict["_atom_site.label_asym_id"],
+                                 seq_id_list)
+            if topology is None:
+                topology = model_topology
+            elif len(topology) != len(model_topology):
+                raise PDBConstructionException(
+                    "Model has %i atoms, not %i."
+                    % (len(model_topology), len(topology)))
+            elif topology != model_topology:
+                raise PDBConstructionException(
+                    "Atoms do not match the first model.")
+            try:
+                coords = numpy.array([mmcif_dict["_atom_site.Cartn_x"],
+                                      mmcif_dict["_atom_site.Cartn_y"],
+                                      mmcif_dict["_atom_site.Cartn_z"]],
+                                     float)
+            except ValueError:
+                raise PDBConstructionException("Invalid coordinate")
+            yield coords.T.astype("f")
+
+    def _atom_site_models(self, filename):
+        """Iterate over the atoms of each model in an mmCIF file (PRIVATE).
+
+        This reads the file up to the _atom_site loop, and then reads the
+        loop a model at a time. Each model is returned as a dictionary like
+        that from MMCIF2Dict, with the earlier categories and the model's
+        rows of the _atom_site loop. If the _atom_site category is not a
+        loop, the whole file is parsed at once.
+        """
+        with as_handle(filename) as handle:
+            lines = iter(handle)
+            header_lines = []
+            for line in lines:
+                if line.startswith("_atom_site."):
+                    break
+                header_lines.append(line)
+            else:
+                # No atoms
+                return
+            previous = [l for l in header_lines if l.strip()
+                        and not l.startswith("#")]
+            if not previous or previous[-1].strip().lower() != "loop_":
+                # Not a loop, parse it all
+                yield MMCIF2Dict(itertools.chain(header_lines, [line], lines))
+                return
+            header = MMCIF2Dict(header_lines)
+            keys = [line.split()[0]]
+            for line in lines:
+                if not line.startswith("_atom_site."):
+                    break
+                keys.append(line.split()[0])
+            else:
+                # Loop without any values
+                return
+            n = len(keys)
+            try:
+                model_index = keys.index("_atom_site.pdbx_PDB_model_num")
+            except ValueError:
+                # All the atoms are in one model
+                model_index = None
+            current_model = None
+            model_values = []
+            pending = []
+            lines = itertools.chain([line], lines)
+            for line in lines:
+                if line[0] == ";":
+                    raise ValueError("Text fields in _atom_site are not supported")
+                tokens = _tokenize_line(line)
+                if tokens and not tokens[0][1] and \
+                        (tokens[0][0][0] == "_" or tokens[0][0].lower() in
+                         ("loop_", "stop_", "global_") or
+                         tokens[0][0].lower().startswith("data_") or
+                         tokens[0][0].lower().startswith("save_")):
+                    # End of the loop
+                    break
+                pending.extend(token for token, quoted in tokens)
+                start = 0
+                while len(pending) - start >= n:
+                    if model_index is not None:
+                        model = pending[start + model_index]
+                        if model != current_model:
+                            if model_values:
+                                yield self._model_dict(header, keys,
+                                                       model_values)
+                                model_values = []
+                            current_model = model
+                    model_values.extend(pending[start:start + n])
+                    start += n
+                del pending[:start]
+            if pending:
+                raise ValueError("Loop of %s has %i values, not a multiple "
+                                 "of %i" % (keys[0], len(pending), n))
+            if model_values:
+                yield self._model_dict(header, keys, model_values)
+
+    def _model_dict(self, header, keys, values):
+        """Make a dictionary of one model's _atom_site values (PRIVATE)."""
+        mmcif_dict = dict(header)
+        n = len(keys)
+        for i, key in enumerate(keys):
+            mmcif_dict[key] = values[i::n]
+        return mmcif_dict
+
+    def _build_structure(self, structure_id, current_model_id=0):
         mmcif_dict=self._mmcif_dict
         atom_id_list=mmcif_dict["_atom_site.label_atom_id"]
         residue_id_list=mmcif_dict["_atom_site.label_comp_id"]
@@ -71,7 +227,6 @@ class MMCIFParser(object):
         structure_builder.init_seg(" ")
         # Historically, Biopython PDB parser uses model_id to mean array index
         # so serial_id means the Model ID specified in the file
-        current_model_id = 0
         current_serial_id = 0
         for i in xrange(0, len(atom_id_list)):
             x=x_list[i]
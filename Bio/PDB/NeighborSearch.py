@@ -3,12 +3,18 @@
 # license.  Please see the LICENSE file that should have been included
 # as part of this package.
 
-"""Fast atom neighbor lookup using a KD tree (implemented in C++)."""
+"""Fast atom neighbor lookup using a KD tree (implemented in C++) or a grid."""
 
 import numpy
 
-from Bio.KDTree import KDTree
+try:
+    from Bio.KDTree import KDTree
+except ImportError:
+    # The C++ module is not compiled, only the grid can be used
+    KDTree = None
 
+from Bio.PDB.CellList import CellList
+from Bio.PDB.CoordinateStore import CoordinateStore
 from Bio.PDB.PDBExceptions import PDBException
 from Bio.PDB.Selection import unfold_entities, entity_levels, uniqueify
 
@@ -24,19 +30,50 @@ class NeighborSearch(object):
     a fixed radius of each other.
 
     NeighborSearch makes use of the Bio.KDTree C++ module, so it's fast.
+    Alternatively it can use a grid of cells made with NumPy (see
+    Bio.PDB.CellList), which also handles periodic boundaries.
     """
-    def __init__(self, atom_list, bucket_size=10):
+    def __init__(self, atom_list, bucket_size=10, backend=None, box=None):
         """
         o atom_list - list of atoms. This list is used in the queries.
-        It can contain atoms from different structures.
+        It can contain atoms from different structures. This can also
+        be a CoordinateStore (see the pack_coords method of Entity), in
+        which case its coordinate array is used directly.
         o bucket_size - bucket size of KD tree. You can play around
         with this to optimize speed if you feel like it.
+        o backend - "kdtree" (the Bio.KDTree C++ module) or "grid" (the
+        NumPy cell list). By default the KD tree is used if it is compiled,
+        unless a periodic box is given.
+        o box - optional lengths of a rectangular periodic box (with a
+        corner at the origin), so that atoms near opposite faces can be
+        neighbors (grid backend only).
         """
-        self.atom_list=atom_list
-        # get the coordinates
-        coord_list = [a.get_coord() for a in atom_list]
-        # to Nx3 array of type float
-        self.coords=numpy.array(coord_list).astype("f")
+        if backend is None:
+            if KDTree is None or box is not None:
+                backend = "grid"
+            else:
+                backend = "kdtree"
+        if backend not in ("kdtree", "grid"):
+            raise PDBException("%s: Unknown backend" % backend)
+        if backend == "kdtree" and KDTree is None:
+            raise PDBException("The Bio.KDTree C++ module is not compiled")
+        if backend == "kdtree" and box is not None:
+            raise PDBException("Periodic boxes need the grid backend")
+        self.backend = backend
+        if isinstance(atom_list, CoordinateStore):
+            self.atom_list=atom_list.atoms
+            # to Nx3 array of type float
+            self.coords=atom_list.coords.astype("f")
+        else:
+            self.atom_list=atom_list
+            # get the coordinates
+            coord_list = [a.get_coord() for a in atom_list]
+            # to Nx3 array of type float
+            self.coords=numpy.array(coord_list).astype("f")
+        if backend == "grid":
+            self.coords = self.coords.reshape((-1, 3))
+            self.grid=CellList(self.coords, box)
+            return
         assert(bucket_size>1)
         assert(self.coords.shape[1]==3)
         self.kdt=KDTree(3, bucket_size)
@@ -79,8 +116,11 @@ class NeighborSearch(object):
         """
         if not level in entity_levels:
             raise PDBException("%s: Unknown level" % level)
-        self.kdt.search(center, radius)
-        indices=self.kdt.get_indices()
+        if self.backend == "grid":
+            indices=self.grid.search(center, radius)
+        else:
+            self.kdt.search(center, radius)
+            indices=self.kdt.get_indices()
         n_atom_list=[]
         atom_list=self.atom_list
         for i in indices:
@@ -102,8 +142,7 @@ class NeighborSearch(object):
         """
         if not level in entity_levels:
             raise PDBException("%s: Unknown level" % level)
-        self.kdt.all_search(radius)
-        indices=self.kdt.all_get_indices()
+        indices=self.search_all_indices(radius)
         atom_list=self.atom_list
         atom_pair_list=[]
         for i1, i2 in indices:
@@ -119,6 +158,23 @@ class NeighborSearch(object):
             if level==l:
                 return next_level_pair_list
 
+    def search_all_indices(self, radius):
+        """All neighbor search, returning atom indices.
+
+        Return a NumPy array of the index pairs (into the atom list) of
+        all the atoms within radius of each other, with one row per pair.
+        This avoids making a list of atom pairs, e.g. for a large complex.
+
+        o radius - float
+        """
+        if self.backend == "grid":
+            return self.grid.search_all(radius)
+        self.kdt.all_search(radius)
+        indices=self.kdt.all_get_indices()
+        if len(indices)==0:
+            return numpy.zeros((0, 2), int)
+        return indices
+
 if __name__=="__main__":
 
     from numpy.random import random
@@ -8,6 +8,7 @@
 # For using with statement in Python 2.5 or Jython
 from __future__ import with_statement
 
+import gc
 import warnings
 
 import numpy
@@ -18,11 +19,34 @@ from Bio.PDB.PDBExceptions import PDBConstructionException
 from Bio.PDB.PDBExceptions import PDBConstructionWarning
 
 from Bio.PDB.StructureBuilder import StructureBuilder
+from Bio.PDB.Atom import Atom
 from Bio.PDB.parse_pdb_header import _parse_pdb_header_list
 
 
 # If PDB spec says "COLUMNS 18-20" this means line[17:20]
 
+# Records other than ATOM/HETATM handled by the fast coordinate parser
+_FAST_OTHER_RECORDS = frozenset(["MODEL ", "ENDMDL", "ANISOU", "SIGUIJ",
+                                 "SIGATM"])
+
+
+def _fixed_columns(lines, width=80):
+    """Return the lines as a 2D array of bytes, padded with spaces (PRIVATE).
+
+    Any characters beyond the width are ignored, and control characters
+    (such as the trailing new line) are replaced by spaces.
+    """
+    columns = numpy.array(lines, "S%i" % width).view(numpy.uint8)
+    columns = columns.reshape(len(lines), width)
+    columns[columns < 32] = 32
+    return columns
+
+
+def _column_field(columns, start, end):
+    """Return one field of all the lines as a NumPy string array (PRIVATE)."""
+    field = numpy.ascontiguousarray(columns[:, start:end])
+    return field.view("S%i" % (end - start)).ravel()
+
 
 class PDBParser(object):
     """
@@ -30,7 +54,8 @@ class PDBParser(object):
     """
 
     def __init__(self, PERMISSIVE=True, get_header=False,
-                 structure_builder=None, QUIET=False):
+                 structure_builder=None, QUIET=False, fast=False,
+                 skip_header=False):
         """
         The PDB parser call a number of standard methods in an aggregated
         StructureBuilder object. Normally this object is instanciated by the
@@ -49,6 +74,17 @@ class PDBParser(object):
         o QUIET - Evaluated as a Boolean. If true, warnings issued in constructing
         the SMCRA data will be suppressed. If false (DEFAULT), they will be shown.
         These warnings might be indicative of problems in the PDB file!
+
+        o fast - Evaluated as a Boolean. If true, the fixed columns of all the
+        ATOM/HETATM records are converted at once using NumPy, and residues
+        without disorder are filled in directly rather than atom by atom via
+        the StructureBuilder, with the garbage collector paused, which is
+        much faster for large files. The resulting Structure is the same.
+        If false (DEFAULT), each line is parsed in turn.
+
+        o skip_header - Evaluated as a Boolean. If true, the header records
+        are not parsed, and the header is an empty dictionary. If false
+        (DEFAULT), the header is parsed.
         """
         if structure_builder is not None:
             self.structure_builder = structure_builder
@@ -59,6 +95,8 @@ class PDBParser(object):
         self.line_counter = 0
         self.PERMISSIVE = bool(PERMISSIVE)
         self.QUIET = bool(QUIET)
+        self.fast = bool(fast)
+        self.skip_header = bool(skip_header)
 
     # Public methods
 
@@ -99,6 +137,120 @@ class PDBParser(object):
         "Return the trailer."
         return self.trailer
 
+    def parse_models(self, id, file):
+        """Iterate over the models in the PDB file, parsing one at a time.
+
+        Arguments:
+        o id - string, the id that will be used for the structure
+        o file - name of the PDB file OR an open filehandle
+
+        This reads the file a model (i.e. MODEL to ENDMDL) at a time, so
+        even a long trajectory of many models needs only enough memory for
+        one of them. The Model objects are the same as those in the
+        Structure from get_structure, but each belongs to its own Structure
+        object (containing just that model, and the header). The header and
+        trailer are available via the get_header and get_trailer methods
+        once the models have been read.
+
+        Don't use the parser for anything else until the iteration is over.
+        """
+        self.header = None
+        self.trailer = None
+        with as_handle(file) as handle:
+            lines = iter(handle)
+            header_lines = []
+            model_lines = []
+            for line in lines:
+                record_type = line[0:6]
+                if record_type == "ATOM  " or record_type == "HETATM" or record_type == "MODEL ":
+                    model_lines.append(line)
+                    break
+                header_lines.append(line)
+            if self.skip_header:
+                self.header = {}
+            else:
+                self.header = _parse_pdb_header_list(header_lines)
+            # Line number before the model lines, and number of models read
+            line_counter = len(header_lines)
+            model_id = 0
+            # Does model_lines contain any atoms?
+            has_atoms = bool(model_lines) and model_lines[0][0:6] != "MODEL "
+            trailer = []
+            for line in lines:
+                record_type = line[0:6]
+                if record_type == "END   " or record_type == "CONECT":
+                    trailer.append(line)
+                    trailer.extend(lines)
+                    break
+                if record_type == "MODEL " and has_atoms:
+                    # Missing ENDMDL record
+                    for model in self._parse_model_lines(id, model_lines,
+                                                         line_counter, model_id):
+                        model_id += 1
+                        yield model
+                    line_counter += len(model_lines)
+                    model_lines = []
+                    has_atoms = False
+                model_lines.append(line)
+                if record_type == "ATOM  " or record_type == "HETATM":
+                    has_atoms = True
+                elif record_type == "ENDMDL":
+                    for model in self._parse_model_lines(id, model_lines,
+                                                         line_counter, model_id):
+                        model_id += 1
+                        yield model
+                    line_counter += len(model_lines)
+                    model_lines = []
+                    has_atoms = False
+            if has_atoms:
+                for model in self._parse_model_lines(id, model_lines,
+                                                     line_counter, model_id):
+                    yield model
+        self.trailer = trailer
+
+    def parse_coords(self, file):
+        """Iterate over the coordinates of each model in the PDB file.
+
+        Arguments:
+        o file - name of the PDB file OR an open filehandle
+
+        This is for files where every model has the same atoms, such as
+        a molecular dynamics trajectory or NMR ensemble, and avoids making
+        any Atom objects. Each model gives an N x 3 NumPy array (of type
+        float32, like the coordinates of an Atom), with one row for each
+        ATOM/HETATM record in the order they are in the file. If there are
+        no alternative locations, this is the same order as the atoms of
+        the Model from get_structure or parse_models (for example, use the
+        first model for the topology, and this for the later ones).
+
+        A PDBConstructionException is raised if a model's records do not
+        match the atoms of the first model (by atom name, alternative
+        location, residue name, chain, sequence number and insertion code).
+        """
+        topology = None
+        atom_lines = []
+        atom_line_numbers = []
+        with as_handle(file) as handle:
+            for i, line in enumerate(handle):
+                record_type = line[0:6]
+                if record_type == "ATOM  " or record_type == "HETATM":
+                    atom_lines.append(line)
+                    atom_line_numbers.append(i + 1)
+                elif record_type == "ENDMDL" or \
+                        (record_type == "MODEL " and atom_lines):
+                    if atom_lines:
+                        topology, coords = self._model_coords(
+                            atom_lines, atom_line_numbers, topology)
+                        yield coords
+                    atom_lines = []
+                    atom_line_numbers = []
+                elif record_type == "END   " or record_type == "CONECT":
+                    break
+        if atom_lines:
+            topology, coords = self._model_coords(atom_lines,
+                                                  atom_line_numbers, topology)
+            yield coords
+
     # Private methods
 
     def _parse(self, header_coords_trailer):
@@ -106,30 +258,46 @@ class PDBParser(object):
         # Extract the header; return the rest of the file
         self.header, coords_trailer = self._get_header(header_coords_trailer)
         # Parse the atomic data; return the PDB file trailer
-        self.trailer = self._parse_coordinates(coords_trailer)
+        self.trailer = self._parse_atoms(coords_trailer)
+
+    def _parse_atoms(self, coords_trailer, model_id=0):
+        "Parse the atomic data, using the fast method if chosen (PRIVATE)."
+        if not self.fast:
+            return self._parse_coordinates(coords_trailer, model_id)
+        # The garbage collector would otherwise run many times while
+        # creating the atoms, finding nothing to free
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._parse_coordinates_fast(coords_trailer, model_id)
+        finally:
+            if gc_enabled:
+                gc.enable()
 
     def _get_header(self, header_coords_trailer):
         "Get the header of the PDB file, return the rest."
         structure_builder = self.structure_builder
         i = 0
         for i in range(0, len(header_coords_trailer)):
-            structure_builder.set_line_counter(i + 1)
             line = header_coords_trailer[i]
             record_type = line[0:6]
             if record_type == "ATOM  " or record_type == "HETATM" or record_type == "MODEL ":
                 break
+        structure_builder.set_line_counter(i + 1)
         header = header_coords_trailer[0:i]
         # Return the rest of the coords+trailer for further processing
         self.line_counter = i
         coords_trailer = header_coords_trailer[i:]
-        header_dict = _parse_pdb_header_list(header)
+        if self.skip_header:
+            header_dict = {}
+        else:
+            header_dict = _parse_pdb_header_list(header)
         return header_dict, coords_trailer
 
-    def _parse_coordinates(self, coords_trailer):
+    def _parse_coordinates(self, coords_trailer, current_model_id=0):
         "Parse the atomic data in the PDB file."
         local_line_counter = 0
         structure_builder = self.structure_builder
-        current_model_id = 0
         # Flag we have an open model
         model_open = 0
         current_chain_id = None
@@ -269,6 +437,285 @@ class PDBParser(object):
         self.line_counter = self.line_counter + local_line_counter
         return []
 
+    def _parse_model_lines(self, id, model_lines, line_counter, model_id):
+        """Parse the lines of one model, returning a new Structure (PRIVATE).
+
+        This is used by parse_models (where line_counter is the number of
+        lines before these, and model_id is the number of models so far).
+        """
+        if self.QUIET:
+            warning_list = warnings.filters[:]
+            warnings.filterwarnings("ignore", category=PDBConstructionWarning)
+        try:
+            self.structure_builder.init_structure(id)
+            self.line_counter = line_counter
+            self._parse_atoms(model_lines, model_id)
+            self.structure_builder.set_header(self.header)
+            return self.structure_builder.get_structure()
+        finally:
+            if self.QUIET:
+                warnings.filters[:] = warning_list
+
+    def _model_coords(self, atom_lines, atom_line_numbers, topology):
+        """Return the topology and coordinates of a model (PRIVATE).
+
+        This is used by parse_coords, where the topology is the atom
+        name, alternative location and residue columns of each record (or
+        None for the first model).
+        """
+        columns = _fixed_columns(atom_lines, 54)
+        model_topology = columns[:, 12:27]
+        if topology is None:
+            topology = model_topology.copy()
+        elif topology.shape != model_topology.shape:
+            raise PDBConstructionException(
+                "Model ending at line %i has %i atoms, not %i."
+                % (atom_line_numbers[-1], len(atom_lines), len(topology)))
+        elif (topology != model_topology).any():
+            i = (topology != model_topology).any(axis=1).argmax()
+            raise PDBConstructionException(
+                "Atom does not match the first model at line %i."
+                % atom_line_numbers[i])
+        coords = numpy.zeros((len(atom_lines), 3), "f")
+        for j, start in enumerate((30, 38, 46)):
+            coords[:, j] = self._fast_numbers(
+                _column_field(columns, start, start + 8), float,
+                atom_line_numbers, "Invalid or missing coordinate(s)")
+        return topology, coords
+
+    def _fast_numbers(self, field, number_type, line_numbers, message=None,
+                      default=None):
+        """Convert a field of all the ATOM/HETATM records to numbers (PRIVATE).
+
+        Invalid values are replaced by the default, with a warning if there
+        is a message (or an exception if not PERMISSIVE).  If there is no
+        default, an invalid value raises a PDBConstructionException.
+        """
+        try:
+            return field.astype(number_type)
+        except ValueError:
+            pass
+        # Find the bad value(s)
+        values = numpy.zeros(len(field), number_type)
+        for i, text in enumerate(field):
+            try:
+                values[i] = number_type(text)
+            except ValueError:
+                if default is None:
+                    raise PDBConstructionException("%s at line %i."
+                                                   % (message, line_numbers[i]))
+                if message:
+                    self._handle_PDB_exception(message, line_numbers[i])
+                values[i] = default
+        return values
+
+    def _parse_coordinates_fast(self, coords_trailer, current_model_id=0):
+        """Parse the atomic data in the PDB file using NumPy (PRIVATE).
+
+        This gives the same result as the _parse_coordinates method, but
+        first collects all the ATOM/HETATM records and converts their fixed
+        columns into arrays. Atoms without an altloc which are added to an
+        ordinary Residue are then put into it directly, unless a custom
+        StructureBuilder is in use.
+        """
+        structure_builder = self.structure_builder
+        atom_lines = []
+        atom_line_numbers = []
+        # Other records, as (number of atoms before it, line number, line)
+        other_records = []
+        end = len(coords_trailer)
+        line_number = self.line_counter
+        for i, line in enumerate(coords_trailer):
+            record_type = line[0:6]
+            if record_type == "ATOM  " or record_type == "HETATM":
+                atom_lines.append(line)
+                atom_line_numbers.append(line_number + i + 1)
+            elif record_type in _FAST_OTHER_RECORDS:
+                other_records.append((len(atom_lines), line_number + i + 1,
+                                      line))
+            elif record_type == "END   " or record_type == "CONECT":
+                # End of atomic data
+                end = i
+                break
+
+        # Convert the numerical columns
+        columns = _fixed_columns(atom_lines)
+        numbers = atom_line_numbers
+        coords = numpy.zeros((len(atom_lines), 3), "f")
+        for j, start in enumerate((30, 38, 46)):
+            coords[:, j] = self._fast_numbers(
+                _column_field(columns, start, start + 8), float, numbers,
+                "Invalid or missing coordinate(s)")
+        occupancies = self._fast_numbers(_column_field(columns, 54, 60),
+                                         float, numbers,
+                                         "Invalid or missing occupancy", 0.0)
+        bfactors = self._fast_numbers(_column_field(columns, 60, 66),
+                                      float, numbers,
+                                      "Invalid or missing B factor", 0.0)
+        serial_numbers = self._fast_numbers(_column_field(columns, 6, 11),
+                                            int, numbers, default=0)
+        try:
+            resseqs = _column_field(columns, 22, 26).astype(int).tolist()
+        except ValueError:
+            # Raise the same error as the line by line parser
+            resseqs = [int(line[22:26].split()[0]) for line in atom_lines]
+        coords = list(coords)
+        occupancies = occupancies.tolist()
+        bfactors = bfactors.tolist()
+        serial_numbers = serial_numbers.tolist()
+        del columns
+
+        direct = type(structure_builder) is StructureBuilder
+        # Flag we have an open model
+        model_open = 0
+        current_chain_id = None
+        current_segid = None
+        current_residue_id = None
+        current_resname = None
+        current_residue_key = None
+        residue = None
+        other_index = 0
+        # Atom names without spaces, by full name
+        names = {}
+        for i, line in enumerate(atom_lines):
+            while other_index < len(other_records) and \
+                    other_records[other_index][0] == i:
+                record = other_records[other_index]
+                model_open, current_model_id = self._fast_other_record(
+                    record, model_open, current_model_id)
+                if record[2][0:6] in ("MODEL ", "ENDMDL"):
+                    current_chain_id = None
+                    current_residue_id = None
+                    current_residue_key = None
+                other_index += 1
+            # Initialize the Model - there was no explicit MODEL record
+            if not model_open:
+                structure_builder.set_line_counter(atom_line_numbers[i])
+                structure_builder.init_model(current_model_id)
+                current_model_id += 1
+                model_open = 1
+            fullname = line[12:16]
+            try:
+                name = names[fullname]
+            except KeyError:
+                # get rid of whitespace in atom names
+                split_list = fullname.split()
+                if len(split_list) != 1:
+                    # atom name has internal spaces, e.g. " N B ", so
+                    # we do not strip spaces
+                    name = fullname
+                else:
+                    # atom name is like " CA ", so we can strip spaces
+                    name = split_list[0]
+                names[fullname] = name
+            altloc = line[16]
+            segid = line[72:76]
+            element = line[76:78].strip()
+            if current_segid != segid:
+                current_segid = segid
+                structure_builder.init_seg(current_segid)
+            # Record type, residue name, chain, sequence number and
+            # insertion code, only checked in detail if the text changes
+            residue_key = line[0] + line[17:27]
+            if residue_key != current_residue_key:
+                current_residue_key = residue_key
+                resname = line[17:20]
+                chainid = line[21]
+                resseq = resseqs[i]
+                icode = line[26]  # insertion code
+                if line[0] == "H":  # hetero atom flag
+                    if resname == "HOH" or resname == "WAT":
+                        hetero_flag = "W"
+                    else:
+                        hetero_flag = "H"
+                else:
+                    hetero_flag = " "
+                residue_id = (hetero_flag, resseq, icode)
+                if current_chain_id != chainid or current_residue_id != residue_id \
+                        or current_resname != resname:
+                    structure_builder.set_line_counter(atom_line_numbers[i])
+                    if current_chain_id != chainid:
+                        current_chain_id = chainid
+                        structure_builder.init_chain(current_chain_id)
+                    current_residue_id = residue_id
+                    current_resname = resname
+                    try:
+                        structure_builder.init_residue(resname, hetero_flag, resseq, icode)
+                    except PDBConstructionException, message:
+                        self._handle_PDB_exception(message, atom_line_numbers[i])
+                    if direct:
+                        residue = structure_builder.residue
+                        if residue is not None and residue.is_disordered() == 2:
+                            # Use the StructureBuilder for DisorderedResidues
+                            residue = None
+            # init atom
+            if residue is not None and altloc == " " \
+                    and name not in residue.child_dict:
+                # Add the atom directly (as Residue.add would)
+                atom = Atom(name, coords[i], bfactors[i], occupancies[i],
+                            altloc, fullname, serial_numbers[i], element)
+                atom.parent = residue
+                residue.child_list.append(atom)
+                residue.child_dict[name] = atom
+                structure_builder.atom = atom
+            else:
+                structure_builder.set_line_counter(atom_line_numbers[i])
+                try:
+                    structure_builder.init_atom(name, coords[i], bfactors[i],
+                                                occupancies[i], altloc,
+                                                fullname, serial_numbers[i],
+                                                element)
+                except PDBConstructionException, message:
+                    self._handle_PDB_exception(message, atom_line_numbers[i])
+        for record in other_records[other_index:]:
+            model_open, current_model_id = self._fast_other_record(
+                record, model_open, current_model_id)
+        # Return the trailer (if the file ends in END or CONECT)
+        self.line_counter += end
+        return coords_trailer[end:]
+
+    def _fast_other_record(self, record, model_open, current_model_id):
+        """Handle a MODEL, ENDMDL, ANISOU, SIGUIJ or SIGATM record (PRIVATE).
+
+        Returns the updated open model flag and next model id.
+        """
+        structure_builder = self.structure_builder
+        count, global_line_counter, line = record
+        structure_builder.set_line_counter(global_line_counter)
+        record_type = line[0:6]
+        if record_type == "ANISOU":
+            anisou = map(float, (line[28:35], line[35:42], line[43:49],
+                                 line[49:56], line[56:63], line[63:70]))
+            # U's are scaled by 10^4
+            anisou_array = (numpy.array(anisou, "f") / 10000.0).astype("f")
+            structure_builder.set_anisou(anisou_array)
+        elif record_type == "MODEL ":
+            try:
+                serial_num = int(line[10:14])
+            except:
+                self._handle_PDB_exception("Invalid or missing model serial number",
+                                           global_line_counter)
+                serial_num = 0
+            structure_builder.init_model(current_model_id, serial_num)
+            current_model_id += 1
+            model_open = 1
+        elif record_type == "ENDMDL":
+            model_open = 0
+        elif record_type == "SIGUIJ":
+            # standard deviation of anisotropic B factor
+            siguij = map(float, (line[28:35], line[35:42], line[42:49],
+                                 line[49:56], line[56:63], line[63:70]))
+            # U sigma's are scaled by 10^4
+            siguij_array = (numpy.array(siguij, "f") / 10000.0).astype("f")
+            structure_builder.set_siguij(siguij_array)
+        elif record_type == "SIGATM":
+            # standard deviation of atomic positions
+            sigatm = map(float, (line[30:38], line[38:45], line[46:54],
+                                 line[54:60], line[60:66]))
+            sigatm_array = numpy.array(sigatm, "f")
+            structure_builder.set_sigatm(sigatm_array)
+        return model_open, current_model_id
+
     def _handle_PDB_exception(self, message, line_counter):
         """
         This method catches an exception that occurs in the StructureBuilder
@@ -53,8 +53,8 @@ import warnings
 from Bio.Alphabet import generic_protein
 from Bio.Seq import Seq
 from Bio.SCOP.Raf import to_one_letter_code
+from Bio.PDB.BackboneGeometry import BackboneGeometry
 from Bio.PDB.PDBExceptions import PDBException
-from Bio.PDB.Vector import calc_dihedral, calc_angle
 
 
 standard_aa_names=["ALA", "CYS", "ASP", "GLU", "PHE", "GLY", "HIS", "ILE", "LYS",
@@ -184,6 +184,11 @@ def is_aa(residue, standard=False):
         return residue in to_one_letter_code
 
 
+def _to_list(values):
+    """Turn an array of angles into a list, with None for NaN (PRIVATE)."""
+    return [None if value!=value else value for value in values.tolist()]
+
+
 class Polypeptide(list):
     """A polypeptide is simply a list of L{Residue} objects."""
     def get_ca_list(self):
@@ -199,44 +204,15 @@ class Polypeptide(list):
         return ca_list
 
     def get_phi_psi_list(self):
-        """Return the list of phi/psi dihedral angles."""
+        """Return the list of phi/psi dihedral angles.
+
+        Angles which cannot be calculated (e.g. phi of the first residue,
+        or where an atom is missing) are None.
+        """
+        geometry=BackboneGeometry(self)
         ppl=[]
-        lng=len(self)
-        for i in range(0, lng):
-            res=self[i]
-            try:
-                n=res['N'].get_vector()
-                ca=res['CA'].get_vector()
-                c=res['C'].get_vector()
-            except:
-                # Some atoms are missing
-                # Phi/Psi cannot be calculated for this residue
-                ppl.append((None, None))
-                res.xtra["PHI"]=None
-                res.xtra["PSI"]=None
-                continue
-            # Phi
-            if i>0:
-                rp=self[i-1]
-                try:
-                    cp=rp['C'].get_vector()
-                    phi=calc_dihedral(cp, n, ca, c)
-                except:
-                    phi=None
-            else:
-                # No phi for residue 0!
-                phi=None
-            # Psi
-            if i<(lng-1):
-                rn=self[i+1]
-                try:
-                    nn=rn['N'].get_vector()
-                    psi=calc_dihedral(n, ca, c, nn)
-                except:
-                    psi=None
-            else:
-                # No psi for last residue!
-                psi=None
+        for res, phi, psi in zip(self, _to_list(geometry.get_phi()),
+                                 _to_list(geometry.get_psi())):
             ppl.append((phi, psi))
             # Add Phi/Psi to xtra dict of residue
             res.xtra["PHI"]=phi
@@ -245,32 +221,28 @@ class Polypeptide(list):
 
     def get_tau_list(self):
         """List of tau torsions angles for all 4 consecutive Calpha atoms."""
-        ca_list=self.get_ca_list()
-        tau_list=[]
-        for i in range(0, len(ca_list)-3):
-            atom_list = (ca_list[i], ca_list[i+1], ca_list[i+2], ca_list[i+3])
-            v1, v2, v3, v4 = [a.get_vector() for a in atom_list]
-            tau=calc_dihedral(v1, v2, v3, v4)
-            tau_list.append(tau)
+        tau_list=_to_list(BackboneGeometry(self).get_tau())[2:-1]
+        for res, tau in zip(self[2:], tau_list):
             # Put tau in xtra dict of residue
-            res=ca_list[i+2].get_parent()
             res.xtra["TAU"]=tau
         return tau_list
 
     def get_theta_list(self):
         """List of theta angles for all 3 consecutive Calpha atoms."""
-        theta_list=[]
-        ca_list=self.get_ca_list()
-        for i in range(0, len(ca_list)-2):
-            atom_list = (ca_list[i], ca_list[i+1], ca_list[i+2])
-            v1, v2, v3 = [a.get_vector() for a in atom_list]
-            theta=calc_angle(v1, v2, v3)
-            theta_list.append(theta)
-            # Put tau in xtra dict of residue
-            res=ca_list[i+1].get_parent()
+        theta_list=_to_list(BackboneGeometry(self).get_theta())[1:-1]
+        for res, theta in zip(self[1:], theta_list):
+            # Put theta in xtra dict of residue
             res.xtra["THETA"]=theta
         return theta_list
 
+    def get_backbone_geometry(self):
+        """Return the backbone angles and distances as NumPy arrays.
+
+        @return: the geometry of the polypeptide
+        @rtype: L{BackboneGeometry}
+        """
+        return BackboneGeometry(self)
+
     def get_sequence(self):
         """Return the AA sequence as a Seq object.
 
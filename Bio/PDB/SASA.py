@@ -0,0 +1,347 @@
+# Copyright 2013 by the Biopython contributors.
+# All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Solvent accessible surface area, calculated without external programs.
+
+This uses the Shrake & Rupley algorithm (J Mol Biol, 79:351-371, 1973):
+each atom is given a sphere of its van der Waals radius plus the radius of
+the probe (e.g. 1.4 Angstrom for water), covered with evenly spread points,
+and the accessible area of the atom is the fraction of its points which are
+not inside the sphere of any other atom.  The overlapping spheres are found
+with a grid of cells (see Bio.PDB.CellList), and the points tested with
+NumPy matrix products, so a typical protein takes a fraction of a second.
+
+The SASA and SASA_atomic classes give the same dictionaries as the NACCESS
+and NACCESS_atomic classes (which run the NACCESS program), e.g.
+
+    >>> from Bio.PDB.PDBParser import PDBParser
+    >>> structure = PDBParser().get_structure("1A8O", "PDB/1A8O.pdb")
+    >>> sasa = SASA(structure[0])
+    >>> values = sasa[("A", 152)]
+    >>> print values["res_name"]
+    ASP
+    >>> print round(values["all_atoms_abs"]) == round(values["side_chain_abs"]
+    ...                                               + values["main_chain_abs"])
+    True
+
+The values will not be exactly the same as those from NACCESS, which uses
+its own atomic radii and a different algorithm (slicing each atom's sphere).
+"""
+
+import numpy
+
+from Bio.PDB.AbstractPropertyMap import AbstractResiduePropertyMap, AbstractAtomPropertyMap
+from Bio.PDB.CellList import CellList
+
+
+# Van der Waals radii of the elements in Angstrom, from A. Bondi (1964),
+# J Phys Chem, 68:441-451; other elements use DEFAULT_RADIUS
+ATOMIC_RADII={}
+ATOMIC_RADII["H"]=1.20
+ATOMIC_RADII["C"]=1.70
+ATOMIC_RADII["N"]=1.55
+ATOMIC_RADII["O"]=1.52
+ATOMIC_RADII["F"]=1.47
+ATOMIC_RADII["P"]=1.80
+ATOMIC_RADII["S"]=1.80
+ATOMIC_RADII["CL"]=1.75
+ATOMIC_RADII["SE"]=1.90
+ATOMIC_RADII["BR"]=1.85
+ATOMIC_RADII["I"]=1.98
+
+DEFAULT_RADIUS=1.80
+
+# Maximal accessible surface area of the amino acids, in an Ala-X-Ala
+# tripeptide (as used by NACCESS for its relative areas)
+# Values from Miller et al. (1987), J Mol Biol, 196:641-656
+MAX_ASA={}
+MAX_ASA["ALA"]=113.0
+MAX_ASA["ARG"]=241.0
+MAX_ASA["ASN"]=158.0
+MAX_ASA["ASP"]=151.0
+MAX_ASA["CYS"]=140.0
+MAX_ASA["GLN"]=189.0
+MAX_ASA["GLU"]=183.0
+MAX_ASA["GLY"]=85.0
+MAX_ASA["HIS"]=194.0
+MAX_ASA["ILE"]=182.0
+MAX_ASA["LEU"]=180.0
+MAX_ASA["LYS"]=211.0
+MAX_ASA["MET"]=204.0
+MAX_ASA["PHE"]=218.0
+MAX_ASA["PRO"]=143.0
+MAX_ASA["SER"]=122.0
+MAX_ASA["THR"]=146.0
+MAX_ASA["TRP"]=259.0
+MAX_ASA["TYR"]=229.0
+MAX_ASA["VAL"]=160.0
+
+# Atoms of the main chain (the rest are counted as the side chain)
+_MAIN_CHAIN_ATOMS=frozenset(["N", "CA", "C", "O", "OXT"])
+
+# Elements counted as non-polar (the rest are counted as polar)
+_NON_POLAR_ELEMENTS=frozenset(["C", "S"])
+
+# Number of atom pairs to test at once (limits the memory used)
+_CHUNK_SIZE=2**20
+
+
+def _sphere_points(n_points):
+    """Return n_points evenly spread over the unit sphere (PRIVATE).
+
+    The points follow a golden section spiral from pole to pole.
+    """
+    k=numpy.arange(n_points)+0.5
+    z=1.0-2.0*k/n_points
+    r=numpy.sqrt(1.0-z*z)
+    phi=k*numpy.pi*(3.0-numpy.sqrt(5.0))
+    return numpy.column_stack((r*numpy.cos(phi), r*numpy.sin(phi), z))
+
+
+def shrake_rupley(coords, radii, probe_radius=1.4, n_points=100, groups=None):
+    """
+    Return the solvent accessible surface area of each atom (in A**2).
+
+    @param coords: atom coordinates
+    @type coords: N x 3 NumPy array
+
+    @param radii: atom radii (e.g. from ATOMIC_RADII)
+    @type radii: NumPy array of N values
+
+    @param probe_radius: radius of the solvent molecule
+    @type probe_radius: float
+
+    @param n_points: number of points on each atom's sphere; more points
+    give more accurate areas but take longer
+    @type n_points: int
+
+    @param groups: optional group number of each atom (e.g. its residue),
+    in which case atoms are only buried by the other atoms of their group
+    @type groups: NumPy array of N integers
+
+    @return: the accessible areas
+    @rtype: NumPy array of N values
+    """
+    coords=numpy.asarray(coords, float).reshape((-1, 3))
+    radii=numpy.asarray(radii, float)
+    if radii.shape!=(len(coords),):
+        raise ValueError("Expected one radius for each atom")
+    if n_points<1:
+        raise ValueError("Expected at least one point per atom")
+    if not len(coords):
+        return numpy.zeros(0)
+    expanded=radii+probe_radius
+    points=_sphere_points(n_points)
+    # Pairs of atoms with overlapping spheres
+    pairs=CellList(coords).search_all(2*expanded.max())
+    first=pairs[:, 0]
+    second=pairs[:, 1]
+    diff=coords[first]-coords[second]
+    keep=(diff*diff).sum(axis=1)<(expanded[first]+expanded[second])**2
+    if groups is not None:
+        groups=numpy.asarray(groups)
+        keep&=groups[first]==groups[second]
+    first, second=(numpy.concatenate((first[keep], second[keep])),
+                   numpy.concatenate((second[keep], first[keep])))
+    order=numpy.argsort(first, kind="mergesort")
+    first=first[order]
+    second=second[order]
+    # A point u on the sphere of atom i is inside the sphere of atom j if
+    # |d + R_i u|**2 < R_j**2, where d is from atom j to atom i, i.e. if
+    # d.u < (R_j**2 - R_i**2 - |d|**2) / (2 R_i)
+    buried=numpy.zeros((len(coords), n_points), bool)
+    chunk=max(1, _CHUNK_SIZE//n_points)
+    for start in range(0, len(first), chunk):
+        i=first[start:start+chunk]
+        j=second[start:start+chunk]
+        d=coords[i]-coords[j]
+        limit=(expanded[j]**2-expanded[i]**2-(d*d).sum(axis=1))/(2*expanded[i])
+        inside=numpy.dot(d, points.T)<limit[:, numpy.newaxis]
+        # Combine the rows of each atom (which are next to each other)
+        starts=numpy.concatenate(([0], numpy.nonzero(i[1:]!=i[:-1])[0]+1))
+        buried[i[starts]]|=numpy.logical_or.reduceat(inside, starts, axis=0)
+    exposed=n_points-buried.sum(axis=1)
+    return 4*numpy.pi*expanded**2*exposed/n_points
+
+
+def _get_atoms(model, radii):
+    """Return the atoms to use, with their radii (PRIVATE).
+
+    Water and hydrogen atoms are left out.
+    """
+    if radii is None:
+        radii=ATOMIC_RADII
+    atoms=[]
+    atom_radii=[]
+    for residue in model.get_residues():
+        if residue.get_id()[0]=="W":
+            continue
+        for atom in residue:
+            element=atom.element
+            if element in ("H", "D"):
+                continue
+            atoms.append(atom)
+            atom_radii.append(radii.get(element, DEFAULT_RADIUS))
+    return atoms, numpy.array(atom_radii)
+
+
+def _calc_areas(model, probe_radius, n_points, radii, isolated=False):
+    """Return the atoms and their accessible areas (PRIVATE).
+
+    With isolated=True, also return the areas of each atom in its own
+    residue on its own.
+    """
+    atoms, atom_radii=_get_atoms(model, radii)
+    coords=numpy.array([a.get_coord() for a in atoms], float)
+    areas=shrake_rupley(coords, atom_radii, probe_radius, n_points)
+    if not isolated:
+        return atoms, areas
+    residue_numbers={}
+    groups=[residue_numbers.setdefault(id(a.get_parent()), len(residue_numbers))
+            for a in atoms]
+    isolated_areas=shrake_rupley(coords, atom_radii, probe_radius, n_points,
+                                 groups)
+    return atoms, areas, isolated_areas
+
+
+class SASA(AbstractResiduePropertyMap):
+    """
+    Solvent accessible surface area of each residue of a model.
+
+    Each (chain_id, res_id) maps to a dictionary with the same keys as
+    from the NACCESS class: the residue name ('res_name') and
+    the absolute ('..._abs', in A**2) and relative ('..._rel', in percent)
+    areas of all the atoms ('all_atoms_...'), the side chain and main
+    chain atoms ('side_chain_...' and 'main_chain_...'), the carbon and
+    sulphur atoms ('non_polar_...') and the other atoms ('all_polar_...').
+
+    The relative area of a whole amino acid ('all_atoms_rel') is compared
+    to its maximal area in an Ala-X-Ala tripeptide (MAX_ASA, as with
+    NACCESS), so it can be over 100 percent (e.g. at the end of a chain,
+    with the extra terminal atoms).  The relative areas of the parts of
+    the residue (e.g. the side chain), and of residues not in the table
+    (or all of them, with max_asa=None), are compared to the same atoms
+    in the residue on its own, so these stay below 100 percent.  The
+    dictionary is also stored in the xtra attribute of each residue as
+    'EXP_SASA'.
+    """
+    def __init__(self, model, probe_radius=1.4, n_points=100, radii=None,
+                 max_asa=MAX_ASA):
+        """
+        @param model: the model (or other entity) to use
+        @type model: L{Model}
+
+        @param probe_radius: radius of the solvent molecule
+        @type probe_radius: float
+
+        @param n_points: number of points on each atom's sphere
+        @type n_points: int
+
+        @param radii: van der Waals radii of the elements (default ATOMIC_RADII)
+        @type radii: dictionary
+
+        @param max_asa: maximal areas of the residues for the relative areas
+        (default MAX_ASA), or None to compare to each residue on its own
+        @type max_asa: dictionary
+        """
+        if max_asa is None:
+            max_asa={}
+        atoms, areas, isolated_areas=_calc_areas(model, probe_radius,
+                                                 n_points, radii, True)
+        totals={}
+        residues=[]
+        for atom, area, isolated_area in zip(atoms, areas, isolated_areas):
+            residue=atom.get_parent()
+            key=id(residue)
+            if key not in totals:
+                totals[key]=numpy.zeros((4, 2))
+                residues.append(residue)
+            if atom.get_id() in _MAIN_CHAIN_ATOMS:
+                totals[key][0]+=(area, isolated_area)
+            else:
+                totals[key][1]+=(area, isolated_area)
+            if atom.element in _NON_POLAR_ELEMENTS:
+                totals[key][2]+=(area, isolated_area)
+            else:
+                totals[key][3]+=(area, isolated_area)
+        property_dict={}
+        property_keys=[]
+        property_list=[]
+        for residue in residues:
+            main, side, non_polar, polar=totals[id(residue)]
+            resname=residue.get_resname()
+            item={'res_name': resname}
+            for name, (area, isolated_area) in [('all_atoms', main+side),
+                                                ('side_chain', side),
+                                                ('main_chain', main),
+                                                ('non_polar', non_polar),
+                                                ('all_polar', polar)]:
+                item[name+'_abs']=area
+                if name=='all_atoms' and resname in max_asa:
+                    item[name+'_rel']=100.0*area/max_asa[resname]
+                elif isolated_area>0:
+                    item[name+'_rel']=100.0*area/isolated_area
+                else:
+                    item[name+'_rel']=0.0
+            chain_id=residue.get_parent().get_id()
+            res_id=residue.get_id()
+            property_dict[(chain_id, res_id)]=item
+            property_keys.append((chain_id, res_id))
+            property_list.append((residue, item))
+            residue.xtra["EXP_SASA"]=item
+        AbstractResiduePropertyMap.__init__(self, property_dict, property_keys,
+                property_list)
+
+
+class SASA_atomic(AbstractAtomPropertyMap):
+    """
+    Solvent accessible surface area of each atom of a model.
+
+    Each (chain_id, res_id, atom_id) maps to the accessible area of the
+    atom (in A**2), as with the NACCESS_atomic class. The area is also
+    stored in the xtra attribute of each atom as 'EXP_SASA'.
+    """
+    def __init__(self, model, probe_radius=1.4, n_points=100, radii=None):
+        """
+        @param model: the model (or other entity) to use
+        @type model: L{Model}
+
+        @param probe_radius: radius of the solvent molecule
+        @type probe_radius: float
+
+        @param n_points: number of points on each atom's sphere
+        @type n_points: int
+
+        @param radii: van der Waals radii of the elements (default ATOMIC_RADII)
+        @type radii: dictionary
+        """
+        atoms, areas=_calc_areas(model, probe_radius, n_points, radii)
+        property_dict={}
+        property_keys=[]
+        property_list=[]
+        for atom, area in zip(atoms, areas):
+            residue=atom.get_parent()
+            full_id=(residue.get_parent().get_id(), residue.get_id(),
+                     atom.get_id())
+            property_dict[full_id]=area
+            property_keys.append(full_id)
+            property_list.append((atom, area))
+            atom.xtra['EXP_SASA']=area
+        AbstractAtomPropertyMap.__init__(self, property_dict, property_keys,
+                property_list)
+
+
+if __name__=="__main__":
+    import sys
+    from Bio.PDB import PDBParser
+
+    p=PDBParser()
+    s=p.get_structure('X', sys.argv[1])
+    model=s[0]
+
+    sasa=SASA(model)
+    for e in sasa:
+        print e
@@ -0,0 +1,467 @@
+# Copyright 2013 by the Biopython contributors.
+# All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Assign secondary structure like DSSP, without running the DSSP program.
+
+This follows the hydrogen bond based method of DSSP (Kabsch & Sander,
+Biopolymers, 22:2577-2637, 1983) on the backbone atoms of a model, with
+the hydrogen bond energies, turns, bridges and bends all calculated with
+NumPy arrays.  The result is a map with the same interface as the DSSP
+class (which runs the DSSP program), using the same codes:
+
+    - H        Alpha helix (4-12)
+    - B        Isolated beta-bridge residue
+    - E        Strand
+    - G        3-10 helix
+    - I        pi helix
+    - T        Turn
+    - S        Bend
+    - -        None
+
+For example:
+
+    >>> from Bio.PDB.PDBParser import PDBParser
+    >>> structure = PDBParser().get_structure("1A8O", "PDB/1A8O.pdb")
+    >>> ss = SecondaryStructure(structure[0])
+    >>> residue, code, acc, rel_acc, phi, psi = ss[("A", 165)]
+    >>> print residue.get_resname(), code
+    VAL H
+    >>> print "".join(ss[key][1] for key in ss.keys())
+    ------TTS-HHHHHHHHHHHHHTTT--HHHHHHHHHTHHHHTS-HHHHHHHHTT-TT--HHHHHHHT--
+
+The accessibility is calculated with the Shrake & Rupley algorithm (see
+Bio.PDB.SASA) using the atomic radii of DSSP, so it is close to but not
+exactly the same as the DSSP value.
+"""
+
+import numpy
+
+from Bio._utils import bincount
+from Bio.PDB.AbstractPropertyMap import AbstractResiduePropertyMap
+from Bio.PDB.BackboneGeometry import calc_angles, calc_dihedrals
+from Bio.PDB.CellList import CellList
+from Bio.PDB.DSSP import MAX_ACC
+from Bio.PDB.Polypeptide import is_aa
+from Bio.PDB.SASA import shrake_rupley
+
+
+# Hydrogen bonds have an energy below this (in kcal/mol)
+_MAX_HBOND_ENERGY = -0.5
+# Lowest hydrogen bond energy (e.g. for overlapping atoms)
+_MIN_HBOND_ENERGY = -9.9
+# Electrostatic constant: 0.42 * 0.20 (partial charges) * 332 (kcal/mol)
+_COUPLING_CONSTANT = 27.888
+# Hydrogen bonds are only looked for between residues with their C-alpha
+# atoms within this distance
+_MAX_CA_DISTANCE = 9.0
+# Peptide bonds longer than this are chain breaks
+_MAX_PEPTIDE_BOND = 2.5
+# Residues bent by more than this angle (in degrees) are a bend
+_MIN_BEND_ANGLE = 70.0
+
+# Atomic radii used by DSSP for the accessibility (side chain atoms use
+# _SIDE_CHAIN_RADIUS)
+_BACKBONE_RADII = {"N": 1.65, "CA": 1.87, "C": 1.76, "O": 1.4}
+_SIDE_CHAIN_RADIUS = 1.8
+
+
+def _get_backbone(model):
+    """Return the amino acids with a full backbone, and its atoms (PRIVATE).
+
+    Returns the list of residues, an N x 4 x 3 array of the N, CA, C and O
+    coordinates, and an array of the chain number of each residue.
+    """
+    residues = []
+    coords = []
+    chains = []
+    for chain_number, chain in enumerate(model):
+        for residue in chain:
+            if not is_aa(residue):
+                continue
+            try:
+                atoms = [residue[name] for name in ("N", "CA", "C", "O")]
+            except KeyError:
+                continue
+            residues.append(residue)
+            coords.append([atom.get_coord() for atom in atoms])
+            chains.append(chain_number)
+    coords = numpy.array(coords, float).reshape((-1, 4, 3))
+    return residues, coords, numpy.array(chains, int)
+
+
+def _hbond_energies(n, h, c, o):
+    """Hydrogen bond energies between NH and CO groups (PRIVATE).
+
+    The arguments are arrays of the donor N and H and the acceptor C and O
+    coordinates of each pair, and the energy is in kcal/mol.
+    """
+    def distance(a, b):
+        diff = a - b
+        return numpy.sqrt((diff * diff).sum(axis=1))
+    d_ho = distance(h, o)
+    d_hc = distance(h, c)
+    d_nc = distance(n, c)
+    d_no = distance(n, o)
+    close = numpy.minimum(numpy.minimum(d_ho, d_hc),
+                          numpy.minimum(d_nc, d_no)) < 0.5
+    # Avoid dividing by zero for overlapping atoms
+    d_ho, d_hc, d_nc, d_no = [numpy.where(close, 1.0, d)
+                              for d in (d_ho, d_hc, d_nc, d_no)]
+    energy = _COUPLING_CONSTANT * (1 / d_no + 1 / d_hc - 1 / d_ho - 1 / d_nc)
+    energy[close] = _MIN_HBOND_ENERGY
+    return numpy.maximum(energy, _MIN_HBOND_ENERGY)
+
+
+def _window(flags, length, shift=0):
+    """Mark the length positions from each flag onwards (PRIVATE).
+
+    Position k of the result is True if any of flags[k - shift - length + 1]
+    to flags[k - shift] is True.
+    """
+    if not len(flags):
+        return numpy.zeros(0, bool)
+    marked = numpy.convolve(flags.astype(int), numpy.ones(length, int))
+    marked = numpy.concatenate((numpy.zeros(shift, int), marked))
+    return marked[:len(flags)] > 0
+
+
+class _Assigner(object):
+    """Kabsch & Sander secondary structure of a backbone (PRIVATE).
+
+    The backbone is given as the N x 4 x 3 array of the N, CA, C and O
+    coordinates, where a chain break (a new chain, or a peptide bond that is
+    too long) starts a new segment.  The hydrogen bonds are kept as codes
+    acceptor * N + donor, so that they can be looked up with numpy.in1d.
+    """
+    def __init__(self, coords, chains, prolines):
+        n = len(coords)
+        self.n = n
+        self.ca = coords[:, 1]
+        starts = numpy.ones(n, bool)
+        if n:
+            peptide = coords[1:, 0] - coords[:-1, 2]
+            peptide = numpy.sqrt((peptide * peptide).sum(axis=1))
+            starts[1:] = (chains[1:] != chains[:-1]) | \
+                         (peptide > _MAX_PEPTIDE_BOND)
+        self.starts = starts
+        self.segments = numpy.cumsum(starts)
+        self.hbonds = self._find_hbonds(coords, prolines)
+
+    def _find_hbonds(self, coords, prolines):
+        """Return the codes of the hydrogen bonds (PRIVATE).
+
+        As in DSSP, the amide hydrogen is placed 1 A from the N in the
+        direction of the previous residue's O to C (or on the N at the
+        start of a chain segment), only the two lowest energy bonds of
+        each NH are kept, and prolines are not donors.
+        """
+        n = self.n
+        if n < 2:
+            return numpy.zeros(0, numpy.int64)
+        nitrogen, c, o = coords[:, 0], coords[:, 2], coords[:, 3]
+        co = c[:-1] - o[:-1]
+        co /= numpy.sqrt((co * co).sum(axis=1))[:, numpy.newaxis]
+        h = nitrogen.copy()
+        follows = ~self.starts[1:]
+        h[1:][follows] += co[follows]
+        pairs = CellList(self.ca).search_all(_MAX_CA_DISTANCE)
+        first, second = pairs[:, 0], pairs[:, 1]
+        # Each residue's NH can bond to any CO except its own and the
+        # previous residue's
+        reverse = second != first + 1
+        donors = numpy.concatenate((first, second[reverse]))
+        acceptors = numpy.concatenate((second, first[reverse]))
+        keep = ~prolines[donors]
+        donors = donors[keep]
+        acceptors = acceptors[keep]
+        energy = _hbond_energies(nitrogen[donors], h[donors], c[acceptors],
+                                 o[acceptors])
+        # The two best bonds of each donor
+        order = numpy.lexsort((energy, donors))
+        donors = donors[order]
+        acceptors = acceptors[order]
+        energy = energy[order]
+        new = numpy.concatenate(([True], donors[1:] != donors[:-1]))
+        group_start = numpy.maximum.accumulate(numpy.where(new,
+                                               numpy.arange(len(donors)), 0))
+        best = numpy.arange(len(donors)) - group_start < 2
+        bonded = best & (energy < _MAX_HBOND_ENERGY)
+        return numpy.unique(acceptors[bonded] * numpy.int64(n)
+                            + donors[bonded])
+
+    def hbond(self, acceptor, donor):
+        """Check for hydrogen bonds from CO of acceptor to NH of donor.
+
+        The arguments are arrays of residue numbers, which may be outside
+        the backbone (giving False).
+        """
+        valid = (acceptor >= 0) & (acceptor < self.n) & \
+                (donor >= 0) & (donor < self.n)
+        codes = acceptor * numpy.int64(self.n) + donor
+        return valid & numpy.in1d(codes, self.hbonds)
+
+    def unbroken(self, first, last):
+        """Check that residues first to last are in one segment."""
+        valid = (first >= 0) & (last < self.n)
+        first = numpy.clip(first, 0, self.n - 1)
+        last = numpy.clip(last, 0, self.n - 1)
+        return valid & (self.segments[first] == self.segments[last])
+
+    def turns(self, stride):
+        """Flag the residues i with an H bond from CO(i) to NH(i+stride)."""
+        i = numpy.arange(self.n)
+        return self.hbond(i, i + stride) & self.unbroken(i, i + stride)
+
+    def bridges(self):
+        """Return the beta bridges as a list of (i, j, parallel) tuples.
+
+        Each pair of residues i < j is only listed once, in order.
+        """
+        n = self.n
+        acceptors = self.hbonds // n
+        donors = self.hbonds % n
+        # Every bridge includes at least one of these bonds
+        i = numpy.concatenate((acceptors + 1, donors, acceptors,
+                               acceptors + 1))
+        j = numpy.concatenate((donors, acceptors + 1, donors, donors - 1))
+        i, j = numpy.minimum(i, j), numpy.maximum(i, j)
+        codes = numpy.unique(i * numpy.int64(n) + j)
+        i = codes // n
+        j = codes % n
+        keep = (j - i > 2) & self.unbroken(i - 1, i + 1) & \
+               self.unbroken(j - 1, j + 1)
+        i = i[keep]
+        j = j[keep]
+        hbond = self.hbond
+        parallel = (hbond(i - 1, j) & hbond(j, i + 1)) | \
+                   (hbond(j - 1, i) & hbond(i, j + 1))
+        antiparallel = (hbond(i, j) & hbond(j, i)) | \
+                       (hbond(i - 1, j + 1) & hbond(j - 1, i + 1))
+        bridge = parallel | antiparallel
+        return zip(i[bridge].tolist(), j[bridge].tolist(),
+                   parallel[bridge].tolist())
+
+    def ladders(self):
+        """Return the ladders of consecutive bridges, joined over bulges.
+
+        Each ladder is a list [parallel, i_list, j_list] of its bridges.
+        """
+        ladders = []
+        # Ladders by the next bridge which would extend them
+        ends = {}
+        for i, j, parallel in self.bridges():
+            ladder = ends.pop((parallel, i, j), None)
+            if ladder is None:
+                ladder = [parallel, [i], [j]]
+                ladders.append(ladder)
+            elif parallel:
+                ladder[1].append(i)
+                ladder[2].append(j)
+            else:
+                ladder[1].append(i)
+                ladder[2].insert(0, j)
+            if parallel:
+                ends[(parallel, i + 1, j + 1)] = ladder
+            else:
+                ends[(parallel, i + 1, j - 1)] = ladder
+        # Join ladders with a small gap (beta bulges), where the ladders
+        # are in order of their first residue
+        k = 0
+        while k < len(ladders):
+            m = k + 1
+            while m < len(ladders) and \
+                    ladders[m][1][0] - ladders[k][1][-1] < 6:
+                if self._bulge(ladders[k], ladders[m]):
+                    ladders[k][1] = sorted(ladders[k][1] + ladders[m][1])
+                    ladders[k][2] = sorted(ladders[k][2] + ladders[m][2])
+                    del ladders[m]
+                else:
+                    m += 1
+            k += 1
+        return ladders
+
+    def _bulge(self, ladder, other):
+        """Check if two ladders are linked by a bulge (PRIVATE)."""
+        if ladder[0] != other[0]:
+            return False
+        ibi, iei = ladder[1][0], ladder[1][-1]
+        jbi, jei = ladder[2][0], ladder[2][-1]
+        ibj, iej = other[1][0], other[1][-1]
+        jbj, jej = other[2][0], other[2][-1]
+        segments = self.segments
+        if segments[min(ibi, ibj)] != segments[max(iei, iej)] or \
+           segments[min(jbi, jbj)] != segments[max(jei, jej)]:
+            return False
+        if ibj - iei >= 6 or (iei >= ibj and ibi <= iej):
+            return False
+        i_gap = ibj - iei
+        if ladder[0]:
+            j_gap = jbj - jei
+        else:
+            j_gap = jbi - jej
+        # DSSP uses unsigned numbers, so a negative gap is never a bulge
+        # (e.g. the next strand of an antiparallel meander)
+        if i_gap < 0 or j_gap < 0:
+            return False
+        return (j_gap < 6 and i_gap < 3) or j_gap < 3
+
+    def bends(self):
+        """Flag the residues where the chain bends by over 70 degrees."""
+        n = self.n
+        bend = numpy.zeros(n, bool)
+        if n < 5:
+            return bend
+        ca = self.ca
+        # The angle between CA(i-2) to CA(i) and CA(i) to CA(i+2)
+        kappa = 180.0 - numpy.degrees(calc_angles(ca[:-4], ca[2:-2], ca[4:]))
+        i = numpy.arange(2, n - 2)
+        bend[2:-2] = (kappa > _MIN_BEND_ANGLE) & self.unbroken(i - 2, i + 2)
+        return bend
+
+    def assign(self):
+        """Return an array of the secondary structure codes."""
+        n = self.n
+        ss = numpy.array(["-"] * n, "S1")
+        # Strands and isolated bridges
+        for parallel, i_list, j_list in self.ladders():
+            if len(i_list) > 1:
+                code = "E"
+            else:
+                code = "B"
+            for first, last in ((i_list[0], i_list[-1]),
+                                (j_list[0], j_list[-1])):
+                part = ss[first:last + 1]
+                part[part != "E"] = code
+        turns = dict((stride, self.turns(stride)) for stride in (3, 4, 5))
+        # A helix starts after two consecutive turns, and alpha helices
+        # take priority over strands, then 3-10 helices, then pi helices
+        for stride, code, allowed in ((4, "H", None), (3, "G", "G"),
+                                      (5, "I", "I")):
+            start = numpy.zeros(n, bool)
+            start[1:] = turns[stride][1:] & turns[stride][:-1]
+            if allowed is not None:
+                # Only where all the residues are free
+                taken = (ss != "-") & (ss != allowed)
+                blocked = _window(taken[::-1], stride)[::-1]
+                start &= ~blocked
+            ss[_window(start, stride)] = code
+        # Turns which are not part of a helix
+        turn = numpy.zeros(n, bool)
+        for stride in (3, 4, 5):
+            turn |= _window(turns[stride], stride - 1, 1)
+        ss[(ss == "-") & turn] = "T"
+        ss[(ss == "-") & self.bends()] = "S"
+        return ss
+
+    def phi_psi(self, coords):
+        """Return arrays of the phi and psi angles (360 if undefined)."""
+        n = self.n
+        phi = numpy.zeros(n) + 360.0
+        psi = numpy.zeros(n) + 360.0
+        if n < 2:
+            return phi, psi
+        nitrogen, ca, c = coords[:, 0], coords[:, 1], coords[:, 2]
+        follows = ~self.starts[1:]
+        phi[1:][follows] = numpy.degrees(calc_dihedrals(
+            c[:-1], nitrogen[1:], ca[1:], c[1:]))[follows]
+        psi[:-1][follows] = numpy.degrees(calc_dihedrals(
+            nitrogen[:-1], ca[:-1], c[:-1], nitrogen[1:]))[follows]
+        return phi, psi
+
+
+def _accessibility(residues):
+    """Accessible area of each residue, using the DSSP radii (PRIVATE)."""
+    coords = []
+    radii = []
+    numbers = []
+    for number, residue in enumerate(residues):
+        for atom in residue:
+            if atom.element in ("H", "D"):
+                continue
+            coords.append(atom.get_coord())
+            radii.append(_BACKBONE_RADII.get(atom.get_id(),
+                                             _SIDE_CHAIN_RADIUS))
+            numbers.append(number)
+    areas = shrake_rupley(numpy.array(coords, float).reshape((-1, 3)),
+                          radii, 1.4, 200)
+    return bincount(numpy.array(numbers, int), areas, len(residues))
+
+
+class SecondaryStructure(AbstractResiduePropertyMap):
+    """
+    DSSP secondary structure, accessibility and phi/psi angles of a model.
+
+    This gives the same map as the DSSP class, but is calculated in Python
+    (see above) so no DSSP program is needed.  Each (chain_id, res_id) maps
+    to a tuple of the residue object, the secondary structure code, the
+    accessible area (in A**2, as an integer), the relative accessibility
+    (compared to MAX_ACC in Bio.PDB.DSSP, or 'NA' for unknown residues),
+    and the phi and psi angles (in degrees, or 360.0 if undefined).
+
+    The values are also stored in the xtra attribute of each residue, as
+    'SS_DSSP', 'EXP_DSSP_ASA', 'EXP_DSSP_RASA', 'PHI_DSSP' and 'PSI_DSSP'.
+
+    Only amino acids with all of their backbone N, CA, C and O atoms are
+    included.  Unlike DSSP, the keys use the full residue id (so modified
+    amino acids like MSE have the hetero flag), and angles are not rounded.
+    """
+
+    def __init__(self, model, pdb_file=None):
+        """
+        @param model: the model (or other entity) to use
+        @type model: L{Model}
+
+        @param pdb_file: ignored (taken so that this can replace the
+        DSSP class, which reads the file)
+        @type pdb_file: string
+        """
+        residues, coords, chains = _get_backbone(model)
+        prolines = numpy.array([r.get_resname() == "PRO" for r in residues],
+                               bool)
+        assigner = _Assigner(coords, chains, prolines)
+        codes = assigner.assign()
+        phi, psi = assigner.phi_psi(coords)
+        areas = _accessibility(residues)
+        property_dict = {}
+        property_keys = []
+        property_list = []
+        for residue, ss, area, res_phi, res_psi in zip(residues, codes,
+                                                       areas, phi, psi):
+            acc = int(round(area))
+            try:
+                rel_acc = acc / MAX_ACC[residue.get_resname()]
+            except KeyError:
+                rel_acc = 'NA'
+            else:
+                if rel_acc > 1.0:
+                    rel_acc = 1.0
+            res_phi = float(res_phi)
+            res_psi = float(res_psi)
+            residue.xtra["SS_DSSP"] = ss
+            residue.xtra["EXP_DSSP_ASA"] = acc
+            residue.xtra["EXP_DSSP_RASA"] = rel_acc
+            residue.xtra["PHI_DSSP"] = res_phi
+            residue.xtra["PSI_DSSP"] = res_psi
+            key = (residue.get_parent().get_id(), residue.get_id())
+            value = (residue, ss, acc, rel_acc, res_phi, res_psi)
+            property_dict[key] = value
+            property_keys.append(key)
+            property_list.append(value)
+        AbstractResiduePropertyMap.__init__(self, property_dict,
+                property_keys, property_list)
+
+
+if __name__ == "__main__":
+    import sys
+    from Bio.PDB import PDBParser
+
+    p = PDBParser()
+    s = p.get_structure('X', sys.argv[1])
+    ss = SecondaryStructure(s[0])
+    for r in ss:
+        print r
+    print "Handled", len(ss), "residues"
+    print ''.join(ss[key][1] for key in ss.keys())
@@ -7,10 +7,22 @@
 
 import numpy
 
-from Bio.SVDSuperimposer import SVDSuperimposer
+from Bio.SVDSuperimposer import SVDSuperimposer, superimpose_many
+from Bio.PDB.CoordinateStore import CoordinateStore
 from Bio.PDB.PDBExceptions import PDBException
 
 
+def _get_coords(atoms):
+    "Return the coordinates of a list of atoms as an array (PRIVATE)."
+    if isinstance(atoms, CoordinateStore):
+        return atoms.coords.astype(float)
+    l=len(atoms)
+    coord=numpy.zeros((l, 3))
+    for i in range(0, l):
+        coord[i]=atoms[i].get_coord()
+    return coord
+
+
 class Superimposer(object):
     """
     Rotate/translate one set of atoms on top of another,
@@ -25,18 +37,18 @@ class Superimposer(object):
         Put (translate/rotate) the atoms in fixed on the atoms in
         moving, in such a way that the RMSD is minimized.
 
+        Either list can be a L{CoordinateStore} (see the pack_coords
+        method of Entity), in which case its coordinate array is used
+        directly.
+
         @param fixed: list of (fixed) atoms
         @param moving: list of (moving) atoms
-        @type fixed,moving: [L{Atom}, L{Atom},...]
+        @type fixed,moving: [L{Atom}, L{Atom},...] or L{CoordinateStore}
         """
         if not (len(fixed)==len(moving)):
             raise PDBException("Fixed and moving atom lists differ in size")
-        l=len(fixed)
-        fixed_coord=numpy.zeros((l, 3))
-        moving_coord=numpy.zeros((l, 3))
-        for i in range(0, len(fixed)):
-            fixed_coord[i]=fixed[i].get_coord()
-            moving_coord[i]=moving[i].get_coord()
+        fixed_coord=_get_coords(fixed)
+        moving_coord=_get_coords(moving)
         sup=SVDSuperimposer()
         sup.set(fixed_coord, moving_coord)
         sup.run()
@@ -46,16 +58,57 @@ class Superimposer(object):
     def apply(self, atom_list):
         """
         Rotate/translate a list of atoms.
+
+        This can also be a L{CoordinateStore}, which is transformed
+        in one step.
         """
         if self.rotran is None:
             raise PDBException("No transformation has been calculated yet")
         rot, tran=self.rotran
         rot=rot.astype('f')
         tran=tran.astype('f')
+        if isinstance(atom_list, CoordinateStore):
+            atom_list.transform(rot, tran)
+            return
         for atom in atom_list:
             atom.transform(rot, tran)
 
 
+def superimpose_ensemble(fixed, moving_list):
+    """
+    Superimpose many lists of atoms on the same fixed atoms at once.
+
+    This is much faster than using a L{Superimposer} for each list in
+    turn, e.g. to compare the models of an NMR ensemble or thousands of
+    decoys. Each rotation and translation can be applied to the atoms with
+    their transform method (or a L{CoordinateStore} transform method).
+
+    @param fixed: list of (fixed) atoms
+    @type fixed: [L{Atom}, L{Atom},...] or L{CoordinateStore}
+
+    @param moving_list: lists of (moving) atoms, each the same length as
+    fixed, or an M x N x 3 array of their coordinates (e.g. from the
+    parse_coords method of PDBParser)
+    @type moving_list: list of [L{Atom}, L{Atom},...] or L{CoordinateStore},
+    or NumPy array
+
+    @return: the rotation matrices (M x 3 x 3 array), the translations
+    (M x 3 array), and the RMSDs (array of M values)
+    """
+    fixed_coord=_get_coords(fixed)
+    if isinstance(moving_list, numpy.ndarray):
+        moving_coords=moving_list.astype(float)
+    else:
+        moving_coords=numpy.zeros((len(moving_list), len(fixed), 3))
+        for i, moving in enumerate(moving_list):
+            if not (len(fixed)==len(moving)):
+                raise PDBException("Fixed and moving atom lists differ in size")
+            moving_coords[i]=_get_coords(moving)
+    if moving_coords.shape[1:]!=fixed_coord.shape:
+        raise PDBException("Fixed and moving atom lists differ in size")
+    return superimpose_many(fixed_coord, moving_coords)
+
+
 if __name__=="__main__":
     import sys
 
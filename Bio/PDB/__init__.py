@@ -29,6 +29,9 @@ from parse_pdb_header import parse_pdb_header
 
 # Find connected polypeptides in a Structure
 from Polypeptide import PPBuilder, CaPPBuilder, is_aa, standard_aa_names
+
+# Backbone angles and C-alpha distances as NumPy arrays
+from BackboneGeometry import BackboneGeometry
 # This is also useful :-)
 from Bio.SCOP.Raf import to_one_letter_code
 
@@ -42,6 +45,9 @@ import Selection
 # Superimpose atom sets
 from Superimposer import Superimposer
 
+# Contiguous coordinate arrays (see Entity.pack_coords)
+from CoordinateStore import CoordinateStore
+
 # 3D vector class
 from Vector import Vector, calc_angle, calc_dihedral, refmat, rotmat, rotaxis
 from Vector import vector_to_axis, m2rotaxis, rotaxis2m
@@ -53,6 +59,9 @@ from StructureAlignment import StructureAlignment
 # (secondary structure and solvent accessible area calculation)
 from DSSP import DSSP, make_dssp_dict
 
+# DSSP secondary structure, calculated without the DSSP program
+from SecondaryStructure import SecondaryStructure
+
 # Residue depth:
 # distance of residue atoms from solvent accessible surface
 from ResidueDepth import ResidueDepth, get_surface
@@ -60,6 +69,9 @@ from ResidueDepth import ResidueDepth, get_surface
 # Calculation of Half Sphere Solvent Exposure
 from HSExposure import HSExposureCA, HSExposureCB, ExposureCN
 
+# Solvent accessible surface area (Shrake & Rupley, without NACCESS)
+from SASA import SASA, SASA_atomic
+
 # Kolodny et al.'s backbone libraries
 from FragmentMapper import FragmentMapper
 
@@ -67,8 +79,6 @@ from FragmentMapper import FragmentMapper
 from Dice import extract
 
 # Fast atom neighbor search
-# Depends on KDTree C++ module
-try:
-    from NeighborSearch import NeighborSearch
-except ImportError:
-    pass
+# Uses the KDTree C++ module if compiled, otherwise a NumPy grid
+from NeighborSearch import NeighborSearch
+from CellList import CellList
@@ -3,9 +3,13 @@
 # license.  Please see the LICENSE file that should have been included
 # as part of this package.
 
+import numpy
 from numpy import dot, transpose, sqrt, array
 from numpy.linalg import svd, det
 
+# NumPy 1.10 added matmul, and stacks of matrices for svd and det
+_stacked_linalg = hasattr(numpy, "matmul")
+
 
 class SVDSuperimposer(object):
     """
@@ -118,6 +122,78 @@ class SVDSuperimposer(object):
         return self.rms
 
 
+def superimpose_many(reference_coords, coords):
+    """Superimpose many coordinate sets on a reference at once.
+
+    o reference_coords: an NxDIM array, or an MxNxDIM array (one reference
+      for each coordinate set)
+    o coords: an MxNxDIM array of M coordinate sets (e.g. the models of an
+      ensemble)
+
+    Returns three arrays: the M right multiplying rotation matrices
+    (MxDIMxDIM), the M translations (MxDIM), and the M RMSDs after
+    superposition, where dot(coords[i], rot[i]) + tran[i] is put on top
+    of the reference. This gives the same answers as running the
+    SVDSuperimposer on each coordinate set in turn, but with NumPy 1.10
+    or later does all the singular value decompositions in one NumPy call
+    (older versions of NumPy loop over the coordinate sets).
+    """
+    reference_coords = numpy.asarray(reference_coords, float)
+    coords = numpy.asarray(coords, float)
+    if coords.ndim != 3 or coords.shape[2] != 3 \
+            or reference_coords.shape[-2:] != coords.shape[1:] \
+            or reference_coords.ndim not in (2, 3) \
+            or (reference_coords.ndim == 3 and
+                reference_coords.shape[0] != coords.shape[0]):
+        raise Exception("Coordinate number/dimension mismatch.")
+    n = coords.shape[1]
+    # center on centroid
+    av1 = coords.sum(axis=1) / n
+    av2 = reference_coords.sum(axis=-2) / n
+    centered = coords - av1[:, numpy.newaxis, :]
+    reference_centered = reference_coords - av2[..., numpy.newaxis, :]
+    if not _stacked_linalg:
+        return _superimpose_each(centered, reference_centered, av1, av2)
+    # correlation matrices
+    a = numpy.matmul(centered.transpose(0, 2, 1), reference_centered)
+    u, d, vt = svd(a)
+    # avoid reflections, by flipping the last singular vector if needed
+    sign = numpy.sign(det(u) * det(vt))
+    sign[sign == 0] = 1
+    u[:, :, 2] *= sign[:, numpy.newaxis]
+    rot = numpy.matmul(u, vt)
+    tran = av2 - numpy.matmul(av1[:, numpy.newaxis, :], rot)[:, 0, :]
+    # rms deviations of the transformed coordinates
+    diff = numpy.matmul(centered, rot) - reference_centered
+    rms = numpy.sqrt((diff * diff).sum(axis=2).sum(axis=1) / n)
+    return rot, tran, rms
+
+
+def _superimpose_each(centered, reference_centered, av1, av2):
+    """Superimpose the centered coordinate sets one at a time (PRIVATE).
+
+    This is used by superimpose_many with NumPy before 1.10.
+    """
+    m, n = centered.shape[:2]
+    rot = numpy.empty((m, 3, 3))
+    tran = numpy.empty((m, 3))
+    rms = numpy.empty(m)
+    for i in range(m):
+        if reference_centered.ndim == 3:
+            reference, centroid = reference_centered[i], av2[i]
+        else:
+            reference, centroid = reference_centered, av2
+        u, d, vt = svd(dot(transpose(centered[i]), reference))
+        # avoid reflections, as in SVDSuperimposer.run
+        if det(u) * det(vt) < 0:
+            u[:, 2] = -u[:, 2]
+        rot[i] = dot(u, vt)
+        tran[i] = centroid - dot(av1[i], rot[i])
+        diff = dot(centered[i], rot[i]) - reference
+        rms[i] = sqrt((diff * diff).sum() / n)
+    return rot, tran, rms
+
+
 if __name__ == "__main__":
 
     # start with two coordinate sets (Nx3 arrays - float)
@@ -47,9 +47,36 @@ o BeforePosition - Specify the position as being found before some base.
 o AfterPosition - Specify the position as being found after some base.
 o OneOfPosition - Specify a position where the location can be multiple positions.
 o UnknownPosition - Represents missing information like '?' in UniProt.
+
+Extract the sequences of many features at once.
+-----------------------------------------------
+functions:
+o extract_features - Bulk equivalent of the SeqFeature extract method.
 """
 
-from Bio.Seq import MutableSeq, reverse_complement
+from Bio.Seq import Seq, UnknownSeq, MutableSeq, reverse_complement
+from Bio.Seq import translate as _translate
+
+
+def _slots_getstate(obj):
+    """Collect the slot (and any instance dictionary) values for pickling.
+
+    The feature and location classes use __slots__ to keep the memory
+    footprint down when parsing large annotated genomes, so they need
+    explicit pickle support for the older pickle protocols.
+    """
+    state = dict(getattr(obj, "__dict__", {}))
+    for cls in obj.__class__.__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if hasattr(obj, name):
+                state[name] = getattr(obj, name)
+    return state
+
+
+def _slots_setstate(obj, state):
+    """Restore the state collected by _slots_getstate (PRIVATE)."""
+    for name, value in state.items():
+        setattr(obj, name, value)
 
 
 class SeqFeature(object):
@@ -83,6 +110,11 @@ class SeqFeature(object):
     This is now superceded by a CompoundFeatureLocation as the location,
     and should not be used (DEPRECATED).
     """
+    # The __dict__ entry is only created on demand, so extra attributes
+    # (e.g. the BioSQL primary key) can still be attached to a feature.
+    __slots__ = ("location", "type", "id", "qualifiers", "_sub_features",
+                 "__dict__")
+
     def __init__(self, location = None, type = '', location_operator = '',
                  strand = None, id = "<unknown id>",
                  qualifiers = None, sub_features = None,
@@ -161,6 +193,12 @@ class SeqFeature(object):
             #TODO - Deprecation warning
             self.ref_db = ref_db
 
+    def __getstate__(self):
+        return _slots_getstate(self)
+
+    def __setstate__(self, state):
+        _slots_setstate(self, state)
+
     def _get_sub_features(self):
         if self._sub_features:
             import warnings
@@ -574,6 +612,8 @@ class FeatureLocation(object):
     as well, for example a GenBank location like complement(<123..150)
     would use a BeforePosition object for the start.
     """
+    __slots__ = ("_start", "_end", "_strand", "ref", "ref_db")
+
     def __init__(self, start, end, strand=None, ref=None, ref_db=None):
         """Specify the start, end, strand etc of a sequence feature.
 
@@ -646,6 +686,12 @@ class FeatureLocation(object):
         self.ref = ref
         self.ref_db = ref_db
 
+    def __getstate__(self):
+        return _slots_getstate(self)
+
+    def __setstate__(self, state):
+        _slots_setstate(self, state)
+
     def _get_strand(self):
         return self._strand
 
@@ -925,6 +971,8 @@ class FeatureLocation(object):
 
 class CompoundLocation(object):
     """For handling joins etc where a feature location has several parts."""
+    __slots__ = ("operator", "parts")
+
     def __init__(self, parts, operator="join"):
         """Create a compound location with several parts.
 
@@ -996,6 +1044,12 @@ class CompoundLocation(object):
         if len(self.parts) < 2:
             raise ValueError("CompoundLocation should have at least 2 parts")
 
+    def __getstate__(self):
+        return _slots_getstate(self)
+
+    def __setstate__(self, state):
+        _slots_setstate(self, state)
+
     def __str__(self):
         """Returns a representation of the location (with python counting)."""
         return "%s{%s}" % (self.operator, ", ".join(str(loc) for loc in self.parts))
@@ -1211,7 +1265,12 @@ class CompoundLocation(object):
 
 class AbstractPosition(object):
     """Abstract base class representing a position.
+
+    The simple position classes (ExactPosition, BeforePosition, etc) are
+    integer subclasses without an instance dictionary, so they cost no
+    more memory than a plain integer object.
     """
+    __slots__ = ()
 
     def __repr__(self):
         """String representation of the location for debugging."""
@@ -1251,6 +1310,8 @@ class ExactPosition(int, AbstractPosition):
     15
 
     """
+    __slots__ = ()
+
     def __new__(cls, position, extension = 0):
         if extension != 0:
             raise AttributeError("Non-zero extension %s for exact position."
@@ -1286,7 +1347,7 @@ class UncertainPosition(ExactPosition):
     This is used in UniProt, e.g. ?222 for uncertain position 222, or in the
     XML format explicitly marked as uncertain. Does not apply to GenBank/EMBL.
     """
-    pass
+    __slots__ = ()
 
 
 class UnknownPosition(AbstractPosition):
@@ -1294,6 +1355,7 @@ class UnknownPosition(AbstractPosition):
 
     This is used in UniProt, e.g. ? or in the XML as unknown.
     """
+    __slots__ = ()
 
     def __repr__(self):
         """String representation of the UnknownPosition location for debugging."""
@@ -1576,6 +1638,8 @@ class BeforePosition(int, AbstractPosition):
     Just remember that for equality and sorting the position objects act
     like integers.
     """
+    __slots__ = ()
+
     #Subclasses int so can't use __init__
     def __new__(cls, position, extension = 0):
         if extension != 0:
@@ -1646,6 +1710,8 @@ class AfterPosition(int, AbstractPosition):
     Just remember that for equality and sorting the position objects act
     like integers.
     """
+    __slots__ = ()
+
     #Subclasses int so can't use __init__
     def __new__(cls, position, extension = 0):
         if extension != 0:
@@ -1791,6 +1857,104 @@ class PositionGap(object):
         return out
 
 
+# --- Bulk feature extraction
+
+def extract_features(record, features=None, translate=False,
+                     table="Standard", stop_symbol="*", to_stop=False,
+                     cds=False):
+    """Extract the sequences of many features from a SeqRecord in one go.
+
+    This is equivalent to calling the extract method of each feature in
+    turn (and optionally the translate method of the result), but is much
+    faster when dealing with many features on a large sequence (e.g. all
+    the CDS features of a bacterial genome).  The parent sequence is only
+    converted into a string once (and reverse complemented at most once),
+    and each feature is then built by joining plain string slices before
+    being turned into a Seq object.
+
+    Arguments:
+     - record - SeqRecord (or any object with seq and features attributes).
+     - features - Optional list of SeqFeature objects, defaults to all the
+                  features of the record.
+     - translate - Boolean, should the extracted nucleotide sequences be
+                   translated?  If so, the remaining arguments are passed
+                   to the Seq object's translate method.
+
+    Returns a list of Seq objects, one for each feature (or a list of
+    strings if the record's sequence is a plain string).
+
+    >>> from Bio.Seq import Seq
+    >>> from Bio.SeqRecord import SeqRecord
+    >>> from Bio.Alphabet import generic_dna
+    >>> from Bio.SeqFeature import SeqFeature, FeatureLocation
+    >>> from Bio.SeqFeature import extract_features
+    >>> record = SeqRecord(Seq("ATGGCCATTGTAATGGGCCGCTGAAAGGGTGCCCGATAG",
+    ...                        generic_dna))
+    >>> f1 = SeqFeature(FeatureLocation(0, 24, strand=+1), type="CDS")
+    >>> f2 = SeqFeature(FeatureLocation(30, 36, strand=-1), type="misc")
+    >>> f3 = SeqFeature(FeatureLocation(0, 6, strand=+1) +
+    ...                 FeatureLocation(12, 18, strand=+1), type="CDS")
+    >>> record.features = [f1, f2, f3]
+    >>> for f_seq in extract_features(record):
+    ...     print f_seq
+    ATGGCCATTGTAATGGGCCGCTGA
+    TCGGGC
+    ATGGCCATGGGC
+    >>> for protein in extract_features(record, [f1, f3], translate=True):
+    ...     print protein
+    MAIVMGR*
+    MAMG
+
+    The results match those from the individual feature's extract method:
+
+    >>> [str(f.extract(record.seq)) for f in record.features]
+    ['ATGGCCATTGTAATGGGCCGCTGA', 'TCGGGC', 'ATGGCCATGGGC']
+
+    """
+    if features is None:
+        features = record.features
+    parent_sequence = record.seq
+    if isinstance(parent_sequence, MutableSeq):
+        parent_sequence = parent_sequence.toseq()
+    if isinstance(parent_sequence, UnknownSeq):
+        #Slicing these is cheap, no need to build a (huge) string
+        answer = [f.extract(parent_sequence) for f in features]
+        if translate:
+            #UnknownSeq.translate only takes keyword arguments
+            answer = [f_seq.translate(table=table, stop_symbol=stop_symbol,
+                                      to_stop=to_stop, cds=cds)
+                      for f_seq in answer]
+        return answer
+    data = str(parent_sequence)
+    length = len(data)
+    #Reverse complement the whole parent sequence at most once, and then
+    #take any reverse strand parts from that as simple slices:
+    rc_data = None
+    answer = []
+    for feature in features:
+        pieces = []
+        for part in feature.location.parts:
+            if part.ref or part.ref_db:
+                #TODO - Take a dictionary as an optional argument?
+                raise ValueError("Feature references another sequence.")
+            start = part.nofuzzy_start
+            end = part.nofuzzy_end
+            if part.strand == -1:
+                if rc_data is None:
+                    rc_data = str(reverse_complement(parent_sequence))
+                pieces.append(rc_data[max(0, length - end):max(0, length - start)])
+            else:
+                pieces.append(data[start:end])
+        f_seq = "".join(pieces)
+        if isinstance(parent_sequence, Seq):
+            f_seq = Seq(f_seq, parent_sequence.alphabet)
+            if translate:
+                f_seq = f_seq.translate(table, stop_symbol, to_stop, cds)
+        elif translate:
+            f_seq = _translate(f_seq, table, stop_symbol, to_stop, cds)
+        answer.append(f_seq)
+    return answer
+
 if __name__ == "__main__":
     from Bio._utils import run_doctest
     run_doctest()
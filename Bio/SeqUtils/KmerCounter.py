@@ -0,0 +1,336 @@
+# Copyright 2013 by the Biopython contributors.
+# All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Count k-mers (words of length k) in nucleotide sequences using NumPy.
+
+Each k-mer is stored as a 2-bit encoded integer (A=0, C=1, G=2, T=3, so
+k can be at most 31), and the counts are held as a pair of compact NumPy
+arrays (the sorted k-mer codes and their counts) rather than a dictionary
+of strings.  K-mers containing any letter other than A, C, G or T (after
+upper casing) are skipped.
+
+>>> from Bio.SeqUtils.KmerCounter import KmerCounter
+>>> counter = KmerCounter(3)
+>>> counter.add("ACGTACGTNACG")
+>>> len(counter)
+4
+>>> counter.total
+7
+>>> counter["ACG"], counter["CGT"], counter["TTT"]
+(3, 2, 0)
+>>> for kmer, count in counter.items():
+...     print kmer, count
+ACG 3
+CGT 2
+GTA 1
+TAC 1
+
+With canonical k-mers, each k-mer is counted together with its reverse
+complement (under whichever of the two sorts first):
+
+>>> counter = KmerCounter(3, canonical=True)
+>>> counter.add("ACGTACGTNACG")
+>>> for kmer, count in counter.items():
+...     print kmer, count
+ACG 5
+GTA 2
+
+The k-mer spectrum gives the number of distinct k-mers seen once, twice,
+and so on:
+
+>>> counter.spectrum().tolist()
+[0, 0, 1, 0, 0, 1]
+
+You can also count the k-mers in a whole file (or any iterable of SeqRecord,
+Seq or string objects), optionally using several processes with the
+count_kmers function:
+
+>>> from Bio import SeqIO
+>>> from Bio.SeqUtils.KmerCounter import count_kmers
+>>> records = SeqIO.parse("GenBank/NC_005816.fna", "fasta")
+>>> counter = count_kmers(records, 8, canonical=True)
+>>> counter.total
+9602
+"""
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SeqUtils.KmerCounter.")
+
+from Bio._utils import bincount
+from Bio.SeqUtils.SlidingWindow import _as_array, _kmer_codes
+
+_letters = "ACGT"
+
+#Maps each byte to its complement (for A, C, G and T only)
+_complement = numpy.zeros(256, dtype=numpy.uint8)
+for _a, _b in zip(_letters, _letters[::-1]):
+    _complement[ord(_a)] = ord(_b)
+del _a, _b
+
+
+def _sequence_string(sequence):
+    """Turn a SeqRecord, Seq or string into a plain string (PRIVATE)."""
+    try:
+        #SeqRecord
+        return str(sequence.seq)
+    except AttributeError:
+        return str(sequence)
+
+
+def _reduce(codes, counts=None):
+    """Sort k-mer codes and sum the counts of duplicates (PRIVATE).
+
+    Returns a tuple of two arrays, the unique codes (sorted), and their
+    counts.  If counts is omitted, each code is counted once.
+    """
+    if counts is None:
+        counts = numpy.ones(len(codes), dtype=numpy.int64)
+    if not len(codes):
+        return (numpy.zeros(0, dtype=numpy.int64),
+                numpy.zeros(0, dtype=numpy.int64))
+    order = numpy.argsort(codes, kind="mergesort")
+    codes = codes[order]
+    counts = counts[order]
+    starts = numpy.concatenate(([0], numpy.flatnonzero(codes[1:] != codes[:-1]) + 1))
+    return codes[starts], numpy.add.reduceat(counts, starts)
+
+
+def _sequence_codes(sequence, k, canonical):
+    """The 2-bit code of each valid k-mer in a sequence (PRIVATE)."""
+    data = _as_array(_sequence_string(sequence))
+    codes, valid = _kmer_codes(data, k)
+    if canonical and len(codes):
+        #The reverse complement of each k-mer is found by encoding the
+        #complement of the reversed sequence (A<->T, C<->G)
+        rc_codes, rc_valid = _kmer_codes(_complement[data[::-1]], k)
+        codes = numpy.minimum(codes, rc_codes[::-1])
+    return codes[valid]
+
+
+def _reverse_complement_code(code, k):
+    """The 2-bit code of the reverse complement of a k-mer (PRIVATE).
+
+    >>> _reverse_complement_code(7, 3) # ACT -> AGT
+    11
+    """
+    answer = 0
+    for i in range(k):
+        answer = (answer << 2) | (3 - (code & 3))
+        code >>= 2
+    return answer
+
+
+def _count_chunk(args):
+    """Count the k-mers in a list of sequence strings (PRIVATE).
+
+    This is used as the worker function for multiprocessing.
+    """
+    sequences, k, canonical = args
+    counter = KmerCounter(k, canonical)
+    for sequence in sequences:
+        counter.add(sequence)
+    return counter.codes, counter.counts
+
+
+class KmerCounter(object):
+    """Count the k-mers in one or more nucleotide sequences.
+
+    Attributes:
+     - k         - k-mer length (integer, 1 to 31).
+     - canonical - Boolean, are k-mers counted together with their reverse
+                   complement?
+     - codes     - sorted NumPy array of the 2-bit codes of the k-mers seen.
+     - counts    - NumPy array of the corresponding counts.
+    """
+
+    #Number of k-mer codes to buffer before merging them into the counts
+    _buffer_size = 1000000
+
+    def __init__(self, k, canonical=False):
+        """Create an empty k-mer counter.
+
+        Arguments:
+         - k - k-mer length (integer, 1 to 31).
+         - canonical - Boolean, count each k-mer together with its reverse
+                       complement (default False).
+        """
+        if not 0 < k < 32:
+            raise ValueError("k should be between 1 and 31, not %r" % k)
+        self.k = k
+        self.canonical = canonical
+        self._codes = numpy.zeros(0, dtype=numpy.int64)
+        self._counts = numpy.zeros(0, dtype=numpy.int64)
+        self._buffer = []
+        self._buffered = 0
+
+    def __repr__(self):
+        return "%s(%i, canonical=%r)" % (self.__class__.__name__, self.k,
+                                         self.canonical)
+
+    def _flush(self):
+        """Merge any buffered k-mer codes into the counts (PRIVATE)."""
+        if self._buffer:
+            codes, counts = _reduce(numpy.concatenate(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+            self._merge(codes, counts)
+
+    def _merge(self, codes, counts):
+        """Add sorted unique codes and their counts (PRIVATE)."""
+        if not len(self._codes):
+            self._codes, self._counts = codes, counts
+        elif len(codes):
+            self._codes, self._counts = _reduce(
+                numpy.concatenate((self._codes, codes)),
+                numpy.concatenate((self._counts, counts)))
+
+    @property
+    def codes(self):
+        """Sorted NumPy array of the 2-bit codes of the k-mers seen."""
+        self._flush()
+        return self._codes
+
+    @property
+    def counts(self):
+        """NumPy array of counts, matching the codes array."""
+        self._flush()
+        return self._counts
+
+    @property
+    def total(self):
+        """Total number of k-mers counted."""
+        return int(self.counts.sum())
+
+    def add(self, sequence):
+        """Count the k-mers in a sequence (SeqRecord, Seq or string)."""
+        codes = _sequence_codes(sequence, self.k, self.canonical)
+        self._buffer.append(codes)
+        self._buffered += len(codes)
+        if self._buffered >= self._buffer_size:
+            self._flush()
+
+    def update(self, sequences):
+        """Count the k-mers in an iterable of sequences (e.g. from SeqIO)."""
+        for sequence in sequences:
+            self.add(sequence)
+
+    def merge(self, other):
+        """Add the counts from another KmerCounter (with the same settings).
+
+        This can be used to combine results counted separately, e.g. in
+        different processes.
+        """
+        if other.k != self.k or other.canonical != self.canonical:
+            raise ValueError("Can't merge %r into %r" % (other, self))
+        self._flush()
+        self._merge(other.codes, other.counts)
+
+    def encode(self, kmer):
+        """Return the 2-bit integer code for a k-mer string.
+
+        >>> KmerCounter(3).encode("ACT")
+        7
+        """
+        if len(kmer) != self.k:
+            raise ValueError("Expected a k-mer of length %i, not %r"
+                             % (self.k, kmer))
+        code = 0
+        for letter in str(kmer).upper():
+            code = (code << 2) | _letters.index(letter)
+        return code
+
+    def decode(self, code):
+        """Return the k-mer string for a 2-bit integer code.
+
+        >>> KmerCounter(3).decode(7)
+        'ACT'
+        """
+        code = int(code)
+        letters = []
+        for i in range(self.k):
+            letters.append(_letters[code & 3])
+            code >>= 2
+        return "".join(letters[::-1])
+
+    def __len__(self):
+        """Number of distinct k-mers seen."""
+        return len(self.codes)
+
+    def __getitem__(self, kmer):
+        """Count for the given k-mer string (zero if not seen)."""
+        code = self.encode(kmer)
+        if self.canonical:
+            code = min(code, _reverse_complement_code(code, self.k))
+        codes = self.codes
+        index = numpy.searchsorted(codes, code)
+        if index < len(codes) and codes[index] == code:
+            return int(self.counts[index])
+        return 0
+
+    def items(self):
+        """Iterate over the k-mers (as strings) and their counts, sorted."""
+        for code, count in zip(self.codes, self.counts):
+            yield self.decode(code), int(count)
+
+    def spectrum(self):
+        """The k-mer spectrum (histogram of the k-mer counts).
+
+        Returns an integer NumPy array where entry i is the number of distinct
+        k-mers seen exactly i times.
+        """
+        return bincount(self.counts, minlength=1)
+
+
+def count_kmers(sequences, k, canonical=False, processes=1, chunk_size=1000):
+    """Count the k-mers in an iterable of sequences, using several processes.
+
+    Arguments:
+     - sequences  - iterable of SeqRecord, Seq or string objects (e.g. from
+                    Bio.SeqIO.parse).
+     - k          - k-mer length (integer, 1 to 31).
+     - canonical  - Boolean, count each k-mer together with its reverse
+                    complement (default False).
+     - processes  - number of worker processes (default one, meaning count
+                    in this process; None means use all the CPUs).
+     - chunk_size - number of sequences sent to a worker process at a time.
+
+    Returns a KmerCounter object.
+    """
+    counter = KmerCounter(k, canonical)
+    if processes == 1:
+        counter.update(sequences)
+        return counter
+
+    def chunks():
+        chunk = []
+        for sequence in sequences:
+            chunk.append(_sequence_string(sequence))
+            if len(chunk) >= chunk_size:
+                yield chunk, k, canonical
+                chunk = []
+        if chunk:
+            yield chunk, k, canonical
+
+    import multiprocessing
+    pool = multiprocessing.Pool(processes)
+    try:
+        for codes, counts in pool.imap_unordered(_count_chunk, chunks()):
+            counter._merge(codes, counts)
+    except:
+        pool.terminate()
+        raise
+    pool.close()
+    pool.join()
+    return counter
+
+
+if __name__ == "__main__":
+    from Bio._utils import run_doctest
+    run_doctest()
@@ -0,0 +1,305 @@
+# Copyright 2013 by the Biopython contributors.
+# All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Protein analysis of many sequences at once, using NumPy.
+
+This offers the same calculations as the ProteinAnalysis class in the
+Bio.SeqUtils.ProtParam module, but for a whole batch of sequences (e.g. a
+complete proteome) at a time.  The sequences are packed into a single NumPy
+array and a composition matrix (the count of each letter in each sequence)
+is built in one pass, from which most of the properties follow by matrix
+multiplication.  The isoelectric points are found by a bisection done on
+all the sequences in parallel.
+
+Each method returns a NumPy array with one value (or row) per sequence:
+
+>>> from Bio.SeqUtils.ProtParamBatch import BatchProteinAnalysis
+>>> batch = BatchProteinAnalysis(["MAEGEITTFTALTEKFNLPPGNYKKPKLLYCSNGG",
+...                               "MKQHKAMIVALIVICITAVVAAL"])
+>>> ["%0.2f" % mw for mw in batch.molecular_weight()]
+['3834.28', '2437.08']
+>>> ["%0.2f" % pi for pi in batch.isoelectric_point()]
+['7.88', '9.31']
+>>> ["%0.3f" % gravy for gravy in batch.gravy()]
+['-0.454', '1.848']
+
+Sequences are upper cased, and values which can't be calculated because a
+sequence contains a non-standard amino acid (e.g. X) are returned as NaN
+(not a number), rather than raising an exception for the whole batch.
+"""
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SeqUtils.ProtParamBatch.")
+
+from Bio._py3k import _as_bytes
+from Bio._utils import bincount
+from Bio.Data import IUPACData
+from Bio.SeqUtils import ProtParamData
+from Bio.SeqUtils import IsoelectricPoint
+
+
+def _byte_scale(values, default=numpy.nan):
+    """Turn a dictionary of amino acid values into a 256 entry array (PRIVATE).
+
+    Letters missing from the dictionary get the default value (NaN).
+    """
+    scale = numpy.empty(256, dtype=float)
+    scale.fill(default)
+    for letter, value in values.items():
+        scale[ord(letter)] = value
+    return scale
+
+
+class BatchProteinAnalysis(object):
+    """Protein analysis of a batch of sequences.
+
+    The constructor takes a list (or any iterable) of protein sequences as
+    strings, Seq or SeqRecord objects.  The optional second argument selects
+    monoisotopic weights for molecular_weight (as in ProteinAnalysis).
+
+    Attributes:
+     - lengths - NumPy array of the sequence lengths.
+     - amino_acids - the column order used for amino acid counts, which is
+                     the twenty standard amino acids (IUPACData.protein_letters).
+    """
+
+    amino_acids = IUPACData.protein_letters
+
+    def __init__(self, sequences, monoisotopic=False):
+        strings = []
+        for sequence in sequences:
+            try:
+                #SeqRecord
+                sequence = sequence.seq
+            except AttributeError:
+                pass
+            strings.append(str(sequence).upper())
+        self.monoisotopic = monoisotopic
+        self.lengths = numpy.array([len(s) for s in strings], dtype=numpy.int64)
+        self._offsets = numpy.zeros(len(strings) + 1, dtype=numpy.int64)
+        numpy.cumsum(self.lengths, out=self._offsets[1:])
+        #All the sequences end to end, and which sequence each letter is from
+        self._data = numpy.frombuffer(_as_bytes("".join(strings)),
+                                      dtype=numpy.uint8)
+        self._index = numpy.repeat(numpy.arange(len(strings)), self.lengths)
+        self._composition = None
+        self._first = numpy.array([ord(s[0]) if s else 0 for s in strings],
+                                  dtype=numpy.uint8)
+        self._last = numpy.array([ord(s[-1]) if s else 0 for s in strings],
+                                 dtype=numpy.uint8)
+
+    def __len__(self):
+        """Number of sequences in the batch."""
+        return len(self.lengths)
+
+    def _get_composition(self):
+        """Matrix of letter counts, one row per sequence and 256 columns (PRIVATE).
+
+        The column is the byte value of the letter, e.g. 65 for A.
+        """
+        if self._composition is None:
+            counts = bincount(self._index * 256 + self._data,
+                              minlength=len(self) * 256)
+            self._composition = counts.reshape((len(self), 256))
+        return self._composition
+
+    def _scale_sum(self, scale):
+        """Sum a 256 entry letter scale over each sequence (PRIVATE).
+
+        Any letter with a NaN value in the scale makes the total NaN
+        (but only for sequences which contain it).
+        """
+        composition = self._get_composition()
+        known = ~numpy.isnan(scale)
+        totals = numpy.dot(composition[:, known], scale[known])
+        unknown = composition[:, ~known].sum(axis=1) > 0
+        totals[unknown] = numpy.nan
+        return totals
+
+    def _lengths_float(self):
+        """Sequence lengths as floats, with NaN for empty sequences (PRIVATE)."""
+        lengths = self.lengths.astype(float)
+        lengths[lengths == 0] = numpy.nan
+        return lengths
+
+    def count_amino_acids(self):
+        """Count standard amino acids, returns an integer array.
+
+        One row per sequence, one column per amino acid (in the order given
+        by the amino_acids attribute).
+        """
+        columns = [ord(aa) for aa in self.amino_acids]
+        return self._get_composition()[:, columns]
+
+    def get_amino_acids_percent(self):
+        """Amino acid content as a fraction of the sequence length.
+
+        As with the ProteinAnalysis method of the same name, these are
+        fractions (between zero and one), not percentages.
+        """
+        return self.count_amino_acids() / self._lengths_float()[:, numpy.newaxis]
+
+    def _fraction(self, letters):
+        """Combined fraction of the given amino acids (PRIVATE)."""
+        columns = [self.amino_acids.index(aa) for aa in letters]
+        return self.get_amino_acids_percent()[:, columns].sum(axis=1)
+
+    def molecular_weight(self):
+        """Calculate the molecular weight of each protein sequence."""
+        if self.monoisotopic:
+            water = 18.01
+            iupac_weights = IUPACData.monoisotopic_protein_weights
+        else:
+            iupac_weights = IUPACData.protein_weights
+            water = 18.02
+        aa_weights = dict((aa, weight - water)
+                          for aa, weight in iupac_weights.items())
+        return water + self._scale_sum(_byte_scale(aa_weights))
+
+    def aromaticity(self):
+        """Calculate the aromaticity according to Lobry, 1994.
+
+        This is the relative frequency of Phe+Trp+Tyr.
+        """
+        return self._fraction("YWF")
+
+    def gravy(self):
+        """Calculate the gravy according to Kyte and Doolittle."""
+        return self._scale_sum(_byte_scale(ProtParamData.kd)) \
+               / self._lengths_float()
+
+    def secondary_structure_fraction(self):
+        """Calculate fraction of helix, turn and sheet.
+
+        Returns an array with three columns (Helix, Turn, Sheet), see
+        the ProteinAnalysis method of the same name.
+        """
+        return numpy.column_stack((self._fraction("VIYFWL"),
+                                   self._fraction("NPGS"),
+                                   self._fraction("EMAL")))
+
+    def instability_index(self):
+        """Calculate the instability index according to Guruprasad et al 1990.
+
+        Any value above 40 means the protein is unstable (has a short half
+        life).  Uses a dipeptide composition over all the sequences at once.
+        """
+        diwv = numpy.empty((256, 256), dtype=float)
+        diwv.fill(numpy.nan)
+        for first, values in ProtParamData.DIWV.items():
+            for second, value in values.items():
+                diwv[ord(first), ord(second)] = value
+        data = self._data
+        #Only consider dipeptides within a single sequence
+        same = self._index[:-1] == self._index[1:]
+        values = diwv[data[:-1][same], data[1:][same]]
+        pair_index = self._index[:-1][same]
+        known = ~numpy.isnan(values)
+        scores = bincount(pair_index[known], values[known], len(self))
+        unknown = bincount(pair_index[~known], minlength=len(self)) > 0
+        scores[unknown] = numpy.nan
+        return (10.0 / self._lengths_float()) * scores
+
+    def flexibility(self):
+        """Calculate the flexibility according to Vihinen, 1994.
+
+        Returns a list with an array of flexibility scores for each sequence,
+        matching the ProteinAnalysis method of the same name (which uses a
+        fixed window size of nine).
+        """
+        window_size = 9
+        weights = [0.25, 0.4375, 0.625, 0.8125, 1]
+        flex = _byte_scale(ProtParamData.Flex)[self._data]
+        count = max(len(flex) - window_size + 1, 0)
+        scores = numpy.zeros(count, dtype=float)
+        for j in range(window_size // 2):
+            scores += (flex[j:j + count] +
+                       flex[window_size - j - 1:window_size - j - 1 + count]) \
+                      * weights[j]
+        middle = window_size // 2 + 1
+        scores += flex[middle:middle + count]
+        scores /= 5.25
+        answer = []
+        for start, length in zip(self._offsets[:-1], self.lengths):
+            answer.append(scores[start:start + max(length - window_size, 0)])
+        return answer
+
+    def _charge(self, pH, charged, pos_pKs, neg_pKs):
+        """Total charge of each protein at the given pH values (PRIVATE)."""
+        positive = numpy.zeros(len(pH), dtype=float)
+        for aa in pos_pKs:
+            CR = 10 ** (pos_pKs[aa] - pH)
+            positive += charged[aa] * (CR / (CR + 1.0))
+        negative = numpy.zeros(len(pH), dtype=float)
+        for aa in neg_pKs:
+            CR = 10 ** (pH - neg_pKs[aa])
+            negative += charged[aa] * (CR / (CR + 1.0))
+        return positive - negative
+
+    def isoelectric_point(self):
+        """Calculate the isoelectric point of each protein.
+
+        This follows the Bjellqvist method used in the IsoelectricPoint
+        module, bracketing the pI in steps of one pH unit from pH 7, and
+        then bisecting until the bracket is at most 0.0001 pH units wide.
+        All the sequences are processed in parallel.
+        """
+        composition = self._get_composition().astype(float)
+        charged = {}
+        for aa in IsoelectricPoint.charged_aas:
+            charged[aa] = composition[:, ord(aa)]
+        charged["Nterm"] = charged["Cterm"] = 1.0
+        #Per sequence pK values, allowing for the terminal residues
+        pos_pKs = dict((aa, numpy.array(pK, dtype=float))
+                       for aa, pK in IsoelectricPoint.positive_pKs.items())
+        neg_pKs = dict((aa, numpy.array(pK, dtype=float))
+                       for aa, pK in IsoelectricPoint.negative_pKs.items())
+        pos_pKs["Nterm"] = _byte_scale(IsoelectricPoint.pKnterminal,
+                                       IsoelectricPoint.positive_pKs["Nterm"])[self._first]
+        neg_pKs["Cterm"] = _byte_scale(IsoelectricPoint.pKcterminal,
+                                       IsoelectricPoint.negative_pKs["Cterm"])[self._last]
+
+        #Bracket between pH1 and pH2, stepping one pH unit at a time
+        size = len(self)
+        pH = numpy.empty(size, dtype=float)
+        pH.fill(7.0)
+        charge = self._charge(pH, charged, pos_pKs, neg_pKs)
+        pH1 = pH.copy()
+        pH2 = pH.copy()
+        up = charge > 0.0
+        #A charge of exactly zero at pH 7 needs no search
+        searching = charge != 0.0
+        while searching.any():
+            step = numpy.where(up, 1.0, -1.0)
+            trial = numpy.where(up, pH1, pH2) + step
+            trial_charge = self._charge(trial, charged, pos_pKs, neg_pKs)
+            #Going up, stop at the first pH with charge <= 0, and going
+            #down stop at the first pH with charge >= 0
+            found = numpy.where(up, trial_charge <= 0.0, trial_charge >= 0.0)
+            found &= searching
+            moving = searching & ~found
+            pH1 = numpy.where(moving & up, trial, pH1)
+            pH2 = numpy.where(moving & ~up, trial, pH2)
+            pH2 = numpy.where(found & up, trial, pH2)
+            pH1 = numpy.where(found & ~up, trial, pH1)
+            pH = numpy.where(searching, trial, pH)
+            charge = numpy.where(searching, trial_charge, charge)
+            searching = moving
+        #Bisection, on all the sequences at once
+        active = (pH2 - pH1 > 0.0001) & (charge != 0.0)
+        while active.any():
+            middle = (pH1 + pH2) / 2.0
+            middle_charge = self._charge(middle, charged, pos_pKs, neg_pKs)
+            pH = numpy.where(active, middle, pH)
+            charge = numpy.where(active, middle_charge, charge)
+            pH1 = numpy.where(active & (middle_charge > 0.0), middle, pH1)
+            pH2 = numpy.where(active & (middle_charge <= 0.0), middle, pH2)
+            active &= (pH2 - pH1 > 0.0001) & (charge != 0.0)
+        return pH
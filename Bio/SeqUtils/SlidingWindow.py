@@ -0,0 +1,252 @@
+# Copyright 2013 by the Biopython contributors.
+# All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Sliding window sequence statistics using NumPy.
+
+The functions in this module compute composition based statistics (GC
+content, GC skew, local composition complexity and k-mer composition) over
+sliding windows along a (possibly chromosome sized) nucleotide sequence.
+
+Rather than counting the letters in each window from scratch, the sequence
+is converted once into a NumPy array and the counts for every window are
+taken as differences of cumulative sums, so the cost does not depend on the
+window size.
+
+The functions take the following window arguments:
+
+ - window  - window size (integer).
+ - step    - distance between the start of consecutive windows, defaults
+             to one (i.e. every possible window).
+ - partial - Boolean, if True then windows running off the end of the
+             sequence are included (truncated to the end of the sequence),
+             otherwise (the default) only complete windows are used.
+             This is not offered for the LCC which assumes a fixed window
+             size.
+
+>>> from Bio.SeqUtils.SlidingWindow import window_counts, gc_content
+>>> window_counts("ACGTTTGCA", 4, step=2).tolist()
+[[1, 1, 1, 1], [0, 0, 1, 3], [0, 1, 1, 2]]
+>>> gc_content("ACGTTTGCA", 4, step=2).tolist()
+[50.0, 25.0, 50.0]
+"""
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SeqUtils.SlidingWindow.")
+
+from Bio._py3k import _as_bytes
+
+
+def _as_array(seq):
+    """Convert a sequence into an upper case NumPy array of bytes (PRIVATE)."""
+    return numpy.frombuffer(_as_bytes(str(seq).upper()), dtype=numpy.uint8)
+
+
+def _window_bounds(length, window, step=1, partial=False):
+    """Start and end coordinates of the sliding windows (PRIVATE).
+
+    >>> starts, ends = _window_bounds(10, 4, 3)
+    >>> starts.tolist(), ends.tolist()
+    ([0, 3, 6], [4, 7, 10])
+    >>> starts, ends = _window_bounds(10, 4, 3, partial=True)
+    >>> starts.tolist(), ends.tolist()
+    ([0, 3, 6, 9], [4, 7, 10, 10])
+    """
+    if window < 1:
+        raise ValueError("Window size must be a positive integer, not %r"
+                         % window)
+    if step < 1:
+        raise ValueError("Window step must be a positive integer, not %r"
+                         % step)
+    if partial:
+        last = length
+    else:
+        last = length - window + 1
+    starts = numpy.arange(0, max(last, 0), step)
+    ends = numpy.minimum(starts + window, length)
+    return starts, ends
+
+
+def _cumulative(mask):
+    """Cumulative sum of a boolean mask, with a leading zero (PRIVATE).
+
+    Then the number of True values in mask[start:end] is given by
+    cumulative[end] - cumulative[start].
+    """
+    answer = numpy.zeros(len(mask) + 1, dtype=numpy.int64)
+    numpy.cumsum(mask, out=answer[1:])
+    return answer
+
+
+def window_counts(seq, window, step=1, letters="ACGT", partial=False):
+    """Count letters (or groups of letters) in sliding windows.
+
+    Arguments:
+     - seq     - sequence (string or Seq object), case is ignored.
+     - letters - a sequence of letters to count, each entry can also be a
+                 string of several letters to be counted together (e.g.
+                 ["GCS", "ATW"] to count strong and weak nucleotides).
+
+    Returns a two dimensional integer array, with one row per window and
+    one column per entry in letters.
+
+    >>> window_counts("GGCCNNAATT", 5, step=5, letters=["GCS", "ATW"]).tolist()
+    [[4, 0], [0, 4]]
+    """
+    data = _as_array(seq)
+    starts, ends = _window_bounds(len(data), window, step, partial)
+    return _window_counts(data, starts, ends, letters)
+
+
+def _window_counts(data, starts, ends, letters):
+    """Count letters in the given windows of an array of bytes (PRIVATE)."""
+    counts = numpy.zeros((len(starts), len(letters)), dtype=numpy.int64)
+    for column, group in enumerate(letters):
+        mask = numpy.zeros(len(data), dtype=bool)
+        for letter in group.upper():
+            mask |= (data == ord(letter))
+        cumulative = _cumulative(mask)
+        counts[:, column] = cumulative[ends] - cumulative[starts]
+    return counts
+
+
+def gc_content(seq, window, step=1, partial=False):
+    """G+C content of sliding windows, as percentages (0 to 100).
+
+    This gives the same values as applying Bio.SeqUtils.GC to each window,
+    i.e. the ambiguous nucleotide S is counted as G or C, and the percentage
+    is calculated against the full length of the window.
+
+    >>> gc_content("GCGCATAT", 4, step=2).tolist()
+    [100.0, 50.0, 0.0]
+    """
+    data = _as_array(seq)
+    starts, ends = _window_bounds(len(data), window, step, partial)
+    gc = _window_counts(data, starts, ends, ["GCS"])[:, 0]
+    lengths = ends - starts
+    #Avoid dividing by zero for an empty sequence (no windows)
+    return gc * 100.0 / numpy.maximum(lengths, 1)
+
+
+def gc_skew(seq, window=100, step=None, partial=True):
+    """GC skew (G-C)/(G+C) of sliding windows.
+
+    By default this uses non-overlapping windows (step equal to the window
+    size) including any partial window at the end of the sequence, which
+    matches the Bio.SeqUtils.GC_skew function.  Windows without any G or C
+    give NaN (not a number).
+
+    >>> ["%0.2f" % value for value in gc_skew("GGGCAACCCCGC", 4)]
+    ['0.50', '-1.00', '-0.50']
+    """
+    if step is None:
+        step = window
+    counts = window_counts(seq, window, step, "GC", partial)
+    g = counts[:, 0]
+    c = counts[:, 1]
+    old = numpy.seterr(divide="ignore", invalid="ignore")
+    try:
+        return (g - c) / (g + c).astype(float)
+    finally:
+        numpy.seterr(**old)
+
+
+def lcc(seq, window, step=1):
+    """Local Composition Complexity (LCC) of sliding windows.
+
+    Gives the same values as applying Bio.SeqUtils.lcc.lcc_simp to each
+    window of an unambiguous DNA sequence (any other letters are ignored).
+
+    >>> ["%0.4f" % value for value in lcc("ACGTACGTAAAA", 8, step=4)]
+    ['2.0000', '1.5488']
+    """
+    #Precompute the entropy terms for each possible count, as done in
+    #Bio.SeqUtils.lcc.lcc_mult, so the values match exactly.
+    log2 = numpy.log(2)
+    proportions = numpy.arange(1, window + 1) / float(window)
+    terms = numpy.zeros(window + 1, dtype=float)
+    terms[1:] = proportions * (numpy.log(proportions) / log2)
+    counts = window_counts(seq, window, step, "ACTG")
+    return -(terms[counts[:, 0]] + terms[counts[:, 1]] +
+             terms[counts[:, 2]] + terms[counts[:, 3]])
+
+
+def _kmer_codes(data, k):
+    """Integer code for the k-mer starting at each position (PRIVATE).
+
+    Takes an upper case array of bytes, and returns an integer array with
+    the 2-bit encoding of the k-mer starting at each position (using A=0,
+    C=1, G=2, T=3 so that the codes sort like the k-mer strings), and a
+    boolean array which is False for k-mers including any other letter.
+    """
+    lookup = numpy.zeros(256, dtype=numpy.int64)
+    valid_letter = numpy.zeros(256, dtype=bool)
+    for code, letter in enumerate("ACGT"):
+        lookup[ord(letter)] = code
+        valid_letter[ord(letter)] = True
+    if len(data) < k:
+        return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=bool)
+    letter_codes = lookup[data]
+    count = len(data) - k + 1
+    codes = numpy.zeros(count, dtype=numpy.int64)
+    for offset in range(k):
+        codes = (codes << 2) | letter_codes[offset:offset + count]
+    invalid = _cumulative(~valid_letter[data])
+    valid = (invalid[k:] - invalid[:count]) == 0
+    return codes, valid
+
+
+def kmer_labels(k):
+    """List of all the k-mers of length k, in the column order used here.
+
+    >>> kmer_labels(2)[:6]
+    ['AA', 'AC', 'AG', 'AT', 'CA', 'CC']
+    """
+    labels = [""]
+    for i in range(k):
+        labels = [label + letter for label in labels for letter in "ACGT"]
+    return labels
+
+
+def kmer_composition(seq, k, window, step=1, partial=False):
+    """Count all the k-mers in sliding windows.
+
+    Only k-mers lying completely within a window are counted, and k-mers
+    including any letter other than A, C, G or T are ignored.  Returns a two
+    dimensional integer array with one row per window, and 4**k columns
+    (one per k-mer, in the order given by the kmer_labels function).
+
+    >>> counts = kmer_composition("AAAACCCC", 2, 4, step=4)
+    >>> counts[:, :6].tolist()
+    [[3, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 3]]
+    """
+    data = _as_array(seq)
+    starts, ends = _window_bounds(len(data), window, step, partial)
+    codes, valid = _kmer_codes(data, k)
+    #The k-mers within a window start between start and end - k inclusive
+    last = numpy.maximum(ends - k + 1, starts)
+    positions = numpy.arange(len(codes))[valid]
+    codes = codes[valid]
+    #Sort the k-mer start positions by k-mer, and then count each k-mer in
+    #all the windows at once with a binary search of its start positions.
+    order = numpy.argsort(codes, kind="mergesort")
+    codes = codes[order]
+    positions = positions[order]
+    bounds = numpy.searchsorted(codes, numpy.arange(4 ** k + 1))
+    counts = numpy.zeros((len(starts), 4 ** k), dtype=numpy.int64)
+    for code in numpy.flatnonzero(bounds[1:] > bounds[:-1]):
+        kmer_positions = positions[bounds[code]:bounds[code + 1]]
+        counts[:, code] = numpy.searchsorted(kmer_positions, last) - \
+                          numpy.searchsorted(kmer_positions, starts)
+    return counts
+
+
+if __name__ == "__main__":
+    from Bio._utils import run_doctest
+    run_doctest()
@@ -92,16 +92,24 @@ def GC_skew(seq, window=100):
     and the size of the window.
 
     Does NOT look at any ambiguous nucleotides.
+
+    If NumPy is installed, the counting is done using the (much faster)
+    Bio.SeqUtils.SlidingWindow module.
     """
-    # 8/19/03: Iddo: added lowercase
-    values = []
-    for i in range(0, len(seq), window):
-        s = seq[i: i + window]
-        g = s.count('G') + s.count('g')
-        c = s.count('C') + s.count('c')
-        skew = (g-c)/float(g+c)
-        values.append(skew)
-    return values
+    try:
+        from Bio.SeqUtils.SlidingWindow import window_counts
+    except ImportError:
+        # 8/19/03: Iddo: added lowercase
+        values = []
+        for i in range(0, len(seq), window):
+            s = seq[i: i + window]
+            g = s.count('G') + s.count('g')
+            c = s.count('C') + s.count('c')
+            skew = (g-c)/float(g+c)
+            values.append(skew)
+        return values
+    counts = window_counts(seq, window, window, "GC", partial=True)
+    return [(g-c)/float(g+c) for g, c in counts.tolist()]
 
 
 def xGC_skew(seq, window=1000, zoom=100,
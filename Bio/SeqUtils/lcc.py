@@ -5,6 +5,9 @@
 # of this package.
 
 import math
+import re
+
+_not_acgt = re.compile("[^ACGT]")
 
 
 def lcc_mult(seq, wsize):
@@ -18,9 +21,19 @@ def lcc_mult(seq, wsize):
 
     The result is the same as applying lcc_simp multiple times, but this
     version is optimized for speed. The optimization works by using the
-    value of previous window as a base to compute the next one."""
-    l2 = math.log(2)
+    value of previous window as a base to compute the next one.  If NumPy
+    is installed, unambiguous upper case DNA is handed over to the (faster)
+    Bio.SeqUtils.SlidingWindow module, which counts all the windows in one
+    go and gives the same values."""
     tamseq = len(seq)
+    if tamseq >= wsize and not _not_acgt.search(str(seq)):
+        try:
+            from Bio.SeqUtils.SlidingWindow import lcc
+        except ImportError:
+            pass
+        else:
+            return [0] + lcc(seq, wsize).tolist()
+    l2 = math.log(2)
     try:
         #Assume its a string
         upper = seq.upper()
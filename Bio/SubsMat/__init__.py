@@ -395,6 +395,137 @@ class LogOddsMatrix(SeqMat):
         return relative_entropy
 
 
+class CompiledMatrix(object):
+    """Substitution matrix stored as a dense table, for fast score lookups.
+
+    The scores are held in a square table indexed by the position of each
+    residue in the alphabet, rather than in a dictionary keyed by pairs of
+    residues.  This can be made from any dictionary style matrix, such as
+    those in Bio.SubsMat.MatrixInfo or a SeqMat, where (as with a half
+    matrix) a missing pair is looked up the other way round:
+
+    >>> from Bio.SubsMat import MatrixInfo, CompiledMatrix
+    >>> blosum62 = CompiledMatrix(MatrixInfo.blosum62)
+    >>> len(blosum62.alphabet)
+    23
+    >>> blosum62["W", "A"], blosum62["A", "W"], blosum62["W", "W"]
+    (-3, -3, 11)
+
+    The object can be called with two residues, so it can be used directly
+    as the match function in Bio.pairwise2, where the C code reads the
+    table without calling back into Python:
+
+    >>> from Bio import pairwise2
+    >>> score = pairwise2.align.localds("PAWHEAE", "HEAGAWGHEE", blosum62,
+    ...                                 -10, -1, score_only=True)
+    >>> print "%0.1f" % score
+    17.0
+    """
+
+    def __init__(self, matrix, alphabet=None):
+        """Create a CompiledMatrix from a substitution matrix.
+
+        Arguments:
+         - matrix   - dictionary with pairs of residues as keys and their
+                      scores as values (e.g. from Bio.SubsMat.MatrixInfo).
+         - alphabet - string of the residues to include (optional, by
+                      default all the residues in the matrix, sorted).
+
+        A ValueError is raised if there is no score for a pair of residues
+        (in either order).
+        """
+        if alphabet is None:
+            letters = set()
+            for a, b in matrix:
+                letters.add(a)
+                letters.add(b)
+            alphabet = "".join(sorted(letters))
+        self.alphabet = alphabet
+        self.index = dict((letter, i) for i, letter in enumerate(alphabet))
+        if len(self.index) != len(alphabet):
+            raise ValueError("Repeated residues in alphabet %r" % alphabet)
+        self.scores = []
+        for a in alphabet:
+            row = []
+            for b in alphabet:
+                if (a, b) in matrix:
+                    row.append(matrix[(a, b)])
+                elif (b, a) in matrix:
+                    row.append(matrix[(b, a)])
+                else:
+                    raise ValueError("No score for residues %r and %r"
+                                     % (a, b))
+            self.scores.append(row)
+        self._update()
+
+    def _update(self):
+        """Build the lookup tables from the scores (PRIVATE).
+
+        The _rows dictionaries are used for lookups from Python, while
+        the C code in Bio.cpairwise2 uses _lookup (mapping each byte to
+        its residue index, or 255 if not in the alphabet) and _table (the
+        scores as packed doubles, row by row).
+        """
+        import array
+        self._rows = dict((a, dict(zip(self.alphabet, row)))
+                          for a, row in zip(self.alphabet, self.scores))
+        lookup = array.array("B", [255] * 256)
+        if len(self.alphabet) < 255:
+            for i, letter in enumerate(self.alphabet):
+                if len(letter) == 1 and ord(letter) < 256:
+                    lookup[ord(letter)] = i
+        self._lookup = lookup.tostring()
+        table = array.array("d")
+        for row in self.scores:
+            table.extend(float(score) for score in row)
+        self._table = table.tostring()
+
+    def __repr__(self):
+        return "%s(<%i residues %r>)" % (self.__class__.__name__,
+                                         len(self.alphabet), self.alphabet)
+
+    def __call__(self, charA, charB):
+        """Score for aligning residue charA with residue charB."""
+        return self._rows[charA][charB]
+
+    def __getitem__(self, pair):
+        """Score for a pair of residues, e.g. matrix["A", "W"]."""
+        a, b = pair
+        return self._rows[a][b]
+
+    def __contains__(self, pair):
+        try:
+            a, b = pair
+            return b in self._rows[a]
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def __len__(self):
+        return len(self.alphabet) ** 2
+
+    def __iter__(self):
+        for a in self.alphabet:
+            for b in self.alphabet:
+                yield a, b
+
+    def keys(self):
+        """List of all the residue pairs, as in a full matrix."""
+        return list(self)
+
+    def transpose(self):
+        """Return a CompiledMatrix with the residue pairs swapped.
+
+        For a symmetric matrix (like BLOSUM or PAM) this has the same
+        scores as the original.
+        """
+        other = self.__class__.__new__(self.__class__)
+        other.alphabet = self.alphabet
+        other.index = self.index
+        other.scores = [list(row) for row in zip(*self.scores)]
+        other._update()
+        return other
+
+
 def _build_obs_freq_mat(acc_rep_mat):
     """
     build_obs_freq_mat(acc_rep_mat):
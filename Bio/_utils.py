@@ -65,6 +65,28 @@ def getattr_str(obj, attr, fmt=None, fallback='?'):
     return fallback
 
 
+def bincount(values, weights=None, minlength=0):
+    """Count the occurrences of each non-negative integer, using NumPy.
+
+    This is numpy.bincount, with the minlength argument (which needs NumPy
+    1.6 or later) done here: the counts are padded with zeros to at least
+    minlength values.  Empty values are also allowed, which older versions
+    of NumPy reject.
+    """
+    import numpy
+    values = numpy.asarray(values)
+    if values.size:
+        counts = numpy.bincount(values, weights)
+    elif weights is None:
+        counts = numpy.zeros(0, int)
+    else:
+        counts = numpy.zeros(0, float)
+    if len(counts) < minlength:
+        counts = numpy.concatenate((counts, numpy.zeros(minlength - len(counts),
+                                                        counts.dtype)))
+    return counts
+
+
 def find_test_dir(start_dir=None):
     """Finds the absolute path of Biopython's Tests directory.
 
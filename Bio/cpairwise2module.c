@@ -139,22 +139,112 @@ static void IndexList_extend(struct IndexList *il1, struct IndexList *il2)
     } */
 
 
+/* A substitution matrix stored as a table of scores (see
+ * CompiledMatrix in Bio.SubsMat), with both sequences converted to
+ * indexes into the table.
+ */
+struct CompiledMatrix {
+    double *table;
+    int size;
+    unsigned char *codesA, *codesB;
+};
+
+static void CompiledMatrix_free(struct CompiledMatrix *cm)
+{
+    if(cm->table)
+        free(cm->table);
+    if(cm->codesA)
+        free(cm->codesA);
+    if(cm->codesB)
+        free(cm->codesB);
+    cm->table = NULL;
+    cm->codesA = cm->codesB = NULL;
+    cm->size = 0;
+}
+
+/* Set up a CompiledMatrix if py_match_fn has the _lookup and _table
+ * attributes of a compiled substitution matrix.  Returns 1 if it can
+ * be used, or 0 if not (e.g. a residue is missing from the matrix), in
+ * which case the scores are found by calling py_match_fn instead.
+ */
+static int CompiledMatrix_init(struct CompiledMatrix *cm,
+                               PyObject *py_match_fn,
+                               char *sequenceA, int lenA,
+                               char *sequenceB, int lenB)
+{
+    PyObject *py_lookup=NULL, *py_table=NULL;
+    char *lookup, *table;
+    Py_ssize_t lookup_length, table_length;
+    int i, size, ok = 0;
+
+    cm->table = NULL;
+    cm->codesA = cm->codesB = NULL;
+    cm->size = 0;
+    if(!(py_lookup = PyObject_GetAttrString(py_match_fn, "_lookup")))
+        goto _cleanup_compiled_matrix_init;
+    if(!(py_table = PyObject_GetAttrString(py_match_fn, "_table")))
+        goto _cleanup_compiled_matrix_init;
+    if(PyBytes_AsStringAndSize(py_lookup, &lookup, &lookup_length) == -1)
+        goto _cleanup_compiled_matrix_init;
+    if(PyBytes_AsStringAndSize(py_table, &table, &table_length) == -1)
+        goto _cleanup_compiled_matrix_init;
+    if(lookup_length != 256)
+        goto _cleanup_compiled_matrix_init;
+    size = 0;
+    while((Py_ssize_t)(size*size*sizeof(double)) < table_length)
+        size++;
+    if((Py_ssize_t)(size*size*sizeof(double)) != table_length)
+        goto _cleanup_compiled_matrix_init;
+
+    cm->size = size;
+    cm->table = malloc(table_length > 0 ? table_length : 1);
+    cm->codesA = malloc(lenA > 0 ? lenA : 1);
+    cm->codesB = malloc(lenB > 0 ? lenB : 1);
+    if(!cm->table || !cm->codesA || !cm->codesB)
+        goto _cleanup_compiled_matrix_init;
+    memcpy(cm->table, table, table_length);
+    for(i=0; i<lenA; i++) {
+        cm->codesA[i] = (unsigned char)lookup[(unsigned char)sequenceA[i]];
+        if(cm->codesA[i] >= size)
+            goto _cleanup_compiled_matrix_init;
+    }
+    for(i=0; i<lenB; i++) {
+        cm->codesB[i] = (unsigned char)lookup[(unsigned char)sequenceB[i]];
+        if(cm->codesB[i] >= size)
+            goto _cleanup_compiled_matrix_init;
+    }
+    ok = 1;
+ _cleanup_compiled_matrix_init:
+    if(PyErr_Occurred())
+        PyErr_Clear();
+    Py_XDECREF(py_lookup);
+    Py_XDECREF(py_table);
+    if(!ok)
+        CompiledMatrix_free(cm);
+    return ok;
+}
+
 double _get_match_score(PyObject *py_sequenceA, PyObject *py_sequenceB,
                         PyObject *py_match_fn, int i, int j,
                         char *sequenceA, char *sequenceB,
                         int use_sequence_cstring,
                         double match, double mismatch,
-                        int use_match_mismatch_scores)
+                        int use_match_mismatch_scores,
+                        struct CompiledMatrix *compiled)
 {
     PyObject *py_A=NULL,
         *py_B=NULL;
     PyObject *py_arglist=NULL, *py_result=NULL;
-    double score = 0;
+    double score = -1.0; /* Returned with an exception set on errors */
 
     if(use_sequence_cstring && use_match_mismatch_scores) {
         score = (sequenceA[i] == sequenceB[j]) ? match : mismatch;
         return score;
     }
+    if(compiled->table) {
+        return compiled->table[compiled->codesA[i]*compiled->size +
+                               compiled->codesB[j]];
+    }
     /* Calculate the match score. */
     if(!(py_A = PySequence_GetItem(py_sequenceA, i)))
         goto _get_match_score_cleanup;
@@ -224,6 +314,7 @@ static PyObject *cpairwise2__make_score_matrix_fast(
     double first_A_gap, first_B_gap;
     double match, mismatch;
     int use_match_mismatch_scores;
+    struct CompiledMatrix compiled = {NULL, 0, NULL, NULL};
     int lenA, lenB;
     double *score_matrix = NULL;
     struct IndexList *trace_matrix = NULL;
@@ -312,6 +403,9 @@ cleanup_after_py_match_fn:
     /* Allocate matrices for storing the results and initialize them. */
     lenA = PySequence_Length(py_sequenceA);
     lenB = PySequence_Length(py_sequenceB);
+    if(use_sequence_cstring && !use_match_mismatch_scores)
+        CompiledMatrix_init(&compiled, py_match_fn,
+                            sequenceA, lenA, sequenceB, lenB);
     score_matrix = malloc(lenA*lenB*sizeof(*score_matrix));
     trace_matrix = malloc(lenA*lenB*sizeof(*trace_matrix));
     if(!score_matrix || !trace_matrix) {
@@ -330,7 +424,7 @@ cleanup_after_py_match_fn:
                                         sequenceA, sequenceB,
                                         use_sequence_cstring,
                                         match, mismatch,
-                                        use_match_mismatch_scores);
+                                        use_match_mismatch_scores, &compiled);
         if(score==-1.0 && PyErr_Occurred())
             goto _cleanup_make_score_matrix_fast;
         if(penalize_end_gaps_B)
@@ -344,7 +438,7 @@ cleanup_after_py_match_fn:
                                         sequenceA, sequenceB,
                                         use_sequence_cstring,
                                         match, mismatch,
-                                        use_match_mismatch_scores);
+                                        use_match_mismatch_scores, &compiled);
         if(score==-1.0 && PyErr_Occurred())
             goto _cleanup_make_score_matrix_fast;
         if(penalize_end_gaps_A)
@@ -410,7 +504,7 @@ cleanup_after_py_match_fn:
                                            sequenceA, sequenceB,
                                            use_sequence_cstring,
                                            match, mismatch,
-                                           use_match_mismatch_scores);
+                                           use_match_mismatch_scores, &compiled);
             if(delta_score==-1.0 && PyErr_Occurred())
                 goto _cleanup_make_score_matrix_fast;
             score = best_score + delta_score;
@@ -522,6 +616,7 @@ cleanup_after_py_match_fn:
 
 
  _cleanup_make_score_matrix_fast:
+    CompiledMatrix_free(&compiled);
     if(score_matrix)
         free(score_matrix);
     if(trace_matrix) {
@@ -558,6 +653,637 @@ cleanup_after_py_match_fn:
     return py_retval;
 }
 
+/* This is a port of _make_score_matrix_banded in pairwise2, which
+ * only fills in the cells of the matrix within a band around the
+ * diagonal.  Please see there for the details.
+ */
+static PyObject *cpairwise2__make_score_matrix_banded(
+    PyObject *self, PyObject *args)
+{
+    int i;
+    int row, col;
+
+    PyObject *py_sequenceA, *py_sequenceB, *py_match_fn;
+#if PY_MAJOR_VERSION >= 3
+    PyObject *py_bytesA, *py_bytesB;
+#endif
+    char *sequenceA=NULL, *sequenceB=NULL;
+    int use_sequence_cstring;
+    double open_A, extend_A, open_B, extend_B;
+    int penalize_extend_when_opening, penalize_end_gaps_A, penalize_end_gaps_B;
+    int align_globally, band_width;
+
+    PyObject *py_match=NULL, *py_mismatch=NULL;
+    double first_A_gap, first_B_gap;
+    double match, mismatch;
+    int use_match_mismatch_scores;
+    struct CompiledMatrix compiled = {NULL, 0, NULL, NULL};
+    int lenA, lenB, low, high, num_cells;
+    int *offsets = NULL, *row_starts = NULL;
+    double *score_matrix = NULL;
+    struct IndexList *trace_matrix = NULL;
+    PyObject *py_offsets=NULL, *py_score_rows=NULL, *py_trace_rows=NULL;
+
+    double *row_cache_score = NULL,
+        *col_cache_score = NULL;
+    char *row_cache_valid = NULL,
+        *col_cache_valid = NULL;
+    struct IndexList *row_cache_index = NULL,
+        *col_cache_index = NULL;
+
+    PyObject *py_retval = NULL;
+
+    if(!PyArg_ParseTuple(args, "OOOddddi(ii)ii", &py_sequenceA, &py_sequenceB,
+                         &py_match_fn, &open_A, &extend_A, &open_B, &extend_B,
+                         &penalize_extend_when_opening,
+                         &penalize_end_gaps_A, &penalize_end_gaps_B,
+                         &align_globally, &band_width))
+        return NULL;
+    if(!PySequence_Check(py_sequenceA) || !PySequence_Check(py_sequenceB)) {
+        PyErr_SetString(PyExc_TypeError,
+                        "py_sequenceA and py_sequenceB should be sequences.");
+        return NULL;
+    }
+
+#if PY_MAJOR_VERSION < 3
+    use_sequence_cstring = 0;
+    if(PyString_Check(py_sequenceA) && PyString_Check(py_sequenceB)) {
+        sequenceA = PyString_AS_STRING(py_sequenceA);
+        sequenceB = PyString_AS_STRING(py_sequenceB);
+        use_sequence_cstring = 1;
+    }
+#else
+    py_bytesA = _create_bytes_object(py_sequenceA);
+    py_bytesB = _create_bytes_object(py_sequenceB);
+    if (py_bytesA && py_bytesB) {
+        sequenceA = PyBytes_AS_STRING(py_bytesA);
+        sequenceB = PyBytes_AS_STRING(py_bytesB);
+        use_sequence_cstring = 1;
+    }
+    else {
+        Py_XDECREF(py_bytesA);
+        Py_XDECREF(py_bytesB);
+        use_sequence_cstring = 0;
+    }
+#endif
+
+    if(!PyCallable_Check(py_match_fn)) {
+        PyErr_SetString(PyExc_TypeError, "py_match_fn must be callable.");
+        return NULL;
+    }
+    match = mismatch = 0;
+    use_match_mismatch_scores = 0;
+    if(!(py_match = PyObject_GetAttrString(py_match_fn, "match")))
+        goto cleanup_after_py_match_fn;
+    match = PyFloat_AsDouble(py_match);
+    if(match==-1.0 && PyErr_Occurred())
+        goto cleanup_after_py_match_fn;
+    if(!(py_mismatch = PyObject_GetAttrString(py_match_fn, "mismatch")))
+        goto cleanup_after_py_match_fn;
+    mismatch = PyFloat_AsDouble(py_mismatch);
+    if(mismatch==-1.0 && PyErr_Occurred())
+        goto cleanup_after_py_match_fn;
+    use_match_mismatch_scores = 1;
+cleanup_after_py_match_fn:
+    if(PyErr_Occurred())
+        PyErr_Clear();
+    if(py_match) {
+        Py_DECREF(py_match);
+    }
+    if(py_mismatch) {
+        Py_DECREF(py_mismatch);
+    }
+
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening);
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening);
+
+    /* Work out which columns of each row are in the band.  The
+       cells of row i start at column offsets[i], and are stored from
+       score_matrix[row_starts[i]] up to score_matrix[row_starts[i+1]]. */
+    lenA = PySequence_Length(py_sequenceA);
+    lenB = PySequence_Length(py_sequenceB);
+    if(use_sequence_cstring && !use_match_mismatch_scores)
+        CompiledMatrix_init(&compiled, py_match_fn,
+                            sequenceA, lenA, sequenceB, lenB);
+    low = ((lenB < lenA) ? lenB-lenA : 0) - band_width;
+    high = ((lenB > lenA) ? lenB-lenA : 0) + band_width;
+    offsets = malloc((lenA+1)*sizeof(*offsets));
+    row_starts = malloc((lenA+1)*sizeof(*row_starts));
+    if(!offsets || !row_starts) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_make_score_matrix_banded;
+    }
+    num_cells = 0;
+    for(row=0; row<lenA; row++) {
+        int start = (row+low > 0) ? row+low : 0;
+        int end = (row+high < lenB-1) ? row+high : lenB-1;
+        offsets[row] = start;
+        row_starts[row] = num_cells;
+        num_cells += end-start+1;
+    }
+    row_starts[lenA] = num_cells;
+
+    score_matrix = malloc(num_cells*sizeof(*score_matrix));
+    trace_matrix = malloc(num_cells*sizeof(*trace_matrix));
+    row_cache_score = malloc(lenA*sizeof(*row_cache_score));
+    row_cache_valid = malloc(lenA*sizeof(*row_cache_valid));
+    row_cache_index = malloc(lenA*sizeof(*row_cache_index));
+    col_cache_score = malloc(lenB*sizeof(*col_cache_score));
+    col_cache_valid = malloc(lenB*sizeof(*col_cache_valid));
+    col_cache_index = malloc(lenB*sizeof(*col_cache_index));
+    if(!score_matrix || !trace_matrix ||
+       !row_cache_score || !row_cache_valid || !row_cache_index ||
+       !col_cache_score || !col_cache_valid || !col_cache_index) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_make_score_matrix_banded;
+    }
+    for(i=0; i<num_cells; i++) {
+        score_matrix[i] = 0;
+        IndexList_init(&trace_matrix[i]);
+    }
+    memset((void *)row_cache_valid, 0, lenA*sizeof(*row_cache_valid));
+    memset((void *)col_cache_valid, 0, lenB*sizeof(*col_cache_valid));
+    for(i=0; i<lenA; i++)
+        IndexList_init(&row_cache_index[i]);
+    for(i=0; i<lenB; i++)
+        IndexList_init(&col_cache_index[i]);
+
+    for(row=0; row<lenA; row++) {
+        int start = offsets[row];
+        int end = start + row_starts[row+1] - row_starts[row] - 1;
+        for(col=start; col<=end; col++) {
+            int offset = row_starts[row] + col - start;
+            double nogap_score, row_score, col_score, best_score;
+            int best_score_rint, use_row_score, use_col_score;
+            double score;
+            struct IndexList *il;
+            int k;
+
+            if(!row || !col) {
+                /* The top and left borders of the matrix. */
+                score = _get_match_score(py_sequenceA, py_sequenceB,
+                                         py_match_fn, row, col,
+                                         sequenceA, sequenceB,
+                                         use_sequence_cstring,
+                                         match, mismatch,
+                                         use_match_mismatch_scores, &compiled);
+                if(score==-1.0 && PyErr_Occurred())
+                    goto _cleanup_make_score_matrix_banded;
+                if(!col && penalize_end_gaps_B)
+                    score += calc_affine_penalty(row, open_B, extend_B,
+                                                 penalize_extend_when_opening);
+                else if(!row && penalize_end_gaps_A)
+                    score += calc_affine_penalty(col, open_A, extend_A,
+                                                 penalize_extend_when_opening);
+                score_matrix[offset] = score;
+                if(!col) {
+                    row_cache_score[row] = score + first_A_gap;
+                    row_cache_valid[row] = 1;
+                    IndexList_append(&row_cache_index[row], row, 0);
+                }
+                if(!row) {
+                    col_cache_score[col] = score + first_B_gap;
+                    col_cache_valid[col] = 1;
+                    IndexList_append(&col_cache_index[col], 0, col);
+                }
+                continue;
+            }
+
+            /* The cell on the diagonal before this one is always in
+               the band. */
+            nogap_score = score_matrix[row_starts[row-1] + col-1 -
+                                       offsets[row-1]];
+            best_score = nogap_score;
+            use_row_score = (col > 1) && row_cache_valid[row-1];
+            use_col_score = (row > 1) && col_cache_valid[col-1];
+            row_score = col_score = 0;
+            if(use_row_score) {
+                row_score = row_cache_score[row-1];
+                if(row_score > best_score)
+                    best_score = row_score;
+            }
+            if(use_col_score) {
+                col_score = col_cache_score[col-1];
+                if(col_score > best_score)
+                    best_score = col_score;
+            }
+            best_score_rint = rint(best_score);
+
+            score = _get_match_score(py_sequenceA, py_sequenceB,
+                                     py_match_fn, row, col,
+                                     sequenceA, sequenceB,
+                                     use_sequence_cstring,
+                                     match, mismatch,
+                                     use_match_mismatch_scores, &compiled);
+            if(score==-1.0 && PyErr_Occurred())
+                goto _cleanup_make_score_matrix_banded;
+            score += best_score;
+            if(!align_globally && score < 0)
+                score_matrix[offset] = 0;
+            else
+                score_matrix[offset] = score;
+
+            il = &trace_matrix[offset];
+            if(best_score_rint == rint(nogap_score))
+                IndexList_append(il, row-1, col-1);
+            if(use_row_score && best_score_rint == rint(row_score))
+                IndexList_extend(il, &row_cache_index[row-1]);
+            if(use_col_score && best_score_rint == rint(col_score))
+                IndexList_extend(il, &col_cache_index[col-1]);
+
+            /* Update the cached column scores, then the row scores. */
+            for(k=0; k<2; k++) {
+                double *cache_score, open_score, extend_score, extend;
+                char *cache_valid;
+                struct IndexList *cache_index;
+                int open_score_rint, extend_score_rint;
+                if(!k) {
+                    cache_score = &col_cache_score[col-1];
+                    cache_valid = &col_cache_valid[col-1];
+                    cache_index = &col_cache_index[col-1];
+                    open_score = nogap_score + first_B_gap;
+                    extend = extend_B;
+                } else {
+                    cache_score = &row_cache_score[row-1];
+                    cache_valid = &row_cache_valid[row-1];
+                    cache_index = &row_cache_index[row-1];
+                    open_score = nogap_score + first_A_gap;
+                    extend = extend_A;
+                }
+                if(!*cache_valid) {
+                    *cache_score = open_score;
+                    *cache_valid = 1;
+                    IndexList_clear(cache_index);
+                    IndexList_append(cache_index, row-1, col-1);
+                    continue;
+                }
+                extend_score = *cache_score + extend;
+                open_score_rint = rint(open_score);
+                extend_score_rint = rint(extend_score);
+                if(open_score_rint > extend_score_rint) {
+                    *cache_score = open_score;
+                    IndexList_clear(cache_index);
+                    IndexList_append(cache_index, row-1, col-1);
+                } else if(extend_score_rint > open_score_rint) {
+                    *cache_score = extend_score;
+                } else {
+                    *cache_score = open_score;
+                    if(!IndexList_contains(cache_index, row-1, col-1))
+                        IndexList_append(cache_index, row-1, col-1);
+                }
+            }
+        }
+    }
+    if(PyErr_Occurred())
+        goto _cleanup_make_score_matrix_banded;
+
+    /* Save the offsets, score and traceback rows as python objects. */
+    if(!(py_offsets = PyList_New(lenA)))
+        goto _cleanup_make_score_matrix_banded;
+    if(!(py_score_rows = PyList_New(lenA)))
+        goto _cleanup_make_score_matrix_banded;
+    if(!(py_trace_rows = PyList_New(lenA)))
+        goto _cleanup_make_score_matrix_banded;
+    for(row=0; row<lenA; row++) {
+        PyObject *py_offset, *py_score_row, *py_trace_row;
+        int ncols = row_starts[row+1] - row_starts[row];
+#if PY_MAJOR_VERSION >= 3
+        if(!(py_offset = PyLong_FromLong((long)offsets[row])))
+#else
+        if(!(py_offset = PyInt_FromLong((long)offsets[row])))
+#endif
+            goto _cleanup_make_score_matrix_banded;
+        PyList_SET_ITEM(py_offsets, row, py_offset);
+        if(!(py_score_row = PyList_New(ncols)))
+            goto _cleanup_make_score_matrix_banded;
+        PyList_SET_ITEM(py_score_rows, row, py_score_row);
+        if(!(py_trace_row = PyList_New(ncols)))
+            goto _cleanup_make_score_matrix_banded;
+        PyList_SET_ITEM(py_trace_rows, row, py_trace_row);
+
+        for(i=0; i<ncols; i++) {
+            int j;
+            PyObject *py_score, *py_indexlist;
+            int offset = row_starts[row] + i;
+            struct IndexList *il = &trace_matrix[offset];
+
+            if(!(py_score = PyFloat_FromDouble(score_matrix[offset])))
+                goto _cleanup_make_score_matrix_banded;
+            PyList_SET_ITEM(py_score_row, i, py_score);
+
+            if(!row || !(offsets[row]+i)) {
+                if(!(py_indexlist = PyList_New(1)))
+                    goto _cleanup_make_score_matrix_banded;
+                Py_INCREF(Py_None);
+                PyList_SET_ITEM(py_indexlist, 0, Py_None);
+            }
+            else {
+                if(!(py_indexlist = PyList_New(il->num_used)))
+                    goto _cleanup_make_score_matrix_banded;
+                for(j=0; j<il->num_used; j++) {
+                    PyObject *py_index=NULL;
+                    if(!(py_index = Py_BuildValue("(ii)", il->indexes[j*2],
+                                                  il->indexes[j*2+1]))) {
+                        Py_DECREF(py_indexlist);
+                        goto _cleanup_make_score_matrix_banded;
+                    }
+                    PyList_SET_ITEM(py_indexlist, j, py_index);
+                }
+            }
+            PyList_SET_ITEM(py_trace_row, i, py_indexlist);
+        }
+    }
+
+    py_retval = Py_BuildValue("(OOO)", py_offsets, py_score_rows,
+                              py_trace_rows);
+
+ _cleanup_make_score_matrix_banded:
+    CompiledMatrix_free(&compiled);
+    if(trace_matrix) {
+        for(i=0; i<num_cells; i++)
+            IndexList_free(&trace_matrix[i]);
+        free(trace_matrix);
+    }
+    if(score_matrix)
+        free(score_matrix);
+    if(row_cache_index) {
+        for(i=0; i<lenA; i++)
+            IndexList_free(&row_cache_index[i]);
+        free(row_cache_index);
+    }
+    if(col_cache_index) {
+        for(i=0; i<lenB; i++)
+            IndexList_free(&col_cache_index[i]);
+        free(col_cache_index);
+    }
+    if(row_cache_score)
+        free(row_cache_score);
+    if(col_cache_score)
+        free(col_cache_score);
+    if(row_cache_valid)
+        free(row_cache_valid);
+    if(col_cache_valid)
+        free(col_cache_valid);
+    if(offsets)
+        free(offsets);
+    if(row_starts)
+        free(row_starts);
+    Py_XDECREF(py_offsets);
+    Py_XDECREF(py_score_rows);
+    Py_XDECREF(py_trace_rows);
+#if PY_MAJOR_VERSION >= 3
+    if (py_bytesA != NULL && py_bytesA != py_sequenceA) Py_DECREF(py_bytesA);
+    if (py_bytesB != NULL && py_bytesB != py_sequenceB) Py_DECREF(py_bytesB);
+#endif
+
+    return py_retval;
+}
+
+/* Return the best score in a row of the score matrix, see
+ * _score_only_row_best in pairwise2.
+ */
+static double _score_only_row_best(double *scores, int row, int lenA, int lenB,
+    double open_A, double extend_A, double open_B, double extend_B,
+    int penalize_extend_when_opening,
+    int penalize_end_gaps_A, int penalize_end_gaps_B, int align_globally)
+{
+    int col;
+    double best, score;
+
+    if(!align_globally) {
+        best = scores[0];
+        for(col=1; col<lenB; col++)
+            if(scores[col] > best)
+                best = scores[col];
+        return best;
+    }
+    best = scores[lenB-1];
+    if(penalize_end_gaps_B)
+        best += calc_affine_penalty(lenA-row-1, open_B, extend_B,
+                                    penalize_extend_when_opening);
+    if(row == lenA-1) {
+        for(col=0; col<lenB-1; col++) {
+            score = scores[col];
+            if(penalize_end_gaps_A)
+                score += calc_affine_penalty(lenB-col-1, open_A, extend_A,
+                                             penalize_extend_when_opening);
+            if(score > best)
+                best = score;
+        }
+    }
+    return best;
+}
+
+/* This is a port of _score_only_fast in pairwise2, which finds the best
+ * score keeping only one row of the score matrix.
+ */
+static PyObject *cpairwise2__score_only_fast(
+    PyObject *self, PyObject *args)
+{
+    int row, col;
+
+    PyObject *py_sequenceA, *py_sequenceB, *py_match_fn;
+#if PY_MAJOR_VERSION >= 3
+    PyObject *py_bytesA, *py_bytesB;
+#endif
+    char *sequenceA=NULL, *sequenceB=NULL;
+    int use_sequence_cstring;
+    double open_A, extend_A, open_B, extend_B;
+    int penalize_extend_when_opening, penalize_end_gaps_A, penalize_end_gaps_B;
+    int align_globally;
+
+    PyObject *py_match=NULL, *py_mismatch=NULL;
+    double first_A_gap, first_B_gap;
+    double match, mismatch;
+    int use_match_mismatch_scores;
+    struct CompiledMatrix compiled = {NULL, 0, NULL, NULL};
+    int lenA, lenB;
+    double *prev_row = NULL, *current_row = NULL, *col_cache_score = NULL;
+    double best_score, score;
+
+    PyObject *py_retval = NULL;
+
+    if(!PyArg_ParseTuple(args, "OOOddddi(ii)i", &py_sequenceA, &py_sequenceB,
+                         &py_match_fn, &open_A, &extend_A, &open_B, &extend_B,
+                         &penalize_extend_when_opening,
+                         &penalize_end_gaps_A, &penalize_end_gaps_B,
+                         &align_globally))
+        return NULL;
+    if(!PySequence_Check(py_sequenceA) || !PySequence_Check(py_sequenceB)) {
+        PyErr_SetString(PyExc_TypeError,
+                        "py_sequenceA and py_sequenceB should be sequences.");
+        return NULL;
+    }
+
+#if PY_MAJOR_VERSION < 3
+    use_sequence_cstring = 0;
+    if(PyString_Check(py_sequenceA) && PyString_Check(py_sequenceB)) {
+        sequenceA = PyString_AS_STRING(py_sequenceA);
+        sequenceB = PyString_AS_STRING(py_sequenceB);
+        use_sequence_cstring = 1;
+    }
+#else
+    py_bytesA = _create_bytes_object(py_sequenceA);
+    py_bytesB = _create_bytes_object(py_sequenceB);
+    if (py_bytesA && py_bytesB) {
+        sequenceA = PyBytes_AS_STRING(py_bytesA);
+        sequenceB = PyBytes_AS_STRING(py_bytesB);
+        use_sequence_cstring = 1;
+    }
+    else {
+        Py_XDECREF(py_bytesA);
+        Py_XDECREF(py_bytesB);
+        use_sequence_cstring = 0;
+    }
+#endif
+
+    if(!PyCallable_Check(py_match_fn)) {
+        PyErr_SetString(PyExc_TypeError, "py_match_fn must be callable.");
+        return NULL;
+    }
+    match = mismatch = 0;
+    use_match_mismatch_scores = 0;
+    if(!(py_match = PyObject_GetAttrString(py_match_fn, "match")))
+        goto cleanup_after_py_match_fn;
+    match = PyFloat_AsDouble(py_match);
+    if(match==-1.0 && PyErr_Occurred())
+        goto cleanup_after_py_match_fn;
+    if(!(py_mismatch = PyObject_GetAttrString(py_match_fn, "mismatch")))
+        goto cleanup_after_py_match_fn;
+    mismatch = PyFloat_AsDouble(py_mismatch);
+    if(mismatch==-1.0 && PyErr_Occurred())
+        goto cleanup_after_py_match_fn;
+    use_match_mismatch_scores = 1;
+cleanup_after_py_match_fn:
+    if(PyErr_Occurred())
+        PyErr_Clear();
+    if(py_match) {
+        Py_DECREF(py_match);
+    }
+    if(py_mismatch) {
+        Py_DECREF(py_mismatch);
+    }
+
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening);
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening);
+
+    lenA = PySequence_Length(py_sequenceA);
+    lenB = PySequence_Length(py_sequenceB);
+    if(use_sequence_cstring && !use_match_mismatch_scores)
+        CompiledMatrix_init(&compiled, py_match_fn,
+                            sequenceA, lenA, sequenceB, lenB);
+    prev_row = malloc(lenB*sizeof(*prev_row));
+    current_row = malloc(lenB*sizeof(*current_row));
+    col_cache_score = malloc(lenB*sizeof(*col_cache_score));
+    if(!prev_row || !current_row || !col_cache_score) {
+        PyErr_SetString(PyExc_MemoryError, "Out of memory");
+        goto _cleanup_score_only_fast;
+    }
+
+    /* The first row of the score matrix. */
+    for(col=0; col<lenB; col++) {
+        score = _get_match_score(py_sequenceA, py_sequenceB, py_match_fn,
+                                 0, col, sequenceA, sequenceB,
+                                 use_sequence_cstring, match, mismatch,
+                                 use_match_mismatch_scores, &compiled);
+        if(score==-1.0 && PyErr_Occurred())
+            goto _cleanup_score_only_fast;
+        if(penalize_end_gaps_A)
+            score += calc_affine_penalty(col, open_A, extend_A,
+                                         penalize_extend_when_opening);
+        prev_row[col] = score;
+        col_cache_score[col] = score + first_B_gap;
+    }
+    best_score = _score_only_row_best(prev_row, 0, lenA, lenB,
+                                      open_A, extend_A, open_B, extend_B,
+                                      penalize_extend_when_opening,
+                                      penalize_end_gaps_A, penalize_end_gaps_B,
+                                      align_globally);
+
+    for(row=1; row<lenA; row++) {
+        double row_cache_score, *swap;
+
+        score = _get_match_score(py_sequenceA, py_sequenceB, py_match_fn,
+                                 row, 0, sequenceA, sequenceB,
+                                 use_sequence_cstring, match, mismatch,
+                                 use_match_mismatch_scores, &compiled);
+        if(score==-1.0 && PyErr_Occurred())
+            goto _cleanup_score_only_fast;
+        if(penalize_end_gaps_B)
+            score += calc_affine_penalty(row, open_B, extend_B,
+                                         penalize_extend_when_opening);
+        current_row[0] = score;
+        row_cache_score = prev_row[0] + first_A_gap;
+        for(col=1; col<lenB; col++) {
+            double nogap_score, row_score, col_score, best;
+            double open_score, extend_score;
+
+            nogap_score = prev_row[col-1];
+            row_score = (col > 1) ? row_cache_score : nogap_score-1;
+            col_score = (row > 1) ? col_cache_score[col-1] : nogap_score-1;
+            best = (row_score > col_score) ? row_score : col_score;
+            if(nogap_score > best)
+                best = nogap_score;
+            score = _get_match_score(py_sequenceA, py_sequenceB, py_match_fn,
+                                     row, col, sequenceA, sequenceB,
+                                     use_sequence_cstring, match, mismatch,
+                                     use_match_mismatch_scores, &compiled);
+            if(score==-1.0 && PyErr_Occurred())
+                goto _cleanup_score_only_fast;
+            score += best;
+            if(!align_globally && score < 0)
+                current_row[col] = 0;
+            else
+                current_row[col] = score;
+
+            /* Update the cached column and row scores. */
+            open_score = nogap_score + first_B_gap;
+            extend_score = col_cache_score[col-1] + extend_B;
+            if(rint(extend_score) > rint(open_score))
+                col_cache_score[col-1] = extend_score;
+            else
+                col_cache_score[col-1] = open_score;
+            open_score = nogap_score + first_A_gap;
+            extend_score = row_cache_score + extend_A;
+            if(rint(extend_score) > rint(open_score))
+                row_cache_score = extend_score;
+            else
+                row_cache_score = open_score;
+        }
+        score = _score_only_row_best(current_row, row, lenA, lenB,
+                                     open_A, extend_A, open_B, extend_B,
+                                     penalize_extend_when_opening,
+                                     penalize_end_gaps_A, penalize_end_gaps_B,
+                                     align_globally);
+        if(score > best_score)
+            best_score = score;
+        swap = prev_row;
+        prev_row = current_row;
+        current_row = swap;
+    }
+
+    py_retval = PyFloat_FromDouble(best_score);
+
+ _cleanup_score_only_fast:
+    CompiledMatrix_free(&compiled);
+    if(prev_row)
+        free(prev_row);
+    if(current_row)
+        free(current_row);
+    if(col_cache_score)
+        free(col_cache_score);
+#if PY_MAJOR_VERSION >= 3
+    if (py_bytesA != NULL && py_bytesA != py_sequenceA) Py_DECREF(py_bytesA);
+    if (py_bytesB != NULL && py_bytesB != py_sequenceB) Py_DECREF(py_bytesB);
+#endif
+
+    return py_retval;
+}
+
 static PyObject *cpairwise2_rint(
     PyObject *self, PyObject *args, PyObject *keywds)
 {
@@ -583,6 +1309,10 @@ static PyObject *cpairwise2_rint(
 static PyMethodDef cpairwise2Methods[] = {
     {"_make_score_matrix_fast",
      (PyCFunction)cpairwise2__make_score_matrix_fast, METH_VARARGS, ""},
+    {"_make_score_matrix_banded",
+     (PyCFunction)cpairwise2__make_score_matrix_banded, METH_VARARGS, ""},
+    {"_score_only_fast",
+     (PyCFunction)cpairwise2__score_only_fast, METH_VARARGS, ""},
     {"rint", (PyCFunction)cpairwise2_rint, METH_VARARGS|METH_KEYWORDS, ""},
     {NULL, NULL, 0, NULL}
 };
@@ -124,9 +124,43 @@ Biopython ( Bio.SubsMat -> MatrixInfo ).
       Score=13
     <BLANKLINE>
 
+Sequences with repeats or low complexity can have a huge number of equally
+good alignments.  With lazy=True the alignment functions return an object
+which recovers them one at a time as you iterate over it, and which can
+count them without recovering them:
+
+    >>> alignments = pairwise2.align.globalxx("A" * 30, "A" * 20, lazy=True)
+    >>> alignments.count()
+    30045015
+    >>> for a in alignments:
+    ...     print format_alignment(*a)
+    ...     break
+    AAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
+    ||||||||||||||||||||||||||||||
+    AAAAAAAAAA-A-A-A-A-A-A-A-A-A-A
+      Score=20
+    <BLANKLINE>
+
 To see a description of the parameters for a function, please look at
 the docstring for the function via the help function, e.g.
 type help(pairwise2.align.localds) at the Python prompt.
+
+To compare many sequences, the batch_scores function aligns every query
+sequence against every target sequence (or, given just one list, every pair
+of sequences in it), optionally sharing the work between several processes,
+and returns a matrix of the scores.  The alignment function is given
+followed by its parameters, without the sequences:
+
+    >>> seqs = ["ACCGT", "ACG", "AGT"]
+    >>> for row in pairwise2.batch_scores(seqs, None, pairwise2.align.globalms,
+    ...                                   2, -1, -.5, -.1):
+    ...     print " ".join("%g" % score for score in row)
+    10 5 5.4
+    5 6 3
+    5.4 3 6
+
+The batch_alignments function works the same way, but returns an iterator
+giving the query index, target index and alignments for each pair.
 """
 # The alignment functions take some undocumented keyword parameters:
 # - penalize_extend_when_opening: boolean
@@ -147,9 +181,39 @@ type help(pairwise2.align.localds) at the Python prompt.
 #   For debugging.
 # - score_only: boolean
 #   Only get the best score, don't recover any alignments.  The return
-#   value of the function is the score.
+#   value of the function is the score.  With affine gap penalties this
+#   only keeps one row of the score matrix, using memory proportional
+#   to the shorter sequence.
 # - one_alignment_only: boolean
 #   Only recover one alignment.
+# - linear_space: boolean
+#   Use a divide and conquer algorithm (Hirschberg, with affine gaps as
+#   described by Myers and Miller) which needs memory proportional to
+#   the length of the sequences rather than their product.  This only
+#   recovers a single optimal alignment, and is only available for
+#   global alignments with affine gap penalties.  It is written in
+#   Python only, and takes about four times as long as the usual (C)
+#   code, so it is still impractical for very long sequences (e.g. two
+#   of 50 kb would take many hours).
+# - band_width: integer
+#   Only fill in the cells of the score matrix within this distance of
+#   the diagonal (widened by any difference in the sequence lengths),
+#   which saves time and memory for similar sequences.  If any of the
+#   best alignments touches the edge of the band, the band width is
+#   doubled and the alignment repeated.  This can still miss a better
+#   alignment which leaves a narrow band by long cheap gaps, so start
+#   with a band wide enough for the expected gaps.  Needs affine gap
+#   penalties.
+# - lazy: boolean
+#   Instead of a list, return an iterable object which recovers the
+#   alignments one at a time as they are needed (so there is no limit
+#   of MAX_ALIGNMENTS), e.g. to look at just the first few of a huge
+#   number of equally good alignments.  Its count() method gives the
+#   number of alignments by adding up the tracebacks through each cell
+#   of the matrix, without recovering them.  Not available with
+#   linear_space.
+
+import itertools
 
 MAX_ALIGNMENTS = 1000   # maximum alignments recovered in traceback
 
@@ -172,7 +236,8 @@ class align(object):
 the score given to non-identical ones."""),
             'd': (['match_dict'],
 """match_dict is a dictionary where the keys are tuples of pairs of
-characters and the values are the scores, e.g. ("A", "C") : 2.5."""),
+characters and the values are the scores, e.g. ("A", "C") : 2.5.
+This can also be a Bio.SubsMat.CompiledMatrix, which is faster."""),
             'c': (['match_fn'],
 """match_fn is a callback function that takes two characters and
 returns the score between them."""),
@@ -260,7 +325,11 @@ alignment occurs.
                     keywds['match_fn'] = identity_match(match, mismatch)
                     i += 2
                 elif self.param_names[i] == 'match_dict':
-                    keywds['match_fn'] = dictionary_match(args[i])
+                    if callable(args[i]):
+                        # e.g. a Bio.SubsMat.CompiledMatrix
+                        keywds['match_fn'] = args[i]
+                    else:
+                        keywds['match_fn'] = dictionary_match(args[i])
                     i += 1
                 elif self.param_names[i] == 'open':
                     assert self.param_names[i+1] == 'extend'
@@ -293,7 +362,10 @@ alignment occurs.
                 ('gap_char', '-'),
                 ('force_generic', 0),
                 ('score_only', 0),
-                ('one_alignment_only', 0)
+                ('one_alignment_only', 0),
+                ('linear_space', 0),
+                ('band_width', None),
+                ('lazy', 0)
                 ]
             for name, default in default_params:
                 keywds[name] = keywds.get(name, default)
@@ -318,14 +390,38 @@ align = align()
 def _align(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
            penalize_extend_when_opening, penalize_end_gaps,
            align_globally, gap_char, force_generic, score_only,
-           one_alignment_only):
+           one_alignment_only, linear_space=0, band_width=None, lazy=0):
     if not sequenceA or not sequenceB:
+        if lazy and not score_only:
+            return _LazyAlignments(sequenceA, sequenceB, [], None, None,
+                                   align_globally, gap_char,
+                                   one_alignment_only)
         return []
 
+    if linear_space:
+        if lazy and not score_only:
+            raise ValueError("lazy is not available with linear_space")
+        return _align_linear_space(
+            sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
+            penalize_extend_when_opening, penalize_end_gaps,
+            align_globally, gap_char, score_only)
+
+    if band_width is not None:
+        return _align_banded(
+            sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
+            penalize_extend_when_opening, penalize_end_gaps,
+            align_globally, gap_char, score_only, one_alignment_only,
+            band_width, lazy)
+
     if (not force_generic) and isinstance(gap_A_fn, affine_penalty) \
     and isinstance(gap_B_fn, affine_penalty):
         open_A, extend_A = gap_A_fn.open, gap_A_fn.extend
         open_B, extend_B = gap_B_fn.open, gap_B_fn.extend
+        if score_only:
+            return _score_only(
+                sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
+                extend_B, penalize_extend_when_opening, penalize_end_gaps,
+                align_globally)
         x = _make_score_matrix_fast(
             sequenceA, sequenceB, match_fn, open_A, extend_A, open_B, extend_B,
             penalize_extend_when_opening, penalize_end_gaps, align_globally,
@@ -364,12 +460,177 @@ def _align(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
             i += 1
 
     # Recover the alignments and return them.
+    if lazy:
+        return _LazyAlignments(
+            sequenceA, sequenceB, starts, score_matrix, trace_matrix,
+            align_globally, gap_char, one_alignment_only)
     x = _recover_alignments(
         sequenceA, sequenceB, starts, score_matrix, trace_matrix,
         align_globally, gap_char, one_alignment_only)
     return x
 
 
+def _score_only(sequenceA, sequenceB, match_fn, open_A, extend_A,
+                open_B, extend_B, penalize_extend_when_opening,
+                penalize_end_gaps, align_globally):
+    # Return the best score, using memory proportional to the shorter
+    # sequence.  The scores are the same with the sequences (and their
+    # gap penalties) swapped, so make sequenceB the shorter one.
+    if len(sequenceA) < len(sequenceB):
+        if hasattr(match_fn, "transpose"):
+            # A compiled substitution matrix (see Bio.SubsMat), keep it
+            # as a table so the C code can use it directly.
+            match_fn = match_fn.transpose()
+        elif not isinstance(match_fn, identity_match):
+            # Keep identity_match as is, the C code has a shortcut for it.
+            original_fn = match_fn
+            match_fn = lambda charB, charA: original_fn(charA, charB)
+        sequenceA, sequenceB = sequenceB, sequenceA
+        open_A, extend_A, open_B, extend_B = open_B, extend_B, open_A, extend_A
+        penalize_end_gaps = (penalize_end_gaps[1], penalize_end_gaps[0])
+    return _score_only_fast(
+        sequenceA, sequenceB, match_fn, open_A, extend_A, open_B, extend_B,
+        penalize_extend_when_opening, tuple(penalize_end_gaps),
+        align_globally)
+
+
+def _score_only_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
+                     open_B, extend_B, penalize_extend_when_opening,
+                     penalize_end_gaps, align_globally):
+    # This does the same calculation as _make_score_matrix_fast followed
+    # by _find_start, but only keeps the previous row of the score
+    # matrix (and the column caches) since no traceback is needed.
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening)
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening)
+    lenA, lenB = len(sequenceA), len(sequenceB)
+
+    # The first row of the score matrix.
+    prev_row = []
+    for col in range(lenB):
+        score = match_fn(sequenceA[0], sequenceB[col])
+        if penalize_end_gaps[0]:
+            score += calc_affine_penalty(
+                col, open_A, extend_A, penalize_extend_when_opening)
+        prev_row.append(score)
+    col_cache_score = [score + first_B_gap for score in prev_row[:-1]]
+    best_score = _score_only_row_best(
+        prev_row, 0, lenA, open_A, extend_A, open_B, extend_B,
+        penalize_extend_when_opening, penalize_end_gaps, align_globally)
+
+    for row in range(1, lenA):
+        score = match_fn(sequenceA[row], sequenceB[0])
+        if penalize_end_gaps[1]:
+            score += calc_affine_penalty(
+                row, open_B, extend_B, penalize_extend_when_opening)
+        current_row = [score]
+        row_cache_score = prev_row[0] + first_A_gap
+        for col in range(1, lenB):
+            nogap_score = prev_row[col-1]
+            if col > 1:
+                row_score = row_cache_score
+            else:
+                row_score = nogap_score - 1
+            if row > 1:
+                col_score = col_cache_score[col-1]
+            else:
+                col_score = nogap_score - 1
+            score = max(nogap_score, row_score, col_score) + \
+                    match_fn(sequenceA[row], sequenceB[col])
+            if not align_globally and score < 0:
+                current_row.append(0)
+            else:
+                current_row.append(score)
+
+            # Update the cached column and row scores, as in
+            # _make_score_matrix_fast.
+            open_score = nogap_score + first_B_gap
+            extend_score = col_cache_score[col-1] + extend_B
+            if rint(extend_score) > rint(open_score):
+                col_cache_score[col-1] = extend_score
+            else:
+                col_cache_score[col-1] = open_score
+            open_score = nogap_score + first_A_gap
+            extend_score = row_cache_score + extend_A
+            if rint(extend_score) > rint(open_score):
+                row_cache_score = extend_score
+            else:
+                row_cache_score = open_score
+        best_score = max(best_score, _score_only_row_best(
+            current_row, row, lenA, open_A, extend_A, open_B, extend_B,
+            penalize_extend_when_opening, penalize_end_gaps, align_globally))
+        prev_row = current_row
+    return best_score
+
+
+def _score_only_row_best(scores, row, lenA, open_A, extend_A, open_B,
+                         extend_B, penalize_extend_when_opening,
+                         penalize_end_gaps, align_globally):
+    # Return the best starting score in a row of the score matrix (see
+    # _find_global_start and _find_local_start).
+    if not align_globally:
+        return max(scores)
+    lenB = len(scores)
+    best = scores[-1]
+    if penalize_end_gaps[1]:
+        best += calc_affine_penalty(
+            lenA-row-1, open_B, extend_B, penalize_extend_when_opening)
+    if row == lenA-1:
+        for col in range(lenB-1):
+            score = scores[col]
+            if penalize_end_gaps[0]:
+                score += calc_affine_penalty(
+                    lenB-col-1, open_A, extend_A, penalize_extend_when_opening)
+            best = max(best, score)
+    return best
+
+
+def _align_banded(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
+                  penalize_extend_when_opening, penalize_end_gaps,
+                  align_globally, gap_char, score_only, one_alignment_only,
+                  band_width, lazy=0):
+    # Like _align, but only using the cells of the matrices within a
+    # band around the diagonal.  Repeat with a wider band until the
+    # best alignment doesn't touch its edge.
+    if not isinstance(gap_A_fn, affine_penalty) \
+    or not isinstance(gap_B_fn, affine_penalty):
+        raise ValueError("band_width needs affine gap penalties")
+    if band_width < 0:
+        raise ValueError("band_width should be non-negative")
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    while True:
+        low, high = _band_limits(lenA, lenB, band_width)
+        offsets, score_rows, trace_rows = _make_score_matrix_banded(
+            sequenceA, sequenceB, match_fn, gap_A_fn.open, gap_A_fn.extend,
+            gap_B_fn.open, gap_B_fn.extend, penalize_extend_when_opening,
+            penalize_end_gaps, align_globally, band_width)
+        score_matrix = _BandedMatrix(offsets, score_rows, lenB)
+        trace_matrix = _BandedMatrix(offsets, trace_rows, lenB)
+        starts = _find_banded_start(
+            score_matrix, sequenceA, sequenceB, gap_A_fn, gap_B_fn,
+            penalize_end_gaps, align_globally)
+        best_score = max([x[0] for x in starts])
+        starts = [(score, pos) for score, pos in starts
+                  if rint(abs(score-best_score)) <= 0]
+        if low <= 1-lenA and high >= lenB-1:
+            # The band covers the whole matrix
+            break
+        if not _band_edge_touched(starts, trace_matrix, low, high, lenB):
+            break
+        band_width = max(1, 2*band_width)
+
+    if score_only:
+        return best_score
+    if lazy:
+        return _LazyAlignments(
+            sequenceA, sequenceB, starts, score_matrix, trace_matrix,
+            align_globally, gap_char, one_alignment_only)
+    return _recover_alignments(
+        sequenceA, sequenceB, starts, score_matrix, trace_matrix,
+        align_globally, gap_char, one_alignment_only)
+
+
 def _make_score_matrix_generic(
         sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
         penalize_extend_when_opening, penalize_end_gaps, align_globally,
@@ -591,15 +852,442 @@ def _make_score_matrix_fast(
     return score_matrix, trace_matrix
 
 
+def _band_limits(lenA, lenB, band_width):
+    # Return the lowest and highest diagonal (col - row) in the band.
+    # The band is widened by the difference in the sequence lengths so
+    # that it always includes the last cell of the matrix.
+    return min(0, lenB-lenA) - band_width, max(0, lenB-lenA) + band_width
+
+
+def _make_score_matrix_banded(
+        sequenceA, sequenceB, match_fn, open_A, extend_A, open_B, extend_B,
+        penalize_extend_when_opening, penalize_end_gaps,
+        align_globally, band_width):
+    # This is _make_score_matrix_fast, but only for the cells within
+    # the band (see _band_limits).  Each row of the score and traceback
+    # matrices only holds the cells in the band, starting at the column
+    # given in offsets.  The row and column caches start off as None,
+    # until a cell of the band has been seen in that row or column.
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening)
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening)
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    low, high = _band_limits(lenA, lenB, band_width)
+    offsets, score_rows, trace_rows = [], [], []
+    row_cache_score, row_cache_index = [None]*lenA, [None]*lenA
+    col_cache_score, col_cache_index = [None]*lenB, [None]*lenB
+
+    for row in range(lenA):
+        start, end = max(0, row+low), min(lenB-1, row+high)
+        scores = [None] * (end-start+1)
+        traces = [[None]] * (end-start+1)
+        if row:
+            prev_start, prev_scores = offsets[row-1], score_rows[row-1]
+        offsets.append(start)
+        score_rows.append(scores)
+        trace_rows.append(traces)
+        for col in range(start, end+1):
+            if not row or not col:
+                # The top and left borders of the matrix.
+                score = match_fn(sequenceA[row], sequenceB[col])
+                if not col and penalize_end_gaps[1]:
+                    score += calc_affine_penalty(
+                        row, open_B, extend_B, penalize_extend_when_opening)
+                elif not row and penalize_end_gaps[0]:
+                    score += calc_affine_penalty(
+                        col, open_A, extend_A, penalize_extend_when_opening)
+                scores[col-start] = score
+                if not col:
+                    row_cache_score[row] = score + first_A_gap
+                    row_cache_index[row] = [(row, 0)]
+                if not row:
+                    col_cache_score[col] = score + first_B_gap
+                    col_cache_index[col] = [(0, col)]
+                continue
+
+            # The cell on the diagonal before this one is always in the
+            # band.
+            nogap_score = prev_scores[col-1-prev_start]
+            candidates = [nogap_score]
+            row_score = col_score = None
+            if col > 1 and row_cache_score[row-1] is not None:
+                row_score = row_cache_score[row-1]
+                candidates.append(row_score)
+            if row > 1 and col_cache_score[col-1] is not None:
+                col_score = col_cache_score[col-1]
+                candidates.append(col_score)
+            best_score = max(candidates)
+            best_score_rint = rint(best_score)
+            best_index = []
+            if best_score_rint == rint(nogap_score):
+                best_index.append((row-1, col-1))
+            if row_score is not None and best_score_rint == rint(row_score):
+                best_index.extend(row_cache_index[row-1])
+            if col_score is not None and best_score_rint == rint(col_score):
+                best_index.extend(col_cache_index[col-1])
+
+            score = best_score + match_fn(sequenceA[row], sequenceB[col])
+            if not align_globally and score < 0:
+                scores[col-start] = 0
+            else:
+                scores[col-start] = score
+            traces[col-start] = best_index
+
+            # Update the cached column and row scores.
+            for cache_score, cache_index, i, first_gap, extend in [
+                    (col_cache_score, col_cache_index, col-1,
+                     first_B_gap, extend_B),
+                    (row_cache_score, row_cache_index, row-1,
+                     first_A_gap, extend_A)]:
+                open_score = nogap_score + first_gap
+                if cache_score[i] is None:
+                    cache_score[i] = open_score
+                    cache_index[i] = [(row-1, col-1)]
+                    continue
+                extend_score = cache_score[i] + extend
+                open_score_rint, extend_score_rint = \
+                                 rint(open_score), rint(extend_score)
+                if open_score_rint > extend_score_rint:
+                    cache_score[i] = open_score
+                    cache_index[i] = [(row-1, col-1)]
+                elif extend_score_rint > open_score_rint:
+                    cache_score[i] = extend_score
+                else:
+                    cache_score[i] = open_score
+                    if (row-1, col-1) not in cache_index[i]:
+                        cache_index[i] = cache_index[i] + [(row-1, col-1)]
+
+    return offsets, score_rows, trace_rows
+
+
+class _BandedMatrix(object):
+    # Wrap the rows of a banded score or traceback matrix, so that it
+    # can be used as matrix[row][col] like the full matrices.  Cells
+    # outside the band are None.
+    def __init__(self, offsets, rows, ncols):
+        self.offsets = offsets
+        self.rows = rows
+        self.ncols = ncols
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, row):
+        return _BandedRow(self.offsets[row], self.rows[row], self.ncols)
+
+
+class _BandedRow(object):
+    def __init__(self, offset, values, ncols):
+        self.offset = offset
+        self.values = values
+        self.ncols = ncols
+
+    def __len__(self):
+        return self.ncols
+
+    def __getitem__(self, col):
+        i = col - self.offset
+        if 0 <= i < len(self.values):
+            return self.values[i]
+        return None
+
+
+def _find_banded_start(score_matrix, sequenceA, sequenceB, gap_A_fn,
+                       gap_B_fn, penalize_end_gaps, align_globally):
+    # As _find_start, but only looking at the cells in the band.
+    nrows, ncols = len(score_matrix), score_matrix.ncols
+    positions = []
+    if align_globally:
+        for row in range(nrows):
+            score = score_matrix[row][ncols-1]
+            if score is None:
+                continue
+            if penalize_end_gaps[1]:
+                score += gap_B_fn(ncols, nrows-row-1)
+            positions.append((score, (row, ncols-1)))
+        offset = score_matrix.offsets[nrows-1]
+        for col in range(offset, ncols-1):
+            score = score_matrix[nrows-1][col]
+            if penalize_end_gaps[0]:
+                score += gap_A_fn(nrows, ncols-col-1)
+            positions.append((score, (nrows-1, col)))
+    else:
+        for row in range(nrows):
+            offset = score_matrix.offsets[row]
+            for i, score in enumerate(score_matrix.rows[row]):
+                positions.append((score, (row, offset+i)))
+    return positions
+
+
+def _band_edge_touched(starts, trace_matrix, low, high, lenB):
+    # Follow the tracebacks from each of the starting points, through
+    # all the equally good previous cells, and check whether any of
+    # them uses a cell on the edge of the band (where the band is
+    # narrower than the matrix).
+    stack = [pos for score, pos in starts]
+    seen = set(stack)
+    while stack:
+        row, col = stack.pop()
+        if (col-row == low and col > 0) or \
+           (col-row == high and col < lenB-1):
+            return True
+        for pos in trace_matrix[row][col]:
+            if pos is not None and pos not in seen:
+                seen.add(pos)
+                stack.append(pos)
+    return False
+
+
+# Linear space alignment.  The alignments found here are chains of
+# aligned pairs of characters, with gaps in at most one of the sequences
+# between two consecutive pairs (as in _make_score_matrix_fast).  For the
+# divide and conquer algorithm this is described as a path through the
+# following states, where gaps at the start and the end of the alignment
+# are kept separate from internal gaps as they may be scored differently
+# (see penalize_end_gaps).  A gap "in A" uses up characters of sequenceB.
+_BEGIN, _MATCH, _START_A, _START_B, _GAP_A, _GAP_B, _END_A, _END_B = range(8)
+_NSTATES = 8
+# Moves: use a character from both sequences, from sequenceB only (a gap
+# in A), or from sequenceA only (a gap in B).
+_DIAG, _LEFT, _UP = range(3)
+_MINUS_INF = float("-inf")
+# Sub-problems up to this many cells are solved with a full matrix.
+_LINEAR_MAX_CELLS = 2500
+
+
+def _align_linear_space(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
+                        penalize_extend_when_opening, penalize_end_gaps,
+                        align_globally, gap_char, score_only):
+    if not align_globally:
+        raise ValueError("linear_space is only available for global "
+                         "alignments")
+    if not isinstance(gap_A_fn, affine_penalty) \
+    or not isinstance(gap_B_fn, affine_penalty):
+        raise ValueError("linear_space needs affine gap penalties")
+    transitions = _linear_transitions(
+        gap_A_fn.open, gap_A_fn.extend, gap_B_fn.open, gap_B_fn.extend,
+        penalize_extend_when_opening, penalize_end_gaps)
+    reverse = [(dst, src, move, cost) for src, dst, move, cost in transitions]
+    ends = [_MATCH, _END_A, _END_B]
+    if score_only:
+        row = _linear_fill(sequenceA, sequenceB, match_fn, transitions,
+                           [_BEGIN])[-1]
+        return max([row[state][-1] for state in ends])
+    score, moves = _linear_path(sequenceA, sequenceB, match_fn,
+                                (transitions, reverse), [_BEGIN], ends)
+    seqA, seqB = _linear_alignment(sequenceA, sequenceB, moves, gap_char)
+    return [(seqA, seqB, score, 0, len(seqA))]
+
+
+def _linear_transitions(open_A, extend_A, open_B, extend_B,
+                        penalize_extend_when_opening, penalize_end_gaps):
+    # Return a list of (from state, to state, move, score) for the
+    # alignment states.  The score of a _DIAG move comes from match_fn.
+    first_A = calc_affine_penalty(1, open_A, extend_A,
+                                  penalize_extend_when_opening)
+    first_B = calc_affine_penalty(1, open_B, extend_B,
+                                  penalize_extend_when_opening)
+    end_first_A = end_extend_A = end_first_B = end_extend_B = 0
+    if penalize_end_gaps[0]:
+        end_first_A, end_extend_A = first_A, extend_A
+    if penalize_end_gaps[1]:
+        end_first_B, end_extend_B = first_B, extend_B
+    transitions = [(state, _MATCH, _DIAG, None) for state in
+                   (_BEGIN, _MATCH, _START_A, _START_B, _GAP_A, _GAP_B)]
+    transitions.extend([
+        (_BEGIN, _START_A, _LEFT, end_first_A),
+        (_START_A, _START_A, _LEFT, end_extend_A),
+        (_BEGIN, _START_B, _UP, end_first_B),
+        (_START_B, _START_B, _UP, end_extend_B),
+        (_MATCH, _GAP_A, _LEFT, first_A),
+        (_GAP_A, _GAP_A, _LEFT, extend_A),
+        (_MATCH, _GAP_B, _UP, first_B),
+        (_GAP_B, _GAP_B, _UP, extend_B),
+        (_MATCH, _END_A, _LEFT, end_first_A),
+        (_END_A, _END_A, _LEFT, end_extend_A),
+        (_MATCH, _END_B, _UP, end_first_B),
+        (_END_B, _END_B, _UP, end_extend_B),
+        ])
+    return transitions
+
+
+def _linear_fill(sequenceA, sequenceB, match_fn, transitions, starts,
+                 keep_rows=False):
+    # Fill in the score matrix for each state, starting in any of the
+    # states in starts at the top left corner.  Only the previous row
+    # is kept, unless keep_rows is true.  Returns a list of rows, where
+    # each row is a list of the scores across sequenceB for each state.
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    incoming = [[] for state in range(_NSTATES)]
+    for src, dst, move, cost in transitions:
+        incoming[dst].append((src, move, cost))
+    rows = []
+    prev = None
+    for row in range(lenA + 1):
+        current = [[_MINUS_INF] * (lenB + 1) for state in range(_NSTATES)]
+        for col in range(lenB + 1):
+            if row == 0 and col == 0:
+                for state in starts:
+                    current[state][0] = 0
+                continue
+            match_score = None
+            for dst in range(_NSTATES):
+                best = _MINUS_INF
+                for src, move, cost in incoming[dst]:
+                    if move == _DIAG:
+                        if not row or not col:
+                            continue
+                        if match_score is None:
+                            match_score = match_fn(sequenceA[row-1],
+                                                   sequenceB[col-1])
+                        score = prev[src][col-1] + match_score
+                    elif move == _LEFT:
+                        if not col:
+                            continue
+                        score = current[src][col-1] + cost
+                    else:
+                        if not row:
+                            continue
+                        score = prev[src][col] + cost
+                    if score > best:
+                        best = score
+                current[dst][col] = best
+        if keep_rows:
+            rows.append(current)
+        prev = current
+    if not keep_rows:
+        rows.append(prev)
+    return rows
+
+
+def _linear_traceback(sequenceA, sequenceB, match_fn, transitions, rows,
+                      starts, ends):
+    # Return the score and the list of moves for the best path through a
+    # complete score matrix from _linear_fill, ending in one of ends.
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    best_score, state = _MINUS_INF, None
+    for end in ends:
+        if rows[lenA][end][lenB] > best_score:
+            best_score, state = rows[lenA][end][lenB], end
+    row, col = lenA, lenB
+    moves = []
+    while row or col:
+        score = rows[row][state][col]
+        for src, dst, move, cost in transitions:
+            if dst != state:
+                continue
+            if move == _DIAG:
+                if not row or not col:
+                    continue
+                prev_row, prev_col = row-1, col-1
+                cost = match_fn(sequenceA[row-1], sequenceB[col-1])
+            elif move == _LEFT:
+                if not col:
+                    continue
+                prev_row, prev_col = row, col-1
+            else:
+                if not row:
+                    continue
+                prev_row, prev_col = row-1, col
+            if rows[prev_row][src][prev_col] + cost == score:
+                break
+        else:
+            raise RuntimeError("Traceback failed at %i, %i" % (row, col))
+        moves.append(move)
+        row, col, state = prev_row, prev_col, src
+    assert state in starts
+    moves.reverse()
+    return best_score, moves
+
+
+def _linear_path(sequenceA, sequenceB, match_fn, transitions, starts, ends):
+    # Find the best path from one of the starts states at the top left
+    # to one of the ends states at the bottom right, in linear space.
+    # The best crossing point of the middle row is found from the scores
+    # of the top half, and of the bottom half calculated backwards on
+    # the reversed sequences.  Then each half is solved recursively.
+    # Returns the score and list of moves.
+    forward, reverse = transitions
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    if lenA <= 1 or (lenA + 1) * (lenB + 1) <= _LINEAR_MAX_CELLS:
+        rows = _linear_fill(sequenceA, sequenceB, match_fn, forward, starts,
+                            keep_rows=True)
+        return _linear_traceback(sequenceA, sequenceB, match_fn, forward,
+                                 rows, starts, ends)
+    middle = lenA // 2
+    top = _linear_fill(sequenceA[:middle], sequenceB, match_fn, forward,
+                       starts)[-1]
+    bottom = _linear_fill(sequenceA[middle:][::-1], sequenceB[::-1],
+                          match_fn, reverse, ends)[-1]
+    best_score, best_col, best_state = _MINUS_INF, None, None
+    for col in range(lenB + 1):
+        for state in range(_NSTATES):
+            score = top[state][col] + bottom[state][lenB-col]
+            if score > best_score:
+                best_score, best_col, best_state = score, col, state
+    score1, moves1 = _linear_path(
+        sequenceA[:middle], sequenceB[:best_col], match_fn, transitions,
+        starts, [best_state])
+    score2, moves2 = _linear_path(
+        sequenceA[middle:], sequenceB[best_col:], match_fn, transitions,
+        [best_state], ends)
+    return score1 + score2, moves1 + moves2
+
+
+def _linear_alignment(sequenceA, sequenceB, moves, gap_char):
+    # Turn a list of moves into the aligned sequences.  As in
+    # _recover_alignments, use slices to preserve the sequence type.
+    seqA, seqB = [], []
+    row = col = 0
+    for move, group in itertools.groupby(moves):
+        n = len(list(group))
+        if move == _DIAG:
+            seqA.append(sequenceA[row:row+n])
+            seqB.append(sequenceB[col:col+n])
+            row += n
+            col += n
+        elif move == _LEFT:
+            seqA.append(gap_char*n)
+            seqB.append(sequenceB[col:col+n])
+            col += n
+        else:
+            seqA.append(sequenceA[row:row+n])
+            seqB.append(gap_char*n)
+            row += n
+    return _join(sequenceA[0:0], seqA), _join(sequenceB[0:0], seqB)
+
+
+def _join(empty, pieces):
+    # Concatenate a list of sequence pieces.
+    if isinstance(empty, basestring):
+        return empty.join(pieces)
+    for piece in pieces:
+        empty = empty + piece
+    return empty
+
+
 def _recover_alignments(sequenceA, sequenceB, starts,
                         score_matrix, trace_matrix, align_globally,
                         gap_char, one_alignment_only):
-    # Recover the alignments by following the traceback matrix.  This
+    # Recover up to MAX_ALIGNMENTS alignments, and return them as a
+    # list.
+    tracebacks = _traceback_alignments(
+        sequenceA, sequenceB, starts, score_matrix, trace_matrix,
+        align_globally, gap_char, one_alignment_only)
+    return _clean_alignments(itertools.islice(tracebacks, MAX_ALIGNMENTS))
+
+
+def _traceback_alignments(sequenceA, sequenceB, starts,
+                          score_matrix, trace_matrix, align_globally,
+                          gap_char, one_alignment_only):
+    # Recover the alignments by following the traceback matrix, and
+    # yield them (seq1, seq2, score, begin, end) one at a time.  This
     # is a recursive procedure, but it's implemented here iteratively
     # with a stack.
     lenA, lenB = len(sequenceA), len(sequenceB)
-    tracebacks = [] # list of (seq1, seq2, score, begin, end)
-    in_process = [] # list of ([same as tracebacks], prev_pos, next_pos)
+    in_process = [] # list of (seq1, seq2, score, begin, end,
+                    #          prev_pos, next_pos)
 
     # sequenceA and sequenceB may be sequences, including strings,
     # lists, or list-like objects.  In order to preserve the type of
@@ -626,7 +1314,7 @@ def _recover_alignments(sequenceA, sequenceB, starts,
              (lenA, lenB), (row, col)))
         if one_alignment_only:
             break
-    while in_process and len(tracebacks) < MAX_ALIGNMENTS:
+    while in_process:
         seqA, seqB, score, begin, end, prev_pos, next_pos = in_process.pop()
         prevA, prevB = prev_pos
         if next_pos is None:
@@ -643,7 +1331,7 @@ def _recover_alignments(sequenceA, sequenceB, starts,
                     begin = 0
                 else:
                     begin = len(seqA) - prevlen
-            tracebacks.append((seqA, seqB, score, begin, end))
+            yield seqA, seqB, score, begin, end
         else:
             nextA, nextB = next_pos
             nseqA, nseqB = prevA-nextA, prevB-nextB
@@ -664,7 +1352,86 @@ def _recover_alignments(sequenceA, sequenceB, starts,
                     if one_alignment_only:
                         break
 
-    return _clean_alignments(tracebacks)
+
+class _LazyAlignments(object):
+    """Iterable of the best alignments, recovered as they are needed.
+
+    This is returned by the alignment functions when called with lazy=1.
+    Each time it is iterated over, the alignments are recovered again
+    from the score and traceback matrices.
+    """
+    def __init__(self, sequenceA, sequenceB, starts, score_matrix,
+                 trace_matrix, align_globally, gap_char, one_alignment_only):
+        self._args = (sequenceA, sequenceB, starts, score_matrix,
+                      trace_matrix, align_globally, gap_char,
+                      one_alignment_only)
+
+    def __iter__(self):
+        seen = set()
+        for align in _traceback_alignments(*self._args):
+            align = _clean_alignment(align)
+            if align is None:
+                continue
+            try:
+                hash(align)
+                key = align
+            except TypeError:
+                # e.g. lists of characters
+                key = repr(align)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield align
+
+    def count(self):
+        """Number of tracebacks, without recovering the alignments.
+
+        This counts the paths from each of the starting points through
+        the traceback matrix.  Normally each gives a different alignment,
+        so this is the number of alignments the object will give when
+        iterated over.
+        """
+        (sequenceA, sequenceB, starts, score_matrix, trace_matrix,
+         align_globally, gap_char, one_alignment_only) = self._args
+        if not align_globally:
+            # A local alignment starting from a cell with a score of zero
+            # would be empty.
+            starts = [(score, (row, col)) for score, (row, col) in starts
+                      if score_matrix[row][col] > 0]
+        if one_alignment_only:
+            return min(1, len(starts))
+        # counts maps a (row, col) position to the number of tracebacks
+        # from there.  These only go up and to the left, so use a stack
+        # to work out the counts for the positions they come from first.
+        counts = {}
+        for score, start in starts:
+            stack = [start]
+            while stack:
+                pos = stack[-1]
+                if pos in counts:
+                    stack.pop()
+                    continue
+                row, col = pos
+                if not align_globally and score_matrix[row][col] <= 0:
+                    # local alignment stops early if score falls < 0
+                    counts[pos] = 1
+                    stack.pop()
+                    continue
+                previous = trace_matrix[row][col]
+                pending = [p for p in previous
+                           if p is not None and p not in counts]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                total = 0
+                for p in previous:
+                    if p is None:
+                        total += 1
+                    else:
+                        total += counts[p]
+                counts[pos] = total
+                stack.pop()
+        return sum([counts[start] for score, start in starts])
 
 
 def _find_start(score_matrix, sequenceA, sequenceB, gap_A_fn, gap_B_fn,
@@ -722,21 +1489,30 @@ def _clean_alignments(alignments):
             unique_alignments.append(align)
     i = 0
     while i < len(unique_alignments):
-        seqA, seqB, score, begin, end = unique_alignments[i]
-        # Make sure end is set reasonably.
-        if end is None:   # global alignment
-            end = len(seqA)
-        elif end < 0:
-            end = end + len(seqA)
+        align = _clean_alignment(unique_alignments[i])
         # If there's no alignment here, get rid of it.
-        if begin >= end:
+        if align is None:
             del unique_alignments[i]
             continue
-        unique_alignments[i] = seqA, seqB, score, begin, end
+        unique_alignments[i] = align
         i += 1
     return unique_alignments
 
 
+def _clean_alignment(align):
+    # Make sure begin and end are set correctly, or return None for an
+    # empty alignment.
+    seqA, seqB, score, begin, end = align
+    # Make sure end is set reasonably.
+    if end is None:   # global alignment
+        end = len(seqA)
+    elif end < 0:
+        end = end + len(seqA)
+    if begin >= end:
+        return None
+    return seqA, seqB, score, begin, end
+
+
 def _pad_until_equal(s1, s2, char):
     # Add char to the end of s1 or s2 until they are equal length.
     ls1, ls2 = len(s1), len(s2)
@@ -873,10 +1649,171 @@ def format_alignment(align1, align2, score, begin, end):
     return ''.join(s)
 
 
+def _batch_sequence(sequence):
+    # Use the string of a SeqRecord or Seq object (which is much faster
+    # in the C code), and leave other sequences as they are.
+    from Bio.Seq import Seq
+    if hasattr(sequence, "seq"):
+        sequence = sequence.seq
+    if isinstance(sequence, Seq):
+        sequence = str(sequence)
+    return sequence
+
+
+def _batch_pairs(queries, targets):
+    # Yield the (query index, target index) pairs to align.  With no
+    # targets, each pair of queries is only used once.
+    if targets is None:
+        for i in range(len(queries)):
+            for j in range(i, len(queries)):
+                yield i, j
+    else:
+        for i in range(len(queries)):
+            for j in range(len(targets)):
+                yield i, j
+
+
+def _batch_chunks(pairs, chunk_size):
+    # Group the pairs into lists, to send to the worker processes.
+    chunk = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# The sequences and decoded parameters for the batch functions, set in
+# each worker process by _batch_init.
+_batch_state = None
+
+
+def _batch_init(queries, targets, keywds):
+    global _batch_state
+    _batch_state = (queries, targets, keywds)
+
+
+def _batch_align(pairs):
+    # Align the given (query index, target index) pairs, returning a
+    # list of (query index, target index, result).
+    queries, targets, keywds = _batch_state
+    if targets is None:
+        targets = queries
+    results = []
+    for i, j in pairs:
+        keywds["sequenceA"] = queries[i]
+        keywds["sequenceB"] = targets[j]
+        results.append((i, j, _align(**keywds)))
+    return results
+
+
+def _batch_run(queries, targets, function, args, keywds, processes,
+               chunk_size):
+    # Yield (query index, target index, result) for all the pairs,
+    # in the order they are finished.
+    global _batch_state
+    if isinstance(function, basestring):
+        function = getattr(align, function)
+    queries = [_batch_sequence(s) for s in queries]
+    if targets is not None:
+        targets = [_batch_sequence(s) for s in targets]
+    # Decode the parameters once, rather than for each pair.
+    keywds = function.decode(None, None, *args, **keywds)
+    chunks = _batch_chunks(_batch_pairs(queries, targets), chunk_size)
+    if processes == 1:
+        old_state = _batch_state
+        _batch_state = (queries, targets, keywds)
+        try:
+            for chunk in chunks:
+                for result in _batch_align(chunk):
+                    yield result
+        finally:
+            _batch_state = old_state
+        return
+
+    import multiprocessing
+    pool = multiprocessing.Pool(processes, _batch_init,
+                                (queries, targets, keywds))
+    try:
+        for results in pool.imap_unordered(_batch_align, chunks):
+            for result in results:
+                yield result
+    except:
+        pool.terminate()
+        raise
+    pool.close()
+    pool.join()
+
+
+def batch_scores(queries, targets, function, *args, **keywds):
+    """batch_scores(queries, targets, function, *args) -> scores
+
+    Align each query sequence to each target sequence, returning a
+    matrix of the best scores as a list of lists (one per query).  If
+    targets is None, the queries are all aligned to each other, which
+    gives a symmetric matrix (each pair is only aligned once, so this
+    assumes the scoring does not depend on the order of the sequences).
+
+    The sequences may be strings, lists, Seq or SeqRecord objects.  The
+    function is one of the pairwise2.align functions (or its name, e.g.
+    "globalms"), and args are its parameters apart from the sequences.
+    Any keyword arguments are passed to the alignment function, except:
+
+     - processes  - number of worker processes to use (default one,
+                    meaning align in this process; None means use all
+                    the CPUs).  Your match and gap functions must be
+                    defined at the top level of a module to use this.
+     - chunk_size - number of pairs sent to a worker process at a time
+                    (default 100).
+
+    Pairs involving an empty sequence have a score of None.
+    """
+    processes = keywds.pop("processes", 1)
+    chunk_size = keywds.pop("chunk_size", 100)
+    keywds["score_only"] = 1
+    queries = list(queries)
+    if targets is not None:
+        targets = list(targets)
+        scores = [[None] * len(targets) for query in queries]
+    else:
+        scores = [[None] * len(queries) for query in queries]
+    for i, j, score in _batch_run(queries, targets, function, args, keywds,
+                                  processes, chunk_size):
+        if score == []:
+            # _align gives an empty list for an empty sequence
+            score = None
+        scores[i][j] = score
+        if targets is None:
+            scores[j][i] = score
+    return scores
+
+
+def batch_alignments(queries, targets, function, *args, **keywds):
+    """batch_alignments(queries, targets, function, *args) -> iterator
+
+    Align each query sequence to each target sequence, returning an
+    iterator giving tuples of (query index, target index, alignments).
+    If targets is None, each pair of queries is aligned once (with the
+    lower index as the query).  The arguments are as for batch_scores.
+    With more than one process the results are given in the order they
+    are finished, rather than the order of the sequences.
+    """
+    processes = keywds.pop("processes", 1)
+    chunk_size = keywds.pop("chunk_size", 100)
+    queries = list(queries)
+    if targets is not None:
+        targets = list(targets)
+    return _batch_run(queries, targets, function, args, keywds, processes,
+                      chunk_size)
+
+
 # Try and load C implementations of functions.  If I can't,
 # then just ignore and use the pure python implementations.
 try:
     from cpairwise2 import rint, _make_score_matrix_fast
+    from cpairwise2 import _make_score_matrix_banded, _score_only_fast
 except ImportError:
     pass
 
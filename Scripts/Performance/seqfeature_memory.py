@@ -0,0 +1,70 @@
+#/usr/bin/env python
+"""Small script to measure the memory used by SeqFeature objects.
+
+Give it a GenBank file (e.g. a full GenBank division file like gbbct1.seq,
+or a bacterial genome), and it will parse all the records and report how
+many feature, location and position objects were created, and how much
+memory they use (including any per-instance dictionaries).
+
+python seqfeature_memory.py gbbct1.seq
+"""
+import sys
+import time
+
+from Bio import SeqIO
+from Bio.SeqFeature import FeatureLocation, CompoundLocation
+
+
+def object_size(obj):
+    """Size of an object plus its instance dictionary (if any)."""
+    size = sys.getsizeof(obj)
+    #Note looking at __dict__ creates an empty dictionary on demand
+    #for a class with a __dict__ slot, so ignore any empty dictionary
+    instance_dict = getattr(obj, "__dict__", None)
+    if instance_dict:
+        size += sys.getsizeof(instance_dict)
+    return size
+
+
+def feature_memory(records):
+    counts = {"features": 0, "locations": 0, "positions": 0}
+    sizes = {"features": 0, "locations": 0, "positions": 0}
+    for record in records:
+        for feature in record.features:
+            counts["features"] += 1
+            sizes["features"] += object_size(feature)
+            location = feature.location
+            if isinstance(location, CompoundLocation):
+                counts["locations"] += 1
+                sizes["locations"] += object_size(location)
+                parts = location.parts
+            else:
+                parts = [location]
+            for part in parts:
+                assert isinstance(part, FeatureLocation)
+                counts["locations"] += 1
+                sizes["locations"] += object_size(part)
+                for position in (part.start, part.end):
+                    counts["positions"] += 1
+                    sizes["positions"] += object_size(position)
+    return counts, sizes
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.stderr.write("Usage: python seqfeature_memory.py file.gbk\n")
+        sys.exit(1)
+    filename = sys.argv[1]
+    start_time = time.time()
+    records = list(SeqIO.parse(filename, "genbank"))
+    elapsed_time = time.time() - start_time
+    counts, sizes = feature_memory(records)
+    print("Parsed %i records in %0.2f seconds"
+          % (len(records), elapsed_time))
+    total = 0
+    for name in ["features", "locations", "positions"]:
+        total += sizes[name]
+        print("\t%i %s using %i bytes (%0.1f bytes each)"
+              % (counts[name], name, sizes[name],
+                 float(sizes[name]) / max(1, counts[name])))
+    print("\tTotal %0.1f MB" % (total / 1024.0 / 1024.0))
@@ -114,14 +114,24 @@ DOCTEST_MODULES = [
                    "Bio.SeqUtils.MeltingTemp",
                    "Bio.Sequencing.Applications._Novoalign",
                    "Bio.Sequencing.Applications._bwa",
+                   "Bio.SubsMat",
                    "Bio.Wise",
                    "Bio.Wise.psw",
                   ]
 #Silently ignore any doctests for modules requiring numpy!
 if is_numpy():
     DOCTEST_MODULES.extend(["Bio.Statistics.lowess",
+                            "Bio.Align.SmithWaterman",
+                            "Bio.PDB.BackboneGeometry",
+                            "Bio.PDB.CellList",
+                            "Bio.PDB.CoordinateStore",
                             "Bio.PDB.Polypeptide",
-                            "Bio.PDB.Selection"
+                            "Bio.PDB.SASA",
+                            "Bio.PDB.SecondaryStructure",
+                            "Bio.PDB.Selection",
+                            "Bio.SeqUtils.KmerCounter",
+                            "Bio.SeqUtils.ProtParamBatch",
+                            "Bio.SeqUtils.SlidingWindow",
                             ])
 
 
@@ -0,0 +1,191 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Unit tests for Bio.AlignIO.index() and the Stockholm parser options."""
+
+import os
+import tempfile
+import unittest
+import warnings
+from StringIO import StringIO
+
+from Bio import AlignIO
+from Bio import BiopythonParserWarning
+from Bio.Alphabet import generic_protein
+from Bio.AlignIO.StockholmIO import StockholmIterator
+
+
+def compare_alignments(test, old, new):
+    """Check two alignments have the same records and annotation."""
+    test.assertEqual(len(old), len(new))
+    for old_rec, new_rec in zip(old, new):
+        test.assertEqual(old_rec.id, new_rec.id)
+        test.assertEqual(str(old_rec.seq), str(new_rec.seq))
+        test.assertEqual(old_rec.annotations, new_rec.annotations)
+        test.assertEqual(old_rec.letter_annotations,
+                         new_rec.letter_annotations)
+    test.assertEqual(old._column_annotations, new._column_annotations)
+
+
+class StockholmIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        #Make a file of several alignments, adding an accession to the
+        #simple example (which lacks one)
+        handle = open("Stockholm/funny.sth")
+        funny = handle.read()
+        handle.close()
+        handle = open("Stockholm/simple.sth")
+        simple = handle.read()
+        handle.close()
+        simple_ac = simple.replace("# STOCKHOLM 1.0\n",
+                                   "# STOCKHOLM 1.0\n#=GF ID simple\n"
+                                   "#=GF AC RF99999.1\n", 1)
+        simple_id = simple.replace("# STOCKHOLM 1.0\n",
+                                   "# STOCKHOLM 1.0\n#=GF ID no_accession\n", 1)
+        self.data = funny + simple_ac + simple_id
+        h, self.filename = tempfile.mkstemp(".sth")
+        os.close(h)
+        handle = open(self.filename, "w")
+        handle.write(self.data)
+        handle.close()
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_index(self):
+        """Index alignments by accession."""
+        alignments = AlignIO.index(self.filename, "stockholm")
+        self.assertEqual(len(alignments), 3)
+        self.assertEqual(sorted(alignments),
+                         ["PF00571", "RF99999.1", "no_accession"])
+        self.assertTrue("RF99999.1" in alignments)
+        self.assertFalse("simple" in alignments)
+        expected = list(AlignIO.parse(self.filename, "stockholm"))
+        compare_alignments(self, expected[0], alignments["PF00571"])
+        compare_alignments(self, expected[1], alignments["RF99999.1"])
+        compare_alignments(self, expected[2], alignments["no_accession"])
+        self.assertEqual(alignments.get("missing"), None)
+        self.assertRaises(KeyError, alignments.__getitem__, "missing")
+        alignments.close()
+
+    def test_raw(self):
+        """Get the raw text of each alignment."""
+        alignments = AlignIO.index(self.filename, "stockholm")
+        raw = "".join(alignments.get_raw(key) for key in
+                      ["PF00571", "RF99999.1", "no_accession"])
+        self.assertEqual(raw, self.data)
+        alignments.close()
+
+    def test_key_function(self):
+        """Index alignments with a key function and alphabet."""
+        alignments = AlignIO.index(self.filename, "stockholm",
+                                   alphabet=generic_protein,
+                                   key_function=lambda acc: acc.split(".")[0])
+        self.assertEqual(sorted(alignments),
+                         ["PF00571", "RF99999", "no_accession"])
+        self.assertEqual(alignments["RF99999"][0].seq.alphabet,
+                         generic_protein)
+        alignments.close()
+        self.assertRaises(ValueError, AlignIO.index, self.filename,
+                          "stockholm", key_function=lambda acc: "same")
+
+    def test_bad_arguments(self):
+        """Invalid arguments to the index function."""
+        self.assertRaises(ValueError, AlignIO.index, self.filename, "clustal")
+        self.assertRaises(ValueError, AlignIO.index, self.filename,
+                          "Stockholm")
+        self.assertRaises(TypeError, AlignIO.index, open(self.filename),
+                          "stockholm")
+
+    def test_missing_key(self):
+        """Alignments without an accession or identifier."""
+        self.assertRaises(ValueError, AlignIO.index, "Stockholm/simple.sth",
+                          "stockholm")
+
+
+class StockholmParserTests(unittest.TestCase):
+
+    def test_letter_annotations(self):
+        """Skipping the per-residue annotation."""
+        for filename in ["Stockholm/simple.sth", "Stockholm/funny.sth"]:
+            handle = open(filename)
+            full = AlignIO.read(handle, "stockholm")
+            handle.close()
+            handle = open(filename)
+            short = StockholmIterator(handle, letter_annotations=False).next()
+            handle.close()
+            self.assertEqual(len(full), len(short))
+            for old_rec, new_rec in zip(full, short):
+                self.assertEqual(old_rec.id, new_rec.id)
+                self.assertEqual(str(old_rec.seq), str(new_rec.seq))
+                self.assertEqual(old_rec.annotations, new_rec.annotations)
+                self.assertEqual(new_rec.letter_annotations, {})
+            self.assertEqual(short._annotations, {})
+
+    def test_interlaced(self):
+        """Interlaced sequences and annotation are joined up."""
+        align = AlignIO.read("Stockholm/simple.sth", "stockholm")
+        self.assertEqual(align.get_alignment_length(), 104)
+        self.assertEqual(str(align[0].seq),
+                         "UUAAUCGAGCUCAACACUCUUCGUAUAUCCUC-UCAAUAUGG-GAUGAGGGU"
+                         "CUCUAC-AGGUA-CCGUAAA-UACCUAGCUACGAAAAGAAUGCAGUUAAUGU")
+        self.assertEqual(align[1].letter_annotations["secondary_structure"],
+                         "-----------------<<<<<<<<-----<<.<<-------->>.>>----"
+                         "------.<<<<<--------->>>>>.-->>>>>>>>---------------")
+
+    def test_column_annotations(self):
+        """Per column annotation, also from interlaced lines."""
+        align = AlignIO.read("Stockholm/simple.sth", "stockholm")
+        self.assertEqual(align._column_annotations.keys(),
+                         ["secondary_structure"])
+        self.assertEqual(align._column_annotations["secondary_structure"],
+                         ".................<<<<<<<<...<<<<<<<........>>>>>>>.."
+                         "......<<<<<<<.......>>>>>>>..>>>>>>>>...............")
+        lines = ["# STOCKHOLM 1.0",
+                 "seq1 ACDE-FG",
+                 "seq2 ACDEHFG",
+                 "#=GC RF xxxx.xx",
+                 "#=GC seq_cons ACDEhFG",
+                 "//"]
+        align = AlignIO.read(StringIO("\n".join(lines) + "\n"), "stockholm")
+        self.assertEqual(align._column_annotations,
+                         {"reference_annotation": "xxxx.xx",
+                          "GC:seq_cons": "ACDEhFG"})
+        #Annotation of the wrong length is skipped, with a warning
+        lines[3] = "#=GC RF xxxx.x"
+        lines[4] = "#=GC seq_cons"
+        warnings.simplefilter("error", BiopythonParserWarning)
+        try:
+            self.assertRaises(BiopythonParserWarning, AlignIO.read,
+                              StringIO("\n".join(lines) + "\n"), "stockholm")
+        finally:
+            warnings.filters.pop(0)
+        warnings.simplefilter("ignore", BiopythonParserWarning)
+        try:
+            align = AlignIO.read(StringIO("\n".join(lines) + "\n"),
+                                 "stockholm")
+        finally:
+            warnings.filters.pop(0)
+        self.assertEqual(len(align), 2)
+        self.assertEqual(align._column_annotations, {})
+
+    def test_repeated_identifier(self):
+        """Many sequences, with one identifier repeated."""
+        lines = ["# STOCKHOLM 1.0"]
+        for i in range(2000):
+            lines.append("seq%i ACDE-FG" % i)
+        lines.append("seq7 HIKL")
+        lines.append("//")
+        handle = StringIO("\n".join(lines) + "\n")
+        self.assertRaises(ValueError, AlignIO.read, handle, "stockholm")
+        handle = StringIO("\n".join(lines[:-2] + ["//"]) + "\n")
+        align = AlignIO.read(handle, "stockholm")
+        self.assertEqual(len(align), 2000)
+        self.assertEqual(align[-1].id, "seq1999")
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -0,0 +1,114 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the Bio.Align.SmithWaterman module."""
+
+import random
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.Align.SmithWaterman.")
+
+from Bio import pairwise2
+from Bio import SeqIO
+from Bio.Seq import Seq
+from Bio.SubsMat import MatrixInfo, CompiledMatrix
+from Bio.Align.SmithWaterman import local_scores
+
+
+def random_protein(length):
+    return "".join(random.choice("ACDEFGHIKLMNPQRSTVWY")
+                   for i in range(length))
+
+
+class SmithWatermanTests(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(2468)
+        self.query = random_protein(30)
+        self.targets = [random_protein(random.randint(1, 60))
+                        for i in range(30)]
+        #Include some related sequences, and the length one special cases
+        self.targets.append(self.query[5:25])
+        self.targets.append(self.query[:10] + "W" + self.query[12:])
+        self.targets.extend(["W", "A"])
+
+    def check(self, query, targets, matrix, open, extend, **keywds):
+        scores = local_scores(query, targets, matrix, open, extend, **keywds)
+        self.assertEqual(len(scores), len(targets))
+        for target, score in zip(targets, scores):
+            expected = pairwise2.align.localds(query, target, matrix,
+                                               open, extend, score_only=True)
+            self.assertAlmostEqual(score, expected)
+
+    def test_integer_scores(self):
+        """Integer scores match pairwise2."""
+        scores = local_scores(self.query, self.targets, MatrixInfo.blosum62,
+                              -10, -1)
+        self.assertTrue(numpy.issubdtype(scores.dtype, numpy.integer))
+        self.check(self.query, self.targets, MatrixInfo.blosum62, -10, -1)
+        self.check(self.query, self.targets, MatrixInfo.pam30, -3, 0)
+
+    def test_float_scores(self):
+        """Non-integer gap penalties match pairwise2."""
+        self.check(self.query, self.targets, MatrixInfo.blosum62, -5, -0.5)
+        self.check(self.query, self.targets, MatrixInfo.benner6, -4, -2)
+
+    def test_compiled_matrix(self):
+        """A CompiledMatrix gives the same scores as its dictionary."""
+        expected = local_scores(self.query, self.targets, MatrixInfo.pam250,
+                                -10, -1)
+        scores = local_scores(self.query, self.targets,
+                              CompiledMatrix(MatrixInfo.pam250), -10, -1)
+        self.assertEqual(scores.tolist(), expected.tolist())
+
+    def test_batches(self):
+        """Small batches give the same scores."""
+        expected = local_scores(self.query, self.targets, MatrixInfo.blosum62,
+                                -7, -2)
+        scores = local_scores(self.query, self.targets, MatrixInfo.blosum62,
+                              -7, -2, batch_cells=50)
+        self.assertEqual(scores.tolist(), expected.tolist())
+
+    def test_short(self):
+        """Empty and length one sequences."""
+        self.check("W", self.targets, MatrixInfo.blosum62, -10, -1)
+        self.check(self.query[:2], self.targets, MatrixInfo.blosum62, -10, -1)
+        scores = local_scores("", ["ACDE", ""], MatrixInfo.blosum62, -10, -1)
+        self.assertEqual(scores.tolist(), [0, 0])
+        scores = local_scores("ACDE", ["", "ACDE"], MatrixInfo.blosum62,
+                              -10, -1)
+        self.assertEqual(scores.tolist(), [0, 24])
+        self.assertEqual(len(local_scores("ACDE", [], MatrixInfo.blosum62,
+                                          -10, -1)), 0)
+
+    def test_records(self):
+        """SeqRecord and Seq objects."""
+        records = [SeqIO.read("Fasta/aster.pro", "fasta"),
+                   SeqIO.read("Fasta/rose.pro", "fasta")]
+        query = Seq(str(records[0].seq))
+        scores = local_scores(query, records, MatrixInfo.blosum62, -10, -1)
+        self.assertEqual(scores[0], local_scores(str(query), [query],
+                                                 MatrixInfo.blosum62,
+                                                 -10, -1)[0])
+        self.check(str(query)[:40], [str(r.seq)[:60] for r in records],
+                   MatrixInfo.blosum62, -10, -1)
+
+    def test_errors(self):
+        """Bad residues and gap penalties."""
+        self.assertRaises(KeyError, local_scores, "ACDE", ["AC1E"],
+                          MatrixInfo.blosum62, -10, -1)
+        self.assertRaises(KeyError, local_scores, "acde", ["ACDE"],
+                          MatrixInfo.blosum62, -10, -1)
+        self.assertRaises(ValueError, local_scores, "ACDE", ["ACDE"],
+                          MatrixInfo.blosum62, 10, -1)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
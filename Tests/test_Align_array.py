@@ -0,0 +1,288 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the NumPy array based methods of MultipleSeqAlignment.
+
+This also covers the NumPy code in Bio.Align.AlignInfo.SummaryInfo.
+"""
+
+import random
+import unittest
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use the array based methods of "
+        "MultipleSeqAlignment.")
+
+from Bio import AlignIO
+from Bio import BiopythonDeprecationWarning
+from Bio.Align import AlignInfo, MultipleSeqAlignment
+from Bio.Alphabet import generic_dna, Gapped, IUPAC
+from Bio.Seq import Seq, MutableSeq
+from Bio.SeqRecord import SeqRecord
+
+
+class AlignmentArrayTests(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(2013)
+        records = []
+        for i in range(30):
+            seq = "".join(random.choice("ACGT-.") for j in range(40))
+            #Make a few columns all gaps
+            seq = seq[:5] + "--" + seq[7:]
+            rec = SeqRecord(Seq(seq, generic_dna), id="seq%i" % i,
+                            description="random %i" % i)
+            rec.letter_annotations["phred_quality"] = \
+                [random.randint(0, 40) for j in range(40)]
+            records.append(rec)
+        self.align = MultipleSeqAlignment(records, generic_dna)
+
+    def test_array(self):
+        """Letters in the array match the records."""
+        array = self.align.as_array()
+        self.assertEqual(array.shape, (30, 40))
+        self.assertEqual(array.dtype, numpy.uint8)
+        for rec, row in zip(self.align, array):
+            self.assertEqual(str(rec.seq), "".join(chr(c) for c in row))
+        self.assertTrue(self.align.as_array() is array)
+        self.assertRaises(ValueError, array.__setitem__, (0, 0), 65)
+
+    def test_examples(self):
+        """The examples in the docstrings."""
+        a = SeqRecord(Seq("AAAACGT", generic_dna), id="Alpha")
+        b = SeqRecord(Seq("AAA-CGT", generic_dna), id="Beta")
+        c = SeqRecord(Seq("AAAAGGT", generic_dna), id="Gamma")
+        array = MultipleSeqAlignment([a, b]).as_array()
+        self.assertEqual(array.shape, (2, 7))
+        self.assertEqual(array[1, 3], 45)
+        counts = MultipleSeqAlignment([a, b, c]).column_counts("ACGT-")
+        self.assertEqual(counts.tolist(),
+                         [[3, 0, 0, 0, 0], [3, 0, 0, 0, 0], [3, 0, 0, 0, 0],
+                          [2, 0, 0, 0, 1], [0, 2, 1, 0, 0], [0, 0, 3, 0, 0],
+                          [0, 0, 0, 3, 0]])
+        a = SeqRecord(Seq("AA-ACGT", generic_dna), id="Alpha")
+        b = SeqRecord(Seq("AA--CGT", generic_dna), id="Beta")
+        c = SeqRecord(Seq("AA-AGG.", generic_dna), id="Gamma")
+        align = MultipleSeqAlignment([a, b, c])
+        self.assertEqual([str(rec.seq) for rec in align.remove_gap_columns()],
+                         ["AAACGT", "AA-CGT", "AAAGG."])
+        self.assertEqual([str(rec.seq) for rec
+                          in align.remove_gap_columns(fraction=0.3)],
+                         ["AACG", "AACG", "AAGG"])
+
+    def test_columns(self):
+        """Columns and column slices match the records."""
+        align = self.align
+        #Without the array, and then using it
+        self.assertEqual(align[:, 0], "".join(str(rec.seq)[0] for rec in align))
+        self.assertTrue(align._array is None)
+        align.as_array()
+        for col in [0, 5, 39, -1, -40]:
+            expected = "".join(str(rec.seq)[col] for rec in align)
+            self.assertEqual(align[:, col], expected)
+            self.assertEqual(align[3:10:2, col], expected[3:10:2])
+        self.assertRaises(IndexError, align.__getitem__, (slice(None), 40))
+        sub_align = align[2:20, 5:30]
+        self.assertEqual(sub_align.get_alignment_length(), 25)
+        for rec, sub_rec in zip(align[2:20], sub_align):
+            self.assertEqual(str(rec.seq)[5:30], str(sub_rec.seq))
+        for col in range(25):
+            self.assertEqual(sub_align[:, col],
+                             "".join(str(r.seq)[col] for r in sub_align))
+
+    def test_cache_updates(self):
+        """The array follows changes to the records."""
+        align = self.align
+        align.as_array()
+        align.append(SeqRecord(Seq("A" * 40, generic_dna), id="extra"))
+        self.assertEqual(align.as_array().shape, (31, 40))
+        self.assertEqual(align[:, 0][-1], "A")
+        align[-1].seq = Seq("C" * 40, generic_dna)
+        self.assertEqual(align[:, 0][-1], "C")
+        align.sort(key=lambda rec: str(rec.seq))
+        self.assertEqual(align[:, 0],
+                         "".join(str(rec.seq)[0] for rec in align))
+
+    def test_mutable(self):
+        """Alignments of MutableSeq objects are not cached."""
+        records = [SeqRecord(MutableSeq("ACGT", generic_dna), id="a"),
+                   SeqRecord(MutableSeq("AC-T", generic_dna), id="b")]
+        align = MultipleSeqAlignment(records)
+        self.assertEqual(align[:, 2], "G-")
+        records[1].seq[2] = "A"
+        self.assertEqual(align[:, 2], "GA")
+        self.assertEqual(align.column_counts("A")[:, 0].tolist(), [2, 0, 1, 0])
+
+    def test_counts(self):
+        """Column counts match counting each column."""
+        align = self.align
+        letters = "ACGT-.X"
+        counts = align.column_counts(letters)
+        self.assertEqual(counts.shape, (40, len(letters)))
+        for col in range(40):
+            column = align[:, col]
+            self.assertEqual(counts[col].tolist(),
+                             [column.count(letter) for letter in letters])
+        weights = [random.random() for rec in align]
+        counts = align.column_counts(letters, weights)
+        for col in range(40):
+            column = align[:, col]
+            for i, letter in enumerate(letters):
+                expected = sum(w for w, c in zip(weights, column)
+                               if c == letter)
+                self.assertAlmostEqual(counts[col, i], expected)
+        self.assertRaises(ValueError, align.column_counts, "A", [1.0])
+
+    def test_counts_chunks(self):
+        """Column counts in several blocks of rows."""
+        import Bio.Align
+        expected = self.align.column_counts("ACGT")
+        old = Bio.Align._COUNT_CHUNK_SIZE
+        try:
+            Bio.Align._COUNT_CHUNK_SIZE = 100
+            self.assertEqual(self.align.column_counts("ACGT").tolist(),
+                             expected.tolist())
+        finally:
+            Bio.Align._COUNT_CHUNK_SIZE = old
+
+    def test_remove_gap_columns(self):
+        """Removing gap columns."""
+        align = self.align
+        for fraction in [1.0, 0.5, 0.2]:
+            keep = [col for col in range(40)
+                    if len([c for c in align[:, col] if c in "-."])
+                    < fraction * len(align)]
+            new_align = align.remove_gap_columns(fraction=fraction)
+            self.assertEqual(new_align.get_alignment_length(), len(keep))
+            self.assertEqual(len(new_align), len(align))
+            for rec, new_rec in zip(align, new_align):
+                self.assertEqual(rec.id, new_rec.id)
+                self.assertEqual(rec.description, new_rec.description)
+                self.assertEqual(str(new_rec.seq),
+                                 "".join(str(rec.seq)[i] for i in keep))
+                self.assertEqual(new_rec.letter_annotations["phred_quality"],
+                                 [rec.letter_annotations["phred_quality"][i]
+                                  for i in keep])
+        self.assertEqual(align.remove_gap_columns().get_alignment_length(), 38)
+
+    def test_remove_gap_columns_strings(self):
+        """Removing gap columns with string and tuple letter annotations."""
+        records = [SeqRecord(Seq("AC-GT", generic_dna), id="a"),
+                   SeqRecord(Seq("AG-GT", generic_dna), id="b")]
+        records[0].letter_annotations["secondary_structure"] = "HH-EE"
+        records[1].letter_annotations["secondary_structure"] = "HHxEE"
+        records[1].letter_annotations["flags"] = (1, 2, 3, 4, 5)
+        new_align = MultipleSeqAlignment(records).remove_gap_columns()
+        self.assertEqual(new_align.get_alignment_length(), 4)
+        self.assertEqual(new_align[0].letter_annotations["secondary_structure"],
+                         "HHEE")
+        self.assertEqual(new_align[1].letter_annotations["secondary_structure"],
+                         "HHEE")
+        self.assertEqual(new_align[1].letter_annotations["flags"],
+                         (1, 2, 4, 5))
+        align = AlignIO.read("Stockholm/simple.sth", "stockholm")
+        new_align = align.remove_gap_columns(fraction=0.5)
+        for new_rec in new_align:
+            structure = new_rec.letter_annotations["secondary_structure"]
+            self.assertTrue(isinstance(structure, str))
+            self.assertEqual(len(structure), len(new_rec))
+
+    def test_clustal(self):
+        """Column access for an alignment from a file."""
+        align = AlignIO.read("Clustalw/opuntia.aln", "clustal")
+        for col in range(align.get_alignment_length()):
+            self.assertEqual(align[:, col],
+                             "".join(rec.seq[col] for rec in align))
+        self.assertEqual(align.remove_gap_columns().get_alignment_length(),
+                         align.get_alignment_length())
+
+
+class SummaryInfoTests(unittest.TestCase):
+    """Compare SummaryInfo results with and without NumPy."""
+
+    def summarise(self, align):
+        """Run all the SummaryInfo methods, with and without NumPy."""
+        answers = []
+        for use_numpy in [True, False]:
+            old = AlignInfo.numpy
+            if not use_numpy:
+                AlignInfo.numpy = None
+            try:
+                summary = AlignInfo.SummaryInfo(align)
+                answer = []
+                for threshold in [0.0, 0.3, 0.7, 1.0]:
+                    for require_multiple in [0, 1]:
+                        answer.append(str(summary.dumb_consensus(
+                            threshold, "N", require_multiple=require_multiple)))
+                        answer.append(str(summary.gap_consensus(
+                            threshold, "N", require_multiple=require_multiple)))
+                answer.append(summary.replacement_dictionary([]))
+                pssm = summary.pos_specific_score_matrix(chars_to_ignore=["-"])
+                answer.append(pssm.pssm)
+                answer.append(summary.information_content(
+                    chars_to_ignore=["-"]))
+                answer.append(summary.information_content(
+                    2, 10, chars_to_ignore=["-"]))
+                answer.append(summary.ic_vector)
+            finally:
+                AlignInfo.numpy = old
+            answers.append(answer)
+        self.assertEqual(answers[0], answers[1])
+
+    def test_clustal(self):
+        """SummaryInfo of alignments from files."""
+        align = AlignIO.read("Clustalw/opuntia.aln", "clustal",
+                             alphabet=Gapped(IUPAC.unambiguous_dna))
+        self.summarise(align)
+        align = AlignIO.read("Clustalw/protein.aln", "clustal",
+                             alphabet=Gapped(IUPAC.protein))
+        self.summarise(align)
+
+    def test_weights(self):
+        """SummaryInfo using record weights."""
+        random.seed(2013)
+        alphabet = Gapped(IUPAC.unambiguous_dna)
+        records = []
+        for i in range(40):
+            seq = "".join(random.choice("ACGT-") for j in range(60))
+            rec = SeqRecord(Seq(seq, alphabet), id="seq%i" % i)
+            rec.annotations["weight"] = random.choice([0.25, 0.5, 1.0, 2.0])
+            records.append(rec)
+        self.summarise(MultipleSeqAlignment(records, alphabet))
+
+    def test_generic(self):
+        """SummaryInfo of an old style alignment."""
+        from Bio.Align.Generic import Alignment
+        warnings.simplefilter("ignore", BiopythonDeprecationWarning)
+        try:
+            align = Alignment(Gapped(IUPAC.unambiguous_dna))
+        finally:
+            warnings.filters.pop(0)
+        align.add_sequence("alpha", "ACGT-ACGTT")
+        align.add_sequence("beta", "ACCT-ACGTA")
+        align.add_sequence("gamma", "A-GTTACGAA")
+        self.summarise(align)
+
+    def test_bad_letters(self):
+        """SummaryInfo with letters not in the alphabet."""
+        alphabet = Gapped(IUPAC.unambiguous_dna)
+        align = MultipleSeqAlignment([SeqRecord(Seq("ACGTN-", alphabet), id="a"),
+                                      SeqRecord(Seq("ACGTA-", alphabet), id="b")],
+                                     alphabet)
+        summary = AlignInfo.SummaryInfo(align)
+        self.assertRaises(ValueError, summary.replacement_dictionary, [])
+        self.assertRaises(ValueError, summary.pos_specific_score_matrix,
+                          chars_to_ignore=[])
+        self.assertRaises(ValueError, summary.information_content,
+                          chars_to_ignore=["-"])
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
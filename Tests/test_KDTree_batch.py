@@ -0,0 +1,113 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the batch searches of Bio.KDTree."""
+
+import threading
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingExternalDependencyError
+    raise MissingExternalDependencyError(
+        "Install NumPy if you want to use Bio.KDTree.")
+
+try:
+    from Bio.KDTree import _CKDTree
+except ImportError:
+    from Bio import MissingExternalDependencyError
+    raise MissingExternalDependencyError(
+        "C module in Bio.KDTree not compiled")
+
+from Bio.KDTree import KDTree
+
+
+class BatchSearchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.random = numpy.random.RandomState(2013)
+        self.coords = self.random.random_sample((1000, 3)) * 20
+        self.kdt = KDTree(3, 5)
+        self.kdt.set_coords(self.coords)
+        self.centers = self.random.random_sample((50, 3)) * 24 - 2
+
+    def distances(self, center):
+        diff = self.coords.astype("f") - center.astype("f")
+        return numpy.sqrt((diff * diff).sum(axis=1))
+
+    def test_search_many(self):
+        """Points within a radius of many centers."""
+        for radius in [0.5, 2.0, 5.0]:
+            offsets, indices, radii = self.kdt.search_many(self.centers, radius)
+            self.assertEqual(offsets.shape, (51,))
+            self.assertEqual(offsets[0], 0)
+            self.assertEqual(offsets[-1], len(indices))
+            self.assertEqual(len(radii), len(indices))
+            for i, center in enumerate(self.centers):
+                hits = indices[offsets[i]:offsets[i + 1]]
+                d = self.distances(center)
+                self.assertEqual(sorted(hits),
+                                 numpy.nonzero(d <= radius)[0].tolist())
+                self.assertTrue(numpy.allclose(radii[offsets[i]:offsets[i + 1]],
+                                               d[hits]))
+                #Same as the one center search
+                self.kdt.search(center, radius)
+                self.assertEqual(sorted(hits), sorted(self.kdt.get_indices()))
+        offsets, indices, radii = self.kdt.search_many(numpy.zeros((0, 3)), 1.0)
+        self.assertEqual(offsets.tolist(), [0])
+        self.assertEqual(len(indices), 0)
+
+    def test_nearest_neighbors(self):
+        """The k nearest points to many centers."""
+        for k in [1, 4, 10]:
+            indices, radii = self.kdt.nearest_neighbors(self.centers, k)
+            self.assertEqual(indices.shape, (50, k))
+            self.assertEqual(radii.shape, (50, k))
+            for i, center in enumerate(self.centers):
+                d = self.distances(center)
+                self.assertTrue(numpy.allclose(radii[i],
+                                               numpy.sort(d)[:k]))
+                self.assertTrue(numpy.allclose(d[indices[i]], radii[i]))
+        #More neighbors than points
+        kdt = KDTree(3, 5)
+        kdt.set_coords(self.coords[:3])
+        indices, radii = kdt.nearest_neighbors(self.centers[:2], 5)
+        self.assertEqual(sorted(indices[0][:3]), [0, 1, 2])
+        self.assertEqual(indices[0][3:].tolist(), [-1, -1])
+        self.assertTrue(numpy.isinf(radii[0][3:]).all())
+
+    def test_bad_arguments(self):
+        """Invalid batch searches."""
+        self.assertRaises(Exception, self.kdt.search_many,
+                          numpy.zeros((5, 2)), 1.0)
+        self.assertRaises(ValueError, self.kdt.search_many,
+                          self.centers, -1.0)
+        self.assertRaises(ValueError, self.kdt.nearest_neighbors,
+                          self.centers, 0)
+        self.assertRaises(Exception, KDTree(3, 5).nearest_neighbors,
+                          self.centers, 1)
+
+    def test_threads(self):
+        """Several threads searching the same tree."""
+        expected = self.kdt.search_many(self.centers, 3.0)
+        results = [None] * 4
+
+        def search(i):
+            results[i] = self.kdt.search_many(self.centers, 3.0)
+
+        threads = [threading.Thread(target=search, args=(i,))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for result in results:
+            for old, new in zip(expected, result):
+                self.assertEqual(old.tolist(), new.tolist())
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
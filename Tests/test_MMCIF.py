@@ -10,6 +10,7 @@
 """Unit tests for the MMCIF portion of the Bio.PDB module."""
 
 import unittest
+from StringIO import StringIO
 
 try:
     import numpy
@@ -28,6 +29,7 @@ from Bio.PDB.PDBExceptions import PDBConstructionException, PDBConstructionWarni
 
 from Bio.PDB import PPBuilder, CaPPBuilder
 from Bio.PDB.MMCIFParser import MMCIFParser
+from Bio.PDB.MMCIF2Dict import MMCIF2Dict
 
 
 class ParseReal(unittest.TestCase):
@@ -127,6 +129,147 @@ class ParseReal(unittest.TestCase):
                 self.assertEqual("MKPVTLYDVAEYAGVSYQTVSRVVNQASHVSAKTREKVEAAMAELNYIPNR",
                                  str(s))
 
+
+class MMCIF2DictTests(unittest.TestCase):
+    """Tokenizing mmCIF files."""
+
+    data = """data_TEST
+# A comment
+_entry.id   TEST
+_struct.title 'It's a test'   # with a comment
+_struct.pdbx_descriptor "quoted _tag"
+_exptl.method
+;SOLUTION
+NMR
+;
+loop_
+_atom_site.group_PDB
+_atom_site.label_atom_id
+_atom_site.Cartn_x
+_atom_site.details
+ATOM N    1.0 .
+ATOM "O5'" 2.0 'don't' ATOM
+"C1'" 3.0 ?
+HETATM C_1 4.0 #comment
+ZN
+loop_
+_cell.length_a _cell.length_b
+10.0 20.0
+_symmetry.space_group_name_H-M 'P 1'
+"""
+
+    def test_tokens(self):
+        """Quoting, comments, text fields and loops."""
+        mmcif_dict = MMCIF2Dict(StringIO(self.data))
+        self.assertEqual(mmcif_dict["data_"], "TEST")
+        self.assertEqual(mmcif_dict["_entry.id"], "TEST")
+        self.assertEqual(mmcif_dict["_struct.title"], "It's a test")
+        self.assertEqual(mmcif_dict["_struct.pdbx_descriptor"], "quoted _tag")
+        self.assertEqual(mmcif_dict["_exptl.method"], "SOLUTIONNMR")
+        self.assertEqual(mmcif_dict["_atom_site.group_PDB"],
+                         ["ATOM", "ATOM", "ATOM", "HETATM"])
+        self.assertEqual(mmcif_dict["_atom_site.label_atom_id"],
+                         ["N", "O5'", "C1'", "C_1"])
+        self.assertEqual(mmcif_dict["_atom_site.Cartn_x"],
+                         ["1.0", "2.0", "3.0", "4.0"])
+        self.assertEqual(mmcif_dict["_atom_site.details"],
+                         [".", "don't", "?", "ZN"])
+        self.assertEqual(mmcif_dict["_cell.length_a"], ["10.0"])
+        self.assertEqual(mmcif_dict["_cell.length_b"], ["20.0"])
+        self.assertEqual(mmcif_dict["_symmetry.space_group_name_H-M"], "P 1")
+        self.assertEqual(len(mmcif_dict), 12)
+
+    def test_categories(self):
+        """Keeping only some categories."""
+        full = MMCIF2Dict(StringIO(self.data))
+        mmcif_dict = MMCIF2Dict(StringIO(self.data), ["_atom_site", "_cell"])
+        self.assertEqual(sorted(mmcif_dict),
+                         ["_atom_site.Cartn_x", "_atom_site.details",
+                          "_atom_site.group_PDB", "_atom_site.label_atom_id",
+                          "_cell.length_a", "_cell.length_b", "data_"])
+        for key in mmcif_dict:
+            self.assertEqual(mmcif_dict[key], full[key])
+        for filename in ["PDB/1A8O.cif", "PDB/1LCD.cif"]:
+            full = MMCIF2Dict(filename)
+            mmcif_dict = MMCIF2Dict(filename, ["_atom_site"])
+            expected = [key for key in full if key.startswith("_atom_site.")]
+            self.assertEqual(sorted(mmcif_dict), sorted(expected + ["data_"]))
+            for key in expected:
+                self.assertEqual(mmcif_dict[key], full[key])
+
+    def test_file(self):
+        """Values from a real file."""
+        mmcif_dict = MMCIF2Dict("PDB/1A8O.cif")
+        self.assertEqual(mmcif_dict["data_"], "1A8O")
+        self.assertEqual(mmcif_dict["_cell.length_a"], "41.980")
+        self.assertEqual(len(mmcif_dict["_atom_site.Cartn_y"]), 644)
+        self.assertEqual(mmcif_dict["_atom_site.Cartn_y"][:3],
+                         ["32.367", "33.101", "34.558"])
+
+    def test_bad(self):
+        """Malformed files."""
+        for data in ["data_X\nloop_\n_a.b\n_a.c\n1 2 3\n",
+                     "data_X\n_a.b 1\n_a.c\n",
+                     "data_X\n_a.b 1 2\n",
+                     "data_X\n_a.b\n;text\n"]:
+            self.assertRaises(ValueError, MMCIF2Dict, StringIO(data))
+
+
+class StreamingTests(unittest.TestCase):
+    """Reading mmCIF files a model at a time."""
+
+    def describe(self, model):
+        """List the details of every atom in a model."""
+        return [(a.get_full_id()[1:], a.get_coord().tolist(), a.get_bfactor(),
+                 a.get_occupancy(), a.get_parent().get_resname())
+                for a in model.get_atoms()]
+
+    def test_models(self):
+        """Models from parse_models match those from get_structure."""
+        parser = MMCIFParser()
+        for filename, count in [("PDB/1A8O.cif", 1), ("PDB/1LCD.cif", 3)]:
+            structure = parser.get_structure("example", filename)
+            models = list(MMCIFParser().parse_models("example", filename))
+            self.assertEqual(len(models), count)
+            for old, new in zip(structure, models):
+                self.assertEqual(old.id, new.id)
+                self.assertEqual(new.get_parent().id, "example")
+                self.assertEqual(len(new.get_parent()), 1)
+                self.assertEqual(self.describe(old), self.describe(new))
+
+    def test_coords(self):
+        """Coordinate arrays from parse_coords."""
+        handle = open("PDB/1A8O.cif")
+        lines = handle.readlines()
+        handle.close()
+        atom_lines = [line for line in lines if line.startswith("ATOM")
+                      or line.startswith("HETATM")]
+        #Add a second model, moved by 1 Angstrom along each axis
+        second = []
+        for line in atom_lines:
+            fields = line.split()
+            for i in [10, 11, 12]:
+                fields[i] = "%.3f" % (float(fields[i]) + 1.0)
+            fields[-1] = "2"
+            second.append(" ".join(fields) + "\n")
+        end = lines.index(atom_lines[-1]) + 1
+        data = "".join(lines[:end] + second + lines[end:])
+        structure = MMCIFParser().get_structure("example", StringIO(data))
+        frames = list(MMCIFParser().parse_coords(StringIO(data)))
+        self.assertEqual(len(frames), 2)
+        for model, coords in zip(structure, frames):
+            self.assertEqual(coords.shape, (644, 3))
+            self.assertEqual(coords.dtype, numpy.float32)
+            self.assertEqual(coords.tolist(),
+                             [a.get_coord().tolist() for a in model.get_atoms()])
+        self.assertTrue(numpy.allclose(frames[1] - frames[0], 1.0))
+        #Different atoms in each model
+        self.assertRaises(PDBConstructionException, list,
+                          MMCIFParser().parse_coords("PDB/1LCD.cif"))
+        data = data.replace("ATOM 1 N N . MSE", "ATOM 1 N N . ALA")
+        self.assertRaises(PDBConstructionException, list,
+                          MMCIFParser().parse_coords(StringIO(data)))
+
 if __name__ == '__main__':
     runner = unittest.TextTestRunner(verbosity=2)
     unittest.main(testRunner=runner)
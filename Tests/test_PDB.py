@@ -10,6 +10,7 @@
 
 """Unit tests for the Bio.PDB module."""
 import os
+import sys
 import tempfile
 import unittest
 import warnings
@@ -679,6 +680,202 @@ class ParseReal(unittest.TestCase):
         finally:
             os.remove(filename)
 
+class FastParseTests(unittest.TestCase):
+    """The fast coordinate parsing mode of PDBParser."""
+
+    def describe(self, structure):
+        """List the details of every atom, including alternative locations."""
+        answer = []
+        for atom in structure.get_atoms():
+            if atom.is_disordered() == 2:
+                atoms = [atom.disordered_get(altloc)
+                         for altloc in atom.disordered_get_id_list()]
+            else:
+                atoms = [atom]
+            for a in atoms:
+                answer.append((a.get_full_id(), a.get_fullname(),
+                               a.get_altloc(), a.get_coord().tolist(),
+                               a.get_bfactor(), a.get_occupancy(),
+                               a.get_serial_number(), a.element,
+                               a.get_parent().get_resname(),
+                               a.get_parent().get_segid()))
+            if a.get_anisou() is not None:
+                answer.append(a.get_anisou().tolist())
+        return answer
+
+    def compare(self, filename, **kwargs):
+        """Parse a file in both modes, and compare the structures."""
+        handle = open(filename)
+        data = handle.read()
+        handle.close()
+        warnings.simplefilter('ignore', PDBConstructionWarning)
+        try:
+            structures = []
+            for fast in [False, True]:
+                parser = PDBParser(fast=fast, **kwargs)
+                structures.append(parser.get_structure("example",
+                                                       StringIO(data)))
+        finally:
+            warnings.filters.pop(0)
+        self.assertEqual(self.describe(structures[0]),
+                         self.describe(structures[1]))
+        return structures[1]
+
+    def test_same_structure(self):
+        """Parse files in the fast mode."""
+        for filename in ["PDB/a_structure.pdb", "PDB/2BEG.pdb", "PDB/ions.pdb",
+                         "PDB/1MOT.pdb", "PDB/1A8O.pdb"]:
+            structure = self.compare(filename)
+        self.assertEqual(structure.header["resolution"], 1.7)
+
+    def test_models(self):
+        """Parse a file with several models in the fast mode."""
+        handle = open("PDB/1A8O.pdb")
+        lines = [line for line in handle if line.startswith("ATOM")]
+        handle.close()
+        data = ""
+        for model in range(3):
+            data += "MODEL     %4i\n" % (model + 1) + "".join(lines) + "ENDMDL\n"
+        filenumber, filename = tempfile.mkstemp()
+        os.close(filenumber)
+        try:
+            handle = open(filename, "w")
+            handle.write(data + "END\n")
+            handle.close()
+            structure = self.compare(filename)
+        finally:
+            os.remove(filename)
+        self.assertEqual(len(structure), 3)
+        self.assertEqual([m.serial_num for m in structure], [1, 2, 3])
+
+    def test_skip_header(self):
+        """Parse a file without the header."""
+        structure = self.compare("PDB/1A8O.pdb", skip_header=True)
+        self.assertEqual(structure.header, {})
+        self.assertEqual(len(list(structure.get_atoms())), 644)
+
+    def test_warnings(self):
+        """The fast mode gives the same warnings."""
+        for fast in [False, True]:
+            # Forget any warnings ignored by earlier tests
+            for module in ["Bio.PDB.Atom", "Bio.PDB.PDBParser",
+                           "Bio.PDB.StructureBuilder"]:
+                vars(sys.modules[module]).pop("__warningregistry__", None)
+            warnings.simplefilter('always', PDBConstructionWarning)
+            try:
+                orig_showwarning = warnings.showwarning
+                all_warns = []
+
+                def showwarning(*args, **kwargs):
+                    all_warns.append(str(args[0]))
+
+                warnings.showwarning = showwarning
+                PDBParser(fast=fast).get_structure("example",
+                                                   "PDB/a_structure.pdb")
+            finally:
+                warnings.showwarning = orig_showwarning
+                warnings.filters.pop(0)
+            if fast:
+                self.assertEqual(sorted(all_warns), expected)
+            else:
+                expected = sorted(all_warns)
+        self.assertEqual(len(expected), 14)
+
+    def test_errors(self):
+        """Bad values in the fast mode."""
+        warnings.simplefilter('ignore', PDBConstructionWarning)
+        try:
+            parser = PDBParser(PERMISSIVE=False, fast=True)
+            self.assertRaises(PDBConstructionException, parser.get_structure,
+                              "example", "PDB/a_structure.pdb")
+        finally:
+            warnings.filters.pop(0)
+        good = "ATOM      9  N   ASP A 152      21.554  34.953  27.691  1.00 19.26           N\n"
+        bad_xyz = "ATOM     10  CA  ASP A 152      21.ish  34.953  27.691  1.00 19.26           C\n"
+        bad_occupancy = "ATOM     10  CA  ASP A 152      22.554  34.953  27.691  x.00 19.26           C\n"
+        self.assertRaises(PDBConstructionException, parser.get_structure,
+                          "example", StringIO(good + bad_xyz))
+        self.assertRaises(PDBConstructionException, parser.get_structure,
+                          "example", StringIO(good + bad_occupancy))
+        parser = PDBParser(PERMISSIVE=True, fast=True)
+        warnings.simplefilter('ignore', PDBConstructionWarning)
+        try:
+            structure = parser.get_structure("example",
+                                             StringIO(good + bad_occupancy))
+        finally:
+            warnings.filters.pop(0)
+        atoms = list(structure.get_atoms())
+        self.assertEqual(len(atoms), 2)
+        self.assertEqual(atoms[1].get_occupancy(), 0.0)
+        self.assertEqual(atoms[1].get_coord().tolist(),
+                         numpy.array([22.554, 34.953, 27.691], "f").tolist())
+        structure = parser.get_structure("example", StringIO(""))
+        self.assertEqual(len(structure), 0)
+
+
+class StreamingTests(unittest.TestCase):
+    """Reading PDB files a model at a time."""
+
+    def setUp(self):
+        handle = open("PDB/1A8O.pdb")
+        lines = [line for line in handle if line.startswith("ATOM")
+                 or line.startswith("HETATM")]
+        handle.close()
+        self.data = "HEADER    TEST\n"
+        for model in range(3):
+            self.data += "MODEL     %4i\n" % (model + 1)
+            for line in lines:
+                #Move each model by 1 Angstrom along the x axis
+                x = float(line[30:38]) + model
+                self.data += line[:30] + "%8.3f" % x + line[38:]
+            self.data += "ENDMDL\n"
+        self.data += "CONECT    1    2\nEND\n"
+
+    def test_models(self):
+        """Models from parse_models match those from get_structure."""
+        for fast in [False, True]:
+            parser = PDBParser(fast=fast)
+            structure = parser.get_structure("example", StringIO(self.data))
+            streamer = PDBParser(fast=fast)
+            models = list(streamer.parse_models("example", StringIO(self.data)))
+            self.assertEqual(len(models), 3)
+            for old, new in zip(structure, models):
+                self.assertEqual(old.id, new.id)
+                self.assertEqual(old.serial_num, new.serial_num)
+                self.assertEqual(len(new.get_parent()), 1)
+                self.assertEqual([(a.get_full_id()[1:], a.get_coord().tolist())
+                                  for a in old.get_atoms()],
+                                 [(a.get_full_id()[1:], a.get_coord().tolist())
+                                  for a in new.get_atoms()])
+            self.assertEqual(streamer.get_header(), parser.get_header())
+            self.assertEqual(streamer.get_trailer(), parser.get_trailer())
+        #A file without MODEL records
+        models = list(PDBParser().parse_models("example", "PDB/1A8O.pdb"))
+        self.assertEqual(len(models), 1)
+        self.assertEqual(len(list(models[0].get_atoms())), 644)
+
+    def test_coords(self):
+        """Coordinate arrays from parse_coords."""
+        structure = PDBParser().get_structure("example", StringIO(self.data))
+        frames = list(PDBParser().parse_coords(StringIO(self.data)))
+        self.assertEqual(len(frames), 3)
+        for model, coords in zip(structure, frames):
+            self.assertEqual(coords.shape, (644, 3))
+            self.assertEqual(coords.dtype, numpy.float32)
+            self.assertEqual(coords.tolist(),
+                             [a.get_coord().tolist() for a in model.get_atoms()])
+        self.assertTrue(numpy.allclose(frames[2][:, 0] - frames[0][:, 0], 2.0))
+        #Atoms which differ from the first model
+        lines = self.data.splitlines(True)
+        missing = "".join(lines[:-5] + lines[-4:])
+        self.assertRaises(PDBConstructionException, list,
+                          PDBParser().parse_coords(StringIO(missing)))
+        renamed = "".join(lines[:-4] + [lines[-4].replace(" HOH ", " WAT ")]
+                          + lines[-3:])
+        self.assertRaises(PDBConstructionException, list,
+                          PDBParser().parse_coords(StringIO(renamed)))
+
+
 class WriteTest(unittest.TestCase):
     def setUp(self):
         warnings.simplefilter('ignore', PDBConstructionWarning)
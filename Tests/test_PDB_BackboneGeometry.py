@@ -0,0 +1,164 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the NumPy backbone angles and distances in Bio.PDB."""
+
+import math
+import unittest
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.PDB.")
+
+from Bio.PDB import PDBParser, PPBuilder
+from Bio.PDB.PDBExceptions import PDBConstructionWarning
+from Bio.PDB.StructureBuilder import StructureBuilder
+from Bio.PDB.BackboneGeometry import BackboneGeometry, calc_angles, \
+     calc_dihedrals
+from Bio.PDB.Vector import Vector, calc_angle, calc_dihedral
+
+
+class CalcTests(unittest.TestCase):
+    """Angles of random points, compared to the Vector functions."""
+
+    def test_dihedrals(self):
+        """The dihedrals match calc_dihedral."""
+        numpy.random.seed(0)
+        points = numpy.random.random((4, 50, 3)) * 10
+        angles = calc_dihedrals(*points)
+        self.assertEqual(angles.shape, (50,))
+        for i, angle in enumerate(angles):
+            vectors = [Vector(p[i]) for p in points]
+            self.assertAlmostEqual(angle, calc_dihedral(*vectors))
+
+    def test_angles(self):
+        """The angles match calc_angle."""
+        numpy.random.seed(1)
+        points = numpy.random.random((3, 50, 3)) * 10
+        angles = calc_angles(*points)
+        for i, angle in enumerate(angles):
+            vectors = [Vector(p[i]) for p in points]
+            self.assertAlmostEqual(angle, calc_angle(*vectors))
+
+
+class BackboneGeometryTests(unittest.TestCase):
+    """Backbone geometry of the polypeptides of 2BEG."""
+
+    def setUp(self):
+        structure = PDBParser().get_structure("2BEG", "PDB/2BEG.pdb")
+        self.peptides = PPBuilder().build_peptides(structure)
+        self.geometry = BackboneGeometry(self.peptides[0])
+
+    def test_arrays(self):
+        """The coordinates are taken from the residues."""
+        geometry = self.geometry
+        self.assertEqual(len(geometry), 26)
+        self.assertEqual(geometry.ca.shape, (26, 3))
+        residue = self.peptides[0][3]
+        for coords, name in [(geometry.n, "N"), (geometry.ca, "CA"),
+                             (geometry.c, "C")]:
+            self.assertTrue(numpy.allclose(coords[3],
+                                           residue[name].get_coord()))
+
+    def test_undefined(self):
+        """Angles off the ends of the chain are NaN."""
+        geometry = self.geometry
+        self.assertTrue(numpy.isnan(geometry.get_phi()[0]))
+        self.assertTrue(numpy.isnan(geometry.get_psi()[-1]))
+        self.assertTrue(numpy.isnan(geometry.get_omega()[-1]))
+        self.assertTrue(numpy.isnan(geometry.get_theta()[[0, -1]]).all())
+        self.assertTrue(numpy.isnan(geometry.get_tau()[[0, 1, -1]]).all())
+        self.assertFalse(numpy.isnan(geometry.get_phi()[1:]).any())
+
+    def test_omega(self):
+        """All the peptide bonds are trans."""
+        omega = numpy.abs(self.geometry.get_omega()[:-1])
+        self.assertTrue((omega > math.radians(150)).all())
+
+    def test_polypeptide(self):
+        """The Polypeptide lists match the arrays."""
+        peptide = self.peptides[0]
+        phi = self.geometry.get_phi()
+        psi = self.geometry.get_psi()
+        phi_psi = peptide.get_phi_psi_list()
+        self.assertEqual(phi_psi[0][0], None)
+        self.assertEqual(phi_psi[-1][1], None)
+        for i in range(1, len(peptide) - 1):
+            self.assertAlmostEqual(phi_psi[i][0], phi[i])
+            self.assertAlmostEqual(phi_psi[i][1], psi[i])
+            self.assertEqual(peptide[i].xtra["PHI"], phi_psi[i][0])
+        tau_list = peptide.get_tau_list()
+        self.assertEqual(len(tau_list), len(peptide) - 3)
+        self.assertEqual(peptide[2].xtra["TAU"], tau_list[0])
+        theta_list = peptide.get_theta_list()
+        self.assertEqual(len(theta_list), len(peptide) - 2)
+        self.assertAlmostEqual(theta_list[0], self.geometry.get_theta()[1])
+        self.assertEqual(peptide[1].xtra["THETA"], theta_list[0])
+
+    def test_missing_atom(self):
+        """Angles using a missing atom are NaN (None in the lists)."""
+        peptide = self.peptides[0]
+        peptide[5].detach_child("N")
+        geometry = peptide.get_backbone_geometry()
+        self.assertTrue(numpy.isnan(geometry.n[5]).all())
+        phi_psi = peptide.get_phi_psi_list()
+        self.assertEqual(phi_psi[4][1], None)
+        self.assertEqual(phi_psi[5], (None, None))
+        self.assertNotEqual(phi_psi[6][0], None)
+
+    def test_distances(self):
+        """The CA distances and contact maps."""
+        distances = self.geometry.get_ca_distances()
+        self.assertEqual(distances.shape, (26, 26))
+        self.assertTrue(numpy.allclose(distances, distances.T))
+        self.assertTrue(numpy.allclose(numpy.diag(distances), 0))
+        ca_list = self.peptides[0].get_ca_list()
+        self.assertAlmostEqual(distances[2, 9], ca_list[2] - ca_list[9], 4)
+        contacts = self.geometry.get_contact_map(4.0)
+        self.assertTrue(contacts[0, 1])
+        self.assertFalse(contacts[0, 2])
+        # Between two chains of the parallel sheet, about 4.8 A apart
+        other = BackboneGeometry(self.peptides[1])
+        between = self.geometry.get_ca_distances(other)
+        self.assertEqual(between.shape, (26, 26))
+        self.assertTrue(self.geometry.get_contact_map(5.5, other)[5, 5])
+
+    def test_disordered_residue(self):
+        """A point mutation uses the atoms of its selected residue."""
+        builder = StructureBuilder()
+        builder.init_structure("mutant")
+        builder.init_model(0)
+        builder.init_chain("A")
+        builder.init_seg("    ")
+        residues = [("ALA", 1, " "), ("SER", 2, "A"), ("CYS", 2, "B"),
+                    ("ALA", 3, " "), ("ALA", 4, " ")]
+        warnings.simplefilter("ignore", PDBConstructionWarning)
+        try:
+            for name, number, altloc in residues:
+                builder.init_residue(name, " ", number, " ")
+                coords = [(3.8 * number - 1.2, 0, 0),
+                          (3.8 * number, 0.5 * (number % 2), 0),
+                          (3.8 * number + 1.2, 0, 0.3 * number)]
+                for atom_name, coord in zip(("N", "CA", "C"), coords):
+                    builder.init_atom(atom_name, numpy.array(coord, "f"),
+                                      0.0, 1.0, altloc, " %-3s" % atom_name,
+                                      element=atom_name[0])
+        finally:
+            warnings.filters.pop(0)
+        chain = builder.get_structure()[0]["A"]
+        self.assertEqual(chain[2].get_resname(), "CYS")
+        geometry = BackboneGeometry(chain)
+        self.assertTrue(numpy.allclose(geometry.ca[1],
+                                       chain[2]["CA"].get_coord()))
+        self.assertFalse(numpy.isnan(geometry.get_phi()[1:]).any())
+        self.assertFalse(numpy.isnan(geometry.get_theta()[1:3]).any())
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -0,0 +1,164 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the NumPy grid (cell list) neighbor search in Bio.PDB."""
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.PDB.")
+
+from Bio._utils import bincount
+from Bio.PDB import PDBParser, NeighborSearch
+from Bio.PDB.CellList import CellList
+from Bio.PDB.PDBExceptions import PDBException
+
+
+def brute_force_pairs(coords, radius, box=None):
+    """All the index pairs within radius, comparing every pair."""
+    diff = coords[:, numpy.newaxis, :] - coords[numpy.newaxis, :, :]
+    if box is not None:
+        diff -= box * numpy.round(diff / box)
+    close = numpy.sqrt((diff * diff).sum(axis=-1)) <= radius
+    first, second = numpy.nonzero(numpy.triu(close, 1))
+    return numpy.column_stack((first, second)).tolist()
+
+
+def brute_force_search(coords, center, radius, box=None):
+    """The indices of the points within radius of center."""
+    diff = coords - center
+    if box is not None:
+        diff -= box * numpy.round(diff / box)
+    return numpy.nonzero(numpy.sqrt((diff * diff).sum(axis=1))
+                         <= radius)[0].tolist()
+
+
+class CellListTests(unittest.TestCase):
+
+    def setUp(self):
+        self.random = numpy.random.RandomState(2013)
+
+    def test_search_all(self):
+        """All pairs within a radius."""
+        for n, width in [(0, 10), (1, 10), (50, 5), (300, 20), (300, 50)]:
+            coords = self.random.random_sample((n, 3)) * width
+            cells = CellList(coords)
+            for radius in [0.5, 2.0, 4.0, 7.0]:
+                pairs, distances = cells.search_all(radius, distances=True)
+                self.assertEqual(pairs.shape[1], 2)
+                self.assertEqual(pairs.tolist(),
+                                 brute_force_pairs(coords, radius))
+                diff = coords[pairs[:, 0]] - coords[pairs[:, 1]]
+                self.assertTrue(numpy.allclose(
+                    distances, numpy.sqrt((diff * diff).sum(axis=1))))
+
+    def test_search(self):
+        """Points within a radius of a center."""
+        coords = self.random.random_sample((300, 3)) * 20
+        cells = CellList(coords)
+        for i in range(20):
+            center = self.random.random_sample(3) * 40 - 10
+            for radius in [1.0, 5.0]:
+                self.assertEqual(cells.search(center, radius).tolist(),
+                                 brute_force_search(coords, center, radius))
+        self.assertEqual(cells.search([500, 500, 500], 5.0).tolist(), [])
+        self.assertRaises(ValueError, cells.search, [1, 2], 5.0)
+        self.assertRaises(ValueError, cells.search_all, 0.0)
+
+    def test_periodic(self):
+        """Neighbors across the faces of a periodic box."""
+        box = numpy.array([10.0, 15.0, 20.0])
+        coords = self.random.random_sample((300, 3)) * box * 2 - box / 2
+        cells = CellList(coords, box)
+        self.assertTrue((cells.coords >= 0).all())
+        self.assertTrue((cells.coords < box).all())
+        for radius in [1.0, 2.5, 4.0, 5.0]:
+            self.assertEqual(cells.search_all(radius).tolist(),
+                             brute_force_pairs(coords % box, radius, box))
+            center = self.random.random_sample(3) * 30
+            self.assertEqual(cells.search(center, radius).tolist(),
+                             brute_force_search(coords % box, center,
+                                                radius, box))
+        #Two points close together through one face
+        cells = CellList([[0.5, 5, 5], [9.5, 5, 5]], box)
+        self.assertEqual(cells.search_all(1.5).tolist(), [[0, 1]])
+        self.assertRaises(ValueError, cells.search_all, 6.0)
+        self.assertRaises(ValueError, CellList, coords, [10.0, 0.0, 10.0])
+
+
+class BincountTests(unittest.TestCase):
+    """The bincount helper, which works with NumPy before 1.6."""
+
+    def test_bincount(self):
+        """Counts padded to the minimum length."""
+        values = numpy.array([0, 2, 2, 5])
+        weights = numpy.array([0.5, 1.0, 2.0, 0.25])
+        for minlength in [0, 3, 6, 10]:
+            counts = bincount(values, minlength=minlength)
+            self.assertEqual(counts.tolist(),
+                             numpy.bincount(values, minlength=minlength).tolist())
+            self.assertEqual(len(counts), max(6, minlength))
+            weighted = bincount(values, weights, minlength)
+            self.assertTrue(numpy.allclose(weighted, numpy.bincount(
+                values, weights, minlength=minlength)))
+
+    def test_empty(self):
+        """No values give minlength zeros."""
+        counts = bincount(numpy.zeros(0, int), minlength=4)
+        self.assertEqual(counts.tolist(), [0, 0, 0, 0])
+        self.assertEqual(len(bincount([])), 0)
+        counts = bincount(numpy.zeros(0, int), numpy.zeros(0), 2)
+        self.assertEqual(counts.dtype, float)
+
+
+class NeighborSearchBackendTests(unittest.TestCase):
+
+    def setUp(self):
+        structure = PDBParser().get_structure("1A8O", "PDB/1A8O.pdb")
+        self.atoms = list(structure.get_atoms())
+
+    def test_grid(self):
+        """NeighborSearch with the grid backend."""
+        ns = NeighborSearch(self.atoms, backend="grid")
+        coords = numpy.array([a.get_coord() for a in self.atoms], float)
+        pairs = ns.search_all_indices(2.0)
+        self.assertEqual(sorted(pairs.tolist()),
+                         brute_force_pairs(coords, 2.0))
+        atom_pairs = ns.search_all(2.0)
+        self.assertEqual(len(atom_pairs), len(pairs))
+        self.assertTrue(atom_pairs[0][0] is self.atoms[pairs[0][0]])
+        residues = ns.search(self.atoms[0].get_coord(), 5.0, "R")
+        self.assertEqual(len(residues), 6)
+        self.assertRaises(PDBException, NeighborSearch, self.atoms,
+                          backend="octree")
+
+    def test_same_as_kdtree(self):
+        """The grid and KD tree backends find the same neighbors."""
+        try:
+            kdtree = NeighborSearch(self.atoms, backend="kdtree")
+        except PDBException:
+            # C++ module not compiled
+            return
+        grid = NeighborSearch(self.atoms, backend="grid")
+        for radius in [1.5, 3.0, 6.0]:
+            self.assertEqual(sorted(sorted(p) for p in
+                                    kdtree.search_all_indices(radius).tolist()),
+                             grid.search_all_indices(radius).tolist())
+            for level in ["A", "R", "C"]:
+                self.assertEqual(len(kdtree.search_all(radius, level)),
+                                 len(grid.search_all(radius, level)))
+            center = self.atoms[100].get_coord()
+            self.assertEqual(sorted(kdtree.search(center, radius)),
+                             sorted(grid.search(center, radius)))
+        self.assertRaises(PDBException, NeighborSearch, self.atoms,
+                          backend="kdtree", box=[50, 50, 50])
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -0,0 +1,171 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for packing Bio.PDB coordinates into contiguous arrays."""
+
+import unittest
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.PDB.")
+
+from Bio.PDB import PDBParser, Superimposer, Selection, rotmat, Vector
+from Bio.PDB import CoordinateStore
+from Bio.PDB.Atom import Atom
+from Bio.PDB.PDBExceptions import PDBConstructionWarning
+
+
+def parse(filename):
+    """Parse a PDB file, ignoring any warnings."""
+    warnings.simplefilter("ignore", PDBConstructionWarning)
+    try:
+        return PDBParser(PERMISSIVE=True).get_structure("X", filename)
+    finally:
+        warnings.filters.pop(0)
+
+
+class PackTests(unittest.TestCase):
+
+    def setUp(self):
+        self.s = parse("PDB/a_structure.pdb")
+        self.rotation = rotmat(Vector(1, 3, 5), Vector(1, 0, 0))
+        self.translation = numpy.array((2.4, 0, 1), "f")
+
+    def test_pack(self):
+        """Atoms use rows of the coordinate array."""
+        atoms = list(self.s.get_atoms())
+        expected = [a.get_coord().tolist() for a in atoms]
+        store = self.s.pack_coords()
+        self.assertTrue(isinstance(store, CoordinateStore))
+        self.assertTrue(self.s.get_coord_store() is store)
+        self.assertTrue(self.s[0].get_coord_store() is store)
+        self.assertEqual(len(store), len(atoms))
+        self.assertEqual(store.coords.shape, (len(atoms), 3))
+        #Disordered atoms are packed as the selected atom
+        for atom, packed in zip(atoms, store):
+            if atom.is_disordered() == 2:
+                atom = atom.disordered_get()
+            self.assertTrue(atom is packed)
+        self.assertEqual(store.coords.tolist(), expected)
+        self.assertEqual(store.bfactors.tolist(),
+                         [a.get_bfactor() for a in atoms])
+        self.assertEqual(store.occupancies.tolist(),
+                         [a.get_occupancy() for a in atoms])
+        #Changes to the array and to the atoms are seen by both
+        store.coords[3] = [1.0, 2.0, 3.0]
+        self.assertEqual(store[3].get_coord().tolist(), [1.0, 2.0, 3.0])
+        store[4].set_coord(numpy.array((4.0, 5.0, 6.0), "f"))
+        self.assertEqual(store.coords[4].tolist(), [4.0, 5.0, 6.0])
+        store[5].set_bfactor(99.0)
+        store[5].set_occupancy(0.25)
+        self.assertEqual(store.bfactors[5], 99.0)
+        self.assertEqual(store.occupancies[5], 0.25)
+        self.assertEqual(store.get_indices([store[7], store[2]]).tolist(),
+                         [7, 2])
+        other = Atom("CA", numpy.zeros(3, "f"), 0.0, 1.0, " ", " CA ", 1, "C")
+        self.assertRaises(ValueError, store.get_indices, [other])
+
+    def test_transform(self):
+        """Transforming a packed entity matches the atom by atom result."""
+        expected = parse("PDB/a_structure.pdb")
+        expected.transform(self.rotation, self.translation)
+        store = self.s.pack_coords()
+        old_coords = store.coords
+        self.s.transform(self.rotation, self.translation)
+        self.assertTrue(store.coords is old_coords)
+        for atom, new_atom in zip(expected.get_atoms(), self.s.get_atoms()):
+            for old, new in zip(atom.get_coord(), new_atom.get_coord()):
+                self.assertAlmostEqual(old, new, places=4)
+        #A transformed child entity still uses the array
+        chain = self.s[0].get_list()[0]
+        chain.transform(self.rotation, self.translation)
+        atom = list(chain.get_atoms())[0]
+        self.assertEqual(atom.get_coord().tolist(),
+                         store.coords[store.get_indices([atom])[0]].tolist())
+
+    def test_changes(self):
+        """Adding or removing children makes the store out of date."""
+        store = self.s.pack_coords()
+        residue = list(self.s.get_residues())[0]
+        residue.detach_child(residue.get_list()[0].get_id())
+        self.assertFalse(store.valid)
+        self.assertEqual(self.s.get_coord_store(), None)
+        #Transforming now uses the atoms, which are still in the array
+        self.s.transform(self.rotation, self.translation)
+        atom = residue.get_list()[0]
+        self.assertEqual(atom.get_coord().tolist(),
+                         store.coords[atom._coord_index].tolist())
+        new_store = self.s.pack_coords()
+        self.assertEqual(len(new_store), len(store) - 1)
+        self.assertTrue(self.s.get_coord_store() is new_store)
+        #Packing a child makes the parent's store out of date
+        self.s[0].pack_coords()
+        self.assertFalse(new_store.valid)
+
+    def test_copy(self):
+        """Copies do not share the packed coordinates."""
+        store = self.s.pack_coords()
+        copy = self.s.copy()
+        self.assertEqual(copy.get_coord_store(), None)
+        self.assertTrue(store.valid)
+        atom = list(copy.get_atoms())[0]
+        atom.set_coord(numpy.array((7.0, 8.0, 9.0), "f"))
+        self.assertNotEqual(store.coords[0].tolist(), [7.0, 8.0, 9.0])
+
+
+class SuperimposeTests(unittest.TestCase):
+
+    def test_superimpose(self):
+        """Superimposer accepts coordinate stores."""
+        fixed = parse("PDB/1A8O.pdb")
+        moving = parse("PDB/1A8O.pdb")
+        moving.transform(rotmat(Vector(1, 3, 5), Vector(1, 0, 0)),
+                         numpy.array((2.4, 0, 1), "f"))
+        fixed_atoms = Selection.unfold_entities(fixed, "A")
+        moving_atoms = Selection.unfold_entities(moving, "A")
+        sup = Superimposer()
+        sup.set_atoms(fixed_atoms, moving_atoms)
+        expected_rms = sup.rms
+        expected_rotran = sup.rotran
+
+        fixed_store = fixed.pack_coords()
+        moving_store = moving.pack_coords()
+        sup = Superimposer()
+        sup.set_atoms(fixed_store, moving_store)
+        self.assertAlmostEqual(sup.rms, expected_rms, places=5)
+        for old, new in zip(expected_rotran, sup.rotran):
+            self.assertTrue(numpy.allclose(old, new))
+        sup.apply(moving_store)
+        self.assertTrue(numpy.allclose(moving_store.coords,
+                                       fixed_store.coords, atol=1e-3))
+        self.assertTrue(numpy.allclose(moving_atoms[0].get_coord(),
+                                       fixed_atoms[0].get_coord(), atol=1e-3))
+
+
+class NeighborTests(unittest.TestCase):
+
+    def test_neighbor_search(self):
+        """NeighborSearch accepts a coordinate store."""
+        try:
+            from Bio.PDB import NeighborSearch
+        except ImportError:
+            return
+        s = parse("PDB/1A8O.pdb")
+        atoms = Selection.unfold_entities(s, "A")
+        expected = NeighborSearch(atoms).search_all(3.0)
+        store = s.pack_coords()
+        ns = NeighborSearch(store)
+        self.assertEqual(sorted(ns.search_all(3.0)), sorted(expected))
+        self.assertEqual(len(ns.search(store.coords[0], 3.0)),
+                         len(NeighborSearch(atoms).search(atoms[0].get_coord(),
+                                                          3.0)))
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
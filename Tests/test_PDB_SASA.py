@@ -0,0 +1,143 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the Shrake & Rupley surface area calculation in Bio.PDB."""
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.PDB.")
+
+from Bio.PDB import PDBParser
+from Bio.PDB.SASA import SASA, SASA_atomic, shrake_rupley, ATOMIC_RADII, \
+     MAX_ASA
+
+
+def sphere_area(radius, other_radius, distance):
+    """Exposed area of a sphere overlapping one other sphere."""
+    if distance >= radius + other_radius:
+        return 4 * numpy.pi * radius ** 2
+    height = radius - (distance ** 2 + radius ** 2 - other_radius ** 2) \
+        / (2 * distance)
+    return 4 * numpy.pi * radius ** 2 - 2 * numpy.pi * radius * height
+
+
+class ShrakeRupleyTests(unittest.TestCase):
+    """Areas of simple sets of spheres."""
+
+    def test_single(self):
+        """A single atom is fully exposed."""
+        areas = shrake_rupley([[1.0, 2.0, 3.0]], [1.6], 1.4)
+        self.assertAlmostEqual(areas[0], 4 * numpy.pi * 3.0 ** 2)
+
+    def test_pair(self):
+        """Two overlapping atoms match the area of the spherical caps."""
+        for distance in [1.0, 3.0, 5.0, 7.0]:
+            areas = shrake_rupley([[0, 0, 0], [0, distance, 0]],
+                                  [1.6, 1.1], 1.4, 2000)
+            self.assertTrue(abs(areas[0] - sphere_area(3.0, 2.5, distance))
+                            < 0.5)
+            self.assertTrue(abs(areas[1] - sphere_area(2.5, 3.0, distance))
+                            < 0.5)
+
+    def test_groups(self):
+        """Atoms in different groups do not bury each other."""
+        coords = [[0, 0, 0], [2.0, 0, 0], [4.0, 0, 0]]
+        areas = shrake_rupley(coords, [1.5] * 3, 1.4, groups=[0, 1, 2])
+        self.assertTrue(numpy.allclose(areas, 4 * numpy.pi * 2.9 ** 2))
+        grouped = shrake_rupley(coords, [1.5] * 3, 1.4, groups=[0, 0, 1])
+        together = shrake_rupley(coords[:2], [1.5] * 2, 1.4)
+        self.assertTrue(numpy.allclose(grouped[:2], together))
+
+    def test_empty(self):
+        """No atoms give no areas."""
+        self.assertEqual(len(shrake_rupley(numpy.zeros((0, 3)), [])), 0)
+
+    def test_bad_arguments(self):
+        """Mismatched radii or no points are rejected."""
+        self.assertRaises(ValueError, shrake_rupley, [[0, 0, 0]], [1.0, 2.0])
+        self.assertRaises(ValueError, shrake_rupley, [[0, 0, 0]], [1.0],
+                          1.4, 0)
+
+
+class SASAStructureTests(unittest.TestCase):
+    """Residue and atom areas of a structure."""
+
+    def setUp(self):
+        structure = PDBParser().get_structure("1A8O", "PDB/1A8O.pdb")
+        self.model = structure[0]
+
+    def test_residues(self):
+        """Residue areas have the same keys as NACCESS."""
+        sasa = SASA(self.model)
+        # All the residues except the waters
+        self.assertEqual(len(sasa), 70)
+        keys = ['res_name']
+        for name in ['all_atoms', 'side_chain', 'main_chain', 'non_polar',
+                     'all_polar']:
+            keys.extend([name + '_abs', name + '_rel'])
+        residue = self.model["A"][152]
+        self.assertTrue(("A", 152) in sasa)
+        values = sasa[("A", 152)]
+        self.assertEqual(sorted(values), sorted(keys))
+        self.assertEqual(values["res_name"], "ASP")
+        self.assertTrue(residue.xtra["EXP_SASA"] is values)
+        for values in sasa.property_dict.values():
+            self.assertAlmostEqual(values["all_atoms_abs"],
+                                   values["side_chain_abs"]
+                                   + values["main_chain_abs"])
+            self.assertAlmostEqual(values["all_atoms_abs"],
+                                   values["non_polar_abs"]
+                                   + values["all_polar_abs"])
+            for key in keys[1:]:
+                self.assertTrue(values[key] >= 0)
+            self.assertTrue(values["side_chain_rel"] <= 100.0)
+
+    def test_relative(self):
+        """Relative areas use the tripeptide or the isolated residue."""
+        sasa = SASA(self.model)
+        isolated = SASA(self.model, max_asa=None)
+        for key, values in sasa.property_dict.items():
+            other = isolated[key]
+            res_name = values["res_name"]
+            if res_name in MAX_ASA:
+                self.assertAlmostEqual(values["all_atoms_rel"],
+                                       100.0 * values["all_atoms_abs"]
+                                       / MAX_ASA[res_name])
+            else:
+                # e.g. MSE
+                self.assertEqual(values["all_atoms_rel"],
+                                 other["all_atoms_rel"])
+            self.assertEqual(values["side_chain_rel"], other["side_chain_rel"])
+            self.assertTrue(other["all_atoms_rel"] <= 100.0)
+        self.assertEqual(len(MAX_ASA), 20)
+
+    def test_atoms(self):
+        """Atom areas add up to the residue areas."""
+        atomic = SASA_atomic(self.model)
+        sasa = SASA(self.model)
+        atom = self.model["A"][152]["CB"]
+        self.assertEqual(atom.xtra["EXP_SASA"],
+                         atomic[("A", (" ", 152, " "), "CB")])
+        for (chain_id, res_id), values in sasa.property_dict.items():
+            total = sum(area for key, area in atomic.property_dict.items()
+                        if key[:2] == (chain_id, res_id))
+            self.assertAlmostEqual(total, values["all_atoms_abs"])
+
+    def test_radii(self):
+        """Larger radii give larger areas for an exposed residue."""
+        radii = dict((element, radius + 0.2)
+                     for element, radius in ATOMIC_RADII.items())
+        small = SASA(self.model)[("A", 152)]["all_atoms_abs"]
+        large = SASA(self.model, radii=radii)[("A", 152)]["all_atoms_abs"]
+        self.assertTrue(large > small)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
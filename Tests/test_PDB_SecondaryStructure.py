@@ -0,0 +1,185 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the DSSP style secondary structure assignment in Bio.PDB."""
+
+import math
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.PDB.")
+
+from Bio.PDB import PDBParser, PPBuilder
+from Bio.PDB.SecondaryStructure import SecondaryStructure, _Assigner
+from Bio.PDB.StructureBuilder import StructureBuilder
+
+
+def get_codes(ss, chain_id, first, last):
+    """The secondary structure codes of a range of residues."""
+    return "".join(ss[key][1] for key in ss.keys()
+                   if key[0] == chain_id and first <= key[1][1] <= last)
+
+
+class HelixTests(unittest.TestCase):
+    """Secondary structure of 1A8O (all helices)."""
+
+    def setUp(self):
+        structure = PDBParser().get_structure("1A8O", "PDB/1A8O.pdb")
+        self.model = structure[0]
+
+    def test_helices(self):
+        """The helices match the HELIX records."""
+        ss = SecondaryStructure(self.model)
+        # All the amino acids (including MSE), but not the waters
+        self.assertEqual(len(ss), 70)
+        self.assertEqual(get_codes(ss, "A", 161, 173), "H" * 13)
+        self.assertEqual(get_codes(ss, "A", 179, 187), "H" * 9)
+        self.assertEqual(get_codes(ss, "A", 196, 203), "H" * 8)
+        self.assertEqual(get_codes(ss, "A", 211, 217), "H" * 7)
+        for residue, code, acc, rel_acc, phi, psi in ss:
+            self.assertTrue(code in "HBEGITS-")
+
+    def test_interface(self):
+        """The map gives the same tuples and xtra values as DSSP."""
+        ss = SecondaryStructure(self.model)
+        residue = self.model["A"][165]
+        self.assertTrue(("A", 165) in ss)
+        value = ss[("A", 165)]
+        self.assertEqual(len(value), 6)
+        self.assertTrue(value[0] is residue)
+        self.assertEqual(value[1], "H")
+        self.assertTrue(isinstance(value[2], int))
+        self.assertTrue(0.0 <= value[3] <= 1.0)
+        self.assertEqual(residue.xtra["SS_DSSP"], "H")
+        self.assertEqual(residue.xtra["EXP_DSSP_ASA"], value[2])
+        self.assertEqual(residue.xtra["EXP_DSSP_RASA"], value[3])
+        self.assertEqual(residue.xtra["PHI_DSSP"], value[4])
+        self.assertEqual(residue.xtra["PSI_DSSP"], value[5])
+        # MSE has no maximum accessibility
+        self.assertEqual(ss.keys()[0], ("A", ("H_MSE", 151, " ")))
+        self.assertEqual(ss[ss.keys()[0]][3], "NA")
+
+    def test_angles(self):
+        """The phi and psi angles agree with the Polypeptide class."""
+        ss = SecondaryStructure(self.model)
+        first = ss.keys()[0]
+        self.assertEqual(ss[first][4], 360.0)
+        last = ss.keys()[-1]
+        self.assertEqual(ss[last][5], 360.0)
+        for peptide in PPBuilder().build_peptides(self.model):
+            for residue, angles in zip(peptide, peptide.get_phi_psi_list()):
+                key = (residue.get_parent().get_id(), residue.get_id())
+                for angle, value in zip(angles, ss[key][4:]):
+                    if angle is not None:
+                        self.assertAlmostEqual(math.degrees(angle), value, 3)
+
+    def test_chain_break(self):
+        """A missing residue breaks the chain."""
+        self.model["A"].detach_child((" ", 180, " "))
+        ss = SecondaryStructure(self.model)
+        self.assertFalse(("A", 180) in ss)
+        self.assertEqual(ss[("A", 179)][5], 360.0)
+        self.assertEqual(ss[("A", 181)][4], 360.0)
+        self.assertEqual(get_codes(ss, "A", 161, 173), "H" * 13)
+
+
+class StrandTests(unittest.TestCase):
+    """Secondary structure of 2BEG (parallel sheets between chains)."""
+
+    def test_strands(self):
+        """The strands match the SHEET records."""
+        structure = PDBParser().get_structure("2BEG", "PDB/2BEG.pdb")
+        ss = SecondaryStructure(structure[0])
+        self.assertEqual(len(ss), 130)
+        for chain_id in "ABCDE":
+            self.assertEqual(get_codes(ss, chain_id, 18, 26), "E" * 9)
+            self.assertEqual(get_codes(ss, chain_id, 31, 41), "E" * 11)
+            self.assertEqual(ss[(chain_id, 17)][1], "-")
+
+
+def meander_backbone(k):
+    """N, CA, C and O of residue k of a flat three stranded meander.
+
+    The antiparallel strands are residues 10-16, 19-25 and 28-34, 4.8 A
+    apart, joined by two residue loops.
+    """
+    if 10 <= k <= 16:
+        x, y, d, s = 3.4 * (k - 10), 0.0, 1, (-1) ** (k - 10)
+    elif 19 <= k <= 25:
+        x, y, d, s = 3.4 * (25 - k), 4.8, -1, -(-1) ** (k - 19)
+    elif 28 <= k <= 34:
+        x, y, d, s = 3.4 * (k - 28), 9.6, 1, (-1) ** (k - 28)
+    else:
+        # Loop residues, with the C=O out of the plane of the sheet
+        if k < 19:
+            x, y = 23.0, 1.6 + 1.6 * (k - 17)
+        else:
+            x, y = -2.6, 6.4 + 1.6 * (k - 26)
+        return [(x, y - 0.4, 0), (x, y, 0), (x, y + 0.4, 0),
+                (x, y + 0.4, 1.23)]
+    # The N-H and C=O of each residue point the same way (s), to or away
+    # from the next strand
+    return [(x - 1.2 * d, y, 0), (x, y, 0), (x + 1.2 * d, y, 0),
+            (x + 1.2 * d, y + 1.23 * s, 0)]
+
+
+class SheetTests(unittest.TestCase):
+    """Secondary structure of an antiparallel sheet."""
+
+    def test_meander(self):
+        """The strands of a meander are not joined over the loops."""
+        builder = StructureBuilder()
+        builder.init_structure("meander")
+        builder.init_model(0)
+        builder.init_chain("A")
+        builder.init_seg("    ")
+        for k in range(10, 35):
+            builder.init_residue("ALA", " ", k, " ")
+            for name, coord in zip(("N", "CA", "C", "O"),
+                                   meander_backbone(k)):
+                builder.init_atom(name, numpy.array(coord, "f"), 0.0, 1.0,
+                                  " ", " %-3s" % name, element=name[0])
+        ss = SecondaryStructure(builder.get_structure()[0])
+        self.assertEqual(get_codes(ss, "A", 11, 15), "E" * 5)
+        self.assertEqual(get_codes(ss, "A", 20, 24), "E" * 5)
+        self.assertEqual(get_codes(ss, "A", 29, 33), "E" * 5)
+        self.assertFalse("E" in get_codes(ss, "A", 16, 19))
+        self.assertFalse("E" in get_codes(ss, "A", 25, 28))
+
+    def test_bulges(self):
+        """Only ladders with small gaps on both strands are joined."""
+        coords = numpy.zeros((60, 4, 3))
+        for k in range(60):
+            coords[k] = [(3 * k - 1, 0, 0), (3 * k, 0, 0), (3 * k + 1, 0, 0),
+                         (3 * k + 1, 1.2, 0)]
+        assigner = _Assigner(coords, numpy.zeros(60, int),
+                             numpy.zeros(60, bool))
+        # A bulge, with gaps of one and two residues
+        self.assertTrue(assigner._bulge([True, [10, 11, 12], [30, 31, 32]],
+                                        [True, [14, 15, 16], [34, 35, 36]]))
+        # A strand changing partner
+        self.assertFalse(assigner._bulge([True, [10, 11, 12], [50, 51, 52]],
+                                         [True, [14, 15, 16], [30, 31, 32]]))
+        self.assertFalse(assigner._bulge([False, [10, 11, 12], [20, 21, 22]],
+                                         [False, [14, 15, 16], [30, 31, 32]]))
+
+
+class EmptyTests(unittest.TestCase):
+    """A model without amino acids."""
+
+    def test_empty(self):
+        """No residues give an empty map."""
+        structure = PDBParser().get_structure("ions", "PDB/ions.pdb")
+        ss = SecondaryStructure(structure[0])
+        self.assertEqual(len(ss), 0)
+        self.assertEqual(ss.keys(), [])
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -0,0 +1,106 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the Bio.SeqUtils.ProtParamBatch module."""
+
+import random
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SeqUtils.ProtParamBatch.")
+
+from Bio import SeqIO
+from Bio.Seq import Seq
+from Bio.SeqUtils.ProtParam import ProteinAnalysis
+from Bio.SeqUtils.ProtParamBatch import BatchProteinAnalysis
+
+
+class BatchProteinAnalysisTests(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(2013)
+        self.sequences = []
+        for i in range(40):
+            length = random.randint(1, 400)
+            self.sequences.append("".join(random.choice("ACDEFGHIKLMNPQRSTVWY")
+                                          for j in range(length)))
+        self.sequences.append("MAEGEITTFTALTEKFNLPPGNYKKPKLLYCSNGGHFLRILPDGTVDGTRDRSDQ")
+        self.batch = BatchProteinAnalysis(self.sequences)
+
+    def compare(self, values, method):
+        self.assertEqual(len(values), len(self.sequences))
+        for value, seq in zip(values, self.sequences):
+            self.assertAlmostEqual(value, getattr(ProteinAnalysis(seq), method)())
+
+    def test_count_amino_acids(self):
+        """Amino acid counts and fractions."""
+        counts = self.batch.count_amino_acids()
+        percent = self.batch.get_amino_acids_percent()
+        self.assertEqual(counts.shape, (len(self.sequences), 20))
+        for seq, row, fractions in zip(self.sequences, counts, percent):
+            analysis = ProteinAnalysis(seq)
+            expected = analysis.count_amino_acids()
+            expected_percent = analysis.get_amino_acids_percent()
+            for aa, count, fraction in zip(self.batch.amino_acids, row, fractions):
+                self.assertEqual(count, expected[aa])
+                self.assertAlmostEqual(fraction, expected_percent[aa])
+
+    def test_molecular_weight(self):
+        """Molecular weights match ProteinAnalysis."""
+        self.compare(self.batch.molecular_weight(), "molecular_weight")
+        batch = BatchProteinAnalysis(self.sequences, monoisotopic=True)
+        for value, seq in zip(batch.molecular_weight(), self.sequences):
+            self.assertAlmostEqual(value, ProteinAnalysis(seq, True).molecular_weight())
+
+    def test_isoelectric_point(self):
+        """Isoelectric points match ProteinAnalysis."""
+        self.compare(self.batch.isoelectric_point(), "isoelectric_point")
+
+    def test_other_properties(self):
+        """Aromaticity, GRAVY and instability index match ProteinAnalysis."""
+        self.compare(self.batch.aromaticity(), "aromaticity")
+        self.compare(self.batch.gravy(), "gravy")
+        self.compare(self.batch.instability_index(), "instability_index")
+
+    def test_secondary_structure_fraction(self):
+        """Secondary structure fractions match ProteinAnalysis."""
+        values = self.batch.secondary_structure_fraction()
+        self.assertEqual(values.shape, (len(self.sequences), 3))
+        for row, seq in zip(values, self.sequences):
+            expected = ProteinAnalysis(seq).secondary_structure_fraction()
+            for a, b in zip(row, expected):
+                self.assertAlmostEqual(a, b)
+
+    def test_flexibility(self):
+        """Flexibility scores match ProteinAnalysis."""
+        values = self.batch.flexibility()
+        self.assertEqual(len(values), len(self.sequences))
+        for scores, seq in zip(values, self.sequences):
+            expected = ProteinAnalysis(seq).flexibility()
+            self.assertEqual(len(scores), len(expected))
+            for a, b in zip(scores, expected):
+                self.assertAlmostEqual(a, b)
+
+    def test_records(self):
+        """Using SeqRecord and Seq objects, with a non-standard letter."""
+        records = list(SeqIO.parse("Fasta/aster.pro", "fasta"))
+        records.extend(SeqIO.parse("Fasta/rose.pro", "fasta"))
+        batch = BatchProteinAnalysis(records + [Seq("mkqx")])
+        self.assertEqual(len(batch), len(records) + 1)
+        weights = batch.molecular_weight()
+        for record, weight in zip(records, weights):
+            self.assertAlmostEqual(weight,
+                ProteinAnalysis(str(record.seq)).molecular_weight())
+        self.assertTrue(numpy.isnan(weights[-1]))
+        self.assertTrue(numpy.isnan(batch.gravy()[-1]))
+        self.assertTrue(numpy.isnan(batch.instability_index()[-1]))
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
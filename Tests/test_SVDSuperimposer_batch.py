@@ -0,0 +1,135 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for superimposing many coordinate sets at once."""
+
+import sys
+import unittest
+
+try:
+    import numpy
+    from numpy.linalg import svd, det
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SVDSuperimposer.")
+
+from Bio.SVDSuperimposer import SVDSuperimposer, superimpose_many
+from Bio.PDB import PDBParser, Superimposer
+from Bio.PDB.PDBExceptions import PDBException
+from Bio.PDB.Superimposer import superimpose_ensemble
+
+
+def random_rotation(random):
+    """A random rotation matrix (without reflection)."""
+    q, r = numpy.linalg.qr(random.normal(size=(3, 3)))
+    if det(q) < 0:
+        q[:, 0] = -q[:, 0]
+    return q
+
+
+class SuperimposeManyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.random = numpy.random.RandomState(2013)
+        self.reference = self.random.random_sample((40, 3)) * 10
+        coords = []
+        for i in range(20):
+            coords.append(numpy.dot(self.reference,
+                                    random_rotation(self.random))
+                          + self.random.normal(size=3) * 5
+                          + self.random.normal(size=(40, 3)) * 0.3)
+        # A mirror image, where the best rotation is not a reflection
+        coords.append(self.reference * [1, 1, -1])
+        self.coords = numpy.array(coords)
+
+    def test_same_as_svdsuperimposer(self):
+        """Batch superposition matches one at a time."""
+        rot, tran, rms = superimpose_many(self.reference, self.coords)
+        self.assertEqual(rot.shape, (21, 3, 3))
+        self.assertEqual(tran.shape, (21, 3))
+        self.assertEqual(rms.shape, (21,))
+        for i, coords in enumerate(self.coords):
+            sup = SVDSuperimposer()
+            sup.set(self.reference, coords)
+            sup.run()
+            expected_rot, expected_tran = sup.get_rotran()
+            self.assertTrue(numpy.allclose(rot[i], expected_rot))
+            self.assertTrue(numpy.allclose(tran[i], expected_tran))
+            self.assertAlmostEqual(rms[i], sup.get_rms())
+            self.assertTrue(det(rot[i]) > 0)
+        self.assertTrue((rms[:20] < 0.6).all())
+
+    def test_many_references(self):
+        """A different reference for each coordinate set."""
+        references = self.coords[::-1]
+        rot, tran, rms = superimpose_many(references, self.coords)
+        for i, coords in enumerate(self.coords):
+            sup = SVDSuperimposer()
+            sup.set(references[i], coords)
+            sup.run()
+            self.assertAlmostEqual(rms[i], sup.get_rms())
+        self.assertRaises(Exception, superimpose_many, references[:3],
+                          self.coords)
+        self.assertRaises(Exception, superimpose_many, self.reference[:5],
+                          self.coords)
+
+    def test_loop(self):
+        """The loop used with older NumPy gives the same answers."""
+        module = sys.modules[superimpose_many.__module__]
+        for references in [self.reference, self.coords[::-1]]:
+            expected = superimpose_many(references, self.coords)
+            old = module._stacked_linalg
+            try:
+                module._stacked_linalg = False
+                answers = superimpose_many(references, self.coords)
+            finally:
+                module._stacked_linalg = old
+            for answer, value in zip(answers, expected):
+                self.assertEqual(answer.shape, value.shape)
+                self.assertTrue(numpy.allclose(answer, value))
+
+
+class SuperimposeEnsembleTests(unittest.TestCase):
+
+    def test_ensemble(self):
+        """Superimpose copies of a structure moved about."""
+        random = numpy.random.RandomState(2013)
+        parser = PDBParser()
+        fixed = list(parser.get_structure("fixed", "PDB/1A8O.pdb").get_atoms())
+        moving_list = []
+        for i in range(5):
+            atoms = list(parser.get_structure("moving",
+                                              "PDB/1A8O.pdb").get_atoms())
+            rot = random_rotation(random)
+            tran = random.normal(size=3) * 10
+            for atom in atoms:
+                atom.transform(rot.astype("f"), tran.astype("f"))
+            moving_list.append(atoms)
+        rot, tran, rms = superimpose_ensemble(fixed, moving_list)
+        self.assertTrue(numpy.allclose(rms, 0.0, atol=1e-3))
+        for i, atoms in enumerate(moving_list):
+            sup = Superimposer()
+            sup.set_atoms(fixed, atoms)
+            self.assertAlmostEqual(rms[i], sup.rms, places=5)
+        #Same answer from the coordinate arrays or coordinate stores
+        coords = numpy.array([[a.get_coord() for a in atoms]
+                              for atoms in moving_list])
+        self.assertTrue(numpy.allclose(
+            superimpose_ensemble(fixed, coords)[2], rms))
+        structure = parser.get_structure("fixed", "PDB/1A8O.pdb")
+        self.assertTrue(numpy.allclose(
+            superimpose_ensemble(structure.pack_coords(), moving_list)[2], rms))
+        #Apply the first transformation
+        for atom in moving_list[0]:
+            atom.transform(rot[0].astype("f"), tran[0].astype("f"))
+        self.assertTrue(numpy.allclose(moving_list[0][10].get_coord(),
+                                       fixed[10].get_coord(), atol=1e-3))
+        self.assertRaises(PDBException, superimpose_ensemble, fixed,
+                          [fixed[:-1]])
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
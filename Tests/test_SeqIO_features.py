@@ -18,6 +18,7 @@ from Bio.Data.CodonTable import TranslationError
 from Bio.Seq import Seq, UnknownSeq, MutableSeq, reverse_complement
 from Bio.SeqRecord import SeqRecord
 from Bio.SeqFeature import SeqFeature, FeatureLocation, CompoundLocation
+from Bio.SeqFeature import extract_features
 from Bio.SeqFeature import ExactPosition, BeforePosition, AfterPosition, \
                            OneOfPosition,  WithinPosition
 from StringIO import StringIO
@@ -240,6 +241,13 @@ class SeqFeatureExtractionWritingReading(unittest.TestCase):
         self.assertTrue(isinstance(new, UnknownSeq))
         self.assertEqual(len(new), len(answer_str))
 
+        for parent in [parent_seq, str(parent_seq), parent_seq.tomutable(),
+                       UnknownSeq(len(parent_seq), parent_seq.alphabet)]:
+            new = extract_features(SeqRecord(parent), [feature])[0]
+            old = feature.extract(parent)
+            self.assertEqual(type(new), type(old))
+            self.assertEqual(str(new), str(old))
+
         if _insdc_feature_location_string(feature, 1326) != location_str:
             #This is to avoid issues with the N^1 between feature which only
             #makes sense at the end of the sequence
@@ -470,6 +478,37 @@ class SeqFeatureCreation(unittest.TestCase):
                 qualifiers={"test": ["a test"]})
         self.assertEqual(f.qualifiers["test"], ["a test"])
 
+    def test_slots(self):
+        """Feature locations and positions have no per-instance dictionary.
+        """
+        f = SeqFeature(FeatureLocation(10, 20, strand=+1) +
+                       FeatureLocation(BeforePosition(30), 40, strand=+1),
+                       type="CDS")
+        for obj in [f.location, f.location.parts[0],
+                    f.location.parts[0].start, f.location.parts[1].start]:
+            self.assertFalse(hasattr(obj, "__dict__"), obj)
+        self.assertRaises(AttributeError, setattr, f.location, "color", "red")
+        #Extra attributes on the feature itself are still allowed
+        f.color = "red"
+        self.assertEqual(f.color, "red")
+
+    def test_pickle(self):
+        """Pickle and copy SeqFeatures with all the pickle protocols.
+        """
+        import copy
+        import pickle
+        f = SeqFeature(FeatureLocation(10, 20, strand=-1, ref="X12345") +
+                       FeatureLocation(BeforePosition(30), 40, strand=-1),
+                       type="CDS", id="test", qualifiers={"gene": ["abc"]})
+        copies = [pickle.loads(pickle.dumps(f, protocol))
+                  for protocol in range(pickle.HIGHEST_PROTOCOL + 1)]
+        copies.append(copy.deepcopy(f))
+        for new in copies:
+            self.assertEqual(repr(new), repr(f))
+            self.assertEqual(new.qualifiers, f.qualifiers)
+            self.assertEqual(new.strand, -1)
+            self.assertEqual(new.location.operator, "join")
+
 
 class FeatureWriting(unittest.TestCase):
     def setUp(self):
@@ -1032,6 +1071,29 @@ class NC_000932(unittest.TestCase):
             else:
                 self.assertEqual(str(pro), str(r.seq))
 
+    def test_extract_features(self):
+        #"""Checking bulk CDS extraction and translation."""
+        gb_record = SeqIO.read(self.gb_filename, "genbank")
+        cds_features = [f for f in gb_record.features if f.type=="CDS"]
+        nucs = extract_features(gb_record, cds_features)
+        pros = extract_features(gb_record, cds_features, translate=True,
+                                table=self.table)
+        self.assertEqual(len(nucs), len(cds_features))
+        self.assertEqual(len(pros), len(cds_features))
+        for f, nuc, pro in zip(cds_features, nucs, pros):
+            old = f.extract(gb_record.seq)
+            self.assertEqual(str(nuc), str(old))
+            self.assertEqual(nuc.alphabet, old.alphabet)
+            self.assertEqual(str(pro), str(old.translate(self.table)))
+        #An unknown sequence gives unknown proteins
+        unknown = SeqRecord(UnknownSeq(len(gb_record), gb_record.seq.alphabet))
+        pros = extract_features(unknown, cds_features, translate=True,
+                                table=self.table)
+        for f, pro in zip(cds_features, pros):
+            self.assertTrue(isinstance(pro, UnknownSeq))
+            self.assertEqual(len(pro), len(f) // 3)
+            self.assertEqual(str(pro), "X" * (len(f) // 3))
+
 
 class NC_005816(NC_000932):
     basename = "NC_005816"
@@ -0,0 +1,118 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the Bio.SeqUtils.KmerCounter module."""
+
+import random
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SeqUtils.KmerCounter.")
+
+from Bio import SeqIO
+from Bio.Seq import Seq, reverse_complement
+from Bio.Alphabet import generic_dna
+from Bio.SeqUtils.KmerCounter import KmerCounter, count_kmers
+
+
+def simple_count(sequences, k, canonical=False):
+    """Dictionary based k-mer counting, for comparison."""
+    answer = {}
+    for seq in sequences:
+        seq = str(seq).upper()
+        for i in range(len(seq) - k + 1):
+            kmer = seq[i:i + k]
+            if [letter for letter in kmer if letter not in "ACGT"]:
+                continue
+            if canonical:
+                kmer = min(kmer, reverse_complement(kmer))
+            answer[kmer] = answer.get(kmer, 0) + 1
+    return answer
+
+
+class KmerCounterTests(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(4321)
+        self.sequences = []
+        for i in range(50):
+            length = random.randint(0, 500)
+            self.sequences.append("".join(random.choice("ACGTacgtN")
+                                          for j in range(length)))
+
+    def test_counts(self):
+        """Compare k-mer counts with simple dictionary counting."""
+        for k in [1, 2, 7, 31]:
+            for canonical in [False, True]:
+                expected = simple_count(self.sequences, k, canonical)
+                counter = KmerCounter(k, canonical)
+                counter.update(self.sequences)
+                self.assertEqual(dict(counter.items()), expected)
+                self.assertEqual(len(counter), len(expected))
+                self.assertEqual(counter.total, sum(expected.values()))
+                for kmer, count in expected.items():
+                    self.assertEqual(counter[kmer], count)
+                    self.assertEqual(counter[kmer.lower()], count)
+                    if canonical:
+                        self.assertEqual(counter[reverse_complement(kmer)],
+                                         count)
+
+    def test_buffer(self):
+        """Counting with a small buffer."""
+        counter = KmerCounter(3)
+        counter._buffer_size = 10
+        counter.update(Seq(s, generic_dna) for s in self.sequences)
+        self.assertEqual(dict(counter.items()),
+                         simple_count(self.sequences, 3))
+
+    def test_merge(self):
+        """Merging counts from two counters."""
+        a = KmerCounter(5, canonical=True)
+        a.update(self.sequences[:20])
+        b = KmerCounter(5, canonical=True)
+        b.update(self.sequences[20:])
+        a.merge(b)
+        self.assertEqual(dict(a.items()),
+                         simple_count(self.sequences, 5, canonical=True))
+        self.assertRaises(ValueError, a.merge, KmerCounter(5))
+        self.assertRaises(ValueError, a.merge, KmerCounter(4, True))
+
+    def test_processes(self):
+        """Counting using several processes."""
+        expected = simple_count(self.sequences, 4)
+        counter = count_kmers(self.sequences, 4, processes=2, chunk_size=7)
+        self.assertEqual(dict(counter.items()), expected)
+
+    def test_spectrum(self):
+        """k-mer spectrum."""
+        counter = KmerCounter(4)
+        counter.update(self.sequences)
+        spectrum = counter.spectrum()
+        expected = simple_count(self.sequences, 4).values()
+        self.assertEqual(spectrum[0], 0)
+        self.assertEqual(spectrum.sum(), len(expected))
+        for i in range(1, len(spectrum)):
+            self.assertEqual(spectrum[i], expected.count(i))
+
+    def test_records(self):
+        """Counting k-mers in SeqRecord objects."""
+        records = list(SeqIO.parse("GenBank/NC_005816.ffn", "fasta"))
+        counter = count_kmers(SeqIO.parse("GenBank/NC_005816.ffn", "fasta"), 6)
+        self.assertEqual(dict(counter.items()),
+                         simple_count([r.seq for r in records], 6))
+
+    def test_bad_k(self):
+        """Invalid k-mer lengths."""
+        self.assertRaises(ValueError, KmerCounter, 0)
+        self.assertRaises(ValueError, KmerCounter, 32)
+        self.assertRaises(ValueError, KmerCounter(3).__getitem__, "ACGT")
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -0,0 +1,113 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the Bio.SeqUtils.SlidingWindow module."""
+
+import random
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SeqUtils.SlidingWindow.")
+
+from Bio.Seq import Seq
+from Bio.Alphabet import generic_dna
+from Bio.SeqUtils import GC, GC_skew
+from Bio.SeqUtils.lcc import lcc_simp, lcc_mult
+from Bio.SeqUtils.SlidingWindow import window_counts, gc_content, gc_skew
+from Bio.SeqUtils.SlidingWindow import lcc, kmer_composition, kmer_labels
+
+
+def random_dna(length, letters="ACGT"):
+    return "".join(random.choice(letters) for i in range(length))
+
+
+class SlidingWindowTests(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(1234)
+        self.seq = random_dna(1000) + "NNNNN" + random_dna(500, "acgtS")
+
+    def windows(self, window, step, partial=False):
+        if partial:
+            last = len(self.seq)
+        else:
+            last = len(self.seq) - window + 1
+        return [self.seq[i:i + window] for i in range(0, last, step)]
+
+    def test_window_counts(self):
+        """Letter counts in sliding windows."""
+        for window, step, partial in [(1, 1, False), (50, 7, False),
+                                      (50, 7, True), (100, 100, True)]:
+            counts = window_counts(Seq(self.seq, generic_dna), window, step,
+                                   ["A", "C", "G", "T", "N", "GCS"], partial)
+            windows = self.windows(window, step, partial)
+            self.assertEqual(len(counts), len(windows))
+            for w, row in zip(windows, counts.tolist()):
+                w = w.upper()
+                self.assertEqual(row, [w.count("A"), w.count("C"),
+                                       w.count("G"), w.count("T"),
+                                       w.count("N"),
+                                       w.count("G") + w.count("C") +
+                                       w.count("S")])
+
+    def test_short(self):
+        """Sequences shorter than the window."""
+        self.assertEqual(window_counts("ACGT", 10).shape, (0, 4))
+        self.assertEqual(window_counts("ACGT", 10, 10, partial=True).tolist(),
+                         [[1, 1, 1, 1]])
+        self.assertEqual(kmer_composition("ACGT", 3, 10).shape, (0, 64))
+        self.assertRaises(ValueError, window_counts, "ACGT", 0)
+        self.assertRaises(ValueError, window_counts, "ACGT", 2, 0)
+
+    def test_gc_content(self):
+        """GC content matches the GC function."""
+        values = gc_content(self.seq, 100, 33, partial=True)
+        expected = [GC(w) for w in self.windows(100, 33, partial=True)]
+        self.assertEqual(len(values), len(expected))
+        for a, b in zip(values, expected):
+            self.assertAlmostEqual(a, b)
+
+    def test_gc_skew(self):
+        """GC skew matches the GC_skew function."""
+        values = gc_skew(self.seq, 100)
+        expected = GC_skew(self.seq, 100)
+        self.assertEqual(len(values), len(expected))
+        for a, b in zip(values, expected):
+            self.assertAlmostEqual(a, b)
+        #Windows without G or C
+        self.assertTrue(numpy.isnan(gc_skew("AAAATTTT", 4)).all())
+        self.assertRaises(ZeroDivisionError, GC_skew, "AAAATTTT", 4)
+
+    def test_lcc(self):
+        """LCC matches the lcc_simp and lcc_mult functions."""
+        seq = self.seq[:1000]
+        values = lcc(seq, 20, 1)
+        self.assertEqual([0] + values.tolist(), lcc_mult(seq, 20))
+        for a, w in zip(values[::50], self.windows(20, 50)):
+            self.assertAlmostEqual(a, lcc_simp(w))
+
+    def test_kmer_composition(self):
+        """k-mer counts in sliding windows."""
+        labels = kmer_labels(2)
+        self.assertEqual(len(labels), 16)
+        self.assertEqual(labels, sorted(labels))
+        counts = kmer_composition(self.seq, 2, 60, 45, partial=True)
+        windows = self.windows(60, 45, partial=True)
+        self.assertEqual(counts.shape, (len(windows), 16))
+        for w, row in zip(windows, counts.tolist()):
+            w = w.upper()
+            expected = [0] * 16
+            for i in range(len(w) - 1):
+                if w[i:i + 2] in labels:
+                    expected[labels.index(w[i:i + 2])] += 1
+            self.assertEqual(row, expected)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
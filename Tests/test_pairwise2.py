@@ -4,9 +4,11 @@
 # license.  Please see the LICENSE file that should have been included
 # as part of this package.
 
+import random
 import unittest
 
 from Bio import pairwise2
+from Bio.SubsMat import CompiledMatrix
 
 
 class TestPairwiseGlobal(unittest.TestCase):
@@ -330,6 +332,54 @@ ATAT
 """)
 
 
+class TestPairwiseCompiledMatrix(unittest.TestCase):
+    """Compare a CompiledMatrix with the equivalent dictionary."""
+
+    def setUp(self):
+        random.seed(4321)
+        self.match_dict = {}
+        for a in "ACGT":
+            for b in "ACGT":
+                # Not symmetric
+                self.match_dict[(a, b)] = random.randint(-4, 5)
+        self.matrix = CompiledMatrix(self.match_dict)
+
+    def test_lookup(self):
+        self.assertEqual(self.matrix.alphabet, "ACGT")
+        for a, b in self.match_dict:
+            self.assertEqual(self.matrix(a, b), self.match_dict[(a, b)])
+            self.assertEqual(self.matrix[a, b], self.match_dict[(a, b)])
+            self.assertEqual(self.matrix.transpose()(b, a),
+                             self.match_dict[(a, b)])
+        self.assertTrue(("A", "C") in self.matrix)
+        self.assertFalse(("A", "N") in self.matrix)
+        self.assertEqual(sorted(self.matrix), sorted(self.match_dict))
+        self.assertRaises(ValueError, CompiledMatrix, {("A", "C"): 1})
+
+    def test_alignments(self):
+        for i in range(20):
+            seq1 = "".join(random.choice("ACGT")
+                           for j in range(random.randint(1, 30)))
+            seq2 = "".join(random.choice("ACGT")
+                           for j in range(random.randint(1, 30)))
+            for function in [pairwise2.align.globalds,
+                             pairwise2.align.localds]:
+                for keywds in [{}, {"score_only": True},
+                               {"band_width": 2}]:
+                    self.assertEqual(
+                        function(seq1, seq2, self.matrix, -3, -1, **keywds),
+                        function(seq1, seq2, self.match_dict, -3, -1,
+                                 **keywds))
+
+    def test_missing_residue(self):
+        self.assertRaises(KeyError, pairwise2.align.globalds, "ACNGT", "ACGT",
+                          self.matrix, -3, -1)
+        self.assertRaises(KeyError, pairwise2.align.globalds, "ACGT", "ACNGT",
+                          self.matrix, -3, -1, score_only=True)
+        self.assertRaises(KeyError, pairwise2.align.localds, ["A", "X"],
+                          ["A"], self.matrix, -3, -1, gap_char=["-"])
+
+
 class TestPairwiseOneCharacter(unittest.TestCase):
 
     def test_align_one_char1(self):
@@ -429,6 +479,287 @@ AAAABBBAAAACCCCCCCCCCCCCCAAAABBBAAAA
 """)
 
 
+class TestPairwiseLinearSpace(unittest.TestCase):
+    """Compare the linear space mode with the full matrix alignments."""
+
+    def setUp(self):
+        random.seed(2013)
+        # Use the divide and conquer code even for short sequences
+        self.old_max_cells = pairwise2._LINEAR_MAX_CELLS
+        pairwise2._LINEAR_MAX_CELLS = 0
+
+    def tearDown(self):
+        pairwise2._LINEAR_MAX_CELLS = self.old_max_cells
+
+    def check(self, function, *args, **keywds):
+        for i in range(20):
+            seq1 = "".join(random.choice("ACGT")
+                           for j in range(random.randint(1, 25)))
+            seq2 = "".join(random.choice("ACGT")
+                           for j in range(random.randint(1, 40)))
+            alignments = function(seq1, seq2, *args, **keywds)
+            best = max(a[2] for a in alignments)
+            linear = function(seq1, seq2, linear_space=True, *args, **keywds)
+            self.assertEqual(len(linear), 1)
+            self.assertAlmostEqual(linear[0][2], best)
+            self.assertEqual(linear[0][0].replace("-", ""), seq1)
+            self.assertEqual(linear[0][1].replace("-", ""), seq2)
+            if len(alignments) < pairwise2.MAX_ALIGNMENTS:
+                self.assertTrue(linear[0][:2] in [a[:2] for a in alignments])
+            score = function(seq1, seq2, linear_space=True, score_only=True,
+                             *args, **keywds)
+            self.assertAlmostEqual(score, best)
+
+    def test_globalxx(self):
+        self.check(pairwise2.align.globalxx)
+
+    def test_globalms(self):
+        self.check(pairwise2.align.globalms, 2, -1, -3, -0.5)
+        self.check(pairwise2.align.globalms, 2, -1, -3, -0.5,
+                   penalize_end_gaps=False)
+        self.check(pairwise2.align.globalms, 2, -1, -3, -0.5,
+                   penalize_extend_when_opening=True)
+
+    def test_globalmd(self):
+        self.check(pairwise2.align.globalmd, 1, -1, -2, -1, -0.5, -0.1,
+                   penalize_end_gaps=(True, False))
+
+    def test_list_sequences(self):
+        alignments = pairwise2.align.globalxx(["A", "C", "G"], ["A", "G"],
+                                              gap_char=["-"],
+                                              linear_space=True)
+        self.assertEqual(alignments, [(["A", "C", "G"], ["A", "-", "G"],
+                                       2, 0, 3)])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, pairwise2.align.localxx, "ACGT", "AGT",
+                          linear_space=True)
+        gap_fn = lambda x, y: -y
+        self.assertRaises(ValueError, pairwise2.align.globalxc, "ACGT", "AGT",
+                          gap_fn, gap_fn, linear_space=True)
+
+
+class TestPairwiseScoreOnly(unittest.TestCase):
+    """Check the score only calculation matches the full alignments."""
+
+    def setUp(self):
+        random.seed(4321)
+
+    def check(self, function, *args, **keywds):
+        for i in range(20):
+            seq1 = "".join(random.choice("ACGT")
+                           for j in range(random.randint(1, 30)))
+            seq2 = "".join(random.choice("ACGT")
+                           for j in range(random.randint(1, 30)))
+            alignments = function(seq1, seq2, *args, **keywds)
+            score = function(seq1, seq2, score_only=True, *args, **keywds)
+            self.assertAlmostEqual(score, max(a[2] for a in alignments))
+
+    def test_globalms(self):
+        self.check(pairwise2.align.globalms, 2, -1, -3, -0.5)
+        self.check(pairwise2.align.globalms, 2, -1, -3, -0.5,
+                   penalize_end_gaps=(True, False),
+                   penalize_extend_when_opening=True)
+
+    def test_localms(self):
+        self.check(pairwise2.align.localms, 2, -1, -3, -0.5)
+
+    def test_globaldd(self):
+        """Score only with an asymmetric score dictionary."""
+        scores = {}
+        for x in "ACGT":
+            for y in "ACGT":
+                scores[(x, y)] = random.randint(-3, 3)
+        self.check(pairwise2.align.globaldd, scores, -2, -1, -1.5, -0.25)
+        self.check(pairwise2.align.localdd, scores, -2, -1, -1.5, -0.25)
+
+    def test_lists(self):
+        score = pairwise2.align.globalxx(["A", "C", "G"], ["A", "G", "G", "C"],
+                                         score_only=True)
+        self.assertEqual(score, 2)
+
+
+class TestPairwiseBatch(unittest.TestCase):
+    """Aligning lists of sequences."""
+
+    def setUp(self):
+        random.seed(99)
+        self.seqs = ["".join(random.choice("ACGT")
+                             for j in range(random.randint(1, 20)))
+                     for i in range(7)]
+
+    def test_batch_scores(self):
+        for processes in [1, 2]:
+            scores = pairwise2.batch_scores(self.seqs, self.seqs[:3],
+                                            pairwise2.align.localms,
+                                            2, -1, -3, -0.5,
+                                            processes=processes,
+                                            chunk_size=4)
+            self.assertEqual(len(scores), len(self.seqs))
+            for seq1, row in zip(self.seqs, scores):
+                self.assertEqual(len(row), 3)
+                for seq2, score in zip(self.seqs, row):
+                    self.assertAlmostEqual(score, pairwise2.align.localms(
+                        seq1, seq2, 2, -1, -3, -0.5, score_only=True))
+
+    def test_all_vs_all(self):
+        scores = pairwise2.batch_scores(self.seqs + [""], None, "globalxx",
+                                        processes=2, chunk_size=3)
+        for i, seq1 in enumerate(self.seqs):
+            for j, seq2 in enumerate(self.seqs):
+                self.assertEqual(scores[i][j],
+                                 pairwise2.align.globalxx(seq1, seq2,
+                                                          score_only=True))
+        self.assertEqual(scores[-1], [None] * (len(self.seqs) + 1))
+
+    def test_batch_alignments(self):
+        results = list(pairwise2.batch_alignments(
+            self.seqs, None, pairwise2.align.globalms, 2, -1, -3, -0.5,
+            processes=2, chunk_size=5))
+        n = len(self.seqs)
+        self.assertEqual(len(results), n * (n + 1) // 2)
+        for i, j, alignments in results:
+            self.assertTrue(i <= j)
+            self.assertEqual(alignments, pairwise2.align.globalms(
+                self.seqs[i], self.seqs[j], 2, -1, -3, -0.5))
+
+
+class TestPairwiseBanded(unittest.TestCase):
+    """Compare banded alignments with the full matrix alignments."""
+
+    def setUp(self):
+        random.seed(1234)
+
+    def similar_pair(self):
+        seq1 = "".join(random.choice("ACGT")
+                       for i in range(random.randint(1, 60)))
+        seq2 = []
+        for letter in seq1:
+            r = random.random()
+            if r < 0.05:
+                # deletion
+                continue
+            elif r < 0.1:
+                seq2.append(random.choice("ACGT"))
+            elif r < 0.15:
+                seq2.append(letter + random.choice("ACGT"))
+            else:
+                seq2.append(letter)
+        return seq1, "".join(seq2) or "A"
+
+    def check(self, function, *args, **keywds):
+        for i in range(20):
+            seq1, seq2 = self.similar_pair()
+            alignments = function(seq1, seq2, *args, **keywds)
+            # A band covering the whole matrix gives the same alignments
+            wide = function(seq1, seq2, band_width=100, *args, **keywds)
+            self.assertEqual(sorted(wide), sorted(alignments))
+            best = max(a[2] for a in alignments)
+            for band_width in [0, 3]:
+                banded = function(seq1, seq2, band_width=band_width,
+                                  *args, **keywds)
+                self.assertAlmostEqual(max(a[2] for a in banded), best)
+                score = function(seq1, seq2, band_width=band_width,
+                                 score_only=True, *args, **keywds)
+                self.assertAlmostEqual(score, best)
+
+    def test_globalms(self):
+        self.check(pairwise2.align.globalms, 2, -1, -3, -0.5)
+        self.check(pairwise2.align.globalms, 2, -1, -3, -0.5,
+                   penalize_end_gaps=False)
+
+    def test_globalxx(self):
+        self.check(pairwise2.align.globalxx, one_alignment_only=True)
+
+    def test_cheap_gaps(self):
+        # The first traceback of the best alignment in a narrow band stays
+        # inside it, but an equally good one touches the edge of the band
+        # (and a wider band gives a better alignment).
+        seq1, seq2 = "CATTCGGCCGTCTGATCAC", "CATTCGGCCGTCTGATTTC"
+        for band_width in [0, 1]:
+            score = pairwise2.align.globalms(seq1, seq2, 2, -1, -0.5, -0.1,
+                                             band_width=band_width,
+                                             score_only=True)
+            self.assertAlmostEqual(score, 32.8)
+
+    def test_localms(self):
+        self.check(pairwise2.align.localms, 2, -1, -3, -0.5)
+
+    def test_invalid(self):
+        gap_fn = lambda x, y: -y
+        self.assertRaises(ValueError, pairwise2.align.globalxc, "ACGT", "AGT",
+                          gap_fn, gap_fn, band_width=2)
+        self.assertRaises(ValueError, pairwise2.align.globalxx, "ACGT", "AGT",
+                          band_width=-1)
+
+
+class TestPairwiseLazy(unittest.TestCase):
+    """Compare lazy alignments with the usual list of alignments."""
+
+    def setUp(self):
+        random.seed(2013)
+
+    def check(self, function, *args, **keywds):
+        for i in range(30):
+            seq1 = "".join(random.choice("AC")
+                           for j in range(random.randint(1, 10)))
+            seq2 = "".join(random.choice("AC")
+                           for j in range(random.randint(1, 10)))
+            expected = function(seq1, seq2, *args, **keywds)
+            alignments = function(seq1, seq2, lazy=True, *args, **keywds)
+            self.assertEqual(list(alignments), expected)
+            # Iterating again gives the same alignments
+            self.assertEqual(list(alignments), expected)
+            self.assertEqual(alignments.count(), len(expected))
+
+    def test_globalxx(self):
+        self.check(pairwise2.align.globalxx)
+        self.check(pairwise2.align.globalxx, one_alignment_only=True)
+
+    def test_globalms(self):
+        self.check(pairwise2.align.globalms, 2, -1, -0.5, -0.1)
+        self.check(pairwise2.align.globalms, 2, -1, -0.5, -0.1,
+                   force_generic=True)
+        self.check(pairwise2.align.globalms, 2, -1, -0.5, -0.1,
+                   band_width=1)
+
+    def test_localms(self):
+        self.check(pairwise2.align.localms, 2, -1, -1, -0.5)
+        self.check(pairwise2.align.localms, 2, -1, -1, -0.5,
+                   one_alignment_only=True)
+        # No alignment with a positive score
+        alignments = pairwise2.align.localxx("AAAA", "CC", lazy=True)
+        self.assertEqual(list(alignments), [])
+        self.assertEqual(alignments.count(), 0)
+
+    def test_many(self):
+        alignments = pairwise2.align.globalxx("A" * 40, "A" * 30, lazy=True)
+        # 40 choose 30
+        self.assertEqual(alignments.count(), 847660528)
+        first = []
+        for align in alignments:
+            first.append(align)
+            if len(first) == 5:
+                break
+        self.assertEqual(first,
+                         pairwise2.align.globalxx("A" * 40, "A" * 30)[:5])
+
+    def test_lists(self):
+        # Alignments of lists can't be hashed
+        seq1, seq2 = ["A", "C", "A", "C"], ["A", "C", "C"]
+        expected = pairwise2.align.globalxx(seq1, seq2, gap_char=["-"])
+        alignments = pairwise2.align.globalxx(seq1, seq2, gap_char=["-"],
+                                              lazy=True)
+        self.assertEqual(list(alignments), expected)
+
+    def test_invalid(self):
+        alignments = pairwise2.align.globalxx("", "ACGT", lazy=True)
+        self.assertEqual(list(alignments), [])
+        self.assertEqual(alignments.count(), 0)
+        self.assertRaises(ValueError, pairwise2.align.globalxx, "ACGT", "AGT",
+                          linear_space=True, lazy=True)
+
+
 if __name__ == '__main__':
     runner = unittest.TextTestRunner(verbosity = 2)
     unittest.main(testRunner=runner)